@@ -0,0 +1,230 @@
+# coding: utf-8
+# 순위 변동 분석: (카테고리, 날짜, 키워드)별 전일 대비 순위 변화를 미리 계산해 두는 테이블 (keyword_rank_deltas)
+#
+# save_to_db 로 하루치가 저장될 때마다 그 날짜만 계산합니다 (update_rank_deltas).
+# - rank_delta: 이전 수집일 순위 - 오늘 순위 (양수면 상승, 신규 진입/이탈은 NULL)
+# - is_new: 이전 수집일에는 TOP 500에 없던 키워드 (카테고리의 첫 수집일은 제외)
+# - is_dropout: 이전 수집일에는 있었지만 오늘 빠진 키워드 (keyword_rank 는 NULL)
+# - streak: 연속으로 TOP 500에 든 수집일 수 (이탈 행은 0)
+# "전일"은 해당 카테고리에서 데이터가 있는 바로 이전 날짜이며, 그 날짜는 prev_date 에 기록됩니다.
+#
+# 전체 재계산: python analytics.py --rebuild [--category 50000169] [--start-date ...] [--end-date ...]
+
+import sys
+import logging
+import argparse
+import datetime
+
+import psycopg2
+import db
+
+DELTAS_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS keyword_rank_deltas (
+        category_id VARCHAR(20) NOT NULL,
+        scrape_date DATE NOT NULL,
+        keyword TEXT NOT NULL,
+        keyword_rank INTEGER,
+        prev_date DATE,
+        prev_rank INTEGER,
+        rank_delta INTEGER,
+        is_new BOOLEAN NOT NULL DEFAULT FALSE,
+        is_dropout BOOLEAN NOT NULL DEFAULT FALSE,
+        streak INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (category_id, scrape_date, keyword)
+    );
+    -- 상승/하락 상위 N개를 인덱스 한 번 읽기로 조회 (정방향=하락, 역방향=상승)
+    CREATE INDEX IF NOT EXISTS idx_rank_deltas_movers
+        ON keyword_rank_deltas (category_id, scrape_date, rank_delta) WHERE rank_delta IS NOT NULL;
+"""
+
+# 한 날짜의 변동 계산: 오늘/이전 수집일 목록을 FULL OUTER JOIN 하고 이전 수집일의 streak 를 이어 받음
+# (같은 날짜에 같은 키워드가 두 번 있으면 높은 순위 하나만 사용)
+_COMPUTE_SQL = """
+    INSERT INTO keyword_rank_deltas
+        (category_id, scrape_date, keyword, keyword_rank, prev_date, prev_rank, rank_delta, is_new, is_dropout, streak)
+    SELECT %(category_id)s, %(scrape_date)s, COALESCE(c.keyword, p.keyword), c.keyword_rank,
+           %(prev_date)s, p.keyword_rank, p.keyword_rank - c.keyword_rank,
+           %(prev_date)s::date IS NOT NULL AND c.keyword IS NOT NULL AND p.keyword IS NULL,
+           c.keyword IS NULL,
+           CASE WHEN c.keyword IS NULL THEN 0 ELSE COALESCE(ps.streak, 0) + 1 END
+    FROM (
+        SELECT DISTINCT ON (keyword) keyword, keyword_rank FROM daily_keywords
+        WHERE category_id = %(category_id)s AND scrape_date = %(scrape_date)s
+        ORDER BY keyword, keyword_rank
+    ) c
+    FULL OUTER JOIN (
+        SELECT DISTINCT ON (keyword) keyword, keyword_rank FROM daily_keywords
+        WHERE category_id = %(category_id)s AND scrape_date = %(prev_date)s
+        ORDER BY keyword, keyword_rank
+    ) p ON p.keyword = c.keyword
+    LEFT JOIN keyword_rank_deltas ps
+        ON ps.category_id = %(category_id)s AND ps.scrape_date = %(prev_date)s
+       AND ps.keyword = p.keyword AND ps.keyword_rank IS NOT NULL;
+"""
+
+# 날짜 하나의 계산 결과 요약 (다음 날짜 재계산이 필요한지 판단용)
+_FINGERPRINT_SQL = """
+    SELECT md5(COALESCE(string_agg(keyword || ':' || streak || ':' || COALESCE(prev_rank, 0), ',' ORDER BY keyword), ''))
+    FROM keyword_rank_deltas WHERE category_id = %s AND scrape_date = %s;
+"""
+
+
+def ensure_deltas_table(conn=None):
+    """순위 변동 테이블/인덱스 생성 (없을 때만)"""
+    if conn is None:
+        with db.get_connection() as conn:
+            return ensure_deltas_table(conn)
+    with conn.cursor() as cur:
+        cur.execute(DELTAS_TABLE_DDL)
+    conn.commit()
+
+
+def _adjacent_date(cur, category_id, scrape_date, later):
+    if later:
+        cur.execute("SELECT MIN(scrape_date) FROM daily_keywords WHERE category_id = %s AND scrape_date > %s;",
+                    (category_id, scrape_date))
+    else:
+        cur.execute("SELECT MAX(scrape_date) FROM daily_keywords WHERE category_id = %s AND scrape_date < %s;",
+                    (category_id, scrape_date))
+    return cur.fetchone()[0]
+
+
+def _has_deltas(cur, category_id, scrape_date):
+    cur.execute("SELECT 1 FROM keyword_rank_deltas WHERE category_id = %s AND scrape_date = %s LIMIT 1;",
+                (category_id, scrape_date))
+    return cur.fetchone() is not None
+
+
+def _compute_date(cur, category_id, scrape_date):
+    """scrape_date 하루를 다시 계산. 결과가 이전 계산과 달라졌으면 True"""
+    cur.execute(_FINGERPRINT_SQL, (category_id, scrape_date))
+    before = cur.fetchone()[0]
+    cur.execute("DELETE FROM keyword_rank_deltas WHERE category_id = %s AND scrape_date = %s;", (category_id, scrape_date))
+    prev_date = _adjacent_date(cur, category_id, scrape_date, later=False)
+    cur.execute(_COMPUTE_SQL, {"category_id": category_id, "scrape_date": scrape_date, "prev_date": prev_date})
+    cur.execute(_FINGERPRINT_SQL, (category_id, scrape_date))
+    return cur.fetchone()[0] != before
+
+
+def update_rank_deltas(conn, category_id, scrape_date):
+    """저장된 (카테고리, 날짜)의 순위 변동 계산 (커밋 포함)
+
+    streak 를 이어 받기 위해 이전 수집일이 아직 계산되지 않았으면 거슬러 올라가 먼저 계산하고,
+    과거 날짜를 나중에 채운 경우(백필)에는 이미 계산된 다음 날짜들을 결과가 바뀌지 않을 때까지 다시 계산합니다.
+    반환값: 계산한 날짜 수
+    """
+    if isinstance(scrape_date, str):
+        scrape_date = datetime.datetime.strptime(scrape_date, "%Y-%m-%d").date()
+    computed = 0
+    with conn.cursor() as cur:
+        # 병렬 워커가 같은 카테고리의 인접 날짜를 동시에 계산하지 않도록 카테고리 단위로 직렬화 (커밋 시 해제)
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (f"keyword_rank_deltas:{category_id}",))
+        pending = [scrape_date]
+        prev_date = _adjacent_date(cur, category_id, scrape_date, later=False)
+        while prev_date is not None and not _has_deltas(cur, category_id, prev_date):
+            pending.append(prev_date)
+            prev_date = _adjacent_date(cur, category_id, prev_date, later=False)
+        for target_date in reversed(pending):
+            _compute_date(cur, category_id, target_date)
+            computed += 1
+
+        target_date = scrape_date
+        while True:
+            target_date = _adjacent_date(cur, category_id, target_date, later=True)
+            if target_date is None or not _has_deltas(cur, category_id, target_date):
+                break
+            computed += 1
+            if not _compute_date(cur, category_id, target_date):
+                break
+    conn.commit()
+    return computed
+
+
+def update_after_save(scrape_date_str, category_id):
+    """save_to_db 직후 호출: 실패해도 수집은 계속되도록 경고만 남김"""
+    logger = logging.getLogger()
+    try:
+        with db.get_connection() as conn:
+            computed = update_rank_deltas(conn, category_id, scrape_date_str)
+        logger.info(f"순위 변동 계산 완료 ({scrape_date_str}, category_id: {category_id}, {computed}일)")
+        return True
+    except psycopg2.Error as e:
+        logger.warning(f"경고: 순위 변동 계산 실패 ({scrape_date_str}, category_id: {category_id}): {e}")
+        return False
+
+
+def fetch_movers(conn, category_id, scrape_date, direction="risers", limit=20):
+    """상승(risers)/하락(fallers) 상위 limit 개 [{keyword, rank, prev_rank, delta, streak}, ...]"""
+    order = "DESC" if direction == "risers" else "ASC"
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT keyword, keyword_rank, prev_rank, rank_delta, streak FROM keyword_rank_deltas
+            WHERE category_id = %s AND scrape_date = %s AND rank_delta IS NOT NULL
+              AND rank_delta {'>' if direction == 'risers' else '<'} 0
+            ORDER BY rank_delta {order}, keyword_rank
+            LIMIT %s;
+            """,
+            (category_id, scrape_date, limit)
+        )
+        return [
+            {"keyword": keyword, "rank": rank, "prev_rank": prev_rank, "delta": delta, "streak": streak}
+            for keyword, rank, prev_rank, delta, streak in cur.fetchall()
+        ]
+
+
+def rebuild(category_ids=None, start_date=None, end_date=None):
+    """저장된 모든 날짜(또는 기간)의 순위 변동을 날짜순으로 다시 계산"""
+    logger = logging.getLogger()
+    with db.get_connection() as conn:
+        ensure_deltas_table(conn)
+        with conn.cursor() as cur:
+            cur.execute("SELECT DISTINCT category_id FROM daily_keywords ORDER BY category_id;")
+            categories = category_ids or [row[0] for row in cur.fetchall()]
+        last_dates = {} # 카테고리 -> 기간 안의 마지막 수집일
+        for category_id in categories:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT DISTINCT scrape_date FROM daily_keywords WHERE category_id = %s "
+                    "AND (%s::date IS NULL OR scrape_date >= %s) AND (%s::date IS NULL OR scrape_date <= %s) "
+                    "ORDER BY scrape_date;",
+                    (category_id, start_date, start_date, end_date, end_date)
+                )
+                dates = [row[0] for row in cur.fetchall()]
+            if dates:
+                # 첫 날짜는 이전 수집일의 streak 를 이어 받아야 하므로 필요하면 거슬러 올라가 계산
+                update_rank_deltas(conn, category_id, dates[0])
+            with conn.cursor() as cur:
+                for scrape_date in dates[1:]:
+                    _compute_date(cur, category_id, scrape_date)
+            conn.commit()
+            if dates:
+                last_dates[category_id] = dates[-1]
+            logger.info(f"[{category_id}] {len(dates)}일 순위 변동 재계산 완료")
+        # 기간 끝 다음 날짜의 streak/이전 순위가 바뀌었을 수 있으므로 이어서 반영
+        # (end_date 가 수집일이 아니면(주말, 미래) 그 날짜를 계산하면 전날 키워드가 모두 이탈로 기록되므로 마지막 수집일부터)
+        if end_date is not None:
+            for category_id, last_date in last_dates.items():
+                update_rank_deltas(conn, category_id, last_date)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="순위 변동 테이블 (keyword_rank_deltas) 계산")
+    parser.add_argument("--rebuild", action="store_true", help="저장된 날짜 전체(또는 기간)를 다시 계산")
+    parser.add_argument("--category", action="append", help="대상 카테고리 ID (여러 번 지정 가능, 기본: 전체)")
+    parser.add_argument("--start-date", default=None, help="재계산 시작 날짜 (YYYY-MM-DD)")
+    parser.add_argument("--end-date", default=None, help="재계산 종료 날짜 (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if not args.rebuild:
+        parser.print_help()
+        sys.exit(0)
+    try:
+        start = datetime.datetime.strptime(args.start_date, "%Y-%m-%d").date() if args.start_date else None
+        end = datetime.datetime.strptime(args.end_date, "%Y-%m-%d").date() if args.end_date else None
+    except ValueError:
+        logging.error("오류: 날짜 형식이 잘못되었습니다. YYYY-MM-DD 형식으로 입력해주세요.")
+        sys.exit(1)
+    rebuild(args.category, start, end)
+    db.close_pool()
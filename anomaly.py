@@ -0,0 +1,294 @@
+# coding: utf-8
+# 급상승/급락 감지: 키워드별 log(순위)의 EWMA(지수 가중 평균/분산) 상태를 유지하고 벗어난 순위를 기록
+#
+# 전체 이력을 매일 다시 훑지 않도록 상태를 keyword_rank_ewma 에 저장해 두고, 저장된 (날짜, 카테고리)마다
+# 오늘 순위권 키워드 + 직전 수집일에 순위권이었다가 빠진 키워드(최대 500 + 500개)만 갱신합니다 (update_after_save).
+# - 관측값: log(순위), 순위권 이탈은 log(OUT_OF_RANK)
+# - z = (기대 log 순위 - 오늘 log 순위) / 표준편차 (양수 = 상승). 관측이 MIN_OBSERVATIONS 이상인 키워드만 판정
+# - |z| >= Z_THRESHOLD 이고 기대 순위와 MIN_RANK_CHANGE 칸 이상 다르면 keyword_anomalies 에 spike(급상승) / crash(급락)로 기록
+# 순위가 낮을수록(숫자가 클수록) 같은 칸 수의 변동은 덜 중요하므로 log 척도를 사용합니다.
+# 반영된 날짜보다 과거 날짜가 나중에 저장되거나(백필) 반영된 마지막 날짜를 다시 수집하면 증분 갱신 대신 재계산 대상으로
+# 표시하고, 수집 실행이 끝날 때 다시 계산합니다.
+#
+# 전체 재계산 (날짜순 한 번 훑기, 날짜마다 NumPy 로 해당 키워드만 갱신):
+#   python anomaly.py rebuild [--category 50000169]
+#   python anomaly.py show --category 50000169 [--date 2025-02-01]
+
+import sys
+import logging
+import argparse
+import datetime
+
+import numpy as np
+import psycopg2
+from psycopg2.extras import execute_values
+
+import db
+import rank_matrix
+
+ALPHA = 0.2 # EWMA 가중치 (최근 관측 비중, 유효 기간 약 2/ALPHA - 1 = 9 수집일)
+OUT_OF_RANK = 501 # 순위권 이탈을 나타내는 관측 순위
+MIN_OBSERVATIONS = 7 # 판정 전에 필요한 관측 수
+Z_THRESHOLD = 3.0
+VAR_FLOOR = 0.05 # log 순위 분산 하한 (순위가 거의 안 움직이던 키워드의 작은 변동을 이상으로 보지 않음, 표준편차 약 25%)
+MIN_RANK_CHANGE = 5 # 기대 순위와 이 칸 수 이상 달라야 판정 (log 척도에서는 1위 -> 2위도 z 약 -3.1 이므로 상위권 작은 변동 제외)
+
+KIND_SPIKE = "spike"
+KIND_CRASH = "crash"
+
+
+# --- EWMA 한 단계 (증분 갱신과 재계산이 같은 함수를 사용) ---
+def ewma_step(ewma, ewm_var, n_obs, x):
+    """관측 x 를 반영한 (z, ewma, ewm_var, n_obs) (모두 같은 길이의 배열, 첫 관측이면 z 는 NaN)"""
+    first = n_obs == 0
+    diff = x - ewma
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = np.where(first, np.nan, -diff / np.sqrt(np.maximum(ewm_var, VAR_FLOOR)))
+    increment = ALPHA * diff
+    new_ewma = np.where(first, x, ewma + increment)
+    new_var = np.where(first, 0.0, (1 - ALPHA) * (ewm_var + diff * increment))
+    return z, new_ewma, new_var, n_obs + 1
+
+
+def _flag(z, n_obs, ewma, ranks):
+    """판정 대상 마스크 (z, ewma 는 갱신 전 상태 기준, n_obs 는 갱신 전 관측 수, ranks 는 오늘 관측 순위)"""
+    with np.errstate(invalid="ignore"):
+        return (n_obs >= MIN_OBSERVATIONS) & (np.abs(z) >= Z_THRESHOLD) & (np.abs(ranks - np.exp(ewma)) >= MIN_RANK_CHANGE)
+
+
+def _observations(pairs):
+    """[(순위, 키워드), ...] -> {키워드: 순위} (같은 키워드가 여러 번이면 높은 순위)"""
+    ranks = {}
+    for rank, keyword in pairs:
+        if keyword not in ranks or rank < ranks[keyword]:
+            ranks[keyword] = rank
+    return ranks
+
+
+# --- 증분 갱신 ---
+def _lock(cur, category_id):
+    # 같은 카테고리의 날짜를 동시에 반영하지 않도록 직렬화 (커밋 시 해제)
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (f"keyword_rank_ewma:{category_id}",))
+
+
+def update_day(conn, category_id, scrape_date, pairs):
+    """(카테고리, 날짜) 하나를 상태에 반영하고 감지된 이상 개수 반환 (커밋 포함, 반영하지 않았으면 None)"""
+    if isinstance(scrape_date, str):
+        scrape_date = datetime.date.fromisoformat(scrape_date)
+    today = _observations(pairs)
+    with conn.cursor() as cur:
+        _lock(cur, category_id)
+        cur.execute("SELECT last_date FROM keyword_anomaly_progress WHERE category_id = %s;", (category_id,))
+        row = cur.fetchone()
+        last_date = row[0] if row else None
+        if last_date is not None and scrape_date <= last_date:
+            # 과거 날짜(백필) 또는 반영된 마지막 날짜의 재수집: 순위가 바뀌었을 수 있으므로 재계산 대상
+            cur.execute("UPDATE keyword_anomaly_progress SET stale = TRUE WHERE category_id = %s;", (category_id,))
+            conn.commit()
+            return None
+
+        # 오늘 순위권 키워드와 직전 수집일에 순위권이었던 키워드의 상태
+        cur.execute(
+            "SELECT keyword, ewma, ewm_var, n_obs, last_date, last_rank FROM keyword_rank_ewma "
+            "WHERE category_id = %s AND (keyword = ANY(%s) OR (last_date = %s AND last_rank IS NOT NULL));",
+            (category_id, list(today), last_date)
+        )
+        state = {keyword: values for keyword, *values in cur.fetchall()}
+        keywords = list(today) + [k for k, v in state.items() if k not in today and v[3] == last_date and v[4] is not None]
+        ranks = np.array([today.get(keyword, OUT_OF_RANK) for keyword in keywords], dtype=np.float64)
+        known = [state.get(keyword) for keyword in keywords]
+        ewma = np.array([s[0] if s else 0.0 for s in known])
+        ewm_var = np.array([s[1] if s else 0.0 for s in known])
+        n_obs = np.array([s[2] if s else 0 for s in known], dtype=np.int64)
+
+        z, new_ewma, new_var, new_n = ewma_step(ewma, ewm_var, n_obs, np.log(ranks))
+        flagged = np.flatnonzero(_flag(z, n_obs, ewma, ranks))
+
+        execute_values(
+            cur,
+            "INSERT INTO keyword_rank_ewma (category_id, keyword, ewma, ewm_var, n_obs, last_date, last_rank) VALUES %s "
+            "ON CONFLICT (category_id, keyword) DO UPDATE SET ewma = EXCLUDED.ewma, ewm_var = EXCLUDED.ewm_var, "
+            "n_obs = EXCLUDED.n_obs, last_date = EXCLUDED.last_date, last_rank = EXCLUDED.last_rank;",
+            [(category_id, keyword, float(new_ewma[i]), float(new_var[i]), int(new_n[i]), scrape_date, today.get(keyword))
+             for i, keyword in enumerate(keywords)],
+            page_size=1000
+        )
+        cur.execute("DELETE FROM keyword_anomalies WHERE category_id = %s AND scrape_date = %s;", (category_id, scrape_date))
+        if len(flagged):
+            execute_values(
+                cur,
+                "INSERT INTO keyword_anomalies (category_id, scrape_date, keyword, kind, keyword_rank, expected_rank, zscore) VALUES %s;",
+                [(category_id, scrape_date, keywords[i], KIND_SPIKE if z[i] > 0 else KIND_CRASH, today.get(keywords[i]),
+                  round(float(np.exp(ewma[i])), 1), round(float(z[i]), 2)) for i in flagged]
+            )
+        cur.execute(
+            "INSERT INTO keyword_anomaly_progress (category_id, last_date) VALUES (%s, %s) "
+            "ON CONFLICT (category_id) DO UPDATE SET last_date = EXCLUDED.last_date;",
+            (category_id, scrape_date)
+        )
+    conn.commit()
+    return len(flagged)
+
+
+def update_after_save(scrape_date_str, category_id, pairs):
+    """save_to_db 직후 호출: 실패해도 수집은 계속되도록 경고만 남김"""
+    logger = logging.getLogger()
+    try:
+        with db.get_connection() as conn:
+            flagged = update_day(conn, category_id, scrape_date_str, pairs)
+        if flagged is None:
+            logger.info(f"급등락 감지: {scrape_date_str} 는 이미 반영된 날짜 이전이거나 재수집이므로 실행 종료 후 재계산합니다 (category_id: {category_id})")
+        else:
+            logger.info(f"급등락 감지 완료 ({scrape_date_str}, category_id: {category_id}, {flagged}건)")
+        return True
+    except psycopg2.errors.UndefinedTable:
+        return False # 0005 마이그레이션 전
+    except psycopg2.Error as e:
+        logger.warning(f"경고: 급등락 감지 실패 ({scrape_date_str}, category_id: {category_id}): {e}")
+        return False
+
+
+# --- 전체 재계산 ---
+def replay(category_id, days):
+    """(날짜, [(순위, 키워드), ...]) 날짜순 목록을 처음부터 반영. (마지막 날짜, 상태 행 목록, 감지 행 목록)
+
+    상태는 키워드 ID 로 색인한 배열에 두고, 날짜마다 그날 갱신할 키워드(최대 1000개)만 NumPy 로 한 번에 계산합니다.
+    """
+    keyword_ids, vocab = {}, []
+    ewma, ewm_var = np.zeros(0), np.zeros(0)
+    n_obs, last_rank = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64) # last_rank 0: 순위권 밖
+    last_seen = [] # 키워드 ID -> 마지막 관측 날짜
+    anomalies = []
+    previous_ranked = np.zeros(0, dtype=np.int64)
+    scrape_date = None
+    for scrape_date, pairs in days:
+        today = _observations(pairs)
+        for keyword in today:
+            if keyword not in keyword_ids:
+                keyword_ids[keyword] = len(vocab)
+                vocab.append(keyword)
+                last_seen.append(None)
+        if len(vocab) > len(ewma):
+            grow = len(vocab) + rank_matrix.KEYWORD_GROWTH - len(ewma)
+            ewma, ewm_var = np.pad(ewma, (0, grow)), np.pad(ewm_var, (0, grow))
+            n_obs, last_rank = np.pad(n_obs, (0, grow)), np.pad(last_rank, (0, grow))
+        today_ids = np.fromiter((keyword_ids[keyword] for keyword in today), dtype=np.int64, count=len(today))
+        dropped = np.setdiff1d(previous_ranked, today_ids, assume_unique=True) # 직전 수집일에 있다가 빠진 키워드
+        ids = np.concatenate([today_ids, dropped])
+        ranks = np.concatenate([np.fromiter(today.values(), dtype=np.int64, count=len(today)),
+                                np.full(len(dropped), OUT_OF_RANK, dtype=np.int64)])
+
+        before, before_n = ewma[ids], n_obs[ids]
+        z, ewma[ids], ewm_var[ids], n_obs[ids] = ewma_step(before, ewm_var[ids], before_n, np.log(ranks.astype(np.float64)))
+        for i in np.flatnonzero(_flag(z, before_n, before, ranks)):
+            rank = int(ranks[i])
+            anomalies.append((category_id, scrape_date, vocab[ids[i]], KIND_SPIKE if z[i] > 0 else KIND_CRASH,
+                              None if rank == OUT_OF_RANK else rank, round(float(np.exp(before[i])), 1), round(float(z[i]), 2)))
+        last_rank[ids] = np.where(ranks == OUT_OF_RANK, 0, ranks)
+        for keyword_id in ids.tolist():
+            last_seen[keyword_id] = scrape_date
+        previous_ranked = today_ids
+    state = [(category_id, keyword, float(ewma[i]), float(ewm_var[i]), int(n_obs[i]), last_seen[i], int(last_rank[i]) or None)
+             for i, keyword in enumerate(vocab)]
+    return scrape_date, state, anomalies
+
+
+def rebuild_category(category_id):
+    """daily_keywords 전체 이력으로 카테고리의 상태와 감지 결과를 다시 만듦. 감지 수 반환"""
+    last_date, state, anomalies = replay(category_id, rank_matrix.iter_days_from_db(category_id))
+    with db.get_connection() as conn:
+        with conn.cursor() as cur:
+            _lock(cur, category_id)
+            cur.execute("DELETE FROM keyword_rank_ewma WHERE category_id = %s;", (category_id,))
+            cur.execute("DELETE FROM keyword_anomalies WHERE category_id = %s;", (category_id,))
+            cur.execute("DELETE FROM keyword_anomaly_progress WHERE category_id = %s;", (category_id,))
+            execute_values(cur, "INSERT INTO keyword_rank_ewma (category_id, keyword, ewma, ewm_var, n_obs, last_date, last_rank) "
+                                "VALUES %s;", state, page_size=5000)
+            execute_values(cur, "INSERT INTO keyword_anomalies (category_id, scrape_date, keyword, kind, keyword_rank, "
+                                "expected_rank, zscore) VALUES %s;", anomalies, page_size=5000)
+            if last_date is not None:
+                cur.execute("INSERT INTO keyword_anomaly_progress (category_id, last_date) VALUES (%s, %s);",
+                            (category_id, last_date))
+        conn.commit()
+    return len(anomalies)
+
+
+def rebuild(category_ids=None):
+    """카테고리별 전체 재계산 (기본: daily_keywords 의 모든 카테고리)"""
+    logger = logging.getLogger()
+    if not category_ids:
+        with db.get_connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT DISTINCT category_id FROM daily_keyword_summary ORDER BY category_id;")
+            category_ids = [row[0] for row in cur.fetchall()]
+    for category_id in category_ids:
+        flagged = rebuild_category(category_id)
+        logger.info(f"[{category_id}] 급등락 상태 재계산 완료 ({flagged}건 감지)")
+
+
+def rebuild_stale():
+    """과거 날짜가 나중에 저장되어 재계산이 필요한 카테고리만 다시 계산 (수집 실행 종료 시, 실패해도 경고만)"""
+    try:
+        with db.get_connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT category_id FROM keyword_anomaly_progress WHERE stale ORDER BY category_id;")
+            category_ids = [row[0] for row in cur.fetchall()]
+        if category_ids:
+            rebuild(category_ids)
+    except psycopg2.errors.UndefinedTable:
+        pass # 0005 마이그레이션 전
+    except psycopg2.Error as e:
+        logging.getLogger().warning(f"경고: 급등락 상태 재계산 실패: {e}")
+
+
+# --- 조회 ---
+def fetch_anomalies(conn, category_id, scrape_date=None, kind=None, limit=50):
+    """(날짜, [{keyword, kind, rank, expected_rank, zscore}, ...]) |z| 큰 순. 날짜를 생략하면 마지막 반영 날짜"""
+    with conn.cursor() as cur:
+        if scrape_date is None:
+            cur.execute("SELECT last_date FROM keyword_anomaly_progress WHERE category_id = %s;", (category_id,))
+            row = cur.fetchone()
+            if row is None:
+                return None, []
+            scrape_date = row[0]
+        cur.execute(
+            "SELECT keyword, kind, keyword_rank, expected_rank, zscore FROM keyword_anomalies "
+            "WHERE category_id = %s AND scrape_date = %s AND (%s::text IS NULL OR kind = %s) "
+            "ORDER BY abs(zscore) DESC, keyword LIMIT %s;",
+            (category_id, scrape_date, kind, kind, limit)
+        )
+        return scrape_date, [
+            {"keyword": keyword, "kind": kind, "rank": rank, "expected_rank": expected, "zscore": zscore}
+            for keyword, kind, rank, expected, zscore in cur.fetchall()
+        ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="키워드 급상승/급락 감지 (EWMA)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="전체 이력으로 상태와 감지 결과 재계산")
+    rebuild_parser.add_argument("--category", action="append", help="카테고리 ID (여러 번 지정 가능, 기본: 전체)")
+    show_parser = subparsers.add_parser("show", help="감지 결과 출력")
+    show_parser.add_argument("--category", required=True, help="카테고리 ID")
+    show_parser.add_argument("--date", default=None, help="날짜 (YYYY-MM-DD, 기본: 마지막 반영 날짜)")
+    show_parser.add_argument("--limit", type=int, default=30)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    try:
+        if args.command == "rebuild":
+            rebuild(args.category)
+        else:
+            target = datetime.date.fromisoformat(args.date) if args.date else None
+            with db.get_connection() as conn:
+                shown_date, rows = fetch_anomalies(conn, args.category, target, limit=args.limit)
+            print(f"[{args.category}] {shown_date or '-'} 급등락 {len(rows)}건")
+            for row in rows:
+                rank = row['rank'] if row['rank'] is not None else '이탈'
+                print(f"{row['kind']:<6} z={row['zscore']:>6}  {rank!s:>4}위 (기대 {row['expected_rank']}위)  {row['keyword']}")
+    except ValueError:
+        logging.error("오류: 날짜 형식이 잘못되었습니다. YYYY-MM-DD 형식으로 입력해주세요.")
+        sys.exit(1)
+    except psycopg2.Error as e:
+        logging.error(f"데이터베이스 오류: {e}")
+        sys.exit(1)
+    finally:
+        db.close_pool()
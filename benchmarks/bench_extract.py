@@ -0,0 +1,90 @@
+# coding: utf-8
+# 목록 추출 마이크로 벤치마크: 기존 방식(page_source 전체 + BeautifulSoup html.parser)과
+# rank_extract(목록 outerHTML + lxml, 사전 컴파일 XPath)를 저장된 HTML 픽스처로 비교합니다.
+#
+# 실행: python benchmarks/bench_extract.py [--number 200] [픽스처.html ...]
+
+import os
+import sys
+import glob
+import argparse
+import timeit
+
+from bs4 import BeautifulSoup
+from lxml import html as lxml_html
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import rank_extract  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+KEYWORD_LIST_CONTAINER_SELECTOR = "ul.rank_top1000_list"
+KEYWORD_ITEM_SELECTOR = "li a.link_text"
+RANK_NUM_SELECTOR = "span.rank_top1000_num"
+
+
+def legacy_extract(page_source):
+    """기존 scrape_page_keywords의 파싱 부분 (순위는 버리고 키워드만 반환)"""
+    keywords_on_page = []
+    soup = BeautifulSoup(page_source, 'html.parser')
+    keyword_container = soup.select_one(KEYWORD_LIST_CONTAINER_SELECTOR)
+    if keyword_container:
+        for item in keyword_container.select(KEYWORD_ITEM_SELECTOR):
+            rank_span = item.select_one(RANK_NUM_SELECTOR)
+            rank_text = rank_span.get_text(strip=True) if rank_span else ""
+            keyword_text = item.get_text(strip=True)
+            if rank_text and keyword_text.startswith(rank_text):
+                keyword = keyword_text[len(rank_text):].strip()
+            else:
+                keyword = keyword_text
+            if keyword:
+                keywords_on_page.append(keyword)
+    return keywords_on_page
+
+
+def list_outer_html(page_source):
+    """드라이버의 get_attribute('outerHTML')에 해당하는 목록 영역 HTML (측정 대상 아님)"""
+    root = lxml_html.fromstring(page_source)
+    container = root.xpath("//ul[contains(concat(' ', normalize-space(@class), ' '), ' rank_top1000_list ')]")[0]
+    return lxml_html.tostring(container, encoding="unicode")
+
+
+def bench(label, func, arg, number, repeat=5):
+    best = min(timeit.repeat(lambda: func(arg), number=number, repeat=repeat)) / number
+    print(f"{label:<44} {best * 1e6:10.1f} µs/page")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="목록 추출 마이크로 벤치마크")
+    parser.add_argument("fixtures", nargs="*", help="HTML 픽스처 (기본: benchmarks/fixtures/*.html)")
+    parser.add_argument("--number", type=int, default=200, help="반복 횟수")
+    args = parser.parse_args()
+
+    fixtures = args.fixtures or sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html")))
+    if not fixtures:
+        print("픽스처가 없습니다.")
+        sys.exit(1)
+
+    for path in fixtures:
+        with open(path, encoding="utf-8") as f:
+            page_source = f.read()
+        fragment = list_outer_html(page_source)
+
+        # 결과 동등성 확인 (키워드 순서/내용)
+        legacy = legacy_extract(page_source)
+        pairs = rank_extract.extract_rank_pairs(fragment)
+        if legacy != [keyword for _, keyword in pairs]:
+            print(f"[경고] {os.path.basename(path)}: 추출 결과가 기존 방식과 다릅니다.")
+
+        print(f"\n{os.path.basename(path)} (page_source {len(page_source.encode()):,} B, "
+              f"목록 outerHTML {len(fragment.encode()):,} B, {len(pairs)}개 항목)")
+        old = bench("기존: page_source + BeautifulSoup(html.parser)", legacy_extract, page_source, args.number)
+        new = bench("신규: 목록 outerHTML + lxml XPath", rank_extract.extract_rank_pairs, fragment, args.number)
+        print(f"{'속도 향상':<44} {old / new:10.1f} x")
+        # 25페이지 x 2카테고리 x 1,900일 기준 예상 파싱 시간
+        pages = 25 * 2 * 1900
+        print(f"{'전체 백필 파싱 시간 (95,000 페이지)':<44} {old * pages / 60:7.1f} 분 → {new * pages / 60:.1f} 분")
+
+
+if __name__ == "__main__":
+    main()
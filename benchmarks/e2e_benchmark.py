@@ -0,0 +1,222 @@
+# coding: utf-8
+# 종단 간 수집 벤치마크: 로컬 데이터랩 대체 서버(standin_server.py)에 실제 스크래퍼를 실행해
+# 분당 수집 날짜 수, 단계별 소요 시간(페이지 탐색/필터, 날짜 선택, 조회/페이지 수집, 저장), DB 저장 처리량을 측정합니다.
+#
+# - 대체 서버는 이 프로세스의 스레드에서 실행하고, 스크래퍼는 임시 작업 디렉토리에서 하위 프로세스로 실행합니다
+#   (DATALAB_BASE_URL 을 대체 서버로 지정, 로그/상태 파일/백업은 임시 디렉토리에 남음).
+# - 사이트 보호용 대기(날짜 사이 10초, 카테고리 사이 5초)는 높은 --rate-limit 로 건너뜁니다.
+# - 단계별 시간은 스크래퍼 로그의 "단계별 소요 시간" 줄을 합산합니다 (카테고리 동시 세션이 여러 개면 세션 합계).
+# - 결과는 --output(기본 benchmarks/results/e2e_results.jsonl)에 한 줄(JSON)씩 추가하고,
+#   같은 설정의 직전 결과보다 분당 날짜 수가 --regression-threshold 이상 떨어지면 회귀로 표시합니다.
+#
+# 실행 (운영 DB가 아닌 로컬 DB를 DB_NAME 등으로 지정, 스키마는 migrate.py up 으로 준비):
+#   DB_NAME=bench python migrate.py up
+#   DB_NAME=bench python benchmarks/e2e_benchmark.py --engine http --days 5 --latency-ms 100 --label after
+#   DB_NAME=bench python benchmarks/e2e_benchmark.py --engine selenium --days 2 --latency-ms 100  # Chrome 필요
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import datetime
+import tempfile
+import subprocess
+from collections import defaultdict
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+import db  # noqa: E402
+import categories as category_registry  # noqa: E402
+from scrape_keywords import PhaseTimer, LOG_FILE  # noqa: E402
+from standin_server import start_server  # noqa: E402 (같은 benchmarks/ 디렉토리)
+
+DEFAULT_OUTPUT = os.path.join(REPO_DIR, "benchmarks", "results", "e2e_results.jsonl")
+DEFAULT_RATE_LIMIT = 60000 # 분당 요청 수: 사실상 제한 없음 (대기 시간만 건너뜀)
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+_PHASE_LINE = re.compile(r"단계별 소요 시간: (.*)$")
+_PHASE_PART = re.compile(r"^(.*) ([\d.]+)s$")
+_RESULT_LINE = re.compile(r"성공: (\d+), 실패: (\d+)")
+
+
+def parse_scrape_log(path):
+    """스크래퍼 로그 → ({단계 이름: 합계 초}, 성공 날짜 수, 실패 날짜 수)"""
+    names = {label: name for name, label in PhaseTimer.PHASE_LABELS.items()}
+    phases = defaultdict(float)
+    succeeded = failed = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            match = _PHASE_LINE.search(line.rstrip())
+            if match:
+                for part in match.group(1).split(" | "):
+                    part_match = _PHASE_PART.match(part.strip())
+                    if part_match and part_match.group(1) in names:
+                        phases[names[part_match.group(1)]] += float(part_match.group(2))
+                continue
+            match = _RESULT_LINE.search(line)
+            if match:
+                succeeded, failed = int(match.group(1)), int(match.group(2))
+    return {name: round(phases[name], 2) for name in PhaseTimer.PHASE_LABELS}, succeeded, failed
+
+
+def count_stored_rows(start_date, end_date, category_ids):
+    with db.get_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT count(*) FROM daily_keywords WHERE scrape_date BETWEEN %s AND %s AND category_id = ANY(%s);",
+            (start_date, end_date, category_ids)
+        )
+        return cur.fetchone()[0]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_result(output, config):
+    """output 파일에서 같은 설정의 마지막 결과 (없으면 None)"""
+    if not os.path.exists(output):
+        return None
+    previous = None
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("config") == config:
+                previous = record
+    return previous
+
+
+def run_benchmark(args):
+    start_date = datetime.date.fromisoformat(args.start_date)
+    end_date = start_date + datetime.timedelta(days=args.days - 1)
+    categories = category_registry.select_categories(category_registry.load_categories(), args.category)
+    category_ids = [c["id"] for c in categories]
+
+    standin = start_server(port=args.port, latency_ms=args.latency_ms, page_latency_ms=args.page_latency_ms,
+                           jitter_ms=args.jitter_ms)
+    base_url = f"http://127.0.0.1:{standin.server_address[1]}"
+    workdir = tempfile.mkdtemp(prefix="e2e_bench_")
+    env = dict(os.environ, DATALAB_BASE_URL=base_url, PYTHONUNBUFFERED="1")
+    env.pop("TARGET_URL", None) # 화면 주소도 DATALAB_BASE_URL 기준으로
+    command = [
+        sys.executable, os.path.join(REPO_DIR, "scrape_keywords.py"),
+        "--engine", args.engine, "--start-date", start_date.isoformat(), "--end-date", end_date.isoformat(),
+        "--force", "--rate-limit", str(args.rate_limit),
+        "--workers", str(args.workers), "--category-concurrency", str(args.category_concurrency),
+    ]
+    if args.engine == "http":
+        command.append("--no-fallback") # 대체 서버 결과만 측정
+    for category_id in category_ids:
+        command += ["--category", category_id]
+
+    print(f"대체 서버 {base_url} (지연 {args.latency_ms:g}ms), 작업 디렉토리 {workdir}")
+    print(f"실행: {' '.join(command[1:])}")
+    started = time.perf_counter()
+    try:
+        with open(os.path.join(workdir, "stdout.log"), "w", encoding="utf-8") as stdout:
+            completed = subprocess.run(command, cwd=workdir, env=env, stdout=stdout, stderr=subprocess.STDOUT,
+                                       timeout=args.timeout)
+        wall_seconds = time.perf_counter() - started
+        phases, succeeded, failed = parse_scrape_log(os.path.join(workdir, LOG_FILE))
+    finally:
+        standin.shutdown()
+    rows = count_stored_rows(start_date, end_date, category_ids)
+    if completed.returncode == 0 and not args.keep_workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+    else:
+        print(f"스크래퍼 로그: {os.path.join(workdir, LOG_FILE)} (종료 코드 {completed.returncode})")
+
+    config = {
+        "engine": args.engine, "dates": args.days, "categories": category_ids, "workers": args.workers,
+        "category_concurrency": args.category_concurrency, "latency_ms": args.latency_ms,
+        "page_latency_ms": args.page_latency_ms, "jitter_ms": args.jitter_ms, "rate_limit": args.rate_limit,
+    }
+    return {
+        "label": args.label,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "config": config,
+        "exit_code": completed.returncode,
+        "dates_succeeded": succeeded,
+        "dates_failed": failed,
+        "wall_s": round(wall_seconds, 2),
+        "dates_per_min": round(args.days / wall_seconds * 60, 2),
+        "phases_s": phases,
+        "rows_stored": rows,
+        "db_rows_per_s": round(rows / phases["persistence"], 1) if phases["persistence"] else None,
+        "standin_requests": standin.stats.snapshot(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="데이터랩 대체 서버를 사용한 종단 간 수집 벤치마크")
+    parser.add_argument("--engine", choices=["selenium", "http"], default="http", help="수집 엔진 (기본 http)")
+    parser.add_argument("--start-date", default="2024-01-01", help="수집 시작 날짜 (YYYY-MM-DD)")
+    parser.add_argument("--days", type=int, default=5, help="수집할 날짜 수")
+    parser.add_argument("--category", action="append", help="대상 카테고리 ID (기본: categories.json 의 enabled 항목)")
+    parser.add_argument("--workers", type=int, default=1, help="스크래퍼 --workers")
+    parser.add_argument("--category-concurrency", type=int, default=1, help="스크래퍼 --category-concurrency")
+    parser.add_argument("--rate-limit", type=float, default=DEFAULT_RATE_LIMIT,
+                        help=f"스크래퍼 --rate-limit (기본 {DEFAULT_RATE_LIMIT}, 대기 시간 없이 측정)")
+    parser.add_argument("--latency-ms", type=float, default=100, help="대체 서버 순위 JSON 응답 지연 (밀리초)")
+    parser.add_argument("--page-latency-ms", type=float, default=300.0, help="대체 서버 화면 HTML 응답 지연 (밀리초)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="응답 지연 흔들림 ± (밀리초)")
+    parser.add_argument("--port", type=int, default=0, help="대체 서버 포트 (기본: 빈 포트)")
+    parser.add_argument("--timeout", type=float, default=3600, help="스크래퍼 실행 제한 시간 (초)")
+    parser.add_argument("--label", default="", help="결과 구분용 이름 (예: before, after)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="결과를 JSON 한 줄로 추가할 파일")
+    parser.add_argument("--regression-threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="직전 결과 대비 분당 날짜 수 하락 비율이 이 이상이면 회귀 (기본 0.10)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="회귀면 종료 코드 2")
+    parser.add_argument("--keep-workdir", action="store_true", help="스크래퍼 임시 작업 디렉토리(로그 등)를 남김")
+    args = parser.parse_args()
+
+    if "DB_NAME" not in os.environ:
+        print("오류: 스크래퍼가 데이터를 덮어쓰므로 로컬 벤치마크 DB를 DB_NAME (필요하면 DB_HOST 등) 환경 변수로 지정하세요.")
+        sys.exit(1)
+    if args.days < 1:
+        print("오류: --days 는 1 이상이어야 합니다.")
+        sys.exit(1)
+
+    record = run_benchmark(args)
+    previous = previous_result(args.output, record["config"])
+
+    print(f"\n[{args.label or '-'}] {args.engine} 엔진, {args.days}일 × 카테고리 {len(record['config']['categories'])}개 "
+          f"(성공 {record['dates_succeeded']}, 실패 {record['dates_failed']})")
+    print(f"  전체 {record['wall_s']:.1f}초, 분당 {record['dates_per_min']:.2f}일")
+    for name, label in PhaseTimer.PHASE_LABELS.items():
+        print(f"  {label:<14} {record['phases_s'][name]:>8.2f}초")
+    print(f"  저장 {record['rows_stored']:,}행, {record['db_rows_per_s'] or 0:,.0f}행/초")
+    print(f"  대체 서버 요청: {record['standin_requests']}")
+
+    regression = False
+    if previous:
+        change = record["dates_per_min"] / previous["dates_per_min"] - 1 if previous["dates_per_min"] else 0.0
+        regression = change <= -args.regression_threshold
+        record["previous"] = {"commit": previous.get("commit"), "dates_per_min": previous["dates_per_min"],
+                              "change": round(change, 4)}
+        print(f"  직전 결과({previous.get('commit') or '-'}, {previous['timestamp']}) 대비 {change:+.1%}"
+              f"{' ← 회귀' if regression else ''}")
+    record["regression"] = regression
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    db.close_pool()
+    if record["exit_code"] != 0 or record["dates_failed"]:
+        sys.exit(1)
+    if regression and args.fail_on_regression:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
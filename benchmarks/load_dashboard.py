@@ -0,0 +1,125 @@
+# coding: utf-8
+# 대시보드 부하 테스트: 여러 클라이언트가 화면의 폴링 패턴(상태/로그/날짜/키워드)을 동시에 호출할 때
+# 엔드포인트별 지연 시간(p50/p99)과 처리량을 측정합니다.
+#
+# 실행 (대시보드를 먼저 띄운 뒤):
+#   uvicorn dashboard:app --port 8000
+#   python benchmarks/load_dashboard.py --clients 50 --duration 30 --label after --output results.jsonl
+#
+# --output 에 결과를 한 줄(JSON)씩 추가하므로 변경 전/후 실행 결과를 같은 파일에 모아 비교할 수 있습니다.
+
+import sys
+import json
+import time
+import random
+import argparse
+import datetime
+import threading
+from collections import defaultdict
+
+import requests
+
+# 화면 한 번 갱신에 해당하는 요청 묶음 (script.js 폴링과 동일한 구성)
+POLL_ENDPOINTS = ["/api/status", "/api/logs?lines=100", "/api/dates"]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct))]
+
+
+def client_loop(base_url, dates, deadline, think_time, samples, errors, lock):
+    """클라이언트 하나: deadline 까지 폴링 묶음 + 임의 날짜의 키워드 조회를 반복"""
+    session = requests.Session()
+    while time.monotonic() < deadline:
+        paths = list(POLL_ENDPOINTS)
+        if dates:
+            paths.append(f"/api/keywords/{random.choice(dates)}")
+        for path in paths:
+            name = path.split("?")[0] if not path.startswith("/api/keywords/") else "/api/keywords/{date}"
+            started = time.perf_counter()
+            try:
+                response = session.get(base_url + path, timeout=30)
+                ok = response.status_code < 500
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                if ok:
+                    samples[name].append(elapsed)
+                else:
+                    errors[name] += 1
+        if think_time:
+            time.sleep(think_time)
+    session.close()
+
+
+def summarize(samples, errors, duration):
+    summary = {}
+    for name in sorted(set(samples) | set(errors)):
+        values = sorted(samples.get(name, []))
+        summary[name] = {
+            "requests": len(values),
+            "errors": errors.get(name, 0),
+            "rps": round(len(values) / duration, 1),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 1),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 1),
+            "max_ms": round(values[-1] * 1000, 1) if values else 0.0,
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대시보드 동시 접속 부하 테스트")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="대시보드 주소")
+    parser.add_argument("--clients", type=int, default=20, help="동시 클라이언트 수")
+    parser.add_argument("--duration", type=float, default=20, help="측정 시간 (초)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="폴링 묶음 사이 대기 (초)")
+    parser.add_argument("--label", default="", help="결과 구분용 이름 (예: before, after)")
+    parser.add_argument("--output", help="결과를 JSON 한 줄로 추가할 파일")
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip("/")
+    try:
+        dates = requests.get(base_url + "/api/dates", timeout=10).json().get("dates", [])
+    except (requests.RequestException, ValueError) as e:
+        print(f"대시보드에 연결할 수 없습니다: {e}")
+        sys.exit(1)
+
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(target=client_loop, args=(base_url, dates[:30], deadline, args.think_time, samples, errors, lock), daemon=True)
+        for _ in range(args.clients)
+    ]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duration = time.monotonic() - started
+
+    summary = summarize(samples, errors, duration)
+    print(f"\n[{args.label or '-'}] 클라이언트 {args.clients}개, {duration:.1f}초")
+    print(f"{'엔드포인트':<24} {'요청':>7} {'오류':>5} {'rps':>7} {'p50(ms)':>9} {'p99(ms)':>9} {'max(ms)':>9}")
+    for name, row in summary.items():
+        print(f"{name:<24} {row['requests']:>7} {row['errors']:>5} {row['rps']:>7} "
+              f"{row['p50_ms']:>9} {row['p99_ms']:>9} {row['max_ms']:>9}")
+
+    if args.output:
+        record = {
+            "label": args.label,
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "clients": args.clients,
+            "duration_s": round(duration, 1),
+            "endpoints": summary,
+        }
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
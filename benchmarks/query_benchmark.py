@@ -0,0 +1,251 @@
+# coding: utf-8
+# 대시보드 쿼리 벤치마크: 로컬 PostgreSQL 에 여러 해 분량의 합성 데이터를 넣고
+# 대시보드가 실행하는 조회(날짜 목록, 날짜별 키워드, 순위 변동, 키워드 이력/검색, 1년 내보내기)를 각각 측정합니다.
+#
+# 실행 (DB_HOST 등은 db.py 와 같은 환경 변수, 운영 DB 가 아닌 로컬 DB 를 가리키도록 설정):
+#   python migrate.py up                                          # 스키마 (파티션/인덱스/요약)
+#   python benchmarks/query_benchmark.py generate --years 5 --categories 50000169,50000167
+#   python benchmarks/query_benchmark.py run --label after --output query_results.jsonl
+#
+# 변경 전 스키마와 비교하려면 빈 DB 에서 `python migrate.py up --to 1` 후 같은 데이터를 만들어 측정합니다.
+# --output 에 결과를 한 줄(JSON)씩 추가하므로 load_dashboard.py 와 같은 방식으로 실행 결과를 모아 비교할 수 있습니다.
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import datetime
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+os.chdir(REPO_DIR) # dashboard 는 static/, templates/ 를 현재 디렉토리 기준으로 찾음
+import db  # noqa: E402
+import migrate  # noqa: E402
+import analytics  # noqa: E402
+import data_export  # noqa: E402
+import keyword_index  # noqa: E402
+import dashboard  # noqa: E402
+
+KEYWORDS_PER_DAY = 500
+COPY_BATCH_DAYS = 31 # COPY 한 번에 보내는 날짜 수
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct))]
+
+
+# --- 합성 데이터 ---
+def synthetic_days(category_index, start_date, n_days, vocab, seed):
+    """(날짜, [키워드 500개 순위순]) 생성: 키워드마다 기본 인기도 + 느린 변동 + 계절성 일부"""
+    rng = np.random.default_rng(seed + category_index)
+    names = np.array([f"합성{category_index}_{i:05d}" for i in range(vocab)], dtype=object)
+    base = rng.normal(0.0, 2.0, vocab)
+    seasonal = np.where(rng.random(vocab) < 0.1, rng.uniform(1.0, 3.0, vocab), 0.0) # 10% 는 연 단위 계절 키워드
+    phase = rng.uniform(0, 2 * np.pi, vocab)
+    state = base.copy()
+    for day in range(n_days):
+        state = 0.9 * state + 0.1 * base + rng.normal(0.0, 0.4, vocab)
+        score = state + seasonal * np.sin(2 * np.pi * day / 365.25 + phase)
+        top = np.argpartition(-score, KEYWORDS_PER_DAY)[:KEYWORDS_PER_DAY]
+        top = top[np.argsort(-score[top])]
+        yield start_date + datetime.timedelta(days=day), names[top]
+
+
+def generate(args):
+    start_date = datetime.datetime.strptime(args.start, "%Y-%m-%d").date()
+    end_date = datetime.date(start_date.year + args.years, start_date.month, start_date.day)
+    n_days = (end_date - start_date).days
+    categories = args.categories.split(",")
+    conn = db.connect_unpooled(statement_timeout_ms=0)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM daily_keywords WHERE scrape_date >= %s AND scrape_date < %s "
+                        "AND category_id = ANY(%s);", (start_date, end_date, categories))
+            existing = cur.fetchone()[0]
+            if existing and not args.replace:
+                print(f"{start_date} ~ {end_date} 에 이미 {existing:,}행이 있습니다 (--replace 로 교체).")
+                sys.exit(1)
+            cur.execute("DELETE FROM daily_keywords WHERE scrape_date >= %s AND scrape_date < %s "
+                        "AND category_id = ANY(%s);", (start_date, end_date, categories))
+        migrate.ensure_partitions([start_date + datetime.timedelta(days=d) for d in range(0, n_days, 28)] + [end_date], conn)
+
+        started = time.perf_counter()
+        rows = 0
+        for category_index, category_id in enumerate(categories):
+            buffer, days_in_buffer = io.StringIO(), 0
+            for scrape_date, keywords in synthetic_days(category_index, start_date, n_days, args.vocab, args.seed):
+                iso = scrape_date.isoformat()
+                buffer.writelines(f"{iso},{category_id},{rank},{keyword}\n" for rank, keyword in enumerate(keywords, 1))
+                days_in_buffer += 1
+                if days_in_buffer == COPY_BATCH_DAYS:
+                    rows += copy_rows(conn, buffer, days_in_buffer)
+                    buffer, days_in_buffer = io.StringIO(), 0
+            if days_in_buffer:
+                rows += copy_rows(conn, buffer, days_in_buffer)
+            print(f"카테고리 {category_id}: {n_days}일 생성")
+        conn.commit()
+        seconds = time.perf_counter() - started
+        print(f"합성 데이터 {rows:,}행 적재 ({seconds:.1f}초, {rows / max(seconds, 1e-9):,.0f}행/초)")
+
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE daily_keywords;")
+    finally:
+        conn.close()
+    if args.with_deltas:
+        started = time.perf_counter()
+        analytics.ensure_deltas_table()
+        analytics.rebuild(categories, start_date, end_date - datetime.timedelta(days=1))
+        print(f"순위 변동 계산 ({time.perf_counter() - started:.1f}초)")
+    migrate.refresh_summaries()
+
+
+def copy_rows(conn, buffer, days):
+    buffer.seek(0)
+    with conn.cursor() as cur:
+        cur.copy_expert("COPY daily_keywords (scrape_date, category_id, keyword_rank, keyword) FROM STDIN WITH (FORMAT csv)",
+                        buffer)
+    return days * KEYWORDS_PER_DAY
+
+
+# --- 측정 ---
+def export_year(category_id, year):
+    """1년치 내보내기 배치를 끝까지 읽음 (인코딩 제외, DB 읽기만)"""
+    conn = db.connect_unpooled(statement_timeout_ms=0)
+    try:
+        rows = sum(len(batch) for batch in data_export.iter_batches(
+            conn, [category_id], datetime.date(year, 1, 1), datetime.date(year, 12, 31)))
+        conn.rollback()
+        return rows
+    finally:
+        conn.close()
+
+
+def timed(func, repeat):
+    func() # 첫 실행(캐시 적재, 계획 생성)은 제외
+    values = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        values.append(time.perf_counter() - started)
+    values.sort()
+    return {
+        "n": len(values),
+        "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2),
+    }
+
+
+def describe_database():
+    with db.get_connection() as conn, conn.cursor() as cur:
+        cur.execute("SHOW server_version;")
+        server_version = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(*) FROM daily_keywords;")
+        rows = cur.fetchone()[0]
+        cur.execute("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'daily_keywords'::regclass);")
+        partitioned = cur.fetchone()[0]
+        cur.execute("SELECT to_regclass('schema_migrations') IS NOT NULL;")
+        schema_version = 0
+        if cur.fetchone()[0]:
+            cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations;")
+            schema_version = cur.fetchone()[0]
+    return {"server_version": server_version, "rows": rows, "partitioned": partitioned, "schema_version": schema_version}
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    with db.get_connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT DISTINCT category_id FROM daily_keywords;")
+        categories = [args.category] if args.category else sorted(row[0] for row in cur.fetchall())
+    if not categories:
+        print("daily_keywords 가 비어 있습니다. 먼저 generate 를 실행하세요.")
+        sys.exit(1)
+
+    queries = {}
+    for category_id in categories:
+        dates = [datetime.date.fromisoformat(d) for d in dashboard.query_available_dates(category_id)["dates"]]
+        if not dates:
+            continue
+        sample_dates = [rng.choice(dates) for _ in range(20)]
+        keywords = [item["keyword"] for d in sample_dates[:5] for item in dashboard.query_keywords(category_id, d)["keywords"]]
+        pick_date = lambda: rng.choice(sample_dates)  # noqa: E731
+        pick_keyword = lambda: rng.choice(keywords)  # noqa: E731
+        years = sorted({d.year for d in dates})
+        export_target = years[-2] if len(years) > 1 else years[-1] # 마지막 해는 일부만 있을 수 있으므로 그 전 해
+
+        def history():
+            with db.get_connection() as conn:
+                keyword_index.query_history(conn, category_id, pick_keyword())
+
+        def search():
+            keyword = pick_keyword()
+            with db.get_connection() as conn:
+                keyword_index.query_search(conn, category_id, keyword[:max(1, len(keyword) - 2)], dashboard.SEARCH_MAX_RESULTS)
+
+        cases = {
+            "dates": lambda: dashboard.query_available_dates(category_id),
+            "keywords_by_date": lambda: dashboard.query_keywords(category_id, pick_date()),
+            "movers": lambda: dashboard.query_movers(category_id, pick_date(), "risers", 20),
+            "keyword_history": history,
+            "keyword_search": search,
+            f"export_year_{export_target}": lambda: export_year(category_id, export_target),
+        }
+        for name, func in cases.items():
+            if args.only and name.split("_")[0] not in args.only:
+                continue
+            repeat = args.export_repeat if name.startswith("export") else args.repeat
+            queries[f"{category_id}/{name}"] = timed(func, repeat)
+            result = queries[f"{category_id}/{name}"]
+            print(f"{category_id} {name:<22} p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+                  f"max {result['max_ms']:>9.2f} ms")
+
+    record = {
+        "label": args.label,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "database": describe_database(),
+        "repeat": args.repeat,
+        "queries": queries,
+    }
+    print(f"[{args.label or '-'}] {record['database']}")
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    db.close_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대시보드 쿼리 벤치마크 (로컬 PostgreSQL + 합성 데이터)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    gen_parser = subparsers.add_parser("generate", help="합성 데이터 적재")
+    gen_parser.add_argument("--start", default="2020-01-01", help="시작 날짜 (YYYY-MM-DD)")
+    gen_parser.add_argument("--years", type=int, default=5, help="생성할 기간 (년)")
+    gen_parser.add_argument("--categories", default="50000169,50000167", help="카테고리 ID (쉼표 구분)")
+    gen_parser.add_argument("--vocab", type=int, default=20000, help="카테고리별 키워드 어휘 크기")
+    gen_parser.add_argument("--seed", type=int, default=1, help="난수 시드")
+    gen_parser.add_argument("--replace", action="store_true", help="기간 안의 기존 행을 지우고 생성")
+    gen_parser.add_argument("--with-deltas", action="store_true", help="순위 변동 테이블도 계산 (movers 측정용)")
+    run_parser = subparsers.add_parser("run", help="쿼리별 지연 시간 측정")
+    run_parser.add_argument("--category", help="측정할 카테고리 (기본: 전체)")
+    run_parser.add_argument("--repeat", type=int, default=50, help="쿼리별 반복 횟수")
+    run_parser.add_argument("--export-repeat", type=int, default=3, help="1년 내보내기 반복 횟수")
+    run_parser.add_argument("--only", action="append", help="이 이름으로 시작하는 쿼리만 (dates, keywords, movers, keyword, export)")
+    run_parser.add_argument("--seed", type=int, default=1, help="난수 시드 (같은 날짜/키워드 표본)")
+    run_parser.add_argument("--label", default="", help="결과 구분용 이름 (예: before, after)")
+    run_parser.add_argument("--output", help="결과를 JSON 한 줄로 추가할 파일")
+    args = parser.parse_args()
+    if args.command == "generate":
+        generate(args)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
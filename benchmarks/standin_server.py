@@ -0,0 +1,350 @@
+# coding: utf-8
+# 데이터랩 쇼핑인사이트 대체 서버 (오프라인 종단 간 벤치마크용)
+#
+# 스크래퍼가 쓰는 선택자와 같은 구조의 화면과 순위 JSON 엔드포인트를 로컬에서 제공합니다.
+#   GET  /shoppingInsight/sCategory.naver             분류(1차/2차) 드롭다운, 기간(일간/주간/월간), 시작/종료 연·월·일 드롭다운,
+#                                                     연령대 체크박스, 조회하기 버튼, ul.rank_top1000_list, 페이지 이동(span.page_info)
+#   POST /shoppingInsight/getCategoryKeywordRank.naver  (cid, 날짜, page)별로 항상 같은 합성 TOP 500 (20개 × 25페이지)
+#   GET  /__stats                                      요청 수 (화면, 순위 페이지, 일간/시작일=종료일이 아닌 잘못된 순위 요청)
+#
+# 화면의 분류 목록은 categories.json 전체(비활성 포함)로 만들고, 1차 분류를 고르면 2차 분류 목록이 채워집니다.
+# 조회/다음 페이지는 화면 스크립트가 JSON 엔드포인트를 호출해 목록을 다시 그리므로 Selenium 엔진과 HTTP 엔진이
+# 같은 서버를 사용합니다. 응답 지연은 --latency-ms(순위 JSON), --page-latency-ms(화면)로 설정합니다.
+#
+# 실행:
+#   python benchmarks/standin_server.py --port 8765 --latency-ms 150
+#   DATALAB_BASE_URL=http://127.0.0.1:8765 python scrape_keywords.py --engine http --start-date 2024-01-01
+# (Selenium 엔진은 TARGET_URL 도 DATALAB_BASE_URL 기준으로 정해지므로 같은 환경 변수로 대체 서버를 사용합니다.)
+
+import os
+import sys
+import json
+import html
+import time
+import random
+import argparse
+import datetime
+import threading
+import functools
+from urllib.parse import parse_qs, urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+import datalab_http  # noqa: E402
+import categories as category_registry  # noqa: E402
+
+DEFAULT_PORT = 8765
+DEFAULT_PAGES = 25
+FIRST_YEAR = 2017 # 연도 드롭다운 첫 해 (마지막 해는 올해)
+AGES = ("10", "20", "30", "40", "50", "60")
+TIME_UNITS = {"일간": "date", "주간": "week", "월간": "month"}
+
+# 합성 키워드 어휘 (브랜드 × 품목 × 수식어)
+BRANDS = ("나이키", "아디다스", "뉴발란스", "노스페이스", "폴로", "탑텐", "스파오", "무신사", "커버낫", "지오다노",
+          "유니클로", "자라", "리바이스", "캘빈클라인", "타미힐피거", "라코스테", "휠라", "푸마", "디스커버리", "내셔널지오그래픽")
+ITEMS = ("반팔", "긴팔", "셔츠", "니트", "맨투맨", "후드티", "슬랙스", "청바지", "반바지", "자켓",
+         "패딩", "코트", "점퍼", "베스트", "트레이닝복", "린넨", "정장", "원피스", "스커트", "가디건")
+MODIFIERS = ("", "남성", "여성", "오버핏", "빅사이즈", "세트", "신상", "기모")
+VOCABULARY = tuple(" ".join(part for part in (brand, item, modifier) if part)
+                   for brand in BRANDS for item in ITEMS for modifier in MODIFIERS)
+
+
+@functools.lru_cache(maxsize=512)
+def synthetic_ranking(cid, date_str, total):
+    """(카테고리, 날짜)의 순위순 키워드 total 개 (같은 입력이면 항상 같은 결과)"""
+    return random.Random(f"{cid}:{date_str}").sample(VOCABULARY, min(total, len(VOCABULARY)))
+
+
+# --- 화면 ---
+_PAGE_CSS = """
+.select_list { display: none; }
+.select.on .select_list { display: block; }
+.select { display: inline-block; position: relative; margin-right: 8px; }
+.select_btn { display: inline-block; min-width: 60px; padding: 2px 6px; border: 1px solid #ccc; cursor: pointer; }
+.select_list li { list-style: none; }
+"""
+
+_PAGE_JS = """
+(function () {
+    var CONFIG = __CONFIG__;
+    var level1 = document.querySelector('div.set_period.category > div.select:nth-of-type(1)');
+    var level2 = document.querySelector('div.set_period.category > div.select:nth-of-type(2)');
+    var current = {page: 0, request: 0};
+
+    function escapeHtml(text) {
+        return String(text).replace(/[&<>"']/g, function (c) {
+            return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+        });
+    }
+    function closeAll(except) {
+        Array.prototype.forEach.call(document.querySelectorAll('div.select.on'), function (el) {
+            if (el !== except) el.classList.remove('on');
+        });
+    }
+    function fillLevel2(parentId) {
+        var children = CONFIG.children[parentId] || [];
+        level2.querySelector('ul.select_list').innerHTML = children.map(function (child) {
+            return '<li><a href="#" class="option" data-cid="' + child[0] + '">' + escapeHtml(child[1]) + '</a></li>';
+        }).join('');
+        level2.querySelector('span.select_btn').textContent = '2분류';
+        delete level2.dataset.cid;
+    }
+    function choose(option) {
+        var select = option.closest('div.select');
+        select.querySelector('span.select_btn').textContent = option.textContent;
+        select.classList.remove('on');
+        if (option.dataset.cid) {
+            select.dataset.cid = option.dataset.cid;
+            if (select === level1) {
+                var parentId = option.dataset.cid;
+                setTimeout(function () { fillLevel2(parentId); }, CONFIG.uiDelayMs);
+            }
+        }
+    }
+    function dateOf(index) {
+        var labels = document.querySelectorAll('div.set_period_target > span:nth-of-type(' + index + ') span.select_btn');
+        return [labels[0], labels[1], labels[2]].map(function (el) { return el.textContent.trim(); }).join('-');
+    }
+    function render(page, ranks) {
+        document.querySelector('ul.rank_top1000_list').innerHTML = ranks.map(function (item) {
+            return '<li class="">\\n<a href="#" class="link_text"><span class="rank_top1000_num">' + item.rank +
+                '</span>\\n' + escapeHtml(item.keyword) + '\\n</a>\\n</li>';
+        }).join('\\n');
+        document.querySelector('span.page_info').innerHTML = '<em>' + page + '</em> /' + CONFIG.pages;
+        var last = page >= CONFIG.pages || ranks.length < CONFIG.pageSize;
+        document.querySelector('a.btn_page_next').classList.toggle('defult', last);
+        current.page = page;
+    }
+    function query(page) {
+        var request = ++current.request;
+        var timeframe = document.querySelector('div.set_period > div.select.w4 > span.select_btn').textContent.trim();
+        var checked = document.querySelectorAll("div.set_option input[type='checkbox']:checked");
+        var form = new URLSearchParams({
+            cid: level2.dataset.cid || level1.dataset.cid || '',
+            timeUnit: CONFIG.timeUnits[timeframe] || timeframe,
+            startDate: dateOf(1),
+            endDate: dateOf(3),
+            age: Array.prototype.map.call(checked, function (el) { return el.value; }).join(','),
+            gender: '',
+            device: '',
+            page: String(page),
+            count: String(CONFIG.pageSize)
+        });
+        fetch(CONFIG.endpoint, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8', 'X-Requested-With': 'XMLHttpRequest'},
+            body: form.toString()
+        }).then(function (response) { return response.json(); }).then(function (payload) {
+            if (request === current.request) render(page, payload.ranks || []);
+        });
+    }
+
+    document.addEventListener('click', function (event) {
+        var target = event.target;
+        var button = target.closest('span.select_btn');
+        if (button) {
+            event.preventDefault();
+            closeAll(button.parentNode);
+            button.parentNode.classList.toggle('on');
+            return;
+        }
+        var option = target.closest('a.option');
+        if (option) { event.preventDefault(); choose(option); return; }
+        if (target.closest('a.btn_submit')) { event.preventDefault(); closeAll(null); query(1); return; }
+        var next = target.closest('a.btn_page_next');
+        if (next) {
+            event.preventDefault();
+            if (current.page && !next.classList.contains('defult')) query(current.page + 1);
+            return;
+        }
+        if (target.closest('a.btn_page_prev')) {
+            event.preventDefault();
+            if (current.page > 1) query(current.page - 1);
+            return;
+        }
+        closeAll(null);
+    });
+})();
+"""
+
+
+def _dropdown(css_class, label, options, cid_options=False):
+    """div.select > span.select_btn + ul.select_list > li > a.option (cid_options: [(cid, 이름)])"""
+    if cid_options:
+        items = "".join(f'<li><a href="#" class="option" data-cid="{html.escape(cid)}">{html.escape(name)}</a></li>'
+                        for cid, name in options)
+    else:
+        items = "".join(f'<li><a href="#" class="option">{html.escape(text)}</a></li>' for text in options)
+    return (f'<div class="{css_class}"><span class="select_btn">{html.escape(label)}</span>'
+            f'<ul class="select_list scroll_cst">{items}</ul></div>')
+
+
+def _date_dropdowns(day, last_year):
+    return (_dropdown("select w2", str(day.year), [str(y) for y in range(FIRST_YEAR, last_year + 1)])
+            + _dropdown("select w3", f"{day.month:02d}", [f"{m:02d}" for m in range(1, 13)])
+            + _dropdown("select w3", f"{day.day:02d}", [f"{d:02d}" for d in range(1, 32)]))
+
+
+def category_tree(categories):
+    """(1차 분류 [(cid, 이름)], {1차 분류 cid: [(2차 cid, 이름), ...]})"""
+    first_level, children = {}, {}
+    for category in categories:
+        if category["parent_id"]:
+            first_level.setdefault(category["parent_id"], category.get("parent_name") or category["parent_id"])
+            children.setdefault(category["parent_id"], []).append((category["id"], category["name"]))
+        else:
+            first_level.setdefault(category["id"], category["name"])
+    return list(first_level.items()), children
+
+
+def render_page(categories, pages, ui_delay_ms=0):
+    """대체 서버 화면 HTML (기본 상태: 분류 미선택, 기간 월간, 날짜 어제, 연령대 미선택, 빈 결과 목록)"""
+    first_level, children = category_tree(categories)
+    today = datetime.date.today()
+    yesterday = today - datetime.timedelta(days=1)
+    config = {
+        "children": children,
+        "pages": pages,
+        "pageSize": datalab_http.PAGE_SIZE,
+        "endpoint": datalab_http.RANK_ENDPOINT_PATH,
+        "timeUnits": TIME_UNITS,
+        "uiDelayMs": ui_delay_ms,
+    }
+    ages = "".join(f'<input type="checkbox" id="age_{age}" value="{age}"><label for="age_{age}">{age}대</label>'
+                   for age in AGES)
+    return f"""<!DOCTYPE html>
+<html lang="ko"><head><meta charset="utf-8"><title>쇼핑인사이트 : 네이버 데이터랩 (대체 서버)</title>
+<style>{_PAGE_CSS}</style></head>
+<body>
+<div id="wrap"><div id="container"><div id="content" class="shopping_insight">
+<div class="section_instie_area"><div class="set_period category">
+{_dropdown("select ", "1분류", first_level, cid_options=True)}{_dropdown("select ", "2분류", [], cid_options=True)}
+</div>
+<div class="set_period">{_dropdown("select w4", "월간", list(TIME_UNITS))}
+<div class="set_period_target"><span>{_date_dropdowns(yesterday, today.year)}</span><span class="tilde">~</span><span>{_date_dropdowns(yesterday, today.year)}</span></div></div>
+<div class="set_option">{ages}</div>
+<a href="#" class="btn_submit"><span>조회하기</span></a>
+</div>
+<div class="section_insite_sub"><div class="rank_top1000_scroll">
+<ul class="rank_top1000_list"></ul></div>
+<div class="page_move"><a href="#" class="btn_page_prev">이전</a><span class="page_info"></span><a href="#" class="btn_page_next">다음</a></div>
+</div>
+</div></div></div>
+<script>{_PAGE_JS.replace("__CONFIG__", json.dumps(config, ensure_ascii=False))}</script>
+</body></html>
+"""
+
+
+# --- 서버 ---
+class StandinStats:
+    """경로별 요청 수 (스레드 안전)"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"page": 0, "rank": 0, "rank_invalid": 0, "not_found": 0}
+
+    def add(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server_version = "DatalabStandin/1.0"
+    protocol_version = "HTTP/1.1" # 연결 재사용 (requests 세션/브라우저와 같은 조건)
+    disable_nagle_algorithm = True # 헤더와 본문을 따로 쓰므로 지연 ACK 대기(약 40ms)가 측정에 섞이지 않게
+
+    def log_message(self, format, *args):
+        pass # 요청마다 로그를 남기지 않음 (측정 대상 아님)
+
+    def _send(self, status, body, content_type):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _delay(self, milliseconds):
+        if milliseconds > 0:
+            jitter = self.server.jitter_ms
+            time.sleep(max(0.0, milliseconds + random.uniform(-jitter, jitter)) / 1000)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == datalab_http.REFERER_PATH:
+            self.server.stats.add("page")
+            self._delay(self.server.page_latency_ms)
+            self._send(200, self.server.page_html, "text/html; charset=UTF-8")
+        elif path == "/__stats":
+            self._send(200, json.dumps(self.server.stats.snapshot()), "application/json;charset=UTF-8")
+        else:
+            self.server.stats.add("not_found")
+            self._send(404, "not found", "text/plain; charset=UTF-8")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        if urlsplit(self.path).path != datalab_http.RANK_ENDPOINT_PATH:
+            self.server.stats.add("not_found")
+            self._send(404, "not found", "text/plain; charset=UTF-8")
+            return
+        form = {k: v[0] for k, v in parse_qs(body).items()}
+        self._delay(self.server.latency_ms)
+        try:
+            page = int(form.get("page", "1"))
+            page_size = int(form.get("count", datalab_http.PAGE_SIZE))
+            datetime.date.fromisoformat(form.get("startDate", ""))
+        except ValueError:
+            self.server.stats.add("rank_invalid")
+            self._send(400, json.dumps({"message": "bad request"}), "application/json;charset=UTF-8")
+            return
+        # 스크래퍼가 화면을 잘못 설정했는지(일간이 아님, 시작일 ≠ 종료일, 분류 미선택) 통계로 확인할 수 있게 기록
+        if form.get("timeUnit") != "date" or form.get("startDate") != form.get("endDate") or not form.get("cid"):
+            self.server.stats.add("rank_invalid")
+        self.server.stats.add("rank")
+        ranking = synthetic_ranking(form.get("cid", ""), form["startDate"], self.server.pages * datalab_http.PAGE_SIZE)
+        start = (page - 1) * page_size
+        ranks = [{"rank": start + i + 1, "keyword": keyword}
+                 for i, keyword in enumerate(ranking[start:start + page_size])] if page >= 1 else []
+        self._send(200, json.dumps({"ranks": ranks}, ensure_ascii=False), "application/json;charset=UTF-8")
+
+
+def start_server(port=DEFAULT_PORT, latency_ms=0, page_latency_ms=0, jitter_ms=0, pages=DEFAULT_PAGES,
+                 ui_delay_ms=0, host="127.0.0.1"):
+    """백그라운드 스레드에서 대체 서버 시작 → ThreadingHTTPServer (server.stats, 종료: server.shutdown())"""
+    server = ThreadingHTTPServer((host, port), StandinHandler)
+    server.daemon_threads = True
+    server.latency_ms = latency_ms
+    server.page_latency_ms = page_latency_ms
+    server.jitter_ms = jitter_ms
+    server.pages = pages
+    server.stats = StandinStats()
+    server.page_html = render_page(category_registry.load_categories(include_disabled=True), pages, ui_delay_ms)
+    threading.Thread(target=server.serve_forever, name="standin-server", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="데이터랩 쇼핑인사이트 대체 서버 (오프라인 벤치마크용)")
+    parser.add_argument("--host", default="127.0.0.1", help="바인드 주소")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"포트 (기본 {DEFAULT_PORT})")
+    parser.add_argument("--latency-ms", type=float, default=0, help="순위 JSON 응답 지연 (밀리초)")
+    parser.add_argument("--page-latency-ms", type=float, default=0, help="화면 HTML 응답 지연 (밀리초)")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="지연에 더할 균등 분포 흔들림 ± (밀리초)")
+    parser.add_argument("--ui-delay-ms", type=int, default=0, help="1차 분류 선택 후 2차 분류 목록이 채워지기까지 지연 (밀리초)")
+    parser.add_argument("--pages", type=int, default=DEFAULT_PAGES, help=f"결과 페이지 수 (기본 {DEFAULT_PAGES})")
+    args = parser.parse_args()
+
+    standin = start_server(args.port, args.latency_ms, args.page_latency_ms, args.jitter_ms, args.pages,
+                           args.ui_delay_ms, args.host)
+    print(f"대체 서버 실행 중: http://{args.host}:{args.port}{datalab_http.REFERER_PATH} (Ctrl+C 로 종료)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        standin.shutdown()
+        print(f"요청 수: {standin.stats.snapshot()}")
@@ -0,0 +1,263 @@
+# coding: utf-8
+# WebDriver 시작 비용 줄이기: 드라이버 경로 고정/캐시 + 미리 띄워 둔 헤드리스 Chrome(웜 브라우저)
+#
+# 1) 드라이버 경로: CHROMEDRIVER_PATH 환경 변수 → 캐시 파일(.chromedriver.json) → PATH 의 chromedriver 순으로 찾고,
+#    모두 없을 때만 webdriver_manager 로 받아 캐시 파일에 기록합니다. 한 번 기록하면 이후 실행은 네트워크 확인을 하지 않습니다.
+#    드라이버를 새로 받으려면 `python browser_service.py driver --refresh`.
+# 2) 웜 브라우저: `python browser_service.py serve --count N` 이 원격 디버깅 포트를 연 Chrome N개를 띄워 두고
+#    주소를 상태 파일(browser_service.json)에 기록합니다. 스크래퍼는 상태 파일이 있으면 쉬고 있는 브라우저 하나를
+#    파일 잠금으로 빌려(debuggerAddress) 붙고, 없거나 모두 사용 중이면 예전처럼 새 Chrome 을 띄웁니다.
+#    서비스는 죽은 브라우저를 다시 띄우고, 종료 시(SIGTERM) 브라우저를 모두 닫고 상태 파일을 지웁니다.
+#
+# 명령줄:
+#   python browser_service.py driver [--refresh]          # 드라이버 경로 확인/캐시
+#   python browser_service.py serve [--count 2] [--port 9222]
+#   python browser_service.py status
+
+import os
+import sys
+import json
+import time
+import fcntl
+import shutil
+import signal
+import logging
+import argparse
+import datetime
+import subprocess
+import urllib.request
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DRIVER_CACHE_FILE = os.environ.get("CHROMEDRIVER_CACHE_FILE", os.path.join(BASE_DIR, ".chromedriver.json"))
+STATE_FILE = os.environ.get("BROWSER_SERVICE_STATE_FILE", os.path.join(BASE_DIR, "browser_service.json"))
+PROFILE_DIR = os.environ.get("BROWSER_SERVICE_PROFILE_DIR", os.path.join(BASE_DIR, ".browser_profiles"))
+CHROME_BINARY_CANDIDATES = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser"]
+
+DEFAULT_BROWSER_COUNT = 2
+DEFAULT_DEBUG_PORT = 9222 # 첫 브라우저의 원격 디버깅 포트 (이후 +1 씩)
+HEALTH_CHECK_INTERVAL_SECONDS = 10
+HEALTH_CHECK_TIMEOUT_SECONDS = 1.0
+STARTUP_TIMEOUT_SECONDS = 20
+
+
+# --- 드라이버 경로 ---
+def _read_driver_cache():
+    try:
+        with open(DRIVER_CACHE_FILE, encoding="utf-8") as f:
+            path = json.load(f).get("path")
+    except (OSError, ValueError, AttributeError):
+        return None
+    return path if path and os.access(path, os.X_OK) else None
+
+
+def _write_driver_cache(path, source):
+    tmp_path = f"{DRIVER_CACHE_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"path": path, "source": source,
+                   "resolved_at": datetime.datetime.now().isoformat(timespec="seconds")}, f, ensure_ascii=False)
+    os.replace(tmp_path, DRIVER_CACHE_FILE)
+
+
+def resolve_driver_path(refresh=False):
+    """(chromedriver 경로, 출처) — 출처: env / cache / path / download"""
+    env_path = os.environ.get("CHROMEDRIVER_PATH")
+    if env_path:
+        return env_path, "env"
+    if not refresh:
+        cached = _read_driver_cache()
+        if cached:
+            return cached, "cache"
+        found = shutil.which("chromedriver")
+        if found:
+            _write_driver_cache(found, "path")
+            return found, "path"
+    from webdriver_manager.chrome import ChromeDriverManager # 네트워크가 필요한 경우에만
+    path = ChromeDriverManager().install()
+    _write_driver_cache(path, "download")
+    return path, "download"
+
+
+# --- 웜 브라우저 임대 (스크래퍼 쪽) ---
+class BrowserLease:
+    """웜 브라우저 하나의 사용권. release() 전까지 다른 실행이 같은 브라우저에 붙지 않음"""
+    def __init__(self, address, lock_file):
+        self.address = address
+        self._lock_file = lock_file
+
+    def release(self):
+        if self._lock_file is not None:
+            self._lock_file.close() # 닫으면 flock 도 풀림
+            self._lock_file = None
+
+
+def _lock_path(port):
+    return os.path.join(PROFILE_DIR, f"browser-{port}.lock")
+
+
+def _is_alive(address):
+    try:
+        with urllib.request.urlopen(f"http://{address}/json/version", timeout=HEALTH_CHECK_TIMEOUT_SECONDS) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+def read_state():
+    """상태 파일 내용 (서비스가 없으면 None)"""
+    try:
+        with open(STATE_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def acquire_browser():
+    """쉬고 있는 웜 브라우저를 빌림. 서비스가 없거나 모두 사용 중이면 None"""
+    state = read_state()
+    if not state:
+        return None
+    for browser in state.get("browsers", []):
+        try:
+            lock_file = open(_lock_path(browser["port"]), "a")
+        except OSError:
+            continue
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close() # 다른 실행이 사용 중
+            continue
+        if _is_alive(browser["address"]):
+            return BrowserLease(browser["address"], lock_file)
+        lock_file.close()
+    return None
+
+
+# --- 웜 브라우저 서비스 ---
+def find_chrome_binary():
+    configured = os.environ.get("CHROME_BINARY")
+    if configured:
+        return configured
+    for name in CHROME_BINARY_CANDIDATES:
+        found = shutil.which(name)
+        if found:
+            return found
+    return None
+
+
+def chrome_command(binary, port, extra_args=()):
+    return [binary, "--headless=new", "--no-sandbox", "--disable-dev-shm-usage",
+            f"--remote-debugging-port={port}", "--remote-debugging-address=127.0.0.1",
+            f"--user-data-dir={os.path.join(PROFILE_DIR, f'profile-{port}')}",
+            "--no-first-run", "--no-default-browser-check", *extra_args, "about:blank"]
+
+
+class BrowserService:
+    """원격 디버깅 포트를 연 헤드리스 Chrome 여러 개를 유지"""
+    def __init__(self, binary, count, base_port, extra_args=()):
+        self.binary = binary
+        self.ports = [base_port + i for i in range(count)]
+        self.extra_args = list(extra_args)
+        self.processes = {} # port -> Popen
+        self._stopping = False
+
+    def _launch(self, port):
+        logger = logging.getLogger()
+        started = time.perf_counter()
+        process = subprocess.Popen(chrome_command(self.binary, port, self.extra_args),
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        address = f"127.0.0.1:{port}"
+        deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+        while time.monotonic() < deadline and process.poll() is None:
+            if _is_alive(address):
+                logger.info(f"웜 브라우저 시작: {address} (PID {process.pid}, {time.perf_counter() - started:.2f}초)")
+                self.processes[port] = process
+                return True
+            time.sleep(0.2)
+        logger.error(f"웜 브라우저 시작 실패: {address}")
+        process.kill()
+        return False
+
+    def _write_state(self):
+        browsers = [{"address": f"127.0.0.1:{port}", "port": port, "pid": process.pid}
+                    for port, process in sorted(self.processes.items())]
+        tmp_path = f"{STATE_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"pid": os.getpid(), "started_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                       "browsers": browsers}, f, ensure_ascii=False)
+        os.replace(tmp_path, STATE_FILE)
+
+    def stop(self, *_):
+        self._stopping = True
+
+    def serve(self):
+        logger = logging.getLogger()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        try:
+            while not self._stopping:
+                changed = False
+                for port in self.ports:
+                    process = self.processes.get(port)
+                    if process is not None and process.poll() is None:
+                        continue
+                    if process is not None:
+                        logger.warning(f"웜 브라우저 종료 감지 (포트 {port}, 종료 코드 {process.returncode}) → 다시 시작")
+                        del self.processes[port]
+                    changed = self._launch(port) or changed
+                if changed:
+                    self._write_state()
+                for _ in range(HEALTH_CHECK_INTERVAL_SECONDS * 10):
+                    if self._stopping:
+                        break
+                    time.sleep(0.1)
+        finally:
+            try:
+                os.remove(STATE_FILE)
+            except OSError:
+                pass
+            for process in self.processes.values():
+                process.terminate()
+            for process in self.processes.values():
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+            logger.info("웜 브라우저 서비스 종료.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WebDriver 드라이버 경로 캐시 / 웜 브라우저 서비스")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    driver_parser = subparsers.add_parser("driver", help="chromedriver 경로 확인 후 캐시")
+    driver_parser.add_argument("--refresh", action="store_true", help="캐시를 무시하고 webdriver_manager 로 다시 받음")
+    serve_parser = subparsers.add_parser("serve", help="웜 브라우저 서비스 실행")
+    serve_parser.add_argument("--count", type=int, default=DEFAULT_BROWSER_COUNT,
+                              help=f"유지할 브라우저 수 (기본 {DEFAULT_BROWSER_COUNT}, 워커 수 × 카테고리 동시 세션 수 권장)")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_DEBUG_PORT,
+                              help=f"첫 원격 디버깅 포트 (기본 {DEFAULT_DEBUG_PORT})")
+    subparsers.add_parser("status", help="웜 브라우저 목록과 사용 가능 여부")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.command == "driver":
+        started = time.perf_counter()
+        path, source = resolve_driver_path(refresh=args.refresh)
+        print(f"{path} ({source}, {time.perf_counter() - started:.2f}초)")
+    elif args.command == "serve":
+        if args.count < 1:
+            logging.error("오류: --count 는 1 이상이어야 합니다.")
+            sys.exit(1)
+        binary = find_chrome_binary()
+        if not binary:
+            logging.error("오류: Chrome 실행 파일을 찾을 수 없습니다 (CHROME_BINARY 환경 변수로 지정).")
+            sys.exit(1)
+        import scrape_keywords # 스크래퍼와 같은 Chrome 옵션(User-Agent, 이미지 차단)을 사용
+        BrowserService(binary, args.count, args.port, scrape_keywords.chrome_arguments()).serve()
+    elif args.command == "status":
+        state = read_state()
+        if not state:
+            print("웜 브라우저 서비스가 실행 중이 아닙니다.")
+            sys.exit(1)
+        for browser in state["browsers"]:
+            print(f"{browser['address']:<18} PID {browser['pid']:<8} {'응답' if _is_alive(browser['address']) else '응답 없음'}")
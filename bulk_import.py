@@ -0,0 +1,239 @@
+# coding: utf-8
+# 백업 대량 적재: csv_backups/backup_{날짜}[_{카테고리}].csv (또는 압축 아카이브) 전체를 daily_keywords 로 다시 채움
+#
+# 날짜마다 save_to_db (DELETE + execute_values + 커밋)를 반복하는 대신
+# 1. 파일별로 병렬(워커당 연결 하나)로 읽고 순위 연속성(1..500)을 검사한 뒤 COPY 로 UNLOGGED 스테이징 테이블에 적재
+# 2. 스테이징 테이블을 날짜 구간 단위의 큰 트랜잭션으로 daily_keywords 에 병합 (기존 (날짜, 카테고리) 교체)
+# 3. 단계별 행 수와 초당 처리 행 수를 보고
+# 병합이 끝나면 대시보드 캐시/색인 전체 무효화 알림을 한 번 보내고 작업 원장을 completed/partial 로 기록합니다.
+#
+# 실행: python scrape_keywords.py import [--source archive|csv (기본: BACKUP_FORMAT)] [--jobs 4] [--category 50000169] [--start-date ...]
+
+import io
+import os
+import csv
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import psycopg2
+
+import db
+import keyword_archive
+import migrate
+
+KEYWORD_COUNT = 500 # 날짜/카테고리 하나의 정상 순위 수 (1..500)
+DEFAULT_JOBS = 4
+MERGE_BATCH_DATES = 60 # 병합 트랜잭션 하나에 들어가는 날짜 수 (카테고리 2개 기준 약 6만 행)
+
+
+class ImportStats:
+    """워커 스레드가 함께 갱신하는 적재 통계"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.files_loaded = 0
+        self.files_partial = 0
+        self.files_rejected = 0
+        self.rows_loaded = 0
+        self.rejected = [] # (경로, 사유)
+
+    def loaded(self, rows, partial):
+        with self._lock:
+            self.files_loaded += 1
+            self.files_partial += partial
+            self.rows_loaded += rows
+
+    def reject(self, path, reason):
+        with self._lock:
+            self.files_rejected += 1
+            self.rejected.append((path, reason))
+
+
+def discover_sources(source, backup_dir, archive_dir, category_ids=None, start_date=None, end_date=None):
+    """[(날짜, 카테고리, 이름, 읽기 함수), ...] (날짜순). source: csv (날짜별 백업 파일) 또는 archive (압축 아카이브)"""
+    if source == "csv":
+        return [(target_date, category_id, path, lambda path=path: read_backup(path))
+                for target_date, category_id, path in keyword_archive.find_backup_files(backup_dir, category_ids, start_date, end_date)]
+    sources = []
+    if category_ids is None:
+        category_ids = sorted(name for name in os.listdir(archive_dir) if os.path.isdir(os.path.join(archive_dir, name))) \
+            if os.path.isdir(archive_dir) else []
+    for category_id in category_ids:
+        archive = keyword_archive.KeywordArchive.open(archive_dir, category_id)
+        if archive is None:
+            continue
+        for target_date in archive.dates():
+            if (start_date and target_date < start_date) or (end_date and target_date > end_date):
+                continue
+            # 같은 달의 날짜는 워커가 달라도 블록 해독 결과를 재사용 (KeywordArchive 는 스레드 안전)
+            sources.append((target_date, category_id, f"{archive.path}/{target_date}",
+                            lambda archive=archive, target_date=target_date: archive.read_day(target_date)))
+    return sorted(sources, key=lambda item: (item[0], item[1]))
+
+
+def read_backup(path):
+    """백업 CSV -> [(순위, 키워드), ...] (헤더 rank,keyword, BOM 허용)"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return [(int(row["rank"]), row["keyword"].strip()) for row in csv.DictReader(f)]
+
+
+def validate_ranks(pairs, allow_partial=False):
+    """순위 연속성 검사. 문제가 없으면 None, 있으면 사유 문자열
+
+    순위는 1부터 빈틈·중복 없이 이어져야 하며, allow_partial 이 아니면 정확히 1..KEYWORD_COUNT 여야 합니다.
+    """
+    if not pairs:
+        return "빈 파일"
+    ranks = sorted(rank for rank, _ in pairs)
+    if ranks[0] < 1 or ranks[-1] > KEYWORD_COUNT:
+        return f"순위 범위 밖 ({ranks[0]}..{ranks[-1]})"
+    if len(set(ranks)) != len(ranks):
+        return f"중복 순위 {len(ranks) - len(set(ranks))}개"
+    if ranks[-1] != len(ranks):
+        missing = sorted(set(range(1, ranks[-1] + 1)) - set(ranks))
+        return f"누락 순위 {len(missing)}개 (첫 누락: {missing[0]})"
+    if any(not keyword for _, keyword in pairs):
+        return "빈 키워드"
+    if not allow_partial and len(ranks) != KEYWORD_COUNT:
+        return f"순위 {len(ranks)}개 (1..{KEYWORD_COUNT} 아님)"
+    return None
+
+
+def ensure_tables(conn, staging_table):
+    migrate.migrate(conn=conn) # 데이터베이스를 잃은 경우에도 관리 스키마(파티션/인덱스/요약)로 다시 만듦
+    with conn.cursor() as cur:
+        # 스테이징은 WAL 을 쓰지 않는 UNLOGGED 테이블 (실패하면 다시 적재하면 되므로)
+        cur.execute(f"""
+            DROP TABLE IF EXISTS {staging_table};
+            CREATE UNLOGGED TABLE {staging_table} (
+                scrape_date DATE NOT NULL,
+                category_id VARCHAR(20) NOT NULL,
+                keyword_rank INTEGER NOT NULL,
+                keyword TEXT NOT NULL
+            );
+        """)
+    conn.commit()
+
+
+def load_file(staging_table, target_date, category_id, path, read_pairs, allow_partial, stats):
+    """파일(아카이브의 날짜) 하나를 검사 후 COPY 로 스테이징 테이블에 적재 (워커 스레드에서 실행)"""
+    try:
+        pairs = read_pairs() or []
+    except (OSError, ValueError, KeyError) as e:
+        stats.reject(path, f"읽기 실패: {e}")
+        return
+    reason = validate_ranks(pairs, allow_partial)
+    if reason:
+        stats.reject(path, reason)
+        return
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows((target_date.isoformat(), category_id, rank, keyword) for rank, keyword in pairs)
+    buffer.seek(0)
+    with db.get_connection() as conn, conn.cursor() as cur:
+        cur.copy_expert(f"COPY {staging_table} (scrape_date, category_id, keyword_rank, keyword) FROM STDIN WITH (FORMAT csv)",
+                        buffer)
+        conn.commit()
+    stats.loaded(len(pairs), len(pairs) != KEYWORD_COUNT)
+
+
+def merge_staging(conn, staging_table, dates, update_ledger=True):
+    """스테이징 → daily_keywords 병합 (MERGE_BATCH_DATES 일씩 한 트랜잭션), 병합한 행 수 반환"""
+    logger = logging.getLogger()
+    merged = 0
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('scrape_ledger') IS NOT NULL;")
+        has_ledger = update_ledger and cur.fetchone()[0]
+        for i in range(0, len(dates), MERGE_BATCH_DATES):
+            first, last = dates[i], dates[min(i + MERGE_BATCH_DATES, len(dates)) - 1]
+            # 스테이징에 있는 (날짜, 카테고리)는 통째로 교체 (save_to_db 와 같은 의미)
+            cur.execute(f"""
+                DELETE FROM daily_keywords d
+                USING (SELECT DISTINCT scrape_date, category_id FROM {staging_table}
+                       WHERE scrape_date BETWEEN %(first)s AND %(last)s) s
+                WHERE d.scrape_date = s.scrape_date AND d.category_id = s.category_id;
+                INSERT INTO daily_keywords (scrape_date, keyword_rank, keyword, category_id)
+                SELECT scrape_date, keyword_rank, keyword, category_id FROM {staging_table}
+                WHERE scrape_date BETWEEN %(first)s AND %(last)s
+                ON CONFLICT (scrape_date, keyword_rank, category_id) DO NOTHING;
+            """, {"first": first, "last": last})
+            merged += cur.rowcount
+            if has_ledger:
+                cur.execute(f"""
+                    INSERT INTO scrape_ledger (scrape_date, category_id, status, keyword_count, updated_at)
+                    SELECT scrape_date, category_id,
+                           CASE WHEN COUNT(*) >= %(expected)s THEN 'completed' ELSE 'partial' END, COUNT(*), now()
+                    FROM {staging_table} WHERE scrape_date BETWEEN %(first)s AND %(last)s
+                    GROUP BY scrape_date, category_id
+                    ON CONFLICT (scrape_date, category_id) DO UPDATE
+                    SET status = EXCLUDED.status, keyword_count = EXCLUDED.keyword_count,
+                        last_error = NULL, updated_at = now();
+                """, {"first": first, "last": last, "expected": KEYWORD_COUNT})
+            conn.commit()
+            logger.info(f"병합 {first} ~ {last} 완료 (누적 {merged:,}행)")
+        # 바뀐 (날짜, 카테고리)가 많으므로 날짜별 알림 대신 전체 무효화 알림 한 번 (형식이 다른 payload)
+        cur.execute("SELECT pg_notify(%s, %s);", (db.KEYWORDS_CHANGED_CHANNEL, "bulk_import"))
+    conn.commit()
+    return merged
+
+
+def run_import(backup_dir="csv_backups", jobs=DEFAULT_JOBS, category_ids=None, start_date=None, end_date=None,
+               allow_partial=False, dry_run=False, source="csv", archive_dir=keyword_archive.ARCHIVE_DIR):
+    """백업 전체 적재 (source: csv 또는 archive). 반환값: ImportStats (merged_rows 포함)"""
+    logger = logging.getLogger()
+    files = discover_sources(source, backup_dir, archive_dir, category_ids, start_date, end_date)
+    stats = ImportStats()
+    stats.merged_rows = 0
+    if not files:
+        logger.info(f"{backup_dir if source == 'csv' else archive_dir} 에 적재할 백업이 없습니다.")
+        return stats
+    logger.info(f"백업 {len(files)}개 적재 시작 ({files[0][0]} ~ {files[-1][0]}, 출처 {source}, 워커 {jobs}개)")
+
+    staging_table = f"daily_keywords_staging_{os.getpid()}" # 동시에 실행한 다른 적재와 겹치지 않도록
+    conn = db.connect_unpooled(statement_timeout_ms=0) # 병합 트랜잭션은 오래 걸릴 수 있음
+    try:
+        ensure_tables(conn, staging_table)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="import") as executor:
+            futures = [executor.submit(load_file, staging_table, target_date, category_id, path, read_pairs, allow_partial, stats)
+                       for target_date, category_id, path, read_pairs in files]
+            for done, future in enumerate(as_completed(futures), 1):
+                future.result() # DB 오류는 전체 적재 중단
+                if done % 200 == 0:
+                    logger.info(f"적재 진행: {done}/{len(files)}개 파일")
+        load_seconds = time.perf_counter() - started
+        logger.info(f"스테이징 적재: {stats.rows_loaded:,}행, {load_seconds:.1f}초 "
+                    f"({stats.rows_loaded / max(load_seconds, 1e-9):,.0f}행/초)")
+        for path, reason in stats.rejected:
+            logger.warning(f"제외: {path} - {reason}")
+
+        if dry_run:
+            logger.info("--dry-run: daily_keywords 에는 병합하지 않습니다.")
+        else:
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT DISTINCT scrape_date FROM {staging_table} ORDER BY scrape_date;")
+                dates = [row[0] for row in cur.fetchall()]
+            migrate.ensure_partitions(dates, conn)
+            merge_started = time.perf_counter()
+            stats.merged_rows = merge_staging(conn, staging_table, dates)
+            merge_seconds = time.perf_counter() - merge_started
+            logger.info(f"병합: {stats.merged_rows:,}행, {merge_seconds:.1f}초 "
+                        f"({stats.merged_rows / max(merge_seconds, 1e-9):,.0f}행/초)")
+        total_seconds = time.perf_counter() - started
+        logger.info(f"완료: 파일 {stats.files_loaded}개 적재 (부분 {stats.files_partial}개), {stats.files_rejected}개 제외, "
+                    f"전체 {total_seconds:.1f}초 ({stats.rows_loaded / max(total_seconds, 1e-9):,.0f}행/초)")
+        if stats.merged_rows:
+            migrate.refresh_summaries()
+            logger.info("순위 변동/순위 행렬은 다시 계산하세요: python analytics.py --rebuild && python rank_matrix.py build")
+    finally:
+        try:
+            conn.rollback()
+            with conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS {staging_table};")
+            conn.commit()
+        except psycopg2.Error as e:
+            logger.warning(f"스테이징 테이블 삭제 실패 ({staging_table}): {e}")
+        conn.close()
+    return stats
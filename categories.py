@@ -0,0 +1,89 @@
+# coding: utf-8
+# 수집 대상 카테고리 목록 (categories.json)
+#
+# 카테고리마다 ID, 이름, 1차 분류(parent_id, parent_name)를 적어 두면 데이터랩 화면의 분류 선택자는
+# data-cid 로 만들어 씁니다. parent_id 가 없는 항목은 1차 분류 자체를 수집합니다 (패션의류 외 다른 분류도 가능).
+# 스크래퍼는 enabled 인 항목만 수집하고, 대시보드는 카테고리 선택 목록을 여기서 채웁니다.
+#
+# 파일 위치는 CATEGORIES_FILE 환경 변수로 바꿀 수 있습니다. 파일이 없으면 경고를 남기고 원래 수집하던
+# 두 카테고리(DEFAULT_CATEGORIES)를 씁니다 (import 시 읽으므로 파일이 빠진 이미지에서도 시작은 되도록).
+
+import os
+import json
+import logging
+
+CATEGORIES_FILE = os.environ.get(
+    "CATEGORIES_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "categories.json"))
+
+# 데이터랩 화면의 1차/2차 분류 드롭다운 옵션 (data-cid 로 선택)
+FIRST_LEVEL_OPTION_SELECTOR = "div.set_period.category > div.select:nth-of-type(1) ul.select_list a.option[data-cid='{}']"
+SECOND_LEVEL_OPTION_SELECTOR = "div.set_period.category > div.select:nth-of-type(2) ul.select_list a.option[data-cid='{}']"
+
+# categories.json 이 없을 때 쓰는 기본 목록 (패션의류 > 남성의류/여성의류)
+DEFAULT_CATEGORIES = [
+    {"id": "50000169", "name": "남성의류", "parent_id": "50000000", "parent_name": "패션의류", "enabled": True},
+    {"id": "50000167", "name": "여성의류", "parent_id": "50000000", "parent_name": "패션의류", "enabled": True},
+]
+
+
+class CategoryConfigError(ValueError):
+    """categories.json 형식 오류"""
+
+
+def _normalize(entry, path):
+    try:
+        category_id, name = str(entry["id"]), entry["name"]
+    except (KeyError, TypeError):
+        raise CategoryConfigError(f"{path}: 카테고리 항목에 id/name 이 없습니다: {entry!r}")
+    parent_id = str(entry["parent_id"]) if entry.get("parent_id") else None
+    category = {
+        "id": category_id,
+        "name": name,
+        "parent_id": parent_id,
+        "parent_name": entry.get("parent_name"),
+        "enabled": bool(entry.get("enabled", True)),
+    }
+    if parent_id:
+        category["parent_selector"] = FIRST_LEVEL_OPTION_SELECTOR.format(parent_id)
+        category["selector"] = entry.get("selector") or SECOND_LEVEL_OPTION_SELECTOR.format(category_id)
+    else:
+        category["parent_selector"] = None
+        category["selector"] = entry.get("selector") or FIRST_LEVEL_OPTION_SELECTOR.format(category_id)
+    return category
+
+
+def load_categories(path=None, include_disabled=False):
+    """카테고리 목록 [{"id", "name", "parent_id", "parent_name", "enabled", "selector", "parent_selector"}, ...]"""
+    path = path or CATEGORIES_FILE
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        logging.getLogger().warning(f"경고: {path} 가 없어 기본 카테고리({', '.join(c['name'] for c in DEFAULT_CATEGORIES)})를 사용합니다.")
+        data = DEFAULT_CATEGORIES
+    except json.JSONDecodeError as e:
+        raise CategoryConfigError(f"{path}: JSON 형식 오류: {e}")
+    entries = data.get("categories", []) if isinstance(data, dict) else data
+    categories, seen = [], set()
+    for entry in entries:
+        category = _normalize(entry, path)
+        if category["id"] in seen:
+            raise CategoryConfigError(f"{path}: 카테고리 ID 중복: {category['id']}")
+        seen.add(category["id"])
+        if include_disabled or category["enabled"]:
+            categories.append(category)
+    if not include_disabled and not categories:
+        logging.getLogger().warning(f"경고: {path} 에 수집할(enabled) 카테고리가 없습니다.")
+    return categories
+
+
+def select_categories(categories, category_ids):
+    """category_ids 로 걸러낸 목록 (None 이면 그대로, 목록에 없는 ID 가 있으면 CategoryConfigError)"""
+    if not category_ids:
+        return categories
+    by_id = {c["id"]: c for c in load_categories(include_disabled=True)}
+    by_id.update({c["id"]: c for c in categories})
+    unknown = [category_id for category_id in category_ids if category_id not in by_id]
+    if unknown:
+        raise CategoryConfigError(f"{CATEGORIES_FILE} 에 없는 카테고리 ID: {', '.join(unknown)}")
+    return [by_id[category_id] for category_id in category_ids]
@@ -1,22 +1,34 @@
 import os
+import json
+import time
+import hashlib
 import datetime
+import threading
 import subprocess
 import psutil
-from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+import numpy as np
+import anyio
+from fastapi import FastAPI, Request, HTTPException, Query
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 import psycopg2
 from psycopg2.extras import DictCursor
+from cachetools import TTLCache
+import db # 공유 연결 풀 (데이터베이스 접속 정보는 db.py 에서 환경 변수로 설정)
+import run_status # 스크래퍼가 기록하는 실행 상태 파일
+import analytics # 순위 변동 (keyword_rank_deltas) 조회
+import anomaly # 급상승/급락 감지 결과 (keyword_anomalies) 조회
+import forecast # 순위 예측 결과 (keyword_forecasts) 조회
+import keyword_families # 키워드 묶음 (표기만 다른 키워드) 순위 집계 조회
+import rank_matrix # (키워드 × 날짜) 순위 행렬 기반 추세 조회 (Postgres 사용 안 함)
+import keyword_index # 키워드별 순위 이력 역색인, 어휘 검색 (자동 완성)
+import data_export # 기간 단위 대량 내보내기 (CSV / NDJSON / Parquet)
+import categories as category_registry # 수집 대상 카테고리 목록 (categories.json)
+import metrics # Prometheus 텍스트 형식 지표 (/metrics)
 
 # --- 설정 ---
-# 데이터베이스 접속 정보 (환경 변수 사용 권장)
-DB_HOST = os.environ.get("DB_HOST", "192.168.1.148")
-DB_NAME = os.environ.get("DB_NAME", "postgres")
-DB_USER = os.environ.get("DB_USER", "postgres")
-DB_PASSWORD = os.environ.get("DB_PASSWORD", "Wldms1701!!")
-DB_PORT = os.environ.get("DB_PORT", "5432")
 
 # 스크래핑 스크립트 경로 (Docker: /app, Local: /home/kkaemo/projects/keywords500)
 APP_BASE_PATH = os.environ.get("APP_BASE_PATH", "/app")
@@ -25,10 +37,87 @@ PYTHON_EXECUTABLE_PATH = os.environ.get("PYTHON_EXECUTABLE", "python")  # Docker
 
 # 로그 파일 경로
 LOG_FILE_PATH = os.path.join(APP_BASE_PATH, "scrape_run.log")
+# 실행 상태 파일 경로 (스크래퍼가 PID와 진행 상황을 기록)
+STATUS_FILE_PATH = os.path.join(APP_BASE_PATH, run_status.STATUS_FILE)
+# 스크래퍼 지표 스냅샷 경로 (스크래퍼가 주기적으로 기록, /metrics 에 이어 붙임)
+SCRAPER_METRICS_FILE_PATH = os.path.join(APP_BASE_PATH, metrics.METRICS_FILE)
+
+# 순위 행렬 경로 (rank_matrix.py build 로 생성)
+RANK_MATRIX_PATH = os.path.join(APP_BASE_PATH, rank_matrix.RANK_MATRIX_DIR)
+
+# 스레드에서 실행하는 블로킹 작업의 동시 실행 한도
+# DB 작업은 연결 풀 크기를 넘지 않게 하여 스레드가 풀 대기로 묶이지 않도록 함
+DB_CONCURRENCY = int(os.environ.get("DASHBOARD_DB_CONCURRENCY", str(db.DB_POOL_MAX)))
+IO_CONCURRENCY = int(os.environ.get("DASHBOARD_IO_CONCURRENCY", "4")) # 로그 파일 읽기, 프로세스 조회/제어
+
+# 대량 내보내기는 풀과 별도의 전용 연결을 쓰므로 동시에 실행할 수 있는 개수를 따로 제한
+EXPORT_CONCURRENCY = int(os.environ.get("DASHBOARD_EXPORT_CONCURRENCY", "2"))
+
+# 로그 읽기/스트리밍 설정
+LOG_TAIL_BLOCK_SIZE = 8192 # 파일 끝에서부터 거꾸로 읽는 단위 (바이트)
+LOG_MAX_TAIL_LINES = 2000 # /api/logs 한 번에 반환하는 최대 줄 수
+LOG_STREAM_POLL_SECONDS = 1.0 # 새 로그 확인 주기
+LOG_STREAM_HEARTBEAT_SECONDS = 15 # 새 로그가 없을 때 연결 유지용 주석 전송 주기
+LOG_STREAM_MAX_CHUNK = 256 * 1024 # 한 이벤트로 보내는 최대 바이트
+
+# 카테고리 선택 목록 (수집 대상으로 설정된 카테고리, 첫 번째가 기본 선택)
+CATEGORIES = category_registry.load_categories()
+
+# 날짜/키워드 응답 캐시 설정
+DEFAULT_CATEGORY_ID = "50000169" # 남성의류
+CACHE_TTL_SECONDS = int(os.environ.get("DASHBOARD_CACHE_TTL", "300")) # 알림을 놓쳐도 이 시간 뒤에는 다시 조회
+CACHE_MAX_ENTRIES = int(os.environ.get("DASHBOARD_CACHE_SIZE", "256"))
+
+# 키워드 이력/검색 설정
+SEARCH_MAX_RESULTS = 50
+KEYWORD_INDEX_PRELOAD = [c for c in os.environ.get("DASHBOARD_KEYWORD_INDEX_PRELOAD", DEFAULT_CATEGORY_ID).split(",") if c]
 
 # FastAPI 앱 설정
 app = FastAPI(title="Keyword Dashboard")
 
+# --- 지표 (/metrics) ---
+METRICS = metrics.Registry()
+REQUEST_SECONDS = METRICS.histogram("dashboard_http_request_duration_seconds",
+                                    "경로별 응답 시간 (스트리밍 응답은 응답 헤더 전송까지)", ["route", "method", "status"])
+DB_QUERY_SECONDS = METRICS.histogram("dashboard_db_query_duration_seconds",
+                                     "스레드에서 실행한 DB 조회 시간 (연결 획득 포함)", ["query"])
+POOL_CONNECTIONS = METRICS.gauge("dashboard_db_pool_connections", "연결 풀 연결 수 (max / in_use / idle / waiting)", ["state"])
+POOL_EVENTS = METRICS.counter("dashboard_db_pool_events_total", "연결 풀 누적 이벤트 (acquired / timeouts / healthcheck_failures)", ["event"])
+POOL_ACQUIRE_MS = METRICS.gauge("dashboard_db_pool_acquire_latency_ms", "최근 연결 획득 지연 (avg / p50 / p99 / max, ms)", ["stat"])
+SCRAPER_METRICS_UPDATED = METRICS.gauge("dashboard_scraper_metrics_timestamp_seconds", "마지막 스크래퍼 지표 기록 시각 (Unix 시간)")
+
+class RequestMetricsMiddleware:
+    """요청마다 경로(라우트 템플릿)별 응답 시간 기록. 라우트가 없는 요청(없는 경로, 정적 파일)은 unmatched 로 묶어 레이블 수를 제한"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        recorded = False
+
+        def record(status):
+            nonlocal recorded
+            recorded = True
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(time.perf_counter() - started, route=getattr(route, "path", "unmatched"),
+                                    method=scope["method"], status=status)
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start" and not recorded:
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            if not recorded: # 응답을 시작하기 전에 예외로 끝난 요청
+                record(500)
+
+app.add_middleware(RequestMetricsMiddleware)
+
 # --- Pydantic 모델 정의 ---
 class ScrapeRequest(BaseModel):
     start_date: str | None = None
@@ -38,92 +127,638 @@ class ScrapeRequest(BaseModel):
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
-# --- 데이터베이스 연결 함수 ---
-def get_db_connection():
-    conn = psycopg2.connect(
-        host=DB_HOST,
-        database=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        port=DB_PORT
-    )
-    return conn
+# --- 데이터베이스 연결 ---
+# 요청마다 새로 연결하지 않고 db.get_connection()으로 공유 풀에서 빌려 씀
+@app.on_event("shutdown")
+def close_db_pool():
+    db.close_pool()
+
+# --- 블로킹 작업 실행 (이벤트 루프 차단 방지) ---
+# psycopg2 쿼리, psutil 프로세스 조회, 파일 읽기는 모두 블로킹이므로 async 엔드포인트에서 직접 호출하면
+# 그동안 다른 요청이 멈춤. 스레드에서 실행하고 종류별 CapacityLimiter로 동시 실행 수를 제한함
+_limiters = {}
+
+@app.on_event("startup")
+async def create_limiters():
+    # anyio 리미터는 실행 중인 이벤트 루프가 필요하므로 시작 시점에 생성
+    _limiters["db"] = anyio.CapacityLimiter(DB_CONCURRENCY)
+    _limiters["io"] = anyio.CapacityLimiter(IO_CONCURRENCY)
+    _limiters["export"] = anyio.CapacityLimiter(EXPORT_CONCURRENCY)
+
+def _timed_db_call(func, *args):
+    started = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        DB_QUERY_SECONDS.observe(time.perf_counter() - started, query=getattr(func, "__name__", "unknown"))
+
+async def run_db(func, *args):
+    """DB 작업을 스레드에서 실행 (리미터 대기를 뺀 실행 시간을 조회 함수 이름별로 기록)"""
+    return await anyio.to_thread.run_sync(_timed_db_call, func, *args, limiter=_limiters["db"])
+
+async def run_io(func, *args):
+    """파일/프로세스 작업을 스레드에서 실행"""
+    return await anyio.to_thread.run_sync(func, *args, limiter=_limiters["io"])
+
+# --- 날짜/키워드 응답 캐시 ---
+# (category_id, 날짜) -> (JSON 본문, ETag). 날짜 목록은 (category_id, None) 키에 저장.
+# 스크래퍼가 저장을 커밋하면 보내는 NOTIFY를 전용 스레드에서 받아 해당 항목을 무효화하고,
+# 같은 응답을 다시 요청하면 If-None-Match 로 304를 돌려주어 DB 조회도 본문 전송도 하지 않음
+_response_cache = TTLCache(maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+_cache_lock = threading.Lock()
+_cache_generation = 0 # 무효화할 때마다 증가 (조회 중에 무효화된 결과를 캐시에 넣지 않기 위함)
+_listener_stop = threading.Event()
+
+def invalidate_cache(category_id=None, date_str=None):
+    """(카테고리, 날짜) 키워드와 그 카테고리의 날짜 목록 캐시 삭제 (인자 없으면 전체 삭제)"""
+    global _cache_generation
+    with _cache_lock:
+        _cache_generation += 1
+        if category_id is None:
+            _response_cache.clear()
+        else:
+            _response_cache.pop((category_id, date_str), None)
+            _response_cache.pop((category_id, None), None)
+
+def on_keywords_changed(payload):
+    changed = db.parse_keywords_changed(payload)
+    if changed is None:
+        invalidate_cache()
+        keyword_index.reset()
+        return
+    invalidate_cache(*changed)
+    if not changed[1]:
+        return # 요약 갱신 알림: 날짜 목록만 다시 읽으면 됨
+    try:
+        keyword_index.apply_change(*changed) # 키워드 역색인에는 저장된 날짜만 다시 읽어 반영
+    except (psycopg2.Error, ValueError) as e:
+        print(f"Error updating keyword index for {payload}: {e}")
+        keyword_index.reset()
+
+def on_listener_reconnect():
+    # 끊긴 동안 놓친 알림이 있을 수 있으므로 캐시와 역색인 모두 폐기
+    invalidate_cache()
+    keyword_index.reset()
+
+@app.on_event("startup")
+def start_cache_listener():
+    _listener_stop.clear()
+    threading.Thread(
+        target=db.listen,
+        args=(db.KEYWORDS_CHANGED_CHANNEL, on_keywords_changed, _listener_stop),
+        kwargs={"on_reconnect": on_listener_reconnect},
+        name="cache-invalidator",
+        daemon=True,
+    ).start()
+
+@app.on_event("shutdown")
+def stop_cache_listener():
+    _listener_stop.set()
+
+@app.on_event("startup")
+def preload_keyword_index():
+    # 역색인은 카테고리당 한 번 전체를 읽으므로 시작할 때 백그라운드에서 미리 읽어 둠 (그동안은 DB로 조회)
+    for category_id in KEYWORD_INDEX_PRELOAD:
+        keyword_index.load_index_in_background(category_id)
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # 약한 비교: W/ 접두사는 무시
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+async def cached_json_response(request, key, loader, *args):
+    """캐시된 JSON 응답 반환 (없으면 loader(*args)를 스레드에서 실행해 채움), ETag/304 처리"""
+    with _cache_lock:
+        entry = _response_cache.get(key)
+        generation = _cache_generation
+    if entry is None:
+        data = await run_db(loader, *args)
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        entry = (body, f'"{hashlib.sha1(body).hexdigest()}"')
+        with _cache_lock:
+            if generation == _cache_generation:
+                _response_cache[key] = entry
+    body, etag = entry
+    # no-cache: 브라우저가 캐시해 두되 매번 ETag로 재검증 (저장 직후 바로 새 데이터가 보이도록)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def validate_category(category):
+    if not category.isdigit():
+        raise HTTPException(status_code=400, detail="잘못된 카테고리 ID입니다.")
+    return category
 
 # --- 헬퍼 함수: 스크립트 프로세스 찾기 ---
-def find_scrape_process():
-    """실행 중인 scrape_keywords.py 프로세스를 찾아 PID를 반환합니다."""
-    for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+# 대시보드가 직접 실행한 스크래퍼 프로세스 핸들 (cron 등 외부에서 실행한 경우는 상태 파일의 PID로 확인)
+_scrape_process = None
+_scrape_process_lock = threading.Lock()
+
+def get_scrape_state():
+    """(실행 중인 스크래퍼 PID 또는 None, 상태 파일 내용) - 전체 프로세스 목록을 훑지 않음"""
+    status = run_status.read_status(STATUS_FILE_PATH)
+    with _scrape_process_lock:
+        if _scrape_process is not None and _scrape_process.poll() is None:
+            return _scrape_process.pid, status # poll()은 종료된 자식 프로세스 회수도 겸함
+    if status and status.get("state") == run_status.STATE_RUNNING:
+        if run_status.is_process_alive(status.get("pid"), status.get("process_create_time")):
+            return status["pid"], status
+        status["state"] = run_status.STATE_INTERRUPTED # 강제 종료 등으로 완료 기록 없이 사라진 경우
+    return None, status
+
+def launch_scrape_process(cmd):
+    """스크래퍼 실행 후 핸들 보관 (직접 실행한 프로세스가 아직 실행 중이면 None)"""
+    global _scrape_process
+    with _scrape_process_lock:
+        # 동시에 들어온 실행 요청이 둘 다 실행되지 않도록 확인과 실행을 한 번에 처리
+        if _scrape_process is not None and _scrape_process.poll() is None:
+            return None
+        # 상태/로그 파일이 APP_BASE_PATH 에 생기도록 작업 디렉토리 지정
+        _scrape_process = subprocess.Popen(cmd, cwd=APP_BASE_PATH)
+        return _scrape_process
+
+def terminate_scrape_process(pid):
+    """pid 스크래퍼에 SIGTERM 전송 (직접 실행한 프로세스면 핸들 사용)"""
+    with _scrape_process_lock:
+        if _scrape_process is not None and _scrape_process.pid == pid and _scrape_process.poll() is None:
+            _scrape_process.terminate()
+            return
+    psutil.Process(pid).terminate()
+
+# --- 헬퍼 함수: 데이터 조회 (스레드에서 실행) ---
+def query_available_dates(category_id):
+    """카테고리에 데이터가 있는 날짜 목록 (최신순)"""
+    # 요약(daily_keyword_summary)에서 날짜당 한 행을 읽고, 마지막 요약 갱신 이후 저장된 최신 날짜만 원본에서 보충
+    with db.get_connection() as conn, conn.cursor() as cur:
         try:
-            # 프로세스 커맨드 라인에 스크립트 경로가 포함되어 있는지 확인
-            cmdline = proc.info.get('cmdline', [])
-            if cmdline and isinstance(cmdline, list) and SCRAPE_SCRIPT_PATH in cmdline:
-                return proc.info['pid']  # PID 반환
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            continue
-    return None  # 프로세스를 찾지 못하면 None 반환
+            # 마지막 요약 날짜를 먼저 읽어 상수로 넘김 (하위 쿼리로 두면 파티션 제외/행 수 추정이 안 되어 병렬 스캔 계획이 나옴)
+            cur.execute("SELECT MAX(scrape_date) FROM daily_keyword_summary WHERE category_id = %s;", (category_id,))
+            summarized_until = cur.fetchone()[0] or datetime.date.min
+            cur.execute(
+                "SELECT scrape_date FROM daily_keyword_summary WHERE category_id = %(category_id)s "
+                "UNION SELECT DISTINCT scrape_date FROM daily_keywords "
+                "WHERE category_id = %(category_id)s AND scrape_date > %(summarized_until)s "
+                "ORDER BY scrape_date DESC;",
+                {"category_id": category_id, "summarized_until": summarized_until}
+            )
+        except psycopg2.errors.UndefinedTable:
+            conn.rollback() # 요약 마이그레이션(0004) 전
+            cur.execute(
+                "SELECT DISTINCT scrape_date FROM daily_keywords WHERE category_id = %s ORDER BY scrape_date DESC;",
+                (category_id,)
+            )
+        dates = [row[0].strftime('%Y-%m-%d') for row in cur.fetchall()]
+    return {"category_id": category_id, "dates": dates}
+
+def query_keywords(category_id, target_date):
+    """카테고리의 지정된 날짜 [{"rank", "keyword"}, ...] (순위순)"""
+    # DictCursor를 사용하여 결과를 딕셔너리로 받음
+    with db.get_connection() as conn, conn.cursor(cursor_factory=DictCursor) as cur:
+        cur.execute(
+            "SELECT keyword_rank, keyword FROM daily_keywords "
+            "WHERE scrape_date = %s AND category_id = %s ORDER BY keyword_rank;",
+            (target_date, category_id)
+        )
+        # 결과를 JSON 직렬화 가능한 형태로 변환
+        keywords = [{"rank": row["keyword_rank"], "keyword": row["keyword"]} for row in cur.fetchall()]
+    return {"category_id": category_id, "keywords": keywords}
+
+def query_movers(category_id, target_date, direction, limit):
+    """순위 상승/하락 상위 키워드 (순위 변동 테이블이 아직 없으면 빈 목록)"""
+    try:
+        with db.get_connection() as conn:
+            movers = analytics.fetch_movers(conn, category_id, target_date, direction, limit)
+    except psycopg2.errors.UndefinedTable:
+        movers = []
+    return {"category_id": category_id, "date": target_date.strftime('%Y-%m-%d'), direction: movers}
+
+def query_anomalies(category_id, target_date, kind, limit):
+    """급상승/급락 감지 결과 (감지 테이블이 아직 없으면 빈 목록)"""
+    try:
+        with db.get_connection() as conn:
+            shown_date, anomalies = anomaly.fetch_anomalies(conn, category_id, target_date, kind, limit)
+    except psycopg2.errors.UndefinedTable:
+        shown_date, anomalies = target_date, []
+    return {"category_id": category_id, "date": shown_date.strftime('%Y-%m-%d') if shown_date else None,
+            "kind": kind, "anomalies": anomalies}
+
+def query_predicted_risers(category_id, limit):
+    """예측 상승폭 상위 키워드 (예측 테이블이 아직 없으면 빈 목록)"""
+    try:
+        with db.get_connection() as conn:
+            risers = forecast.fetch_predicted_risers(conn, category_id, limit)
+    except psycopg2.errors.UndefinedTable:
+        risers = []
+    return {"category_id": category_id, "horizon": forecast.HORIZON, "risers": risers}
+
+def query_keyword_history(category_id, keyword, date_from, date_to):
+    """키워드의 [{"date", "rank"}, ...] (메모리 역색인이 있으면 사용, 없으면 이력 인덱스로 DB 조회)"""
+    index = keyword_index.get_index(category_id)
+    if index is not None:
+        history, source = index.history(keyword, date_from, date_to), "index"
+    else:
+        keyword_index.load_index_in_background(category_id)
+        with db.get_connection() as conn:
+            history, source = keyword_index.query_history(conn, category_id, keyword, date_from, date_to), "db"
+    return {
+        "category_id": category_id,
+        "keyword": keyword,
+        "source": source,
+        "history": [{"date": d.strftime('%Y-%m-%d'), "rank": rank} for d, rank in history],
+    }
+
+def query_family_trend(category_id, keyword, date_from, date_to):
+    """키워드가 속한 묶음과 묶음의 날짜별 순위 집계 (묶음 테이블이 아직 없으면 묶음 없음)"""
+    try:
+        with db.get_connection() as conn:
+            trend = keyword_families.fetch_family_trend(conn, category_id, keyword, date_from, date_to)
+    except psycopg2.errors.UndefinedTable:
+        trend = {"family_id": None, "representative": None, "members": [], "history": []}
+    return {"category_id": category_id, "keyword": keyword, **trend}
+
+def search_keywords(category_id, query, limit):
+    """어휘 검색 결과 [{"keyword", "days"}, ...] (접두어 일치 우선)"""
+    index = keyword_index.get_index(category_id)
+    if index is not None:
+        matches, source = index.search(query, limit), "index"
+    else:
+        keyword_index.load_index_in_background(category_id)
+        with db.get_connection() as conn:
+            matches, source = keyword_index.query_search(conn, category_id, query, limit), "db"
+    return {
+        "category_id": category_id,
+        "query": query,
+        "source": source,
+        "results": [{"keyword": keyword, "days": days} for keyword, days in matches],
+    }
+
+# --- 헬퍼 함수: 순위 행렬 추세 계산 (스레드에서 실행) ---
+def _rounded(values):
+    """NaN 은 None 으로 바꾼 소수 첫째 자리 목록 (JSON 직렬화용)"""
+    return [None if value != value else round(float(value), 1) for value in values]
+
+def compute_keyword_trend(category_id, keyword, days, window, top):
+    """키워드의 최근 days 일 순위와 이동 평균, 변동성, TOP top 일수 (행렬/키워드가 없으면 None)"""
+    matrix = rank_matrix.load_cached(category_id, RANK_MATRIX_PATH)
+    if matrix is None:
+        return None
+    history = matrix.history(keyword)
+    if history is None:
+        return {"category_id": category_id, "keyword": keyword, "found": False}
+    start = max(0, matrix.n_dates - days)
+    ranks = np.asarray(history[start:])
+    collected = matrix.collected[start:]
+    ranked = ranks != rank_matrix.NOT_RANKED
+    return {
+        "category_id": category_id,
+        "keyword": keyword,
+        "found": True,
+        "dates": [str(d) for d in matrix.dates()[start:]],
+        # 순위권 밖이면 null, 수집하지 않은 날은 "collected" 가 false
+        "ranks": [int(rank) if is_ranked else None for rank, is_ranked in zip(ranks, ranked)],
+        "collected": collected.tolist(),
+        # 구간 앞부분도 이전 날짜를 포함해 계산되도록 전체 이력으로 계산 후 자름
+        "rolling_mean": _rounded(rank_matrix.rolling_mean_rank(history, window)[start:]),
+        "mean_rank": _rounded([rank_matrix.mean_rank(ranks)])[0],
+        "volatility": _rounded([rank_matrix.volatility(ranks)])[0],
+        "best_rank": int(rank_matrix.best_rank(ranks)) or None,
+        "days_ranked": int(ranked.sum()),
+        "days_in_top": int(rank_matrix.days_in_top(ranks, top)),
+        "days_collected": int(collected.sum()),
+    }
+
+def compute_trend_leaders(category_id, days, top, limit):
+    """최근 days 일 동안 TOP top 에 가장 오래 머문 키워드 (행렬이 없으면 None)"""
+    matrix = rank_matrix.load_cached(category_id, RANK_MATRIX_PATH)
+    if matrix is None:
+        return None
+    return {"category_id": category_id, "days": days, "top": top,
+            "leaders": rank_matrix.leaders(matrix, days, top, limit)}
+
+# --- 헬퍼 함수: 로그 파일 읽기 (스레드에서 실행) ---
+def read_log_tail(lines):
+    """로그 파일의 마지막 lines 줄과 파일 끝 오프셋 (파일이 없으면 None)
+
+    파일 전체를 읽지 않고 끝에서부터 블록 단위로 거꾸로 읽어, 요청한 줄 수만큼만 읽습니다.
+    반환하는 오프셋은 /api/logs/stream 에서 이어 받기 시작할 위치로 사용합니다.
+    """
+    try:
+        f = open(LOG_FILE_PATH, 'rb')
+    except FileNotFoundError:
+        return None
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        chunks = []
+        newlines = 0
+        # 마지막 줄이 개행으로 끝나면 그 개행은 줄 수에 포함하지 않음
+        while position > 0 and newlines <= lines:
+            size = min(LOG_TAIL_BLOCK_SIZE, position)
+            position -= size
+            f.seek(position)
+            chunk = f.read(size)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+    data = b"".join(reversed(chunks))
+    tail_lines = data.splitlines(keepends=True)[-lines:] if lines > 0 else []
+    return b"".join(tail_lines).decode('utf-8', errors='replace'), end
+
+def read_log_from(offset):
+    """offset 부터 새로 추가된 완전한 줄들과 다음 오프셋
+
+    파일이 잘리거나 새로 만들어져 offset 보다 작아지면 처음부터 다시 읽고 reset=True 를 반환합니다.
+    쓰는 중인 마지막 줄(개행 전)은 다음 호출에서 읽습니다. 파일이 없으면 None.
+    """
+    try:
+        f = open(LOG_FILE_PATH, 'rb')
+    except FileNotFoundError:
+        return None
+    with f:
+        size = f.seek(0, os.SEEK_END)
+        reset = size < offset
+        if reset:
+            offset = 0
+        if size == offset:
+            return "", offset, reset
+        f.seek(offset)
+        data = f.read(min(size - offset, LOG_STREAM_MAX_CHUNK))
+    complete = data.rfind(b"\n") + 1
+    if complete == 0 and len(data) < LOG_STREAM_MAX_CHUNK:
+        return "", offset, reset
+    if complete == 0:
+        complete = len(data) # 개행 없이 아주 긴 줄은 잘라서 전송
+    return data[:complete].decode('utf-8', errors='replace'), offset + complete, reset
 
 # --- API 엔드포인트 ---
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     """메인 대시보드 페이지를 렌더링합니다."""
-    return templates.TemplateResponse("index.html", {"request": request})
+    return templates.TemplateResponse("index.html", {"request": request, "categories": CATEGORIES,
+                                                     "default_category_id": DEFAULT_CATEGORY_ID})
+
+@app.get("/api/categories", response_class=JSONResponse)
+async def get_categories():
+    """수집 대상 카테고리 목록 (categories.json)"""
+    return {"default": DEFAULT_CATEGORY_ID,
+            "categories": [{key: c[key] for key in ("id", "name", "parent_id", "parent_name")} for c in CATEGORIES]}
 
 @app.get("/api/dates", response_class=JSONResponse)
-async def get_available_dates():
-    """데이터베이스에서 데이터가 있는 날짜 목록을 조회합니다."""
-    conn = None
+async def get_available_dates(request: Request, category: str = DEFAULT_CATEGORY_ID):
+    """카테고리에 데이터가 있는 날짜 목록을 조회합니다. (캐시, ETag 지원)"""
+    category = validate_category(category)
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT DISTINCT scrape_date FROM daily_keywords ORDER BY scrape_date DESC;")
-        dates = [row[0].strftime('%Y-%m-%d') for row in cur.fetchall()]
-        cur.close()
-        return {"dates": dates}
+        return await cached_json_response(request, (category, None), query_available_dates, category)
     except Exception as e:
         print(f"Error fetching dates: {e}")
         raise HTTPException(status_code=500, detail="날짜 목록 조회 중 오류 발생")
-    finally:
-        if conn:
-            conn.close()
 
 @app.get("/api/keywords/{date_str}", response_class=JSONResponse)
-async def get_keywords_by_date(date_str: str):
-    """지정된 날짜의 키워드 목록을 조회합니다."""
-    conn = None
+async def get_keywords_by_date(request: Request, date_str: str, category: str = DEFAULT_CATEGORY_ID):
+    """카테고리의 지정된 날짜 키워드 목록을 조회합니다. (캐시, ETag 지원)"""
     try:
+        category = validate_category(category)
         # 날짜 형식 검증
         try:
             target_date = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
         except ValueError:
             raise HTTPException(status_code=400, detail="잘못된 날짜 형식입니다. YYYY-MM-DD 형식을 사용하세요.")
 
-        conn = get_db_connection()
-        # DictCursor를 사용하여 결과를 딕셔너리로 받음
-        cur = conn.cursor(cursor_factory=DictCursor)
-        cur.execute(
-            "SELECT keyword_rank, keyword FROM daily_keywords WHERE scrape_date = %s ORDER BY keyword_rank;",
-            (target_date,)
-        )
-        keywords = cur.fetchall()
-        cur.close()
-        # 결과를 JSON 직렬화 가능한 형태로 변환
-        keywords_list = [{"rank": row["keyword_rank"], "keyword": row["keyword"]} for row in keywords]
-        return {"keywords": keywords_list}
+        key = (category, target_date.strftime("%Y-%m-%d"))
+        return await cached_json_response(request, key, query_keywords, category, target_date)
     except HTTPException as http_exc: # 이미 발생한 HTTP 예외는 그대로 전달
         raise http_exc
     except Exception as e:
         print(f"Error fetching keywords for {date_str}: {e}")
         raise HTTPException(status_code=500, detail="키워드 조회 중 오류 발생")
-    finally:
-        if conn:
-            conn.close()
+
+async def get_movers(date_str, category, direction, limit):
+    """상승/하락 상위 키워드 공통 처리"""
+    try:
+        category = validate_category(category)
+        try:
+            target_date = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="잘못된 날짜 형식입니다. YYYY-MM-DD 형식을 사용하세요.")
+        if not 1 <= limit <= 500:
+            raise HTTPException(status_code=400, detail="limit 은 1~500 사이여야 합니다.")
+        return await run_db(query_movers, category, target_date, direction, limit)
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        print(f"Error fetching {direction} for {date_str}: {e}")
+        raise HTTPException(status_code=500, detail="순위 변동 조회 중 오류 발생")
+
+@app.get("/api/risers/{date_str}", response_class=JSONResponse)
+async def get_top_risers(date_str: str, category: str = DEFAULT_CATEGORY_ID, limit: int = 20):
+    """전일 대비 순위가 가장 많이 오른 키워드를 조회합니다."""
+    return await get_movers(date_str, category, "risers", limit)
+
+@app.get("/api/fallers/{date_str}", response_class=JSONResponse)
+async def get_top_fallers(date_str: str, category: str = DEFAULT_CATEGORY_ID, limit: int = 20):
+    """전일 대비 순위가 가장 많이 떨어진 키워드를 조회합니다."""
+    return await get_movers(date_str, category, "fallers", limit)
+
+def parse_optional_date(value, name):
+    if not value:
+        return None
+    try:
+        return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"잘못된 {name} 날짜 형식입니다. YYYY-MM-DD 형식을 사용하세요.")
+
+@app.get("/api/anomalies", response_class=JSONResponse)
+async def get_anomalies(category: str = DEFAULT_CATEGORY_ID, date: str | None = None, kind: str | None = None, limit: int = 50):
+    """평소 순위(EWMA)에서 크게 벗어난 급상승(spike)/급락(crash) 키워드를 조회합니다. (date 생략 시 마지막 반영 날짜)"""
+    category = validate_category(category)
+    target_date = parse_optional_date(date, "date")
+    if kind not in (None, anomaly.KIND_SPIKE, anomaly.KIND_CRASH):
+        raise HTTPException(status_code=400, detail="kind 는 spike 또는 crash 여야 합니다.")
+    if not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="limit 은 1~500 사이여야 합니다.")
+    try:
+        return await run_db(query_anomalies, category, target_date, kind, limit)
+    except Exception as e:
+        print(f"Error fetching anomalies: {e}")
+        raise HTTPException(status_code=500, detail="급등락 조회 중 오류 발생")
+
+@app.get("/api/forecast/risers", response_class=JSONResponse)
+async def get_predicted_risers(category: str = DEFAULT_CATEGORY_ID, limit: int = 20):
+    """앞으로 며칠(horizon) 동안 순위가 가장 많이 오를 것으로 예측된 키워드를 조회합니다. (scrape_keywords.py forecast 로 갱신)"""
+    category = validate_category(category)
+    if not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="limit 은 1~500 사이여야 합니다.")
+    try:
+        return await run_db(query_predicted_risers, category, limit)
+    except Exception as e:
+        print(f"Error fetching predicted risers: {e}")
+        raise HTTPException(status_code=500, detail="순위 예측 조회 중 오류 발생")
+
+@app.get("/api/keyword/{keyword}/history", response_class=JSONResponse)
+async def get_keyword_history(keyword: str, category: str = DEFAULT_CATEGORY_ID,
+                              date_from: str | None = Query(None, alias="from"),
+                              date_to: str | None = Query(None, alias="to")):
+    """키워드의 날짜별 순위 이력을 한 번에 조회합니다. (from/to: YYYY-MM-DD, 생략 시 전체 기간)"""
+    category = validate_category(category)
+    start = parse_optional_date(date_from, "from")
+    end = parse_optional_date(date_to, "to")
+    keyword = keyword.strip()
+    if not keyword:
+        raise HTTPException(status_code=400, detail="키워드를 입력하세요.")
+    try:
+        return await run_db(query_keyword_history, category, keyword, start, end)
+    except Exception as e:
+        print(f"Error fetching history for {keyword}: {e}")
+        raise HTTPException(status_code=500, detail="키워드 이력 조회 중 오류 발생")
+
+@app.get("/api/keyword/{keyword}/family", response_class=JSONResponse)
+async def get_keyword_family(keyword: str, category: str = DEFAULT_CATEGORY_ID,
+                             date_from: str | None = Query(None, alias="from"),
+                             date_to: str | None = Query(None, alias="to")):
+    """키워드와 표기만 다른 키워드 묶음(띄어쓰기, 브랜드+품목 등)의 날짜별 최고/평균 순위를 조회합니다."""
+    category = validate_category(category)
+    start = parse_optional_date(date_from, "from")
+    end = parse_optional_date(date_to, "to")
+    keyword = keyword.strip()
+    if not keyword:
+        raise HTTPException(status_code=400, detail="키워드를 입력하세요.")
+    try:
+        result = await run_db(query_family_trend, category, keyword, start, end)
+    except Exception as e:
+        print(f"Error fetching family for {keyword}: {e}")
+        raise HTTPException(status_code=500, detail="키워드 묶음 조회 중 오류 발생")
+    if result["family_id"] is None:
+        raise HTTPException(status_code=404, detail="묶음에 배정되지 않은 키워드입니다. (python keyword_families.py build)")
+    return result
+
+@app.get("/api/keyword-search", response_class=JSONResponse)
+async def get_keyword_search(q: str, category: str = DEFAULT_CATEGORY_ID, limit: int = 10):
+    """지금까지 수집된 키워드 중 q 로 시작하거나 q 를 포함하는 키워드를 찾습니다. (자동 완성)"""
+    category = validate_category(category)
+    if not 1 <= limit <= SEARCH_MAX_RESULTS:
+        raise HTTPException(status_code=400, detail=f"limit 은 1~{SEARCH_MAX_RESULTS} 사이여야 합니다.")
+    query = q.strip()
+    if not query:
+        return {"category_id": category, "query": query, "source": None, "results": []}
+    try:
+        return await run_db(search_keywords, category, query, limit)
+    except Exception as e:
+        print(f"Error searching keywords for {q}: {e}")
+        raise HTTPException(status_code=500, detail="키워드 검색 중 오류 발생")
+
+@app.get("/api/trend/{keyword}", response_class=JSONResponse)
+async def get_keyword_trend(keyword: str, category: str = DEFAULT_CATEGORY_ID, days: int = 365, window: int = 7, top: int = 100):
+    """순위 행렬에서 키워드의 기간별 순위, 이동 평균, 변동성, TOP N 일수를 계산합니다. (DB 조회 없음)"""
+    category = validate_category(category)
+    if days < 1 or window < 1 or not 1 <= top <= 500:
+        raise HTTPException(status_code=400, detail="days/window 는 1 이상, top 은 1~500 이어야 합니다.")
+    try:
+        result = await run_io(compute_keyword_trend, category, keyword.strip(), days, window, top)
+    except Exception as e:
+        print(f"Error computing trend for {keyword}: {e}")
+        raise HTTPException(status_code=500, detail="추세 계산 중 오류 발생")
+    if result is None:
+        raise HTTPException(status_code=404, detail="순위 행렬이 아직 생성되지 않았습니다. (python rank_matrix.py build)")
+    return result
+
+@app.get("/api/trend-leaders", response_class=JSONResponse)
+async def get_trend_leaders(category: str = DEFAULT_CATEGORY_ID, days: int = 90, top: int = 100, limit: int = 20):
+    """최근 기간 동안 TOP N 에 가장 오래 머문 키워드를 조회합니다. (DB 조회 없음)"""
+    category = validate_category(category)
+    if days < 1 or not 1 <= top <= 500 or not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="days 는 1 이상, top/limit 은 1~500 이어야 합니다.")
+    try:
+        result = await run_io(compute_trend_leaders, category, days, top, limit)
+    except Exception as e:
+        print(f"Error computing trend leaders: {e}")
+        raise HTTPException(status_code=500, detail="추세 계산 중 오류 발생")
+    if result is None:
+        raise HTTPException(status_code=404, detail="순위 행렬이 아직 생성되지 않았습니다. (python rank_matrix.py build)")
+    return result
+
+@app.get("/api/export")
+async def export_keywords(request: Request, category: str | None = None, format: str = "csv",
+                          date_from: str | None = Query(None, alias="from"),
+                          date_to: str | None = Query(None, alias="to")):
+    """기간/카테고리의 키워드를 CSV, NDJSON, Parquet 로 스트리밍합니다.
+
+    category 는 쉼표로 여러 개를 지정할 수 있고(생략 시 전체), from/to 를 생략하면 처음/끝까지 내보냅니다.
+    서버 측 커서에서 배치 단위로 읽어 바로 보내므로 기간이 길어도 메모리 사용량이 일정합니다.
+    """
+    category_ids = [validate_category(c.strip()) for c in category.split(",") if c.strip()] if category else None
+    start = parse_optional_date(date_from, "from")
+    end = parse_optional_date(date_to, "to")
+    if format not in data_export.FORMATS:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 형식입니다: {format} ({', '.join(data_export.FORMATS)})")
+    if format not in data_export.available_formats():
+        raise HTTPException(status_code=501, detail="Parquet 내보내기에는 서버에 pyarrow 가 필요합니다.")
+    chunks = data_export.iter_export(format, category_ids, start, end) # 연결은 첫 조각을 만들 때 열림
+
+    async def stream():
+        # 동시 내보내기 수만큼만 실행 (나머지는 대기), 조각 하나(= DB 배치 하나)마다 스레드에서 만들고
+        # 클라이언트가 끊으면 서버 측 커서와 전용 연결을 바로 닫음
+        async with _limiters["export"]:
+            try:
+                while True:
+                    chunk = await anyio.to_thread.run_sync(next, chunks, None)
+                    if chunk is None:
+                        break
+                    if chunk:
+                        yield chunk
+            except Exception as e:
+                print(f"Error exporting keywords: {e}") # 헤더를 이미 보냈으므로 응답을 중간에 끊는 것으로 알림
+                raise
+            finally:
+                with anyio.CancelScope(shield=True):
+                    await anyio.to_thread.run_sync(chunks.close)
+
+    media_type, extension = data_export.FORMATS[format]
+    name = "_".join(["keywords", "-".join(category_ids) if category_ids else "all",
+                     start.isoformat() if start else "begin", end.isoformat() if end else "end"])
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{extension}"', "Cache-Control": "no-store"}
+    return StreamingResponse(stream(), media_type=media_type, headers=headers)
+
+@app.get("/api/db-pool", response_class=JSONResponse)
+async def get_db_pool_metrics():
+    """데이터베이스 연결 풀 지표 (사용 중/대기 중 연결 수, 획득 지연 등)를 반환합니다."""
+    metrics = db.pool_metrics()
+    if metrics is None:
+        return {"initialized": False}
+    return {"initialized": True, **metrics}
+
+def update_pool_metrics():
+    """연결 풀 지표를 /metrics 게이지에 반영"""
+    pool = db.pool_metrics()
+    if pool is None:
+        return
+    for state in ("max", "in_use", "idle", "waiting"):
+        POOL_CONNECTIONS.set(pool[state], state=state)
+    for event in ("acquired", "timeouts", "healthcheck_failures"):
+        POOL_EVENTS.set_total(pool[f"{event}_total"], event=event)
+    for stat, value in pool["acquire_latency_ms"].items():
+        POOL_ACQUIRE_MS.set(value, stat=stat)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus 텍스트 형식 지표: 대시보드(경로별 응답 시간, DB 조회 시간, 연결 풀)와 스크래퍼(마지막 실행)"""
+    update_pool_metrics()
+    scraper_snapshot = await run_io(metrics.read_snapshot, SCRAPER_METRICS_FILE_PATH)
+    if scraper_snapshot:
+        SCRAPER_METRICS_UPDATED.set(round(scraper_snapshot.get("timestamp", 0), 3))
+    body = METRICS.render()
+    if scraper_snapshot:
+        body += metrics.render_snapshot(scraper_snapshot)
+    return Response(body, media_type=metrics.CONTENT_TYPE)
 
 @app.get("/api/status", response_class=JSONResponse)
 async def get_scrape_status():
-    """스크래핑 스크립트 실행 상태와 PID를 확인합니다."""
-    pid = find_scrape_process()
-    return {"is_running": pid is not None, "pid": pid}
+    """스크래핑 스크립트 실행 상태와 PID, 진행 상황(현재 날짜/카테고리/페이지/수집 키워드 수)을 반환합니다."""
+    pid, progress = await run_io(get_scrape_state)
+    return {"is_running": pid is not None, "pid": pid, "progress": progress}
 
 @app.post("/api/run-scrape", response_class=JSONResponse)
 async def run_scrape_script(scrape_request: ScrapeRequest):
@@ -152,7 +787,9 @@ async def run_scrape_script(scrape_request: ScrapeRequest):
 
         print(f"Executing command: {' '.join(cmd)}")
         # 백그라운드에서 스크립트 실행
-        process = subprocess.Popen(cmd)
+        process = await run_io(launch_scrape_process, cmd)
+        if process is None:
+            raise HTTPException(status_code=409, detail="스크립트가 이미 실행 중입니다.")
         print(f"스크립트 프로세스 시작됨 (PID: {process.pid})")
         return {"message": "스크립트 실행을 시작했습니다.", "command": " ".join(cmd), "pid": process.pid}
     except HTTPException as http_exc:
@@ -166,7 +803,7 @@ async def run_scrape_script(scrape_request: ScrapeRequest):
 async def stop_scrape_script():
     """실행 중인 스크래핑 스크립트를 중지합니다."""
     print("스크립트 중지 API 호출됨") # 로그 추가
-    pid = find_scrape_process()
+    pid, _ = await run_io(get_scrape_state)
     print(f"찾은 프로세스 PID: {pid}") # 로그 추가
     
     if pid is None:
@@ -174,9 +811,8 @@ async def stop_scrape_script():
         raise HTTPException(status_code=404, detail="실행 중인 스크립트를 찾을 수 없습니다.")
     
     try:
-        process = psutil.Process(pid)
         print(f"프로세스(PID: {pid}) 종료 시도...") # 로그 추가
-        process.terminate() # SIGTERM 전송 (대부분의 OS에서 작동)
+        await run_io(terminate_scrape_process, pid) # SIGTERM 전송 (대부분의 OS에서 작동)
         print(f"스크립트 프로세스(PID: {pid})에 종료 신호(SIGTERM)를 보냈습니다.")
         return {"message": f"스크립트(PID: {pid})에 중지 신호를 보냈습니다. 잠시 후 상태를 확인하세요."}
     
@@ -189,24 +825,54 @@ async def stop_scrape_script():
 
 @app.get("/api/logs", response_class=JSONResponse)
 async def get_latest_logs(lines: int = 100):
-    """로그 파일의 최신 내용을 지정된 줄 수만큼 반환합니다."""
-    try:
-        if not os.path.exists(LOG_FILE_PATH):
-            return {"logs": "로그 파일이 아직 생성되지 않았습니다."}
-
-        with open(LOG_FILE_PATH, 'r', encoding='utf-8') as f:
-            # 파일의 마지막 N 라인을 효율적으로 읽기 (큰 파일 고려)
-            log_lines = f.readlines()
-            # 최신 로그가 아래에 추가되므로 마지막 N 라인을 가져옴
-            latest_logs = log_lines[-lines:] 
-        
-        # 리스트를 하나의 문자열로 합침 (개행 유지)
-        log_content = "".join(latest_logs)
-        return {"logs": log_content}
+    """로그 파일의 최신 내용을 지정된 줄 수만큼 반환합니다. (offset: 스트림을 이어 받을 위치)"""
+    try:
+        result = await run_io(read_log_tail, max(0, min(lines, LOG_MAX_TAIL_LINES)))
+        if result is None:
+            return {"logs": "로그 파일이 아직 생성되지 않았습니다.", "offset": 0}
+        log_content, offset = result
+        return {"logs": log_content, "offset": offset}
     except Exception as e:
         print(f"Error reading log file: {e}")
         raise HTTPException(status_code=500, detail="로그 파일 읽기 중 오류 발생")
 
+@app.get("/api/logs/stream")
+async def stream_logs(request: Request, offset: int = 0):
+    """offset 이후 새로 추가되는 로그 줄을 Server-Sent Events 로 전송합니다.
+
+    각 이벤트의 id 는 다음 오프셋이므로, 연결이 끊기면 브라우저(EventSource)가
+    Last-Event-ID 헤더로 이어 받을 위치를 알려 줍니다.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        offset = int(last_event_id)
+    offset = max(0, offset)
+
+    async def event_stream():
+        nonlocal offset
+        idle = 0.0
+        yield "retry: 3000\n\n"
+        while not await request.is_disconnected():
+            try:
+                result = await run_io(read_log_from, offset)
+            except OSError as e:
+                print(f"Error streaming log file: {e}")
+                result = None
+            if result is not None and (result[0] or result[2]):
+                text, offset, reset = result
+                payload = json.dumps({"lines": text, "reset": reset}, ensure_ascii=False)
+                yield f"id: {offset}\ndata: {payload}\n\n"
+                idle = 0.0
+                continue # 밀린 로그가 더 있으면 바로 이어서 전송
+            idle += LOG_STREAM_POLL_SECONDS
+            if idle >= LOG_STREAM_HEARTBEAT_SECONDS:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            await anyio.sleep(LOG_STREAM_POLL_SECONDS)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=headers)
+
 # --- Uvicorn 실행 (개발용) ---
 # 터미널에서 직접 실행: uvicorn dashboard:app --reload
 # if __name__ == "__main__":
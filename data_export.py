@@ -0,0 +1,180 @@
+# coding: utf-8
+# 기간 단위 대량 내보내기: daily_keywords 를 서버 측 커서로 나눠 읽어 CSV / NDJSON / Parquet 바이트 조각으로 생성
+#
+# 결과 전체를 메모리에 만들지 않고 EXPORT_BATCH_ROWS 행씩 읽어 바로 인코딩하므로, 여러 해 × 여러 카테고리를
+# 내보내도 메모리 사용량은 배치 하나 크기로 일정합니다. 대시보드 /api/export 가 이 조각들을 그대로 스트리밍합니다.
+# 정렬은 (scrape_date, keyword_rank, category_id) 고유 인덱스 순서라 정렬 없이 첫 행부터 바로 보냅니다.
+#
+# 명령줄: python data_export.py --from 2023-01-01 --to 2024-12-31 [--category 50000169] --format parquet -o out.parquet
+
+import io
+import csv
+import sys
+import json
+import logging
+import argparse
+import datetime
+
+import db
+
+try: # Parquet 는 pyarrow 가 설치된 경우에만 지원
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+EXPORT_BATCH_ROWS = 50000 # 서버 측 커서에서 한 번에 읽는 행 수 (Parquet 는 배치 하나가 row group 하나)
+COLUMNS = ["scrape_date", "category_id", "keyword_rank", "keyword"]
+
+FORMATS = {
+    # 형식 -> (Content-Type, 확장자)
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def available_formats():
+    """현재 환경에서 사용할 수 있는 형식 목록"""
+    return [name for name in FORMATS if name != "parquet" or pq is not None]
+
+
+def iter_batches(conn, category_ids=None, date_from=None, date_to=None, batch_rows=EXPORT_BATCH_ROWS):
+    """[(scrape_date, category_id, keyword_rank, keyword), ...] 배치를 차례로 생성 (서버 측 커서)"""
+    with conn.cursor(name="data_export") as cur:
+        cur.execute(
+            "SELECT scrape_date, category_id, keyword_rank, keyword FROM daily_keywords "
+            "WHERE (%s::text[] IS NULL OR category_id = ANY(%s)) "
+            "AND (%s::date IS NULL OR scrape_date >= %s) AND (%s::date IS NULL OR scrape_date <= %s) "
+            "ORDER BY scrape_date, keyword_rank, category_id;",
+            (category_ids, category_ids, date_from, date_from, date_to, date_to)
+        )
+        while True:
+            rows = cur.fetchmany(batch_rows)
+            if not rows:
+                break
+            yield rows
+
+
+def encode_csv(batches):
+    """CSV 바이트 조각 (save_to_csv 백업과 같이 Excel 호환용 BOM 포함)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows((scrape_date.isoformat(), category_id, rank, keyword)
+                         for scrape_date, category_id, rank, keyword in rows)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def encode_ndjson(batches):
+    """한 줄에 JSON 객체 하나"""
+    for rows in batches:
+        yield "".join(
+            json.dumps({"scrape_date": scrape_date.isoformat(), "category_id": category_id,
+                        "keyword_rank": rank, "keyword": keyword}, ensure_ascii=False) + "\n"
+            for scrape_date, category_id, rank, keyword in rows
+        ).encode("utf-8")
+
+
+class _ChunkSink:
+    """ParquetWriter 가 쓴 바이트를 모아 두었다가 꺼내 가는 쓰기 전용 파일 객체"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def encode_parquet(batches):
+    """Parquet 바이트 조각 (배치마다 row group 하나를 써서 바로 내보냄)"""
+    if pq is None:
+        raise RuntimeError("Parquet 내보내기에는 pyarrow 가 필요합니다 (pip install pyarrow).")
+    schema = pa.schema([
+        ("scrape_date", pa.date32()),
+        ("category_id", pa.string()),
+        ("keyword_rank", pa.int16()),
+        ("keyword", pa.string()),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for rows in batches:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close() # 파일 끝 메타데이터 (중간에 끊겨도 writer 는 닫음)
+    yield sink.drain()
+
+
+ENCODERS = {"csv": encode_csv, "ndjson": encode_ndjson, "parquet": encode_parquet}
+
+
+def iter_export(fmt, category_ids=None, date_from=None, date_to=None, conn=None):
+    """형식 fmt 의 내보내기 바이트 조각 생성
+
+    conn 을 주지 않으면 공유 풀을 쓰지 않는 전용 연결을 열고, 끝나거나 중간에 닫히면(close) 연결도 닫습니다.
+    내보내기는 오래 걸릴 수 있으므로 전용 연결에는 statement_timeout 을 적용하지 않습니다.
+    """
+    if conn is None:
+        conn = db.connect_unpooled(statement_timeout_ms=0)
+        try:
+            yield from iter_export(fmt, category_ids, date_from, date_to, conn)
+        finally:
+            conn.close()
+        return
+    yield from ENCODERS[fmt](iter_batches(conn, category_ids, date_from, date_to))
+    conn.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="daily_keywords 기간 내보내기 (CSV / NDJSON / Parquet)")
+    parser.add_argument("--from", dest="date_from", default=None, help="시작 날짜 (YYYY-MM-DD, 기본: 처음부터)")
+    parser.add_argument("--to", dest="date_to", default=None, help="종료 날짜 (YYYY-MM-DD, 기본: 끝까지)")
+    parser.add_argument("--category", action="append", help="카테고리 ID (여러 번 지정 가능, 기본: 전체)")
+    parser.add_argument("--format", choices=list(FORMATS), default="csv", help="출력 형식 (기본: csv)")
+    parser.add_argument("-o", "--output", required=True, help="출력 파일 경로 (- 이면 표준 출력)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.format not in available_formats():
+        logging.error("오류: Parquet 내보내기에는 pyarrow 가 필요합니다 (pip install pyarrow).")
+        sys.exit(1)
+    try:
+        start = datetime.datetime.strptime(args.date_from, "%Y-%m-%d").date() if args.date_from else None
+        end = datetime.datetime.strptime(args.date_to, "%Y-%m-%d").date() if args.date_to else None
+    except ValueError:
+        logging.error("오류: 날짜 형식이 잘못되었습니다. YYYY-MM-DD 형식으로 입력해주세요.")
+        sys.exit(1)
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    written = 0
+    with out:
+        for chunk in iter_export(args.format, args.category, start, end):
+            out.write(chunk)
+            written += len(chunk)
+    logging.info(f"내보내기 완료: {args.output} ({written:,} bytes)")
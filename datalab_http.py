@@ -0,0 +1,158 @@
+# coding: utf-8
+# 데이터랩 쇼핑인사이트 인기검색어 JSON 엔드포인트를 직접 호출하는 수집기 (브라우저 없이 동작)
+#
+# 데이터랩 화면의 순위 목록은 getCategoryKeywordRank.naver 에 폼 데이터를 POST 하여 받아오며,
+# 한 번에 20개씩 25페이지로 TOP 500을 제공합니다.
+# 오프라인 테스트를 위해 응답을 파일로 기록(record)하거나 기록된 파일로 재생(replay)할 수 있고,
+# DATALAB_BASE_URL 을 로컬 대체 서버로 바꿔 실행할 수도 있습니다.
+
+import os
+import json
+import logging
+import requests
+from requests.adapters import HTTPAdapter, BaseAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import parse_qs
+
+# --- 설정 ---
+DATALAB_BASE_URL = os.environ.get("DATALAB_BASE_URL", "https://datalab.naver.com")
+RANK_ENDPOINT_PATH = "/shoppingInsight/getCategoryKeywordRank.naver"
+REFERER_PATH = "/shoppingInsight/sCategory.naver"
+PAGE_SIZE = 20 # 페이지당 키워드 수 (사이트 최대값)
+REQUEST_TIMEOUT_SECONDS = 15
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
+
+
+class DataLabHttpError(Exception):
+    """JSON 엔드포인트 응답이 비정상일 때 발생"""
+
+
+def create_session(pool_size=4, retries=3):
+    """연결을 재사용하는 requests.Session 생성 (일시적 5xx/연결 오류는 지수 백오프로 재시도)"""
+    session = requests.Session()
+    retry = Retry(
+        total=retries,
+        backoff_factor=1.0,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "POST"]),
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Referer": DATALAB_BASE_URL + REFERER_PATH,
+        "X-Requested-With": "XMLHttpRequest",
+        "Accept": "application/json, text/javascript, */*; q=0.01",
+    })
+    return session
+
+
+def build_rank_request(category_id, target_date, ages, page):
+    """순위 요청 폼 데이터 (화면에서 '일간' + 시작일=종료일 + 연령대 선택과 동일)"""
+    date_str = target_date.strftime("%Y-%m-%d")
+    return {
+        "cid": category_id,
+        "timeUnit": "date",
+        "startDate": date_str,
+        "endDate": date_str,
+        "age": ",".join(ages),
+        "gender": "",
+        "device": "",
+        "page": page,
+        "count": PAGE_SIZE,
+    }
+
+
+def fetch_rank_page(session, category_id, target_date, ages, page, before_request=None):
+    """한 페이지(20개)의 (순위, 키워드) 목록 조회"""
+    if before_request is not None:
+        before_request() # 전역 요청 속도 제한 등
+    response = session.post(
+        DATALAB_BASE_URL + RANK_ENDPOINT_PATH,
+        data=build_rank_request(category_id, target_date, ages, page),
+        timeout=REQUEST_TIMEOUT_SECONDS,
+    )
+    response.raise_for_status()
+    try:
+        payload = response.json()
+    except ValueError:
+        raise DataLabHttpError(f"JSON이 아닌 응답 (page {page}): {response.text[:200]}")
+    ranks = payload.get("ranks")
+    if ranks is None:
+        raise DataLabHttpError(f"응답에 ranks 항목이 없음 (page {page}): {str(payload)[:200]}")
+    return [(int(item["rank"]), item["keyword"].strip()) for item in ranks if item.get("keyword")]
+
+
+def fetch_top_keywords(session, category_id, target_date, ages, max_pages=25, before_request=None, on_page=None):
+    """(카테고리, 날짜, 연령대)의 TOP 500을 [(순위, 키워드), ...] 순위순으로 반환 (on_page(페이지, 행 목록): 페이지마다 호출)"""
+    logger = logging.getLogger()
+    ranked = {}
+    for page in range(1, max_pages + 1):
+        rows = fetch_rank_page(session, category_id, target_date, ages, page, before_request)
+        if on_page is not None:
+            on_page(page, rows) # 수집 지표 등
+        if not rows:
+            logger.info(f"  > {page} 페이지 결과 없음, 수집 종료.")
+            break
+        for rank, keyword in rows:
+            ranked.setdefault(rank, keyword)
+        if len(rows) < PAGE_SIZE:
+            break # 마지막 페이지
+    return sorted(ranked.items())
+
+
+# --- 응답 기록/재생 (오프라인 테스트용) ---
+def fixture_filename(form):
+    """기록 파일명: {cid}_{startDate}_p{page}.json"""
+    return f"{form['cid']}_{form['startDate']}_p{form['page']}.json"
+
+
+def record_responses(session, fixture_dir):
+    """세션의 순위 응답을 fixture_dir 에 파일로 기록 (이후 FixtureAdapter 로 재생 가능)"""
+    os.makedirs(fixture_dir, exist_ok=True)
+
+    def _save(response, *args, **kwargs):
+        if response.ok and RANK_ENDPOINT_PATH in response.url:
+            form = {k: v[0] for k, v in parse_qs(response.request.body or "").items()}
+            with open(os.path.join(fixture_dir, fixture_filename(form)), "w", encoding="utf-8") as f:
+                f.write(response.text)
+        return response
+
+    session.hooks["response"].append(_save)
+    return session
+
+
+class FixtureAdapter(BaseAdapter):
+    """기록된 JSON 파일로 순위 요청에 응답하는 requests 어댑터 (네트워크 사용 안 함)"""
+
+    def __init__(self, fixture_dir):
+        super().__init__()
+        self.fixture_dir = fixture_dir
+
+    def send(self, request, **kwargs):
+        form = {k: v[0] for k, v in parse_qs(request.body or "").items()}
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        path = os.path.join(self.fixture_dir, fixture_filename(form)) if "cid" in form else None
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                response._content = f.read()
+            response.status_code = 200
+            response.headers["Content-Type"] = "application/json;charset=UTF-8"
+        else:
+            # 기록이 없는 페이지는 빈 결과로 응답 (마지막 페이지 이후와 동일)
+            response._content = json.dumps({"ranks": []}).encode("utf-8")
+            response.status_code = 200
+        response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        pass
+
+
+def use_fixtures(session, fixture_dir):
+    """세션이 네트워크 대신 기록된 파일에서 응답하도록 설정"""
+    session.mount(DATALAB_BASE_URL, FixtureAdapter(fixture_dir))
+    return session
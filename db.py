@@ -0,0 +1,294 @@
+# coding: utf-8
+# dashboard.py 와 scrape_keywords.py 가 함께 사용하는 데이터베이스 접근 모듈
+#
+# 요청/저장마다 새로 연결하지 않도록 크기가 제한된 연결 풀을 프로세스당 하나 유지합니다.
+# - 풀이 가득 차면 DB_POOL_ACQUIRE_TIMEOUT 초까지 대기 후 PoolTimeout 발생
+# - 일정 시간 이상 쉬던 연결은 꺼내기 전에 SELECT 1 로 상태 확인 (끊긴 연결은 교체)
+# - 모든 연결에 statement_timeout 적용
+# - 사용 중/대기 중 연결 수와 획득 지연 시간 등 풀 지표 제공 (pool_metrics)
+# - 키워드 저장 알림 (NOTIFY/LISTEN): 스크래퍼가 저장을 커밋하면 대시보드가 캐시를 무효화
+
+import os
+import time
+import select
+import logging
+import threading
+import contextlib
+from collections import deque
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import PoolError
+
+# --- PostgreSQL 접속 정보 ---
+# 환경 변수에서 읽거나 기본값 사용
+DB_HOST = os.environ.get("DB_HOST", "192.168.1.148")
+DB_NAME = os.environ.get("DB_NAME", "postgres")
+DB_USER = os.environ.get("DB_USER", "postgres")
+DB_PASSWORD = os.environ.get("DB_PASSWORD", "Wldms1701!!")
+DB_PORT = os.environ.get("DB_PORT", "5432")
+
+# --- 연결 풀 설정 ---
+DB_POOL_MIN = int(os.environ.get("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", "10"))
+DB_POOL_ACQUIRE_TIMEOUT = float(os.environ.get("DB_POOL_ACQUIRE_TIMEOUT", "10")) # 연결 획득 최대 대기 (초)
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "30000")) # 쿼리 최대 실행 시간 (ms)
+DB_HEALTHCHECK_IDLE_SECONDS = float(os.environ.get("DB_HEALTHCHECK_IDLE_SECONDS", "30")) # 이 시간 이상 쉰 연결은 확인 후 사용
+DB_CONNECT_TIMEOUT = int(os.environ.get("DB_CONNECT_TIMEOUT", "5"))
+
+LATENCY_WINDOW = 1000 # 획득 지연 통계에 사용할 최근 표본 수
+
+# --- 변경 알림 ---
+KEYWORDS_CHANGED_CHANNEL = "daily_keywords_changed" # payload: "{category_id}:{YYYY-MM-DD}" (날짜가 비면 요약 갱신)
+LISTEN_RECONNECT_SECONDS = 5
+
+
+class PoolTimeout(PoolError):
+    """풀이 가득 찬 상태로 대기 시간이 지나 연결을 얻지 못함 (psycopg2.Error 하위 클래스)"""
+
+
+class ConnectionPool:
+    """크기 제한 + 대기 + 상태 확인 + 지표 수집을 추가한 스레드 안전 연결 풀"""
+
+    def __init__(self, minconn=DB_POOL_MIN, maxconn=DB_POOL_MAX, acquire_timeout=DB_POOL_ACQUIRE_TIMEOUT,
+                 statement_timeout_ms=DB_STATEMENT_TIMEOUT_MS, healthcheck_idle_seconds=DB_HEALTHCHECK_IDLE_SECONDS,
+                 **connect_kwargs):
+        self.maxconn = maxconn
+        self.acquire_timeout = acquire_timeout
+        self.healthcheck_idle_seconds = healthcheck_idle_seconds
+        connect_kwargs.setdefault("host", DB_HOST)
+        connect_kwargs.setdefault("database", DB_NAME)
+        connect_kwargs.setdefault("user", DB_USER)
+        connect_kwargs.setdefault("password", DB_PASSWORD)
+        connect_kwargs.setdefault("port", DB_PORT)
+        connect_kwargs.setdefault("connect_timeout", DB_CONNECT_TIMEOUT)
+        if statement_timeout_ms:
+            connect_kwargs.setdefault("options", f"-c statement_timeout={statement_timeout_ms}")
+        self._connect_kwargs = connect_kwargs
+        # psycopg2.pool 은 minconn 을 넘는 연결을 반납 즉시 닫고, 가득 차면 대기 없이 예외를 내므로
+        # 유휴 연결 목록을 직접 관리하고 세마포어로 최대 연결 수만큼의 슬롯을 나눠 줌
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._idle = deque() # (conn, 반납 시각 monotonic) - 최근 반납된 연결부터 재사용
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+        self._in_use = 0
+        self._waiting = 0
+        self._acquired_total = 0
+        self._timeouts_total = 0
+        self._healthcheck_failures = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def acquire(self, timeout=None):
+        """연결 하나를 꺼냄 (풀이 가득 차면 timeout 초까지 대기)"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.perf_counter()
+        with self._lock:
+            self._waiting += 1
+        try:
+            got_slot = self._slots.acquire(timeout=timeout)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        if not got_slot:
+            with self._lock:
+                self._timeouts_total += 1
+            raise PoolTimeout(f"{timeout:g}초 안에 데이터베이스 연결을 얻지 못했습니다 (최대 {self.maxconn}개 사용 중).")
+        try:
+            conn = self._checkout_healthy()
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use += 1
+            self._acquired_total += 1
+            self._latencies.append(time.perf_counter() - started)
+        return conn
+
+    def _connect(self):
+        return psycopg2.connect(**self._connect_kwargs)
+
+    def _checkout_healthy(self):
+        """유휴 연결을 꺼내고(없으면 새로 연결), 오래 쉬었거나 닫힌 연결이면 확인/교체"""
+        with self._lock:
+            conn, last_used = self._idle.pop() if self._idle else (None, None)
+        if conn is None:
+            return self._connect()
+        stale = time.monotonic() - last_used >= self.healthcheck_idle_seconds
+        if conn.closed or (stale and not self._ping(conn)):
+            with self._lock:
+                self._healthcheck_failures += 1
+            logging.getLogger().warning("끊어진 데이터베이스 연결을 교체합니다.")
+            self._discard(conn)
+            return self._connect()
+        return conn
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    @staticmethod
+    def _ping(conn):
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def release(self, conn):
+        """연결 반납 (진행 중인 트랜잭션은 롤백, 끊긴 연결은 폐기)"""
+        try:
+            close = bool(conn.closed)
+            if not close and conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    close = True
+            if close:
+                self._discard(conn)
+            else:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    @contextlib.contextmanager
+    def connection(self, timeout=None):
+        """with pool.connection() as conn: ... (커밋은 호출한 쪽에서 수행)"""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def metrics(self):
+        """풀 지표: 최대/사용 중/대기 중 연결 수, 누적 획득 수, 획득 지연(ms) 통계"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            data = {
+                "max": self.maxconn,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "acquired_total": self._acquired_total,
+                "timeouts_total": self._timeouts_total,
+                "healthcheck_failures_total": self._healthcheck_failures,
+            }
+        if latencies:
+            data["acquire_latency_ms"] = {
+                "avg": round(sum(latencies) / len(latencies) * 1000, 3),
+                "p50": round(latencies[len(latencies) // 2] * 1000, 3),
+                "p99": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3),
+                "max": round(latencies[-1] * 1000, 3),
+            }
+        else:
+            data["acquire_latency_ms"] = {"avg": 0.0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+        return data
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            self._discard(conn)
+
+
+# --- 프로세스 단위 공유 풀 ---
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """프로세스 공유 연결 풀 (처음 사용할 때 생성)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+@contextlib.contextmanager
+def get_connection(timeout=None):
+    """공유 풀에서 연결을 빌려 사용: with db.get_connection() as conn: ..."""
+    with get_pool().connection(timeout) as conn:
+        yield conn
+
+
+def pool_metrics():
+    """공유 풀 지표 (아직 풀이 없으면 None)"""
+    return _pool.metrics() if _pool is not None else None
+
+
+def close_pool():
+    """공유 풀의 모든 연결 종료 (프로세스 종료 시)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def connect_unpooled(statement_timeout_ms=None):
+    """풀과 별도의 전용 연결 (알림 수신, 대량 내보내기처럼 오래 붙잡는 작업용, 닫는 것은 호출한 쪽 책임)"""
+    kwargs = {}
+    if statement_timeout_ms is not None:
+        kwargs["options"] = f"-c statement_timeout={statement_timeout_ms}"
+    return psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASSWORD,
+                            port=DB_PORT, connect_timeout=DB_CONNECT_TIMEOUT, **kwargs)
+
+
+# --- 키워드 저장 알림 (NOTIFY/LISTEN) ---
+def notify_keywords_changed(cur, scrape_date, category_id):
+    """(날짜, 카테고리) 키워드가 바뀌었음을 알림 (트랜잭션 안에서 호출하면 커밋될 때 전달됨)"""
+    cur.execute("SELECT pg_notify(%s, %s);", (KEYWORDS_CHANGED_CHANNEL, f"{category_id}:{scrape_date}"))
+
+
+def notify_summary_refreshed(cur, category_id):
+    """카테고리 요약(날짜 목록 등)이 갱신되었음을 알림 (payload 의 날짜 부분이 빈 문자열)"""
+    cur.execute("SELECT pg_notify(%s, %s);", (KEYWORDS_CHANGED_CHANNEL, f"{category_id}:"))
+
+
+def parse_keywords_changed(payload):
+    """notify_keywords_changed 의 payload -> (category_id, 'YYYY-MM-DD') (요약 갱신이면 날짜가 '', 형식이 다르면 None)"""
+    category_id, sep, date_str = payload.partition(":")
+    return (category_id, date_str) if sep else None
+
+
+def listen(channel, on_notify, stop_event, on_reconnect=None, poll_seconds=1.0):
+    """channel 의 알림마다 on_notify(payload)를 호출 (stop_event 가 설정될 때까지 블로킹)
+
+    풀과 별도의 전용 연결을 사용합니다. 연결이 끊기면 다시 연결하고, 끊긴 동안 놓친 알림이
+    있을 수 있으므로 재연결할 때마다 on_reconnect()를 호출합니다.
+    """
+    logger = logging.getLogger()
+    first = True
+    while not stop_event.is_set():
+        conn = None
+        try:
+            conn = connect_unpooled()
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {channel};")
+            if not first and on_reconnect is not None:
+                on_reconnect()
+            first = False
+            while not stop_event.is_set():
+                if select.select([conn], [], [], poll_seconds) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    on_notify(conn.notifies.pop(0).payload)
+        except psycopg2.Error as e:
+            logger.warning(f"{channel} 알림 수신 연결 오류, {LISTEN_RECONNECT_SECONDS}초 후 재연결: {e}")
+            first = False # 다음 연결 성공 시 on_reconnect 호출
+            stop_event.wait(LISTEN_RECONNECT_SECONDS)
+        finally:
+            if conn is not None:
+                ConnectionPool._discard(conn)
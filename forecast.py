@@ -0,0 +1,209 @@
+# coding: utf-8
+# 키워드 순위 예측: 카테고리의 모든 키워드에 주간 계절성 Holt-Winters 모델을 적합해 상승 예상 키워드를 뽑음
+#
+# 1. daily_keywords 에서 최근 LOOKBACK_DAYS 수집일의 (키워드 × 수집일) log(순위) 행렬을 만듦 (순위권 밖은 log(OUT_OF_RANK))
+# 2. 순위권에 든 날이 MIN_RANKED_DAYS 미만인 키워드는 제외
+# 3. keyword_forecasts 에 같은 (키워드, 마지막 순위권 날짜)로 적합한 결과가 있으면 건너뜀 (새 데이터가 있는 키워드만 다시 적합)
+# 4. 남은 키워드를 CHUNK_KEYWORDS 개씩 나눠 프로세스 풀(기본: CPU 수)에서 적합
+#    - 모델: 감쇠 추세 + 7일 계절성 가법 Holt-Winters. 키워드 묶음 × 매개변수 후보 전체를 NumPy 배열 하나로 한 번에 계산하고
+#      한 단계 예측 오차가 가장 작은 매개변수를 키워드마다 고름
+# 5. 창의 마지막 수집일(origin_date) 다음 날부터 HORIZON 수집일의 예측 순위와 예상 상승폭(log 순위 차이)을 저장
+#    (순위권에서 빠진 키워드는 last_date 가 그대로여서 다시 적합하지 않으므로 origin_date 가 last_date 보다 늦을 수 있음)
+#
+# 실행: python scrape_keywords.py forecast [--category 50000169] [--jobs 4] [--full]
+
+import os
+import time
+import datetime
+import logging
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+import db
+import anomaly
+
+LOOKBACK_DAYS = 90 # 적합에 쓰는 최근 수집일 수
+MIN_RANKED_DAYS = 21 # 이보다 적게 순위권에 든 키워드는 예측하지 않음
+HORIZON = 7 # 예측할 수집일 수
+SEASON = 7 # 요일 계절성
+CHUNK_KEYWORDS = 500 # 프로세스 작업 하나에 넣는 키워드 수
+DEFAULT_JOBS = os.cpu_count() or 1
+OUT_OF_RANK = anomaly.OUT_OF_RANK
+
+# 매개변수 후보 (alpha: 수준, beta: 추세, gamma: 계절성), 추세 감쇠 PHI
+ALPHAS = (0.1, 0.3, 0.6)
+BETAS = (0.0, 0.05, 0.2)
+GAMMAS = (0.05, 0.2)
+PHI = 0.9
+MODEL_NAME = "holt_winters_damped_s7"
+
+_GRID = np.array(list(itertools.product(ALPHAS, BETAS, GAMMAS))) # (G, 3)
+
+
+# --- 모델 (작업 프로세스에서 실행) ---
+def fit_chunk(series):
+    """log 순위 행렬 (키워드 n × 수집일 T, T >= 2 * SEASON) -> (예측 log 순위 (n × HORIZON), 오차 (n,), 매개변수 (n × 3))"""
+    n, length = series.shape
+    alpha, beta, gamma = (_GRID[:, i][None, :] for i in range(3)) # (1, G)
+    y = series[:, None, :] # (n, 1, T)
+    level = np.repeat(series[:, :SEASON].mean(axis=1, keepdims=True), len(_GRID), axis=1) # (n, G)
+    trend = np.zeros_like(level)
+    season = np.repeat((series[:, :SEASON] - level[:, :1])[:, None, :], len(_GRID), axis=1) # (n, G, SEASON)
+    sse = np.zeros_like(level)
+    for t in range(length):
+        s = season[:, :, t % SEASON]
+        observed = y[:, :, t]
+        if t >= SEASON: # 첫 주기는 초기값 추정에 사용
+            sse += (observed - (level + PHI * trend + s)) ** 2
+        new_level = alpha * (observed - s) + (1 - alpha) * (level + PHI * trend)
+        trend = beta * (new_level - level) + (1 - beta) * PHI * trend
+        level = new_level
+        season[:, :, t % SEASON] = gamma * (observed - level) + (1 - gamma) * s
+    best = sse.argmin(axis=1)
+    rows = np.arange(n)
+    level, trend, season = level[rows, best], trend[rows, best], season[rows, best]
+    damping = np.cumsum(PHI ** np.arange(1, HORIZON + 1)) # 1..h 단계 감쇠 추세 합
+    steps = np.arange(length, length + HORIZON) % SEASON
+    predicted = level[:, None] + damping[None, :] * trend[:, None] + season[:, steps]
+    predicted = np.clip(predicted, 0.0, np.log(OUT_OF_RANK))
+    error = np.sqrt(sse[rows, best] / (length - SEASON))
+    return predicted, error, _GRID[best]
+
+
+# --- 데이터 준비 ---
+def load_series(conn, category_id, lookback=LOOKBACK_DAYS):
+    """(수집일 목록, 키워드 목록, 순위 행렬 int (키워드 × 수집일, 순위권 밖 0))"""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT scrape_date FROM daily_keyword_summary WHERE category_id = %s ORDER BY scrape_date DESC LIMIT %s;",
+            (category_id, lookback)
+        )
+        dates = sorted(row[0] for row in cur.fetchall())
+        if not dates:
+            return [], [], np.zeros((0, 0), dtype=np.int16)
+        cur.execute(
+            "SELECT scrape_date, keyword, min(keyword_rank) FROM daily_keywords "
+            "WHERE category_id = %s AND scrape_date >= %s GROUP BY scrape_date, keyword;",
+            (category_id, dates[0])
+        )
+        rows = cur.fetchall()
+    conn.commit()
+    column = {d: i for i, d in enumerate(dates)}
+    keyword_ids = {}
+    for _, keyword, _ in rows:
+        keyword_ids.setdefault(keyword, len(keyword_ids))
+    ranks = np.zeros((len(keyword_ids), len(dates)), dtype=np.int16)
+    for scrape_date, keyword, rank in rows:
+        if scrape_date in column: # 요약 갱신 전에 저장된 날짜는 다음 실행에서 반영
+            ranks[keyword_ids[keyword], column[scrape_date]] = rank
+    return dates, list(keyword_ids), ranks
+
+
+def _cached(conn, category_id):
+    """{키워드: 적합에 쓴 마지막 순위권 날짜}"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT keyword, last_date FROM keyword_forecasts WHERE category_id = %s;", (category_id,))
+        cached = dict(cur.fetchall())
+    conn.commit()
+    return cached
+
+
+def forecast_category(category_id, executor=None, full=False):
+    """카테고리 하나 예측 갱신 (executor: 프로세스 풀, 없으면 현재 프로세스에서 적합). (대상 키워드 수, 다시 적합한 키워드 수)"""
+    logger = logging.getLogger()
+    started = time.perf_counter()
+    with db.get_connection() as conn:
+        dates, vocab, ranks = load_series(conn, category_id)
+        cached = {} if full else _cached(conn, category_id)
+    if len(dates) < 2 * SEASON:
+        logger.info(f"[{category_id}] 수집일 {len(dates)}일 - 예측에 필요한 {2 * SEASON}일 미만이라 건너뜀")
+        return 0, 0
+
+    ranked = ranks > 0
+    eligible = np.flatnonzero(ranked.sum(axis=1) >= MIN_RANKED_DAYS)
+    last_column = len(dates) - 1 - np.argmax(ranked[:, ::-1], axis=1) # 키워드별 마지막 순위권 열
+    refit = np.array([i for i in eligible if cached.get(vocab[i]) != dates[last_column[i]]], dtype=np.int64)
+    logger.info(f"[{category_id}] 키워드 {len(vocab):,}개 중 예측 대상 {len(eligible):,}개, "
+                f"새 데이터로 다시 적합 {len(refit):,}개 (수집일 {dates[0]} ~ {dates[-1]})")
+
+    rows = []
+    if len(refit):
+        fit_started = time.perf_counter()
+        series = np.log(np.where(ranked[refit], ranks[refit], OUT_OF_RANK).astype(np.float64))
+        chunks = [series[i:i + CHUNK_KEYWORDS] for i in range(0, len(series), CHUNK_KEYWORDS)]
+        results = list(executor.map(fit_chunk, chunks)) if executor is not None else [fit_chunk(chunk) for chunk in chunks]
+        predicted = np.concatenate([r[0] for r in results])
+        error = np.concatenate([r[1] for r in results])
+        params = np.concatenate([r[2] for r in results])
+        fit_seconds = time.perf_counter() - fit_started
+
+        for j, i in enumerate(refit):
+            last_rank = int(ranks[i, last_column[i]])
+            predicted_ranks = np.exp(predicted[j])
+            rows.append((category_id, vocab[i], dates[last_column[i]], dates[-1], last_rank,
+                         [round(float(r), 1) for r in predicted_ranks],
+                         round(float(np.log(last_rank) - predicted[j, -1]), 4), round(float(error[j]), 4),
+                         f"{MODEL_NAME}(a={params[j, 0]:g},b={params[j, 1]:g},g={params[j, 2]:g})"))
+    with db.get_connection() as conn:
+        with conn.cursor() as cur:
+            if rows:
+                execute_values(
+                    cur,
+                    "INSERT INTO keyword_forecasts (category_id, keyword, last_date, origin_date, last_rank, predicted_ranks, "
+                    "predicted_gain, fit_error, model) VALUES %s "
+                    "ON CONFLICT (category_id, keyword) DO UPDATE SET last_date = EXCLUDED.last_date, "
+                    "origin_date = EXCLUDED.origin_date, "
+                    "last_rank = EXCLUDED.last_rank, predicted_ranks = EXCLUDED.predicted_ranks, "
+                    "predicted_gain = EXCLUDED.predicted_gain, fit_error = EXCLUDED.fit_error, "
+                    "model = EXCLUDED.model, fitted_at = now();",
+                    rows, page_size=2000
+                )
+            # 더 이상 예측 대상이 아닌 키워드(최근 순위권 일수 부족)의 예전 결과 정리
+            cur.execute("DELETE FROM keyword_forecasts WHERE category_id = %s AND NOT (keyword = ANY(%s));",
+                        (category_id, [vocab[i] for i in eligible]))
+        conn.commit()
+    if rows:
+        logger.info(f"[{category_id}] 적합 {fit_seconds:.1f}초, 저장 포함 {time.perf_counter() - started:.1f}초 "
+                    f"({len(refit) / max(fit_seconds, 1e-9):,.0f}키워드/초)")
+    return len(eligible), len(refit)
+
+
+def run_forecast(category_ids=None, jobs=DEFAULT_JOBS, full=False):
+    """카테고리별 예측 갱신 (기본: 수집된 모든 카테고리). 프로세스 풀은 카테고리 간에 공유"""
+    with db.get_connection() as conn, conn.cursor() as cur:
+        if not category_ids:
+            cur.execute("SELECT DISTINCT category_id FROM daily_keyword_summary ORDER BY category_id;")
+            category_ids = [row[0] for row in cur.fetchall()]
+    if jobs <= 1:
+        return {category_id: forecast_category(category_id, full=full) for category_id in category_ids}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return {category_id: forecast_category(category_id, pool, full) for category_id in category_ids}
+
+
+# --- 조회 ---
+def predicted_dates(origin_date):
+    """predicted_ranks 각 항목의 날짜 (매일 수집하므로 origin_date 다음 날부터 하루씩 HORIZON 일, 기준일을 모르면 None)"""
+    if origin_date is None:
+        return None
+    return [(origin_date + datetime.timedelta(days=step)).strftime('%Y-%m-%d') for step in range(1, HORIZON + 1)]
+
+
+def fetch_predicted_risers(conn, category_id, limit=20):
+    """마지막 수집일에 순위권인 키워드 중 예상 상승폭이 큰 순
+    [{keyword, date, rank, predicted_dates, predicted_ranks, predicted_rank, gain}, ...] (date: 마지막 순위권 날짜)"""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT keyword, last_date, origin_date, last_rank, predicted_ranks, predicted_gain, fit_error FROM keyword_forecasts "
+            "WHERE category_id = %s AND last_date = (SELECT max(last_date) FROM keyword_forecasts WHERE category_id = %s) "
+            "AND predicted_gain > 0 ORDER BY predicted_gain DESC, keyword LIMIT %s;",
+            (category_id, category_id, limit)
+        )
+        return [
+            {"keyword": keyword, "date": last_date.strftime('%Y-%m-%d'), "rank": rank,
+             "predicted_dates": predicted_dates(origin_date), "predicted_ranks": predicted,
+             "predicted_rank": predicted[-1], "gain": gain, "fit_error": fit_error}
+            for keyword, last_date, origin_date, rank, predicted, gain, fit_error in cur.fetchall()
+        ]
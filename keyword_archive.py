@@ -0,0 +1,400 @@
+# coding: utf-8
+# 카테고리별 압축 아카이브: 날짜/카테고리마다 CSV 파일 하나씩 쓰던 csv_backups/ 를 대체
+#
+# archive/{category_id}/ 아래에 저장합니다.
+# - dictionary.txt: 키워드 사전 (한 줄에 키워드 하나, 줄 번호 = 키워드 ID, 뒤에 추가만 함)
+# - blocks.bin: 월 단위 블록을 이어 붙인 파일 (추가만 함). 블록 하나 = 그 달의 모든 날짜를 zlib 으로 압축
+#     [일(uint8) × n일][키워드 수(uint16) × n일][순위 차분(uint16) × 전체][키워드 ID(uint32) × 전체]
+#     순위는 앞 순위와의 차이로 저장하므로 1..500 이 연속이면 모두 1 이 되어 거의 공간을 차지하지 않음
+# - index.json: 월 -> (블록 위치, 길이, 들어 있는 날짜) + 사전/블록 파일의 유효 길이 (마지막에 교체)
+# 날짜 하나를 읽을 때는 그 달의 블록 하나만 읽어 압축을 풉니다. 이미 있는 달에 날짜를 추가하면 그 달의 블록을
+# 새로 만들어 파일 끝에 붙이고 색인만 바꿉니다 (이전 블록은 버려진 공간, 일정 비율을 넘으면 compact 로 정리).
+#
+# 변환: python keyword_archive.py convert [--backup-dir csv_backups] [--category 50000169]
+# 확인: python keyword_archive.py info --category 50000169 / show --category 50000169 --date 2024-01-01
+
+import os
+import re
+import csv
+import sys
+import json
+import glob
+import time
+import zlib
+import fcntl
+import logging
+import argparse
+import datetime
+import threading
+import contextlib
+
+import numpy as np
+
+ARCHIVE_DIR = os.environ.get("KEYWORD_ARCHIVE_DIR", "archive")
+COMPRESSION_LEVEL = 9
+COMPACT_MIN_BYTES = 4 * 1024 * 1024 # 버려진 공간이 이 크기 이상이고
+COMPACT_GARBAGE_RATIO = 1.0 # 유효 블록 크기 대비 이 비율을 넘으면 추가할 때 compact
+
+# 예전 날짜별 CSV 백업 (변환, 대량 적재, 순위 행렬 생성에서 공용)
+BACKUP_FILE_PATTERN = re.compile(r"backup_(\d{4}-\d{2}-\d{2})(?:_(\w+))?\.csv$")
+LEGACY_CATEGORY_ID = "50000169" # 카테고리 없이 저장된 예전 CSV 백업 (남성의류만 수집하던 시기)
+
+_write_lock = threading.Lock() # 같은 프로세스의 워커 스레드 간 (프로세스 간은 파일 잠금)
+
+
+def find_backup_files(backup_dir, category_ids=None, start_date=None, end_date=None):
+    """[(날짜, 카테고리, 경로), ...] (날짜순). 같은 (날짜, 카테고리)가 여러 파일이면 카테고리가 붙은 새 형식 우선"""
+    found = {}
+    for path in glob.glob(os.path.join(backup_dir, "backup_*.csv")):
+        match = BACKUP_FILE_PATTERN.search(os.path.basename(path))
+        if not match:
+            continue
+        target_date = datetime.date.fromisoformat(match.group(1))
+        category_id = match.group(2) or LEGACY_CATEGORY_ID
+        if category_ids and category_id not in category_ids:
+            continue
+        if (start_date and target_date < start_date) or (end_date and target_date > end_date):
+            continue
+        if match.group(2) or (target_date, category_id) not in found:
+            found[(target_date, category_id)] = path
+    return [(target_date, category_id, path) for (target_date, category_id), path in sorted(found.items())]
+
+
+def _month_key(target_date):
+    return f"{target_date.year:04d}-{target_date.month:02d}"
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def encode_block(days, keyword_ids):
+    """{날짜: [(순위, 키워드), ...]} (같은 달) -> 압축된 블록 바이트 (새 키워드는 keyword_ids 에 등록)"""
+    ordered = sorted(days)
+    counts, rank_deltas, ids = [], [], []
+    for target_date in ordered:
+        pairs = sorted(days[target_date])
+        previous = 0
+        for rank, keyword in pairs:
+            rank_deltas.append(rank - previous)
+            previous = rank
+            keyword = keyword.replace("\n", " ") # 사전은 줄 단위
+            keyword_id = keyword_ids.get(keyword)
+            if keyword_id is None:
+                keyword_id = keyword_ids[keyword] = len(keyword_ids)
+            ids.append(keyword_id)
+        counts.append(len(pairs))
+    raw = b"".join([
+        np.array([d.day for d in ordered], dtype=np.uint8).tobytes(),
+        np.array(counts, dtype="<u2").tobytes(),
+        np.array(rank_deltas, dtype="<u2").tobytes(),
+        np.array(ids, dtype="<u4").tobytes(),
+    ])
+    return zlib.compress(raw, COMPRESSION_LEVEL)
+
+
+def decode_block(data, month, n_days):
+    """압축된 블록 -> [(날짜, 순위 배열, 키워드 ID 배열), ...] (날짜순)"""
+    raw = zlib.decompress(data)
+    year, month_number = map(int, month.split("-"))
+    day_numbers = np.frombuffer(raw, dtype=np.uint8, count=n_days)
+    offset = n_days
+    counts = np.frombuffer(raw, dtype="<u2", count=n_days, offset=offset).astype(np.int64)
+    offset += 2 * n_days
+    total = int(counts.sum())
+    ranks = np.cumsum(np.frombuffer(raw, dtype="<u2", count=total, offset=offset), dtype=np.int64)
+    offset += 2 * total
+    ids = np.frombuffer(raw, dtype="<u4", count=total, offset=offset)
+    result, start = [], 0
+    for day_number, count in zip(day_numbers, counts):
+        end = start + int(count)
+        day_ranks = ranks[start:end]
+        if start:
+            day_ranks = day_ranks - ranks[start - 1] # 순위 차분은 날짜마다 0부터 다시 시작
+        result.append((datetime.date(year, month_number, int(day_number)), day_ranks, ids[start:end]))
+        start = end
+    return result
+
+
+class KeywordArchive:
+    """카테고리 하나의 아카이브 (open 으로 생성, writable 이면 put_days 로 추가)"""
+
+    def __init__(self, path, category_id, writable=False):
+        self.path = path
+        self.category_id = str(category_id)
+        self.writable = writable
+        self._lock = threading.Lock()
+        self._block_cache = (None, None) # (월, 해독된 블록) - 같은 달 날짜를 이어 읽을 때 재사용
+        try:
+            with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+                self.index = json.load(f)
+        except FileNotFoundError:
+            self.index = {"version": 1, "category_id": self.category_id, "dictionary_bytes": 0,
+                          "dictionary_size": 0, "data_bytes": 0, "blocks": {}}
+        # 색인에 기록된 길이까지만 유효 (색인 교체 전에 중단된 쓰기의 흔적은 무시/정리)
+        self.vocab = []
+        dictionary_path = os.path.join(path, "dictionary.txt")
+        if os.path.exists(dictionary_path):
+            with open(dictionary_path, "rb") as f:
+                data = f.read(self.index["dictionary_bytes"])
+            self.vocab = data.decode("utf-8").split("\n")[:self.index["dictionary_size"]]
+        if writable:
+            os.makedirs(path, exist_ok=True)
+            for name, size in (("dictionary.txt", self.index["dictionary_bytes"]), ("blocks.bin", self.index["data_bytes"])):
+                with open(os.path.join(path, name), "ab") as f:
+                    f.truncate(size)
+        self.keyword_ids = {keyword: i for i, keyword in enumerate(self.vocab)}
+        blocks_path = os.path.join(path, "blocks.bin")
+        # 읽는 도중 compact 로 파일이 교체되어도 열어 둔 파일로 계속 읽음
+        self._blocks_fd = os.open(blocks_path, os.O_RDONLY) if os.path.exists(blocks_path) else None
+
+    @classmethod
+    def open(cls, directory, category_id, writable=False):
+        """아카이브 열기 (읽기 전용인데 없으면 None)"""
+        path = os.path.join(directory, str(category_id))
+        if not writable and not os.path.exists(os.path.join(path, "index.json")):
+            return None
+        return cls(path, category_id, writable)
+
+    def close(self):
+        if self._blocks_fd is not None:
+            os.close(self._blocks_fd)
+            self._blocks_fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- 읽기 ---
+    def dates(self):
+        """저장된 날짜 목록 (날짜순)"""
+        return sorted(datetime.date.fromisoformat(f"{month}-{day:02d}")
+                      for month, (_, _, days) in self.index["blocks"].items() for day in days)
+
+    def _read_block(self, month):
+        with self._lock:
+            cached_month, decoded = self._block_cache
+            if cached_month == month:
+                return decoded
+        offset, length, days = self.index["blocks"][month]
+        decoded = decode_block(os.pread(self._blocks_fd, length, offset), month, len(days))
+        with self._lock:
+            self._block_cache = (month, decoded)
+        return decoded
+
+    def _pairs(self, ranks, ids):
+        vocab = self.vocab
+        return [(int(rank), vocab[keyword_id]) for rank, keyword_id in zip(ranks.tolist(), ids.tolist())]
+
+    def read_day(self, target_date):
+        """날짜 하나의 [(순위, 키워드), ...] (그 달의 블록만 해독, 없으면 None)"""
+        month = _month_key(target_date)
+        entry = self.index["blocks"].get(month)
+        if entry is None or target_date.day not in entry[2]:
+            return None
+        for block_date, ranks, ids in self._read_block(month):
+            if block_date == target_date:
+                return self._pairs(ranks, ids)
+        return None
+
+    def iter_days(self, start_date=None, end_date=None):
+        """(날짜, [(순위, 키워드), ...]) 를 날짜순으로 (기간 밖의 달은 읽지 않음)"""
+        for month in sorted(self.index["blocks"]):
+            if start_date and month < _month_key(start_date):
+                continue
+            if end_date and month > _month_key(end_date):
+                break
+            for block_date, ranks, ids in self._read_block(month):
+                if (start_date and block_date < start_date) or (end_date and block_date > end_date):
+                    continue
+                yield block_date, self._pairs(ranks, ids)
+
+    # --- 쓰기 ---
+    def put_days(self, days):
+        """{날짜: [(순위, 키워드), ...]} 추가/교체. 달마다 기존 블록과 합친 새 블록을 파일 끝에 붙이고 색인 교체"""
+        if not self.writable:
+            raise ValueError("읽기 전용으로 연 아카이브입니다.")
+        by_month = {}
+        for target_date, pairs in days.items():
+            by_month.setdefault(_month_key(target_date), {})[target_date] = pairs
+        dictionary_size = len(self.keyword_ids)
+        new_blocks = {}
+        for month, month_days in sorted(by_month.items()):
+            if month in self.index["blocks"]:
+                merged = {d: self._pairs(ranks, ids) for d, ranks, ids in self._read_block(month)}
+                merged.update(month_days)
+                month_days = merged
+            new_blocks[month] = (encode_block(month_days, self.keyword_ids), sorted(d.day for d in month_days))
+
+        # 1. 새 키워드를 사전에 추가 (ID 순서대로)
+        if len(self.keyword_ids) > dictionary_size:
+            added = sorted(self.keyword_ids.items(), key=lambda item: item[1])[dictionary_size:]
+            text = ("\n" if dictionary_size else "") + "\n".join(keyword for keyword, _ in added)
+            with open(os.path.join(self.path, "dictionary.txt"), "ab") as f:
+                f.write(text.encode("utf-8"))
+                self.index["dictionary_bytes"] = f.tell()
+            self.vocab.extend(keyword for keyword, _ in added)
+            self.index["dictionary_size"] = len(self.vocab)
+        # 2. 블록 추가
+        blocks_path = os.path.join(self.path, "blocks.bin")
+        with open(blocks_path, "ab") as f:
+            for month, (data, day_numbers) in new_blocks.items():
+                self.index["blocks"][month] = [f.tell(), len(data), day_numbers]
+                f.write(data)
+            self.index["data_bytes"] = f.tell()
+        if self._blocks_fd is None:
+            self._blocks_fd = os.open(blocks_path, os.O_RDONLY)
+        self._block_cache = (None, None)
+        # 3. 색인 교체 (여기까지 끝나야 추가한 내용이 보임)
+        _write_json(os.path.join(self.path, "index.json"), self.index)
+        if self.garbage_bytes() >= max(COMPACT_MIN_BYTES, self.live_bytes() * COMPACT_GARBAGE_RATIO):
+            self.compact()
+
+    def live_bytes(self):
+        return sum(length for _, length, _ in self.index["blocks"].values())
+
+    def garbage_bytes(self):
+        return self.index["data_bytes"] - self.live_bytes()
+
+    def compact(self):
+        """유효한 블록만 월 순서대로 새 파일에 복사해 교체 (버려진 이전 블록 정리)"""
+        blocks_path = os.path.join(self.path, "blocks.bin")
+        tmp_path = f"{blocks_path}.tmp"
+        blocks = {}
+        with open(tmp_path, "wb") as f:
+            for month in sorted(self.index["blocks"]):
+                offset, length, day_numbers = self.index["blocks"][month]
+                blocks[month] = [f.tell(), length, day_numbers]
+                f.write(os.pread(self._blocks_fd, length, offset))
+            data_bytes = f.tell()
+        os.replace(tmp_path, blocks_path)
+        self.index["blocks"] = blocks
+        self.index["data_bytes"] = data_bytes
+        _write_json(os.path.join(self.path, "index.json"), self.index)
+        os.close(self._blocks_fd)
+        self._blocks_fd = os.open(blocks_path, os.O_RDONLY)
+        self._block_cache = (None, None)
+
+
+@contextlib.contextmanager
+def locked(directory, category_id):
+    """카테고리 아카이브 쓰기 잠금 (스레드 + 프로세스)"""
+    path = os.path.join(directory, str(category_id))
+    os.makedirs(path, exist_ok=True)
+    with _write_lock, open(os.path.join(path, ".lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def append_day(scrape_date_str, category_id, pairs, directory=ARCHIVE_DIR):
+    """수집 결과 하루치를 아카이브에 저장 (save_to_csv 대체, 실패해도 수집은 계속)"""
+    logger = logging.getLogger()
+    try:
+        with locked(directory, category_id), KeywordArchive.open(directory, category_id, writable=True) as archive:
+            archive.put_days({datetime.date.fromisoformat(scrape_date_str): list(pairs)})
+        logger.info(f"아카이브 저장 완료: {directory}/{category_id} ({scrape_date_str})")
+        return True
+    except (OSError, ValueError) as e:
+        logger.error(f"아카이브 저장 중 오류 발생 ({scrape_date_str}, category_id: {category_id}): {e}")
+        return False
+
+
+def read_backup_csv(path):
+    """예전 CSV 백업 -> [(순위, 키워드), ...] (순위가 숫자가 아닌 줄은 건너뜀)"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return [(int(row["rank"]), row["keyword"]) for row in csv.DictReader(f) if row.get("rank", "").isdigit()]
+
+
+def convert_csv(backup_dir, category_id, directory=ARCHIVE_DIR):
+    """카테고리의 CSV 백업 전체를 아카이브로 변환 (달마다 블록 하나씩 기록). 반환값: 변환한 날짜 수"""
+    files = find_backup_files(backup_dir, [str(category_id)])
+    converted = 0
+    with locked(directory, category_id), KeywordArchive.open(directory, category_id, writable=True) as archive:
+        month, days = None, {}
+        for target_date, _, path in files + [(None, None, None)]:
+            key = _month_key(target_date) if target_date else None
+            if days and key != month:
+                archive.put_days(days)
+                converted += len(days)
+                days = {}
+            if target_date is None:
+                break
+            month = key
+            days[target_date] = read_backup_csv(path)
+        archive.compact()
+    return converted
+
+
+def _disk_usage(paths):
+    return sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="카테고리별 키워드 압축 아카이브")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    convert_parser = subparsers.add_parser("convert", help="csv_backups/ 의 CSV 백업을 아카이브로 변환")
+    convert_parser.add_argument("--backup-dir", default="csv_backups", help="CSV 백업 디렉토리")
+    convert_parser.add_argument("--category", action="append", help="카테고리 ID (여러 번 지정 가능, 기본: 전체)")
+    info_parser = subparsers.add_parser("info", help="아카이브 정보와 전체 읽기 시간 출력")
+    info_parser.add_argument("--category", action="append", required=True, help="카테고리 ID")
+    show_parser = subparsers.add_parser("show", help="날짜 하나의 키워드 출력")
+    show_parser.add_argument("--category", required=True, help="카테고리 ID")
+    show_parser.add_argument("--date", required=True, help="날짜 (YYYY-MM-DD)")
+    for sub in (convert_parser, info_parser, show_parser):
+        sub.add_argument("--dir", default=ARCHIVE_DIR, help=f"아카이브 디렉토리 (기본: {ARCHIVE_DIR})")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.command == "convert":
+        categories = args.category or sorted({category_id for _, category_id, _ in find_backup_files(args.backup_dir)})
+        for category_id in categories:
+            files = [path for _, _, path in find_backup_files(args.backup_dir, [category_id])]
+            started = time.perf_counter()
+            csv_rows = sum(len(read_backup_csv(path)) for path in files)
+            csv_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            count = convert_csv(args.backup_dir, category_id, args.dir)
+            convert_seconds = time.perf_counter() - started
+            archive_path = os.path.join(args.dir, category_id)
+            archive_bytes = _disk_usage([os.path.join(archive_path, name) for name in ("dictionary.txt", "blocks.bin", "index.json")])
+            with KeywordArchive.open(args.dir, category_id) as archive:
+                started = time.perf_counter()
+                archive_rows = sum(len(pairs) for _, pairs in archive.iter_days())
+                archive_seconds = time.perf_counter() - started
+            csv_bytes = _disk_usage(files)
+            logging.info(f"[{category_id}] {count}일 변환 ({convert_seconds:.1f}초): "
+                         f"CSV {len(files)}개 {csv_bytes:,} bytes -> 아카이브 {archive_bytes:,} bytes "
+                         f"({csv_bytes / max(archive_bytes, 1):.1f}배), 전체 읽기 CSV {csv_seconds:.2f}초 ({csv_rows:,}행) "
+                         f"-> 아카이브 {archive_seconds:.2f}초 ({archive_rows:,}행)")
+    elif args.command == "info":
+        for category_id in args.category:
+            archive = KeywordArchive.open(args.dir, category_id)
+            if archive is None:
+                print(f"[{category_id}] 아카이브 없음")
+                sys.exit(1)
+            with archive:
+                dates = archive.dates()
+                started = time.perf_counter()
+                rows = sum(len(pairs) for _, pairs in archive.iter_days())
+                seconds = time.perf_counter() - started
+                print(f"[{category_id}] {dates[0] if dates else '-'} ~ {dates[-1] if dates else '-'}, {len(dates)}일, "
+                      f"월 블록 {len(archive.index['blocks'])}개, 키워드 사전 {len(archive.vocab)}개, "
+                      f"블록 {archive.live_bytes():,} bytes (버려진 공간 {archive.garbage_bytes():,}), "
+                      f"전체 읽기 {rows:,}행 {seconds:.2f}초")
+    else:
+        archive = KeywordArchive.open(args.dir, args.category)
+        pairs = archive.read_day(datetime.date.fromisoformat(args.date)) if archive else None
+        if pairs is None:
+            print(f"[{args.category}] {args.date} 데이터 없음")
+            sys.exit(1)
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["rank", "keyword"])
+        writer.writerows(pairs)
@@ -0,0 +1,374 @@
+# coding: utf-8
+# 키워드 묶음: 띄어쓰기, 브랜드+품목, 접미어 등 표기만 다른 키워드를 한 묶음(family)으로 모아 순위 추이를 합쳐 봄
+#
+# 모든 키워드 쌍을 비교하면 어휘 수의 제곱만큼 걸리므로 문자 n-gram MinHash/LSH 로 후보만 찾습니다.
+# - 키워드를 소문자로 바꾸고 공백을 지운 뒤 문자 NGRAM-gram 집합을 만듦 ("나이키 반팔" == "나이키반팔")
+# - NUM_BANDS × BAND_ROWS 개 해시로 MinHash 서명을 만들고, 밴드(BAND_ROWS 개씩)마다 해시 하나를 keyword_family_buckets 에 저장
+# - 정규화한 키워드와 끝 1..SUFFIX_MAX_LEN 글자를 뗀 앞부분의 해시도 버킷으로 저장 (접미어 변형 후보)
+# - 새 키워드는 버킷이 하나라도 같은 키워드만 후보로 꺼내(버킷 기본 키 인덱스) 실제 n-gram Jaccard 가
+#   JACCARD_THRESHOLD 이상이거나 접미어 변형인 가장 비슷한 키워드의 묶음에 들어가고, 없으면 새 묶음을 만듦
+#
+# 묶이는 변형:
+# - 띄어쓰기/대소문자만 다른 표기 ("나이키 반팔" == "나이키반팔", "Nike" == "nike")
+# - 수식어나 글자 몇 개가 붙거나 바뀐 긴 키워드 (2-gram Jaccard 0.7 이상, 예: "나이키 반팔 티셔츠" / "나이키반팔티셔츠 남성")
+# - 짧은 키워드 끝에 SUFFIX_MAX_LEN 글자 이하가 붙은 접미어/복수형 ("양말" / "양말들", "원피스" / "원피스s")
+#   짧은 키워드는 한 글자만 붙어도 Jaccard 가 0.5~0.67 이라 기준에 못 미치므로 앞부분 일치로 따로 판정합니다.
+#   앞부분이 같은 다른 낱말도 묶일 수 있음 ("바지" / "바지락")
+# 앞에 붙은 접두어("남성 양말"), 어순이 바뀐 키워드, 동의어/번역어는 Jaccard 가 기준 이상일 때만 묶입니다.
+# 배정은 키워드마다 한 번만 하고 바꾸지 않으므로(묶음 ID 안정), 저장할 때마다 그날 키워드 중 처음 보는 것만 배정하고
+# (카테고리, 날짜)의 묶음별 순위 집계(keyword_family_daily)를 다시 씁니다 (update_after_save).
+#
+# 기존 데이터는 한 번 전체 배정/집계가 필요합니다 (처음 순위권에 든 날짜순으로 배정하므로 수집 중 증분 배정과 거의 같은 결과):
+#   python keyword_families.py build [--reset]
+#   python keyword_families.py show "나이키 반팔" [--category 50000169]
+
+import os
+import re
+import sys
+import zlib
+import hashlib
+import logging
+import argparse
+import datetime
+
+import numpy as np
+import psycopg2
+from psycopg2.extras import execute_values
+
+import db
+
+NGRAM = 2 # 한글 키워드는 짧으므로 음절 2-gram
+NUM_BANDS = 20
+BAND_ROWS = 3 # 서명 길이 NUM_BANDS * BAND_ROWS = 60, Jaccard 0.7 인 쌍이 후보가 될 확률 99.98% (0.5 는 93%)
+# 이보다 낮으면 긴 브랜드명을 공유하는 서로 다른 품목이 한 묶음으로 이어짐 (바꾸면 build --reset 필요)
+JACCARD_THRESHOLD = float(os.environ.get("KEYWORD_FAMILY_THRESHOLD", "0.7"))
+MINHASH_SEED = 20250201 # 서명이 실행마다 같아야 저장된 버킷과 비교할 수 있음 (바꾸면 build --reset 필요)
+SUFFIX_MAX_LEN = 2 # 접미어 변형으로 보는 덧붙은 글자 수 ("들", "s", "es")
+SUFFIX_MIN_STEM = 2 # 접미어 변형의 짧은 쪽 최소 글자 수 (한 글자 키워드는 앞부분 일치로 묶지 않음)
+BUILD_CHUNK = 5000 # build 에서 한 번에 서명을 계산/저장하는 키워드 수
+
+_PRIME = (1 << 31) - 1 # a * x + b 가 uint64 를 넘지 않도록 (x 는 32비트 해시)
+_rng = np.random.default_rng(MINHASH_SEED)
+_HASH_A = _rng.integers(1, _PRIME, size=NUM_BANDS * BAND_ROWS, dtype=np.uint64)
+_HASH_B = _rng.integers(0, _PRIME, size=NUM_BANDS * BAND_ROWS, dtype=np.uint64)
+_BAND_MIX = _rng.integers(1, 1 << 63, size=BAND_ROWS + 1, dtype=np.uint64) | np.uint64(1) # 밴드 해시 결합용 홀수 상수
+_WHITESPACE = re.compile(r"\s+")
+
+
+# --- MinHash / LSH ---
+def normalize(keyword):
+    """소문자로 바꾸고 공백을 지운 키워드"""
+    return _WHITESPACE.sub("", keyword.lower())
+
+
+def ngrams(keyword):
+    """정규화한 키워드의 문자 n-gram 집합 (NGRAM 보다 짧으면 키워드 자체)"""
+    text = normalize(keyword)
+    if len(text) <= NGRAM:
+        return {text}
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+def lsh_buckets(gram_sets):
+    """n-gram 집합 목록 -> (키워드 수, NUM_BANDS) int64 밴드 해시 (밴드 번호가 섞여 있어 밴드끼리 겹치지 않음)
+
+    모든 키워드의 n-gram 해시를 한 배열로 이어 붙여 (해시 함수 × n-gram) 을 한 번에 계산하고 키워드 구간별 최솟값을 취합니다.
+    """
+    lengths = np.fromiter((len(grams) for grams in gram_sets), dtype=np.int64, count=len(gram_sets))
+    hashed = np.fromiter((zlib.crc32(gram.encode("utf-8")) for grams in gram_sets for gram in grams),
+                         dtype=np.uint64, count=int(lengths.sum()))
+    values = (_HASH_A[:, None] * hashed[None, :] + _HASH_B[:, None]) % np.uint64(_PRIME)
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    signatures = np.minimum.reduceat(values, offsets, axis=1).T.reshape(len(gram_sets), NUM_BANDS, BAND_ROWS)
+    with np.errstate(over="ignore"): # 2^64 로 나눈 나머지 (의도한 오버플로)
+        buckets = np.arange(NUM_BANDS, dtype=np.uint64) * _BAND_MIX[-1]
+        for row in range(BAND_ROWS):
+            buckets = buckets + signatures[:, :, row] * _BAND_MIX[row]
+    return buckets.view(np.int64)
+
+
+def is_suffix_variant(a, b):
+    """정규화한 두 키워드 중 짧은 쪽(SUFFIX_MIN_STEM 글자 이상)이 긴 쪽의 앞부분이고 SUFFIX_MAX_LEN 글자 이하만 더 붙었는지"""
+    if len(a) > len(b):
+        a, b = b, a
+    return SUFFIX_MIN_STEM <= len(a) < len(b) <= len(a) + SUFFIX_MAX_LEN and b.startswith(a)
+
+
+def prefix_buckets(text):
+    """정규화한 키워드와 끝 1..SUFFIX_MAX_LEN 글자를 뗀 앞부분(SUFFIX_MIN_STEM 글자 이상)의 64비트 해시 목록
+
+    접미어 변형 쌍은 짧은 쪽 전체가 긴 쪽의 앞부분 목록에 들어 있으므로 항상 버킷 하나를 공유합니다.
+    밴드 해시와 겹치지 않도록 person 을 달리한 blake2b 를 씁니다.
+    """
+    return [int.from_bytes(hashlib.blake2b(text[:end].encode("utf-8"), digest_size=8, person=b"kwfamily").digest(),
+                           "little", signed=True)
+            for end in range(len(text), max(len(text) - SUFFIX_MAX_LEN, SUFFIX_MIN_STEM) - 1, -1)]
+
+
+def keyword_buckets(keywords):
+    """키워드 목록 -> (n-gram 집합 목록, 키워드별 버킷 목록: LSH 밴드 해시 + 접미어 변형용 앞부분 해시)"""
+    gram_sets = [ngrams(keyword) for keyword in keywords]
+    bands = lsh_buckets(gram_sets).tolist()
+    return gram_sets, [band + prefix_buckets(normalize(keyword)) for keyword, band in zip(keywords, bands)]
+
+
+class FamilyIndex:
+    """밴드 해시 -> 키워드 목록과 키워드 -> 묶음 ID (배정 중 같은 배치에서 새로 배정한 키워드도 후보에 포함)"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._members = {} # 키워드 -> [n-gram 집합, 묶음 ID, 정규화한 키워드] (n-gram/정규화는 None 이면 필요할 때 계산)
+
+    def __len__(self):
+        return len(self._members)
+
+    def __contains__(self, keyword):
+        return keyword in self._members
+
+    def add(self, keyword, family_id, buckets, grams=None):
+        self._members.setdefault(keyword, [grams, family_id, None])
+        for bucket in buckets:
+            self._buckets.setdefault(bucket, []).append(keyword)
+
+    def match(self, keyword, grams, buckets):
+        """Jaccard 가 가장 높은(같으면 묶음 ID 가 작은) 후보의 묶음 ID, 기준 미달이면 None
+
+        buckets 는 keyword_buckets 순서(밴드 해시 NUM_BANDS 개 다음 앞부분 해시)입니다. 앞부분 해시로만 찾은 후보는
+        접미어 변형(is_suffix_variant)일 때만 보고, 접미어 변형은 Jaccard 가 낮아도 JACCARD_THRESHOLD 로 칩니다.
+        """
+        text = normalize(keyword)
+        best_key, best_family, seen = None, None, set()
+        for position, bucket in enumerate(buckets):
+            for candidate in self._buckets.get(bucket, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                member = self._members[candidate]
+                if member[2] is None:
+                    member[2] = normalize(candidate)
+                suffix_variant = is_suffix_variant(text, member[2])
+                if position >= NUM_BANDS and not suffix_variant:
+                    continue # 앞부분만 같은 키워드 (버킷이 클 수 있어 Jaccard 를 계산하지 않음)
+                if member[0] is None:
+                    member[0] = ngrams(candidate)
+                score = jaccard(grams, member[0])
+                if suffix_variant:
+                    score = max(score, JACCARD_THRESHOLD)
+                if score >= JACCARD_THRESHOLD and (best_key is None or (score, -member[1]) > best_key):
+                    best_key, best_family = (score, -member[1]), member[1]
+        return best_family
+
+
+def _lock(cur):
+    # 새 키워드 배정은 카테고리와 무관하게 직렬화 (같은 키워드를 동시에 배정하지 않도록, 커밋 시 해제)
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext('keyword_families'));")
+
+
+def _assign_new(cur, index, keywords):
+    """index 에 없는 새 키워드 목록을 차례로 배정하고 저장 (커밋하지 않음). {키워드: 묶음 ID}"""
+    gram_sets, buckets = keyword_buckets(keywords)
+    cur.execute("SELECT nextval(pg_get_serial_sequence('keyword_families', 'keyword_id')) FROM generate_series(1, %s);",
+                (len(keywords),))
+    keyword_ids = [row[0] for row in cur.fetchall()]
+    assigned, rows, bucket_rows = {}, [], []
+    for keyword, grams, buckets_of, keyword_id in zip(keywords, gram_sets, buckets, keyword_ids):
+        family_id = index.match(keyword, grams, buckets_of)
+        if family_id is None:
+            family_id = keyword_id # 새 묶음
+        index.add(keyword, family_id, buckets_of, grams)
+        assigned[keyword] = family_id
+        rows.append((keyword, keyword_id, family_id))
+        bucket_rows.extend((bucket, keyword_id) for bucket in buckets_of)
+    execute_values(cur, "INSERT INTO keyword_families (keyword, keyword_id, family_id) VALUES %s;", rows, page_size=5000)
+    execute_values(cur, "INSERT INTO keyword_family_buckets (bucket, keyword_id) VALUES %s ON CONFLICT DO NOTHING;",
+                   bucket_rows, page_size=10000) # 한 키워드의 두 밴드 해시가 우연히 같을 수 있음
+    return assigned
+
+
+def assign(cur, keywords):
+    """키워드 목록의 {키워드: 묶음 ID} (처음 보는 키워드는 목록 순서대로 배정해 저장, 커밋하지 않음)
+
+    후보는 새 키워드와 버킷(밴드 해시/앞부분 해시)이 겹치는 기존 키워드만 버킷 인덱스로 읽습니다 (겹친 버킷으로만 색인).
+    """
+    keywords = list(dict.fromkeys(keywords))
+    _lock(cur)
+    cur.execute("SELECT keyword, family_id FROM keyword_families WHERE keyword = ANY(%s);", (keywords,))
+    families = dict(cur.fetchall())
+    new_keywords = [keyword for keyword in keywords if keyword not in families]
+    if new_keywords:
+        _, buckets = keyword_buckets(new_keywords)
+        wanted = sorted({bucket for buckets_of in buckets for bucket in buckets_of})
+        cur.execute("SELECT b.bucket, f.keyword, f.family_id FROM keyword_family_buckets b "
+                    "JOIN keyword_families f USING (keyword_id) WHERE b.bucket = ANY(%s::bigint[]);", (wanted,))
+        index = FamilyIndex()
+        for bucket, keyword, family_id in cur.fetchall():
+            index.add(keyword, family_id, (bucket,))
+        families.update(_assign_new(cur, index, new_keywords))
+    return families, len(new_keywords)
+
+
+# --- (카테고리, 날짜) 집계 ---
+def _daily_rows(category_id, scrape_date, pairs, families):
+    ranks = {}
+    for rank, keyword in pairs:
+        if keyword not in ranks or rank < ranks[keyword]:
+            ranks[keyword] = rank
+    stats = {} # 묶음 ID -> [최고 순위, 순위 합, 키워드 수]
+    for keyword, rank in ranks.items():
+        family = stats.setdefault(families[keyword], [rank, 0, 0])
+        family[0] = min(family[0], rank)
+        family[1] += rank
+        family[2] += 1
+    return [(category_id, scrape_date, family_id, best, total / count, count)
+            for family_id, (best, total, count) in stats.items()]
+
+
+def update_day(conn, category_id, scrape_date, pairs):
+    """그날 키워드의 새 키워드 배정 + (카테고리, 날짜) 묶음 집계 갱신 (커밋 포함). 새로 배정한 키워드 수 반환"""
+    if isinstance(scrape_date, str):
+        scrape_date = datetime.date.fromisoformat(scrape_date)
+    with conn.cursor() as cur:
+        families, new_count = assign(cur, [keyword for _, keyword in pairs])
+        cur.execute("DELETE FROM keyword_family_daily WHERE category_id = %s AND scrape_date = %s;", (category_id, scrape_date))
+        execute_values(cur, "INSERT INTO keyword_family_daily (category_id, scrape_date, family_id, best_rank, avg_rank, "
+                            "member_count) VALUES %s;", _daily_rows(category_id, scrape_date, pairs, families), page_size=1000)
+    conn.commit()
+    return new_count
+
+
+def update_after_save(scrape_date_str, category_id, pairs):
+    """save_to_db 직후 호출: 실패해도 수집은 계속되도록 경고만 남김"""
+    logger = logging.getLogger()
+    try:
+        with db.get_connection() as conn:
+            new_count = update_day(conn, category_id, scrape_date_str, pairs)
+        logger.info(f"키워드 묶음 갱신 완료 ({scrape_date_str}, category_id: {category_id}, 새 키워드 {new_count}개)")
+        return True
+    except psycopg2.errors.UndefinedTable:
+        return False # 0007 마이그레이션 전
+    except psycopg2.Error as e:
+        logger.warning(f"경고: 키워드 묶음 갱신 실패 ({scrape_date_str}, category_id: {category_id}): {e}")
+        return False
+
+
+# --- 전체 배정/집계 ---
+def build(reset=False, category_ids=None):
+    """daily_keywords 의 모든 키워드를 처음 순위권에 든 날짜순으로 배정하고 묶음 집계를 다시 만듦
+
+    후보 검색용 색인은 메모리에 두고(기존 배정을 한 번 읽음) BUILD_CHUNK 개씩 서명을 계산해 저장합니다.
+    reset 이면 기존 배정을 지우고 처음부터 묶습니다 (묶음 ID 가 바뀜). category_ids 는 집계할 카테고리 (기본: 전체)
+    reset 은 묶음 ID 를 다시 매기므로 다른 카테고리의 집계가 옛 ID 를 가리키지 않도록 category_ids 와 함께 쓸 수 없습니다.
+    """
+    if reset and category_ids:
+        raise ValueError("reset 은 모든 카테고리의 집계를 다시 만들어야 하므로 category_ids 와 함께 쓸 수 없습니다")
+    logger = logging.getLogger()
+    with db.get_connection() as conn:
+        with conn.cursor() as cur:
+            _lock(cur)
+            if reset:
+                cur.execute("TRUNCATE keyword_families, keyword_family_buckets, keyword_family_daily RESTART IDENTITY;")
+            index = FamilyIndex()
+            cur.execute("SELECT b.bucket, f.keyword, f.family_id FROM keyword_family_buckets b JOIN keyword_families f USING (keyword_id);")
+            for bucket, keyword, family_id in cur.fetchall():
+                index.add(keyword, family_id, (bucket,))
+            cur.execute("SELECT keyword FROM daily_keywords GROUP BY keyword ORDER BY min(scrape_date), keyword;")
+            new_keywords = [row[0] for row in cur.fetchall() if row[0] not in index]
+            logger.info(f"키워드 묶음 배정: 기존 {len(index)}개, 새 키워드 {len(new_keywords)}개")
+            for start in range(0, len(new_keywords), BUILD_CHUNK):
+                _assign_new(cur, index, new_keywords[start:start + BUILD_CHUNK])
+                logger.info(f"  {min(start + BUILD_CHUNK, len(new_keywords))}/{len(new_keywords)}")
+            cur.execute("SELECT count(DISTINCT family_id) FROM keyword_families;")
+            family_count = cur.fetchone()[0]
+
+            cur.execute("DELETE FROM keyword_family_daily WHERE %s::text[] IS NULL OR category_id = ANY(%s);",
+                        (category_ids, category_ids))
+            cur.execute(
+                "INSERT INTO keyword_family_daily (category_id, scrape_date, family_id, best_rank, avg_rank, member_count) "
+                "SELECT d.category_id, d.scrape_date, f.family_id, min(d.keyword_rank), avg(d.keyword_rank), count(*) "
+                "FROM (SELECT category_id, scrape_date, keyword, min(keyword_rank) AS keyword_rank FROM daily_keywords "
+                "      WHERE %s::text[] IS NULL OR category_id = ANY(%s) GROUP BY category_id, scrape_date, keyword) d "
+                "JOIN keyword_families f USING (keyword) "
+                "GROUP BY d.category_id, d.scrape_date, f.family_id;",
+                (category_ids, category_ids)
+            )
+            daily_count = cur.rowcount
+        conn.commit()
+    logger.info(f"키워드 묶음 {family_count}개 (키워드 {len(index)}개), 날짜별 집계 {daily_count}행")
+    return family_count
+
+
+# --- 조회 ---
+def fetch_family(conn, keyword):
+    """(묶음 ID, 대표 키워드, [묶음 키워드, ...]) 배정되지 않은 키워드면 (None, None, [])"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT family_id FROM keyword_families WHERE keyword = %s;", (keyword,))
+        row = cur.fetchone()
+        if row is None:
+            return None, None, []
+        family_id = row[0]
+        cur.execute("SELECT keyword, keyword_id FROM keyword_families WHERE family_id = %s ORDER BY keyword_id;", (family_id,))
+        members = cur.fetchall()
+    representative = next((member for member, keyword_id in members if keyword_id == family_id), members[0][0])
+    return family_id, representative, [member for member, _ in members]
+
+
+def fetch_family_trend(conn, category_id, keyword, date_from=None, date_to=None):
+    """키워드가 속한 묶음의 {family_id, representative, members, history: [{date, best_rank, avg_rank, members}, ...]}"""
+    family_id, representative, members = fetch_family(conn, keyword)
+    history = []
+    if family_id is not None:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT scrape_date, best_rank, avg_rank, member_count FROM keyword_family_daily "
+                "WHERE category_id = %s AND family_id = %s "
+                "AND (%s::date IS NULL OR scrape_date >= %s) AND (%s::date IS NULL OR scrape_date <= %s) "
+                "ORDER BY scrape_date;",
+                (category_id, family_id, date_from, date_from, date_to, date_to)
+            )
+            history = [{"date": scrape_date.strftime('%Y-%m-%d'), "best_rank": best, "avg_rank": round(avg, 1), "members": count}
+                       for scrape_date, best, avg, count in cur.fetchall()]
+    return {"family_id": family_id, "representative": representative, "members": members, "history": history}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="키워드 묶음 (문자 n-gram MinHash/LSH)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="모든 키워드 배정 및 묶음별 날짜 집계 재생성")
+    build_parser.add_argument("--reset", action="store_true", help="기존 배정을 지우고 처음부터 묶기 (묶음 ID 가 바뀜)")
+    build_parser.add_argument("--category", action="append", help="집계할 카테고리 ID (여러 번 지정 가능, 기본: 전체)")
+    show_parser = subparsers.add_parser("show", help="키워드가 속한 묶음과 최근 순위 출력")
+    show_parser.add_argument("keyword")
+    show_parser.add_argument("--category", default=None, help="카테고리 ID (지정하면 최근 묶음 순위도 출력)")
+    show_parser.add_argument("--days", type=int, default=14)
+    args = parser.parse_args()
+    if args.command == "build" and args.reset and args.category:
+        parser.error("--reset 은 묶음 ID 를 다시 매기므로 --category 와 함께 쓸 수 없습니다 (전체 집계를 다시 만듦)")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    try:
+        if args.command == "build":
+            build(args.reset, args.category)
+        else:
+            with db.get_connection() as conn:
+                if args.category:
+                    since = datetime.date.today() - datetime.timedelta(days=args.days)
+                    trend = fetch_family_trend(conn, args.category, args.keyword, since)
+                else:
+                    family_id, representative, members = fetch_family(conn, args.keyword)
+                    trend = {"family_id": family_id, "representative": representative, "members": members, "history": []}
+            if trend["family_id"] is None:
+                print(f"'{args.keyword}' 는 아직 묶음에 배정되지 않았습니다.")
+                sys.exit(1)
+            print(f"묶음 {trend['family_id']} ({trend['representative']}): 키워드 {len(trend['members'])}개")
+            print("  " + ", ".join(trend["members"]))
+            for row in trend["history"]:
+                print(f"{row['date']}  최고 {row['best_rank']:>3}위  평균 {row['avg_rank']:>5}위  키워드 {row['members']}개")
+    except psycopg2.Error as e:
+        logging.error(f"데이터베이스 오류: {e}")
+        sys.exit(1)
+    finally:
+        db.close_pool()
@@ -0,0 +1,254 @@
+# coding: utf-8
+# 키워드별 순위 이력 조회: DB 인덱스 (category_id, keyword, scrape_date) + 메모리 역색인
+#
+# - ensure_history_index(): daily_keywords 에 키워드 기준 인덱스 생성 (날짜 기준으로만 읽던 테이블에서
+#   키워드 하나의 이력을 인덱스 범위 읽기 한 번으로 가져옴, 순위는 INCLUDE 로 인덱스에 포함)
+# - KeywordIndex: 카테고리 하나의 키워드 -> 게시 목록 [(날짜, 순위), ...] 역색인과 어휘 검색(접두어/부분 문자열)
+#   대시보드가 카테고리별로 한 번 읽어 두고, 저장 알림(NOTIFY)을 받으면 해당 날짜만 반영합니다.
+
+import bisect
+import logging
+import datetime
+import threading
+
+import numpy as np
+import psycopg2
+
+import db
+
+HISTORY_INDEX_DDL = """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_daily_keywords_keyword_history
+        ON daily_keywords (category_id, keyword, scrape_date) INCLUDE (keyword_rank);
+"""
+
+
+def ensure_history_index():
+    """키워드 이력 인덱스 생성 (없을 때만, 쓰기를 막지 않도록 CONCURRENTLY)
+
+    마이그레이션(0003)이 적용된 파티션 테이블에는 이미 있으므로 건너뜁니다
+    (파티션 테이블에는 CONCURRENTLY 로 인덱스를 만들 수 없음).
+    """
+    logger = logging.getLogger()
+    try:
+        with db.get_connection() as conn:
+            conn.autocommit = True # CREATE INDEX CONCURRENTLY 는 트랜잭션 밖에서만 실행 가능
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT to_regclass('idx_daily_keywords_keyword_history') IS NOT NULL;")
+                    if not cur.fetchone()[0]:
+                        cur.execute(HISTORY_INDEX_DDL)
+            finally:
+                conn.autocommit = False
+        return True
+    except psycopg2.Error as e:
+        logger.warning(f"경고: 키워드 이력 인덱스를 만들지 못했습니다: {e}")
+        return False
+
+
+def query_history(conn, category_id, keyword, date_from=None, date_to=None):
+    """DB에서 키워드 이력 [(날짜, 순위), ...] (날짜순, 이력 인덱스 사용)"""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT scrape_date, keyword_rank FROM daily_keywords "
+            "WHERE category_id = %s AND keyword = %s "
+            "AND (%s::date IS NULL OR scrape_date >= %s) AND (%s::date IS NULL OR scrape_date <= %s) "
+            "ORDER BY scrape_date;",
+            (category_id, keyword, date_from, date_from, date_to, date_to)
+        )
+        return cur.fetchall()
+
+
+def query_search(conn, category_id, query, limit=10):
+    """DB에서 어휘 검색 (메모리 색인이 아직 없을 때): [(키워드, 등장 일수), ...] 등장 일수순"""
+    pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    with conn.cursor() as cur:
+        try: # 키워드당 한 행인 요약(keyword_summary)에서 검색, 없으면 원본에서 집계
+            cur.execute(
+                "SELECT keyword, days FROM keyword_summary "
+                "WHERE category_id = %s AND keyword ILIKE %s "
+                "ORDER BY (lower(keyword) LIKE lower(%s)) DESC, days DESC, keyword LIMIT %s;",
+                (category_id, pattern, pattern[1:], limit)
+            )
+            return cur.fetchall()
+        except psycopg2.errors.UndefinedTable:
+            conn.rollback()
+        cur.execute(
+            "SELECT keyword, COUNT(*) AS days FROM daily_keywords "
+            "WHERE category_id = %s AND keyword ILIKE %s GROUP BY keyword "
+            "ORDER BY (lower(keyword) LIKE lower(%s)) DESC, days DESC, keyword LIMIT %s;",
+            (category_id, pattern, pattern[1:], limit)
+        )
+        return cur.fetchall()
+
+
+class KeywordIndex:
+    """카테고리 하나의 키워드 -> (날짜 ordinal int32 배열, 순위 int16 배열) 역색인"""
+
+    def __init__(self, category_id):
+        self.category_id = category_id
+        self._postings = {} # keyword -> (dates, ranks), 날짜순
+        self._by_date = {} # 날짜 ordinal -> 그날 등장한 키워드 목록 (날짜 단위 교체용)
+        self._search_keys = [] # (소문자 키워드, 키워드) 정렬 목록 (접두어 검색)
+        self._lock = threading.Lock()
+        self.loaded_at = None
+
+    @classmethod
+    def load(cls, conn, category_id):
+        """daily_keywords 전체에서 색인 생성 (키워드/날짜순으로 서버 측 커서로 나눠 읽음)"""
+        index = cls(category_id)
+        with conn.cursor(name="keyword_index_load") as cur:
+            cur.itersize = 50000
+            cur.execute(
+                "SELECT keyword, scrape_date, keyword_rank FROM daily_keywords "
+                "WHERE category_id = %s ORDER BY keyword, scrape_date, keyword_rank;",
+                (category_id,)
+            )
+            current, dates, ranks = None, [], []
+            for keyword, scrape_date, rank in cur:
+                if keyword != current:
+                    if current is not None:
+                        index._add_postings(current, dates, ranks)
+                    current, dates, ranks = keyword, [], []
+                ordinal = scrape_date.toordinal()
+                if dates and dates[-1] == ordinal:
+                    continue # 같은 날 중복 등장은 높은 순위 하나만
+                dates.append(ordinal)
+                ranks.append(rank)
+            if current is not None:
+                index._add_postings(current, dates, ranks)
+        conn.rollback()
+        index._search_keys = sorted((keyword.lower(), keyword) for keyword in index._postings)
+        index.loaded_at = datetime.datetime.now()
+        return index
+
+    def _add_postings(self, keyword, dates, ranks):
+        self._postings[keyword] = (np.array(dates, dtype=np.int32), np.array(ranks, dtype=np.int16))
+        for ordinal in dates:
+            self._by_date.setdefault(ordinal, []).append(keyword)
+
+    def __len__(self):
+        return len(self._postings)
+
+    def __contains__(self, keyword):
+        return keyword in self._postings
+
+    def history(self, keyword, date_from=None, date_to=None):
+        """키워드 이력 [(날짜, 순위), ...] (없는 키워드면 빈 목록)"""
+        with self._lock:
+            postings = self._postings.get(keyword)
+        if postings is None:
+            return []
+        dates, ranks = postings
+        lo = 0 if date_from is None else np.searchsorted(dates, date_from.toordinal(), side="left")
+        hi = len(dates) if date_to is None else np.searchsorted(dates, date_to.toordinal(), side="right")
+        return [(datetime.date.fromordinal(int(d)), int(r)) for d, r in zip(dates[lo:hi], ranks[lo:hi])]
+
+    def search(self, query, limit=10):
+        """어휘 검색: 접두어 일치를 먼저, 이어서 부분 문자열 일치 (각각 등장 일수순) [(키워드, 등장 일수), ...]"""
+        query = query.strip().lower()
+        if not query:
+            return []
+        with self._lock:
+            keys = self._search_keys
+            start = bisect.bisect_left(keys, (query,))
+            prefix = []
+            for i in range(start, len(keys)):
+                if not keys[i][0].startswith(query):
+                    break
+                prefix.append(keys[i][1])
+            substring = [keyword for lowered, keyword in keys if query in lowered and not lowered.startswith(query)] \
+                if len(prefix) < limit else []
+            counts = {keyword: len(self._postings[keyword][0]) for keyword in prefix + substring}
+        ranked = sorted(prefix, key=lambda k: (-counts[k], k)) + sorted(substring, key=lambda k: (-counts[k], k))
+        return [(keyword, counts[keyword]) for keyword in ranked[:limit]]
+
+    def set_day(self, scrape_date, pairs):
+        """날짜 하나의 [(순위, 키워드), ...]로 해당 날짜의 게시 항목 교체 (저장 알림 반영용)"""
+        ordinal = scrape_date.toordinal()
+        best = {}
+        for rank, keyword in pairs:
+            if rank is not None and keyword and rank < best.get(keyword, rank + 1):
+                best[keyword] = rank
+        with self._lock:
+            for keyword in self._by_date.pop(ordinal, []):
+                dates, ranks = self._postings[keyword]
+                keep = dates != ordinal
+                if keep.all():
+                    continue
+                if keep.any():
+                    self._postings[keyword] = (dates[keep], ranks[keep])
+                else:
+                    del self._postings[keyword]
+                    self._search_keys.pop(bisect.bisect_left(self._search_keys, (keyword.lower(), keyword)))
+            for keyword, rank in best.items():
+                postings = self._postings.get(keyword)
+                if postings is None:
+                    self._postings[keyword] = (np.array([ordinal], dtype=np.int32), np.array([rank], dtype=np.int16))
+                    bisect.insort(self._search_keys, (keyword.lower(), keyword))
+                else:
+                    dates, ranks = postings
+                    pos = np.searchsorted(dates, ordinal)
+                    self._postings[keyword] = (np.insert(dates, pos, ordinal), np.insert(ranks, pos, rank))
+            self._by_date[ordinal] = list(best)
+
+
+# --- 프로세스 공유 색인 (대시보드) ---
+_indexes = {} # category_id -> KeywordIndex
+_load_locks = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(category_id):
+    """메모리에 올라온 색인 (아직 없으면 None)"""
+    return _indexes.get(category_id)
+
+
+def load_index(category_id):
+    """카테고리 색인을 읽어 등록 (이미 있으면 그대로 반환, 동시에 여러 번 읽지 않음)"""
+    with _indexes_lock:
+        lock = _load_locks.setdefault(category_id, threading.Lock())
+    with lock:
+        index = _indexes.get(category_id)
+        if index is None:
+            with db.get_connection() as conn:
+                index = KeywordIndex.load(conn, category_id)
+            _indexes[category_id] = index
+            logging.getLogger().info(f"키워드 색인 로드 완료 (category_id: {category_id}, 키워드 {len(index)}개)")
+        return index
+
+
+def load_index_in_background(category_id):
+    """색인이 없으면 백그라운드 스레드에서 읽기 시작 (요청은 그동안 DB로 처리)"""
+    if category_id in _indexes:
+        return
+    with _indexes_lock:
+        lock = _load_locks.setdefault(category_id, threading.Lock())
+    if lock.locked():
+        return # 이미 읽는 중
+
+    def _load():
+        try:
+            load_index(category_id)
+        except psycopg2.Error as e:
+            logging.getLogger().warning(f"키워드 색인 로드 실패 (category_id: {category_id}): {e}")
+
+    threading.Thread(target=_load, name=f"keyword-index-{category_id}", daemon=True).start()
+
+
+def apply_change(category_id, date_str):
+    """저장 알림 반영: 색인이 있으면 그 날짜 데이터만 다시 읽어 교체"""
+    index = _indexes.get(category_id)
+    if index is None:
+        return
+    scrape_date = datetime.date.fromisoformat(date_str)
+    with db.get_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT keyword_rank, keyword FROM daily_keywords WHERE category_id = %s AND scrape_date = %s;",
+            (category_id, scrape_date)
+        )
+        index.set_day(scrape_date, cur.fetchall())
+
+
+def reset():
+    """모든 색인 폐기 (알림을 놓쳤을 수 있을 때, 다음 요청에서 다시 읽음)"""
+    _indexes.clear()
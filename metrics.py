@@ -0,0 +1,227 @@
+# coding: utf-8
+# Prometheus 텍스트 형식 지표 (카운터 / 게이지 / 히스토그램)
+#
+# 대시보드는 /metrics 에서 자기 지표(경로별 응답 시간, DB 조회 시간, 연결 풀)와 스크래퍼 지표를 함께 내보냅니다.
+# 스크래퍼는 별도 프로세스이므로 지표 스냅샷을 파일(scrape_metrics.json)에 주기적으로 기록하고(FileExporter),
+# 스크래퍼를 실행한 대시보드가 같은 디렉토리(APP_BASE_PATH)에서 읽어 그대로 이어 붙입니다.
+# 스냅샷은 임시 파일에 쓴 뒤 os.replace 로 교체하므로 읽는 쪽이 쓰다 만 내용을 보지 않습니다.
+# 카운터/히스토그램은 스크래퍼 실행마다 0부터 다시 시작합니다 (Prometheus 는 카운터 초기화로 처리).
+
+import os
+import json
+import math
+import time
+import threading
+import contextlib
+
+METRICS_FILE = "scrape_metrics.json"
+EXPORT_INTERVAL_SECONDS = float(os.environ.get("SCRAPE_METRICS_INTERVAL", "5")) # 스크래퍼 스냅샷 기록 주기
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 히스토그램 기본 구간 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {} # 레이블 값 튜플 -> 값
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: 레이블 {sorted(labels)} 가 정의({list(self.labelnames)})와 다릅니다.")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _snapshot_value(self, value):
+        return value
+
+    def snapshot(self):
+        with self._lock:
+            values = [[list(key), self._snapshot_value(value)] for key, value in sorted(self._values.items())]
+        return {"name": self.name, "type": self.kind, "help": self.documentation,
+                "labelnames": list(self.labelnames), "values": values}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value, **labels):
+        """다른 곳에서 센 누적값을 그대로 반영 (연결 풀 누적 획득 수 등)"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0}
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            state["counts"][index] += 1
+            state["sum"] += value
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """with 블록 실행 시간(초)을 기록"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _snapshot_value(self, state):
+        cumulative, total = [], 0
+        for count in state["counts"]:
+            total += count
+            cumulative.append(total)
+        return {"buckets": cumulative, "sum": state["sum"], "count": total}
+
+    def snapshot(self):
+        data = super().snapshot()
+        data["buckets"] = list(self.buckets)
+        return data
+
+
+class Registry:
+    """지표 모음 (이름 중복 불가)"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"이미 등록된 지표: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self):
+        """JSON 으로 저장할 수 있는 스냅샷 {"timestamp", "metrics": [...]}"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {"timestamp": time.time(), "metrics": [metric.snapshot() for metric in metrics]}
+
+    def render(self):
+        return render_snapshot(self.snapshot())
+
+
+# --- 텍스트 형식 ---
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+def render_snapshot(snapshot):
+    """스냅샷 -> Prometheus 텍스트 형식 (값이 없는 지표도 HELP/TYPE 은 출력)"""
+    lines = []
+    for metric in snapshot.get("metrics", []):
+        name, names = metric["name"], metric["labelnames"]
+        lines.append(f"# HELP {name} {_escape(metric['help'])}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for values, value in metric["values"]:
+            if metric["type"] == "histogram":
+                bounds = [*metric["buckets"], math.inf]
+                for bound, count in zip(bounds, value["buckets"]):
+                    lines.append(f"{name}_bucket{_labels(names, values, [('le', _number(float(bound)))])} {count}")
+                lines.append(f"{name}_sum{_labels(names, values)} {_number(float(value['sum']))}")
+                lines.append(f"{name}_count{_labels(names, values)} {value['count']}")
+            else:
+                lines.append(f"{name}{_labels(names, values)} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# --- 다른 프로세스로 내보내기 (파일) ---
+def write_snapshot(path, registry):
+    """스냅샷을 원자적으로 기록 (임시 파일 작성 후 교체)"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(registry.snapshot(), f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    """스냅샷 파일 내용 (없거나 읽을 수 없으면 None)"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class FileExporter:
+    """registry 스냅샷을 interval 초마다 path 에 기록하는 백그라운드 스레드 (stop() 시 마지막으로 한 번 더 기록)"""
+
+    def __init__(self, registry, path=METRICS_FILE, interval=EXPORT_INTERVAL_SECONDS):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _write(self):
+        try:
+            write_snapshot(self.path, self.registry)
+        except OSError:
+            pass # 지표는 부가 정보이므로 기록 실패로 수집을 중단하지 않음
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._write()
+
+    def stop(self):
+        self._stop.set()
+        self._write()
@@ -0,0 +1,223 @@
+# coding: utf-8
+# 스키마 마이그레이션: migrations/NNNN_이름.sql 을 번호순으로 한 번씩 적용
+#
+# 적용 기록은 schema_migrations 테이블에 남기고(번호, 이름, 체크섬, 적용 시각), 마이그레이션 하나를
+# 트랜잭션 하나로 실행하므로 중간에 실패하면 그 마이그레이션 전체가 취소됩니다.
+# 여러 프로세스가 동시에 실행해도 advisory lock 으로 한 곳에서만 적용합니다.
+#
+# 명령줄:
+#   python migrate.py status         # 적용/대기 목록
+#   python migrate.py up [--to N]    # 대기 중인 마이그레이션 적용
+#   python migrate.py refresh        # 요약 materialized view 갱신
+#
+# 스크래퍼/대량 적재가 함께 쓰는 도우미:
+# - ensure_partitions(dates): 저장할 날짜의 연도 파티션 생성 (파티션 전환 전이면 아무것도 안 함)
+# - refresh_summaries(): 요약 materialized view 갱신 후 카테고리별 날짜 목록 변경 알림
+
+import os
+import re
+import sys
+import time
+import hashlib
+import logging
+import argparse
+import threading
+
+import psycopg2
+
+import db
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d{4})_(\w+)\.sql$")
+MIGRATION_LOCK_ID = 50000169 # pg_advisory_lock 키 (마이그레이션 동시 실행 방지)
+
+SUMMARY_VIEWS = ["daily_keyword_summary", "keyword_summary"] # refresh_summaries 가 갱신하는 순서
+# 수집 중에는 날짜 목록용 요약만 갱신 (keyword_summary 는 전체 파티션 집계라 실행 끝에 한 번만)
+IN_RUN_SUMMARY_VIEWS = ["daily_keyword_summary"]
+SUMMARY_REFRESH_INTERVAL_SECONDS = int(os.environ.get("SUMMARY_REFRESH_INTERVAL_SECONDS", "60")) # 수집 중 갱신 최소 간격
+
+MIGRATIONS_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        checksum VARCHAR(64) NOT NULL,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+"""
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """[(번호, 이름, SQL, 체크섬), ...] 번호순 (번호가 겹치면 ValueError)"""
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        version, name = int(match.group(1)), match.group(2)
+        if version in migrations:
+            raise ValueError(f"마이그레이션 번호 중복: {version:04d} ({migrations[version][0]}, {name})")
+        with open(os.path.join(directory, filename), encoding="utf-8") as f:
+            sql = f.read()
+        migrations[version] = (name, sql, hashlib.sha256(sql.encode("utf-8")).hexdigest())
+    return [(version, *migrations[version]) for version in sorted(migrations)]
+
+
+def applied_migrations(conn):
+    """{번호: (이름, 체크섬, 적용 시각)}"""
+    with conn.cursor() as cur:
+        cur.execute(MIGRATIONS_TABLE_DDL)
+        cur.execute("SELECT version, name, checksum, applied_at FROM schema_migrations;")
+        rows = cur.fetchall()
+    conn.commit()
+    return {version: (name, checksum, applied_at) for version, name, checksum, applied_at in rows}
+
+
+def migrate(target=None, conn=None):
+    """target 번호까지(기본: 전부) 대기 중인 마이그레이션을 적용하고 적용한 번호 목록 반환
+
+    데이터 복사가 들어 있을 수 있으므로 statement_timeout 없는 전용 연결을 사용합니다.
+    """
+    if conn is None:
+        conn = db.connect_unpooled(statement_timeout_ms=0)
+        try:
+            return migrate(target, conn)
+        finally:
+            conn.close()
+    logger = logging.getLogger()
+    applied = []
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK_ID,))
+    try:
+        done = applied_migrations(conn) # 잠금을 얻은 뒤에 읽어야 다른 프로세스가 적용한 것까지 보임
+        for version, name, sql, checksum in load_migrations():
+            if target is not None and version > target:
+                break
+            if version in done:
+                if done[version][1] != checksum:
+                    logger.warning(f"경고: 이미 적용된 마이그레이션 {version:04d}_{name}.sql 이 적용 후 수정되었습니다.")
+                continue
+            started = time.perf_counter()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(sql)
+                    cur.execute("INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s);",
+                                (version, name, checksum))
+                conn.commit()
+            except psycopg2.Error:
+                conn.rollback()
+                logger.error(f"마이그레이션 {version:04d}_{name} 실패 (이 마이그레이션의 변경은 모두 취소됨)")
+                raise
+            applied.append(version)
+            logger.info(f"마이그레이션 {version:04d}_{name} 적용 ({time.perf_counter() - started:.1f}초)")
+    finally:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_ID,))
+        conn.commit()
+    return applied
+
+
+def status(conn):
+    """[(번호, 이름, 상태, 적용 시각), ...] 상태: applied / pending / modified"""
+    done = applied_migrations(conn)
+    rows = []
+    for version, name, sql, checksum in load_migrations():
+        if version not in done:
+            rows.append((version, name, "pending", None))
+        else:
+            rows.append((version, name, "applied" if done[version][1] == checksum else "modified", done[version][2]))
+    return rows
+
+
+def ensure_partitions(dates, conn=None):
+    """dates 가 들어갈 연도 파티션을 미리 생성 (파티션 전환 전 스키마면 아무것도 하지 않음)"""
+    years = sorted({d.year for d in dates})
+    if not years:
+        return
+    if conn is None:
+        with db.get_connection() as pooled:
+            return ensure_partitions(dates, pooled)
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regprocedure('daily_keywords_ensure_partition(date)') IS NOT NULL;")
+        if cur.fetchone()[0]:
+            for year in years:
+                cur.execute("SELECT daily_keywords_ensure_partition(make_date(%s, 1, 1));", (year,))
+    conn.commit()
+
+
+_refresh_lock = threading.Lock()
+_last_refresh = 0.0
+
+
+def refresh_summaries(force=True, views=SUMMARY_VIEWS):
+    """요약 materialized view(views 중 있는 것)를 갱신 (읽기를 막지 않도록 CONCURRENTLY)
+
+    force=False 이면 마지막 시도 후 SUMMARY_REFRESH_INTERVAL_SECONDS 가 지나지 않았거나 다른 스레드가
+    갱신 중일 때 건너뜁니다 (수집 중 날짜마다 호출하는 용도, 뷰가 아직 없거나 실패해도 간격을 지킴).
+    갱신 후 카테고리마다 "{category_id}:" 알림을 보내 대시보드가 날짜 목록 캐시를 비우게 합니다. 갱신했으면 True.
+    """
+    global _last_refresh
+    logger = logging.getLogger()
+    if not force and time.monotonic() - _last_refresh < SUMMARY_REFRESH_INTERVAL_SECONDS:
+        return False
+    if not _refresh_lock.acquire(blocking=force):
+        return False
+    _last_refresh = time.monotonic()
+    try:
+        conn = db.connect_unpooled(statement_timeout_ms=0)
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT matviewname FROM pg_matviews WHERE schemaname = current_schema();")
+                existing = {row[0] for row in cur.fetchall()}
+            conn.commit()
+            views = [view for view in views if view in existing]
+            if not views:
+                return False # 0004 마이그레이션 전
+            conn.autocommit = True # 뷰마다 따로 커밋 (하나가 실패해도 나머지는 갱신)
+            for view in views:
+                with conn.cursor() as cur:
+                    cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view};")
+            with conn.cursor() as cur:
+                cur.execute("SELECT DISTINCT category_id FROM daily_keyword_summary;")
+                for (category_id,) in cur.fetchall():
+                    db.notify_summary_refreshed(cur, category_id)
+        finally:
+            conn.close()
+        return True
+    except psycopg2.Error as e:
+        logger.warning(f"경고: 요약 테이블 갱신 실패: {e}")
+        return False
+    finally:
+        _refresh_lock.release()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="daily_keywords 스키마 마이그레이션")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status", help="적용/대기 중인 마이그레이션 목록")
+    up_parser = subparsers.add_parser("up", help="대기 중인 마이그레이션 적용")
+    up_parser.add_argument("--to", type=int, default=None, help="이 번호까지만 적용 (기본: 전부)")
+    subparsers.add_parser("refresh", help="요약 materialized view 갱신")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    try:
+        if args.command == "status":
+            conn = db.connect_unpooled()
+            try:
+                for version, name, state, applied_at in status(conn):
+                    when = applied_at.strftime("%Y-%m-%d %H:%M:%S") if applied_at else ""
+                    print(f"{version:04d}  {name:<32} {state:<8} {when}")
+            finally:
+                conn.close()
+        elif args.command == "up":
+            applied = migrate(args.to)
+            logging.info(f"마이그레이션 {len(applied)}개 적용" if applied else "적용할 마이그레이션이 없습니다.")
+            if applied:
+                refresh_summaries()
+        elif args.command == "refresh":
+            if not refresh_summaries():
+                sys.exit(1)
+            logging.info("요약 갱신 완료")
+    except psycopg2.Error as e:
+        logging.error(f"데이터베이스 오류: {e}")
+        sys.exit(1)
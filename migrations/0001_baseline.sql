@@ -0,0 +1,39 @@
+-- 기준 스키마: 마이그레이션 도입 전부터 코드(save_to_db, ensure_ledger_table, analytics.ensure_deltas_table)가
+-- 사용하던 테이블. 이미 있는 데이터베이스에서는 아무것도 바꾸지 않습니다.
+
+CREATE TABLE IF NOT EXISTS daily_keywords (
+    id SERIAL PRIMARY KEY,
+    scrape_date DATE NOT NULL,
+    keyword_rank INTEGER NOT NULL,
+    keyword TEXT NOT NULL,
+    category_id VARCHAR(20) NOT NULL DEFAULT '50000169',
+    created_at TIMESTAMP DEFAULT now(),
+    UNIQUE (scrape_date, keyword_rank, category_id)
+);
+
+CREATE TABLE IF NOT EXISTS scrape_ledger (
+    scrape_date DATE NOT NULL,
+    category_id VARCHAR(20) NOT NULL,
+    status VARCHAR(16) NOT NULL,
+    keyword_count INTEGER NOT NULL DEFAULT 0,
+    attempt INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (scrape_date, category_id)
+);
+
+CREATE TABLE IF NOT EXISTS keyword_rank_deltas (
+    category_id VARCHAR(20) NOT NULL,
+    scrape_date DATE NOT NULL,
+    keyword TEXT NOT NULL,
+    keyword_rank INTEGER,
+    prev_date DATE,
+    prev_rank INTEGER,
+    rank_delta INTEGER,
+    is_new BOOLEAN NOT NULL DEFAULT FALSE,
+    is_dropout BOOLEAN NOT NULL DEFAULT FALSE,
+    streak INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (category_id, scrape_date, keyword)
+);
+CREATE INDEX IF NOT EXISTS idx_rank_deltas_movers
+    ON keyword_rank_deltas (category_id, scrape_date, rank_delta) WHERE rank_delta IS NOT NULL;
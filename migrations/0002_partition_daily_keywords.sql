@@ -0,0 +1,59 @@
+-- daily_keywords 를 scrape_date 기준 연 단위 범위 파티션 테이블로 전환
+--
+-- 조회는 모두 날짜 범위로 걸러지므로 해당 연도 파티션만 읽고, 카테고리가 늘어 테이블이 커져도
+-- 연도별 인덱스 크기는 일정하게 유지됩니다. 오래된 연도는 파티션 단위로 분리(DETACH)/보관할 수 있습니다.
+-- 파티션 키가 고유 제약에 포함되어야 하므로 id 단독 PRIMARY KEY 는 없애고
+-- (scrape_date, keyword_rank, category_id) 고유 제약(ON CONFLICT 대상)만 유지합니다.
+
+-- 날짜가 속한 연도 파티션이 없으면 생성 (스크래퍼/대량 적재가 저장 전에 호출)
+CREATE OR REPLACE FUNCTION daily_keywords_ensure_partition(target DATE) RETURNS VOID AS $$
+DECLARE
+    target_year INTEGER := extract(year FROM target)::INTEGER;
+    partition_name TEXT := format('daily_keywords_y%s', target_year);
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('daily_keywords_partitions'));
+    IF to_regclass(partition_name) IS NULL THEN
+        EXECUTE format('CREATE TABLE %I PARTITION OF daily_keywords FOR VALUES FROM (%L) TO (%L)',
+                       partition_name, make_date(target_year, 1, 1), make_date(target_year + 1, 1, 1));
+    END IF;
+END
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    first_year INTEGER;
+    last_year INTEGER;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'daily_keywords'::regclass) THEN
+        RETURN; -- 이미 전환됨
+    END IF;
+
+    ALTER TABLE daily_keywords RENAME TO daily_keywords_unpartitioned;
+    CREATE SEQUENCE IF NOT EXISTS daily_keywords_id_seq;
+    CREATE TABLE daily_keywords (
+        id BIGINT NOT NULL DEFAULT nextval('daily_keywords_id_seq'),
+        scrape_date DATE NOT NULL,
+        keyword_rank INTEGER NOT NULL,
+        keyword TEXT NOT NULL,
+        category_id VARCHAR(20) NOT NULL DEFAULT '50000169',
+        created_at TIMESTAMP DEFAULT now(),
+        CONSTRAINT daily_keywords_date_rank_category_key UNIQUE (scrape_date, keyword_rank, category_id)
+    ) PARTITION BY RANGE (scrape_date);
+
+    -- 기존 데이터의 연도부터 내년까지 파티션 생성
+    SELECT extract(year FROM min(scrape_date))::INTEGER, extract(year FROM max(scrape_date))::INTEGER
+      INTO first_year, last_year FROM daily_keywords_unpartitioned;
+    first_year := coalesce(first_year, extract(year FROM current_date)::INTEGER);
+    last_year := greatest(coalesce(last_year, first_year), extract(year FROM current_date)::INTEGER + 1);
+    FOR target_year IN first_year..last_year LOOP
+        PERFORM daily_keywords_ensure_partition(make_date(target_year, 1, 1));
+    END LOOP;
+
+    INSERT INTO daily_keywords (id, scrape_date, keyword_rank, keyword, category_id, created_at)
+    SELECT id, scrape_date, keyword_rank, keyword, category_id, created_at FROM daily_keywords_unpartitioned;
+    PERFORM setval('daily_keywords_id_seq', greatest((SELECT max(id) FROM daily_keywords), 1));
+    -- 시퀀스를 새 테이블 소유로 옮긴 뒤 기존 테이블 삭제 (시퀀스가 함께 삭제되지 않도록)
+    ALTER SEQUENCE daily_keywords_id_seq OWNED BY daily_keywords.id;
+    DROP TABLE daily_keywords_unpartitioned;
+END
+$$;
@@ -0,0 +1,12 @@
+-- 대시보드/분석 조회용 커버링 인덱스 (파티션 테이블에 만들면 연도 파티션마다 생성됨)
+
+-- 날짜 하나의 키워드 목록 (/api/keywords/{date}), 순위 변동 계산, 내보내기:
+-- (카테고리, 날짜) 범위를 순위순으로 읽고 keyword 까지 인덱스에 있어 테이블을 읽지 않음
+CREATE INDEX IF NOT EXISTS idx_daily_keywords_category_date
+    ON daily_keywords (category_id, scrape_date, keyword_rank) INCLUDE (keyword);
+
+-- 키워드 하나의 전체 이력 (/api/keyword/{keyword}/history)
+CREATE INDEX IF NOT EXISTS idx_daily_keywords_keyword_history
+    ON daily_keywords (category_id, keyword, scrape_date) INCLUDE (keyword_rank);
+
+ANALYZE daily_keywords;
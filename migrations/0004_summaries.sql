@@ -0,0 +1,20 @@
+-- 미리 집계한 요약 (migrate.refresh_summaries 로 갱신, 스크래퍼/대량 적재가 저장 후 호출)
+
+-- (카테고리, 날짜)별 수집 현황: 날짜 목록(/api/dates)을 원본 전체 대신 날짜당 한 행에서 읽음
+CREATE MATERIALIZED VIEW IF NOT EXISTS daily_keyword_summary AS
+SELECT category_id, scrape_date, count(*) AS keyword_count, max(keyword_rank) AS max_rank
+FROM daily_keywords
+GROUP BY category_id, scrape_date;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_daily_keyword_summary
+    ON daily_keyword_summary (category_id, scrape_date); -- REFRESH ... CONCURRENTLY 에 필요
+
+-- (카테고리, 키워드)별 전체 기간 요약: 키워드 검색(자동 완성)과 등장 일수 정렬
+CREATE MATERIALIZED VIEW IF NOT EXISTS keyword_summary AS
+SELECT category_id, keyword,
+       min(scrape_date) AS first_date, max(scrape_date) AS last_date,
+       count(DISTINCT scrape_date) AS days,
+       min(keyword_rank) AS best_rank, round(avg(keyword_rank), 1) AS avg_rank
+FROM daily_keywords
+GROUP BY category_id, keyword;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_keyword_summary ON keyword_summary (category_id, keyword);
+CREATE INDEX IF NOT EXISTS idx_keyword_summary_days ON keyword_summary (category_id, days DESC);
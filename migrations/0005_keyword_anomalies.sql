@@ -0,0 +1,34 @@
+-- 급상승/급락 감지 (anomaly.py): 키워드별 EWMA 상태와 감지 결과
+
+-- (카테고리, 키워드)별 log(순위)의 지수 가중 평균/분산. 순위권에 들었거나 직전 수집일에 들었다가 빠진 날만 갱신
+CREATE TABLE IF NOT EXISTS keyword_rank_ewma (
+    category_id VARCHAR(20) NOT NULL,
+    keyword TEXT NOT NULL,
+    ewma DOUBLE PRECISION NOT NULL,
+    ewm_var DOUBLE PRECISION NOT NULL,
+    n_obs INTEGER NOT NULL,
+    last_date DATE NOT NULL,
+    last_rank INTEGER, -- 마지막 관측이 순위권 밖(이탈)이면 NULL
+    PRIMARY KEY (category_id, keyword)
+);
+-- 직전 수집일에 순위권이었던 키워드(오늘 빠졌는지 확인할 대상)를 바로 찾음
+CREATE INDEX IF NOT EXISTS idx_keyword_rank_ewma_last
+    ON keyword_rank_ewma (category_id, last_date) WHERE last_rank IS NOT NULL;
+
+-- 카테고리별로 상태에 반영된 마지막 수집일
+CREATE TABLE IF NOT EXISTS keyword_anomaly_progress (
+    category_id VARCHAR(20) PRIMARY KEY,
+    last_date DATE NOT NULL,
+    stale BOOLEAN NOT NULL DEFAULT FALSE -- 반영된 날짜보다 과거 날짜가 나중에 저장됨 (재계산 필요)
+);
+
+CREATE TABLE IF NOT EXISTS keyword_anomalies (
+    category_id VARCHAR(20) NOT NULL,
+    scrape_date DATE NOT NULL,
+    keyword TEXT NOT NULL,
+    kind VARCHAR(8) NOT NULL, -- spike(급상승) / crash(급락)
+    keyword_rank INTEGER, -- 순위권 이탈이면 NULL
+    expected_rank DOUBLE PRECISION NOT NULL,
+    zscore DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (category_id, scrape_date, keyword)
+);
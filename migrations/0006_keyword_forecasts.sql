@@ -0,0 +1,15 @@
+-- 키워드별 순위 예측 (forecast.py): 키워드의 마지막 순위권 날짜가 바뀐 경우에만 다시 적합
+CREATE TABLE IF NOT EXISTS keyword_forecasts (
+    category_id VARCHAR(20) NOT NULL,
+    keyword TEXT NOT NULL,
+    last_date DATE NOT NULL, -- 적합에 쓴 마지막 순위권 날짜 (캐시 키)
+    last_rank INTEGER NOT NULL,
+    predicted_ranks REAL[] NOT NULL, -- last_date 다음 수집일부터 horizon 일
+    predicted_gain REAL NOT NULL, -- log(last_rank) - log(horizon 마지막 예측 순위), 양수 = 상승 예상
+    fit_error REAL NOT NULL, -- 한 단계 예측 오차 (log 순위 RMSE)
+    model VARCHAR(64) NOT NULL,
+    fitted_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (category_id, keyword)
+);
+CREATE INDEX IF NOT EXISTS idx_keyword_forecasts_risers
+    ON keyword_forecasts (category_id, last_date, predicted_gain DESC);
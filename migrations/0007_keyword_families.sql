@@ -0,0 +1,29 @@
+-- 키워드 묶음 (keyword_families.py): 띄어쓰기/브랜드+품목 등 표기만 다른 키워드를 문자 n-gram MinHash/LSH 로 묶음
+
+-- 키워드마다 한 번 배정하고 바꾸지 않음. 묶음 ID 는 묶음을 처음 만든 키워드의 keyword_id
+CREATE TABLE IF NOT EXISTS keyword_families (
+    keyword TEXT PRIMARY KEY,
+    keyword_id SERIAL UNIQUE,
+    family_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_keyword_families_family ON keyword_families (family_id);
+
+-- LSH 버킷: MinHash 서명의 밴드별 해시(밴드 번호 포함) -> 키워드. 새 키워드와 버킷이 겹치는 키워드만 후보로 읽음
+CREATE TABLE IF NOT EXISTS keyword_family_buckets (
+    bucket BIGINT NOT NULL,
+    keyword_id INTEGER NOT NULL REFERENCES keyword_families (keyword_id) ON DELETE CASCADE,
+    PRIMARY KEY (bucket, keyword_id)
+);
+
+-- (카테고리, 날짜, 묶음)별 순위 집계: 묶음 하나의 추이를 키워드 하나와 같은 인덱스 범위 읽기로 조회
+CREATE TABLE IF NOT EXISTS keyword_family_daily (
+    category_id VARCHAR(20) NOT NULL,
+    scrape_date DATE NOT NULL,
+    family_id INTEGER NOT NULL,
+    best_rank INTEGER NOT NULL, -- 묶음에서 가장 높은 순위
+    avg_rank REAL NOT NULL,
+    member_count INTEGER NOT NULL, -- 그날 순위권에 든 묶음 키워드 수
+    PRIMARY KEY (category_id, family_id, scrape_date)
+);
+CREATE INDEX IF NOT EXISTS idx_keyword_family_daily_date
+    ON keyword_family_daily (category_id, scrape_date, best_rank);
@@ -0,0 +1,6 @@
+-- 예측 시작 기준일: predicted_ranks 는 키워드의 last_date 가 아니라 적합에 쓴 창의 마지막 수집일(origin_date) 다음 날부터
+-- (순위권에서 빠진 키워드는 last_date 가 그대로라 다시 적합하지 않으므로 두 날짜가 다를 수 있음)
+ALTER TABLE keyword_forecasts ADD COLUMN IF NOT EXISTS origin_date DATE; -- 이 컬럼 추가 전 결과는 NULL (forecast --full 로 채움)
+COMMENT ON COLUMN keyword_forecasts.last_date IS '적합에 쓴 마지막 순위권 날짜 (캐시 키)';
+COMMENT ON COLUMN keyword_forecasts.predicted_ranks IS 'origin_date 다음 수집일부터 horizon 일의 예측 순위';
+COMMENT ON COLUMN keyword_forecasts.origin_date IS '적합에 쓴 수집일 창의 마지막 날짜 (예측 시작 기준)';
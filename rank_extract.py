@@ -0,0 +1,37 @@
+# coding: utf-8
+# 인기검색어 목록(ul.rank_top1000_list) HTML에서 (순위, 키워드)를 추출하는 파싱 계층
+#
+# 페이지 전체(page_source) 대신 목록 영역의 outerHTML만 받아 lxml(C 파서)로 한 번만 파싱하고,
+# XPath는 모듈 로드 시 한 번만 컴파일해 재사용합니다.
+
+from lxml import etree
+from lxml import html as lxml_html
+
+
+def _has_class(class_name):
+    """공백으로 구분된 class 속성에 class_name이 포함되어 있는지 검사하는 XPath 조건"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+# --- 한 번만 컴파일되는 XPath ---
+_ITEM_XPATH = etree.XPath(f".//li//a[{_has_class('link_text')}]")
+_RANK_TEXT_XPATH = etree.XPath(f"string(.//span[{_has_class('rank_top1000_num')}])")
+_KEYWORD_TEXT_XPATH = etree.XPath(f".//text()[not(ancestor::span[{_has_class('rank_top1000_num')}])]")
+
+
+def extract_rank_pairs(list_html):
+    """목록 HTML에서 [(순위, 키워드), ...]를 화면 순서대로 반환
+
+    순위는 사이트에 표시된 실제 번호(span.rank_top1000_num)이며, 표시가 없거나 숫자가 아니면 None 입니다.
+    키워드 텍스트는 순위 span을 제외한 텍스트 조각을 각각 공백 제거 후 이어 붙여 만듭니다.
+    """
+    if not list_html:
+        return []
+    root = lxml_html.fragment_fromstring(list_html, create_parent="div")
+    pairs = []
+    for item in _ITEM_XPATH(root):
+        rank_text = _RANK_TEXT_XPATH(item).strip()
+        keyword = "".join(text.strip() for text in _KEYWORD_TEXT_XPATH(item))
+        if keyword:
+            pairs.append((int(rank_text) if rank_text.isdigit() else None, keyword))
+    return pairs
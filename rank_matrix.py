@@ -0,0 +1,430 @@
+# coding: utf-8
+# 카테고리별 (키워드 × 날짜) 순위 행렬: 전체 기간 추세 계산을 Postgres 없이 NumPy 로 처리
+#
+# rank_matrix/{category_id}/ 아래에 저장합니다.
+# - ranks.npy: int16 2차원 배열 (행 = 키워드 ID, 열 = start_date 부터의 일 수), 메모리 매핑으로 열어 사용
+#              순위권 밖(또는 미수집)은 NOT_RANKED(0). 키워드 한 개의 전체 이력이 연속된 메모리에 있음
+# - collected.npy: 열(날짜)별 수집 여부 (미수집일과 순위권 밖을 구분)
+# - vocab.json: 키워드 ID -> 키워드 (ID는 처음 등장한 순서대로 부여, 바뀌지 않음)
+# - meta.json: 시작 날짜, 사용 중인 키워드/날짜 수 (마지막에 교체되므로 읽는 쪽은 이 파일 기준으로 갱신 여부 판단)
+# 배열은 여유 용량을 두고 커지므로 하루 추가는 열 하나만 씁니다.
+#
+# 생성: python rank_matrix.py build [--source db|csv|archive] [--category 50000169]
+# 이후에는 스크래퍼가 저장할 때마다 해당 날짜 열만 갱신합니다 (update_after_save).
+
+import os
+import sys
+import json
+import shutil
+import fcntl
+import logging
+import argparse
+import datetime
+import threading
+import contextlib
+
+import numpy as np
+
+import db
+import keyword_archive
+
+RANK_MATRIX_DIR = os.environ.get("RANK_MATRIX_DIR", "rank_matrix")
+NOT_RANKED = 0 # 순위권 밖/미수집 (새로 늘어난 영역이 0으로 채워지므로 별도 초기화 불필요)
+RANK_DTYPE = np.int16
+KEYWORD_GROWTH = 4096 # 키워드(행) 용량 증가 단위
+DATE_GROWTH = 366 # 날짜(열) 용량 증가 단위
+CHUNK_ROWS = 8192 # 전체 행렬 계산 시 한 번에 처리하는 키워드 수 (메모리 사용량 제한)
+
+_write_lock = threading.Lock() # 같은 프로세스의 워커 스레드 간 (프로세스 간은 파일 잠금)
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class RankMatrix:
+    """카테고리 하나의 순위 행렬 (open/create 로 생성)"""
+
+    def __init__(self, path, meta, vocab, ranks, collected, writable):
+        self.path = path
+        self.category_id = meta["category_id"]
+        self.start_date = datetime.date.fromisoformat(meta["start_date"])
+        self.n_dates = meta["n_dates"]
+        self.vocab = vocab
+        self.keyword_ids = {keyword: i for i, keyword in enumerate(vocab)}
+        self._ranks = ranks
+        self._collected = collected
+        self.writable = writable
+        self._vocab_dirty = False
+
+    # --- 열기/생성 ---
+    @classmethod
+    def open(cls, directory, category_id, writable=False):
+        """저장된 행렬 열기 (없으면 None)"""
+        path = os.path.join(directory, str(category_id))
+        try:
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(os.path.join(path, "vocab.json"), encoding="utf-8") as f:
+                vocab = json.load(f)
+        except FileNotFoundError:
+            return None
+        mode = "r+" if writable else "r"
+        ranks = np.load(os.path.join(path, "ranks.npy"), mmap_mode=mode)
+        collected = np.load(os.path.join(path, "collected.npy"))
+        # vocab.json 이 meta.json 보다 먼저 교체되므로 meta 기준 키워드 수만 사용
+        return cls(path, meta, vocab[:meta["n_keywords"]], ranks, collected, writable)
+
+    @classmethod
+    def create(cls, directory, category_id, start_date, n_keywords=KEYWORD_GROWTH, n_dates=DATE_GROWTH):
+        """빈 행렬 생성 (기존 파일은 덮어씀)"""
+        path = os.path.join(directory, str(category_id))
+        os.makedirs(path, exist_ok=True)
+        ranks = np.lib.format.open_memmap(os.path.join(path, "ranks.npy"), mode="w+", dtype=RANK_DTYPE,
+                                          shape=(n_keywords, n_dates))
+        collected = np.zeros(n_dates, dtype=bool)
+        meta = {"category_id": str(category_id), "start_date": start_date.isoformat(), "n_dates": 0, "n_keywords": 0}
+        matrix = cls(path, meta, [], ranks, collected, writable=True)
+        matrix._vocab_dirty = True
+        return matrix
+
+    # --- 조회 ---
+    @property
+    def n_keywords(self):
+        return len(self.vocab)
+
+    @property
+    def ranks(self):
+        """사용 중인 영역 (키워드 수 × 날짜 수) 보기 (복사 없음)"""
+        return self._ranks[:self.n_keywords, :self.n_dates]
+
+    @property
+    def collected(self):
+        return self._collected[:self.n_dates]
+
+    def dates(self):
+        """열 순서의 날짜 배열 (datetime64[D])"""
+        return np.datetime64(self.start_date, "D") + np.arange(self.n_dates)
+
+    def column(self, target_date):
+        return (target_date - self.start_date).days
+
+    def history(self, keyword):
+        """키워드의 전체 기간 순위 (1차원 int16 보기, 없는 키워드면 None)"""
+        keyword_id = self.keyword_ids.get(keyword)
+        return None if keyword_id is None else self._ranks[keyword_id, :self.n_dates]
+
+    # --- 갱신 ---
+    def _resize(self, n_keywords, n_dates, shift=0):
+        """용량 확장 (shift: 시작 날짜를 앞당길 때 기존 열을 오른쪽으로 미는 칸 수)"""
+        rows, cols = self._ranks.shape
+        new_shape = (
+            rows if n_keywords <= rows else n_keywords + KEYWORD_GROWTH,
+            cols + shift if n_dates <= cols + shift else n_dates + DATE_GROWTH,
+        )
+        if new_shape == (rows, cols):
+            return
+        tmp_path = os.path.join(self.path, "ranks.npy.tmp")
+        resized = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=RANK_DTYPE, shape=new_shape)
+        # 새 키워드가 먼저 등록(intern)되어 n_keywords 가 기존 용량보다 클 수 있으므로 기존 행 전체를 복사
+        resized[:rows, shift:shift + self.n_dates] = self._ranks[:, :self.n_dates]
+        resized.flush()
+        del resized
+        self._ranks.flush()
+        self._ranks = None
+        os.replace(tmp_path, os.path.join(self.path, "ranks.npy")) # 기존 파일을 연 쪽은 이전 내용을 계속 봄
+        self._ranks = np.load(os.path.join(self.path, "ranks.npy"), mmap_mode="r+")
+        collected = np.zeros(new_shape[1], dtype=bool)
+        collected[shift:shift + self.n_dates] = self.collected
+        self._collected = collected
+
+    def intern(self, keyword):
+        """키워드 ID (처음 보는 키워드면 새로 부여)"""
+        keyword_id = self.keyword_ids.get(keyword)
+        if keyword_id is None:
+            keyword_id = len(self.vocab)
+            self.vocab.append(keyword)
+            self.keyword_ids[keyword] = keyword_id
+            self._vocab_dirty = True
+        return keyword_id
+
+    def set_day(self, target_date, pairs):
+        """날짜 하나의 [(순위, 키워드), ...]로 해당 열을 교체"""
+        if not self.writable:
+            raise ValueError("읽기 전용으로 연 순위 행렬입니다.")
+        if target_date < self.start_date:
+            shift = (self.start_date - target_date).days
+            self._resize(self.n_keywords, self.n_dates + shift, shift=shift)
+            self.start_date = target_date
+            self.n_dates += shift
+        pairs = [(rank, keyword) for rank, keyword in pairs if rank is not None and keyword]
+        ids = np.fromiter((self.intern(keyword) for _, keyword in pairs), dtype=np.int64, count=len(pairs))
+        col = self.column(target_date)
+        self._resize(self.n_keywords, col + 1)
+        self.n_dates = max(self.n_dates, col + 1)
+        self._ranks[:self.n_keywords, col] = NOT_RANKED
+        # 같은 키워드가 두 번 나오면 높은 순위(작은 값)가 남도록 역순으로 기록
+        ranks = np.fromiter((rank for rank, _ in pairs), dtype=RANK_DTYPE, count=len(pairs))
+        order = np.argsort(-ranks.astype(np.int32), kind="stable")
+        self._ranks[ids[order], col] = ranks[order]
+        self._collected[col] = True
+
+    def save(self):
+        """변경 내용을 디스크에 반영 (meta.json 을 마지막에 교체)"""
+        self._ranks.flush()
+        np.save(os.path.join(self.path, "collected.npy.tmp.npy"), self._collected)
+        os.replace(os.path.join(self.path, "collected.npy.tmp.npy"), os.path.join(self.path, "collected.npy"))
+        if self._vocab_dirty:
+            _write_json(os.path.join(self.path, "vocab.json"), self.vocab)
+            self._vocab_dirty = False
+        _write_json(os.path.join(self.path, "meta.json"), {
+            "category_id": self.category_id,
+            "start_date": self.start_date.isoformat(),
+            "n_dates": self.n_dates,
+            "n_keywords": self.n_keywords,
+            "updated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        })
+
+
+@contextlib.contextmanager
+def locked(directory, category_id):
+    """카테고리 행렬 쓰기 잠금 (스레드 + 프로세스)"""
+    path = os.path.join(directory, str(category_id))
+    os.makedirs(path, exist_ok=True)
+    with _write_lock, open(os.path.join(path, ".lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+# --- 추세 계산 (마지막 축 = 날짜, 1차원/2차원 모두 가능) ---
+def ranked_mask(ranks):
+    return ranks != NOT_RANKED
+
+
+def rolling_mean_rank(ranks, window):
+    """window 일 이동 평균 순위 (구간에 순위권 날짜가 없으면 NaN). 순위권 밖인 날은 평균에서 제외"""
+    mask = ranked_mask(ranks)
+    pad = [(0, 0)] * (ranks.ndim - 1) + [(1, 0)]
+    # 누적합 S[k] = 앞 k 일의 합 -> t 일의 구간 합 = S[t+1] - S[max(0, t+1-window)] (앞쪽은 있는 날짜까지만)
+    sums = np.pad(np.cumsum(np.where(mask, ranks, 0), axis=-1, dtype=np.int64), pad)
+    counts = np.pad(np.cumsum(mask, axis=-1, dtype=np.int64), pad)
+    hi = np.arange(1, ranks.shape[-1] + 1)
+    lo = np.maximum(0, hi - window)
+    window_sums = sums[..., hi] - sums[..., lo]
+    window_counts = counts[..., hi] - counts[..., lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(window_counts > 0, window_sums / np.maximum(window_counts, 1), np.nan)
+
+
+def mean_rank(ranks):
+    """순위권에 든 날의 평균 순위 (없으면 NaN)"""
+    mask = ranked_mask(ranks)
+    counts = mask.sum(axis=-1)
+    sums = np.where(mask, ranks, 0).sum(axis=-1, dtype=np.int64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def volatility(ranks):
+    """순위권에 든 날 순위의 표준편차 (변동성, 2일 미만이면 NaN)"""
+    mask = ranked_mask(ranks)
+    counts = mask.sum(axis=-1)
+    means = mean_rank(ranks)
+    deviations = np.where(mask, ranks - np.expand_dims(np.nan_to_num(means), -1), 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 1, np.sqrt((deviations ** 2).sum(axis=-1) / np.maximum(counts, 1)), np.nan)
+
+
+def days_in_top(ranks, top=100):
+    """TOP top 안에 든 날 수"""
+    return ((ranks != NOT_RANKED) & (ranks <= top)).sum(axis=-1)
+
+
+def best_rank(ranks):
+    """최고 순위 (순위권에 든 적이 없으면 0)"""
+    best = np.where(ranked_mask(ranks), ranks, np.iinfo(RANK_DTYPE).max).min(axis=-1)
+    return np.where(best == np.iinfo(RANK_DTYPE).max, NOT_RANKED, best)
+
+
+def leaders(matrix, days=90, top=100, limit=20):
+    """최근 days 일 동안 TOP top 에 가장 오래 머문 키워드 [{keyword, days_in_top, mean_rank}, ...]"""
+    window = matrix.ranks[:, max(0, matrix.n_dates - days):]
+    counts = np.concatenate([days_in_top(window[i:i + CHUNK_ROWS], top) for i in range(0, len(window), CHUNK_ROWS)]) \
+        if len(window) else np.zeros(0, dtype=np.int64)
+    limit = min(limit, int((counts > 0).sum()))
+    if limit <= 0:
+        return []
+    candidates = np.argpartition(-counts, limit - 1)[:limit]
+    means = mean_rank(window[candidates])
+    order = np.lexsort((means, -counts[candidates]))
+    return [
+        {"keyword": matrix.vocab[candidates[i]], "days_in_top": int(counts[candidates[i]]),
+         "mean_rank": round(float(means[i]), 1)}
+        for i in order
+    ]
+
+
+# --- 생성 ---
+def _build(directory, category_id, days):
+    """(날짜, [(순위, 키워드), ...]) 순서열로 새 행렬을 만든 뒤 기존 행렬과 교체"""
+    building_dir = os.path.join(directory, ".building")
+    shutil.rmtree(building_dir, ignore_errors=True)
+    matrix = None
+    count = 0
+    for target_date, pairs in days:
+        if matrix is None:
+            matrix = RankMatrix.create(building_dir, category_id, target_date)
+        matrix.set_day(target_date, pairs)
+        count += 1
+    if matrix is None:
+        return 0
+    matrix.save()
+    with locked(directory, category_id):
+        target = os.path.join(directory, str(category_id))
+        old = f"{target}.old"
+        shutil.rmtree(old, ignore_errors=True)
+        os.rename(target, old) # 잠금 파일만 있는 디렉토리라도 존재함
+        os.rename(os.path.join(building_dir, str(category_id)), target)
+        shutil.rmtree(old, ignore_errors=True)
+    shutil.rmtree(building_dir, ignore_errors=True)
+    return count
+
+
+def iter_days_from_db(category_id):
+    """daily_keywords 에서 날짜순으로 (날짜, [(순위, 키워드), ...]) (서버 측 커서로 나눠 읽음)"""
+    with db.get_connection() as conn:
+        with conn.cursor(name="rank_matrix_build") as cur:
+            cur.itersize = 50000
+            cur.execute(
+                "SELECT scrape_date, keyword_rank, keyword FROM daily_keywords "
+                "WHERE category_id = %s ORDER BY scrape_date, keyword_rank;",
+                (category_id,)
+            )
+            current_date, pairs = None, []
+            for scrape_date, rank, keyword in cur:
+                if scrape_date != current_date:
+                    if pairs:
+                        yield current_date, pairs
+                    current_date, pairs = scrape_date, []
+                pairs.append((rank, keyword))
+            if pairs:
+                yield current_date, pairs
+        conn.rollback()
+
+
+def iter_days_from_csv(backup_dir, category_id):
+    """csv_backups/backup_{날짜}_{카테고리}.csv 에서 날짜순으로 (날짜, [(순위, 키워드), ...])"""
+    for target_date, _, path in keyword_archive.find_backup_files(backup_dir, [str(category_id)]):
+        yield target_date, keyword_archive.read_backup_csv(path)
+
+
+def iter_days_from_archive(archive_dir, category_id):
+    """압축 아카이브에서 날짜순으로 (날짜, [(순위, 키워드), ...]) (아카이브가 없으면 빈 목록)"""
+    archive = keyword_archive.KeywordArchive.open(archive_dir, category_id)
+    if archive is None:
+        return
+    with archive:
+        yield from archive.iter_days()
+
+
+def build_from_db(category_id, directory=RANK_MATRIX_DIR):
+    return _build(directory, category_id, iter_days_from_db(category_id))
+
+
+def build_from_csv(category_id, backup_dir="csv_backups", directory=RANK_MATRIX_DIR):
+    return _build(directory, category_id, iter_days_from_csv(backup_dir, category_id))
+
+
+def build_from_archive(category_id, archive_dir=keyword_archive.ARCHIVE_DIR, directory=RANK_MATRIX_DIR):
+    return _build(directory, category_id, iter_days_from_archive(archive_dir, category_id))
+
+
+def update_after_save(scrape_date_str, category_id, pairs, directory=RANK_MATRIX_DIR):
+    """save_to_db 직후 호출: 행렬이 이미 만들어져 있으면 해당 날짜 열만 갱신 (실패해도 수집은 계속)"""
+    logger = logging.getLogger()
+    if not os.path.exists(os.path.join(directory, str(category_id), "meta.json")):
+        return False # 아직 build 하지 않음 (일부 날짜만으로 만들지 않음)
+    try:
+        with locked(directory, category_id):
+            matrix = RankMatrix.open(directory, category_id, writable=True)
+            if matrix is None:
+                return False # 아직 build 하지 않음 (일부 날짜만으로 만들지 않음)
+            matrix.set_day(datetime.date.fromisoformat(scrape_date_str), pairs)
+            matrix.save()
+        return True
+    except (OSError, ValueError) as e:
+        logger.warning(f"경고: 순위 행렬 갱신 실패 ({scrape_date_str}, category_id: {category_id}): {e}")
+        return False
+
+
+# --- 읽기 전용 캐시 (대시보드) ---
+_cache = {} # (directory, category_id) -> (meta.json mtime, RankMatrix)
+_cache_lock = threading.Lock()
+
+
+def load_cached(category_id, directory=RANK_MATRIX_DIR):
+    """읽기 전용 행렬 (meta.json 이 바뀌었을 때만 다시 열기, 없으면 None)"""
+    key = (directory, str(category_id))
+    try:
+        mtime = os.stat(os.path.join(directory, str(category_id), "meta.json")).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    matrix = RankMatrix.open(directory, category_id)
+    with _cache_lock:
+        _cache[key] = (mtime, matrix)
+    return matrix
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="카테고리별 (키워드 × 날짜) 순위 행렬 생성/확인")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="행렬 전체 생성")
+    build_parser.add_argument("--source", choices=["db", "csv", "archive"], default="db", help="데이터 출처 (기본: db)")
+    build_parser.add_argument("--category", action="append", help="카테고리 ID (여러 번 지정 가능, 기본: 전체)")
+    build_parser.add_argument("--backup-dir", default="csv_backups", help="--source csv 일 때 CSV 백업 디렉토리")
+    build_parser.add_argument("--archive-dir", default=keyword_archive.ARCHIVE_DIR, help="--source archive 일 때 아카이브 디렉토리")
+    build_parser.add_argument("--dir", default=RANK_MATRIX_DIR, help="행렬 저장 디렉토리")
+    info_parser = subparsers.add_parser("info", help="저장된 행렬 정보 출력")
+    info_parser.add_argument("--category", action="append", required=True, help="카테고리 ID")
+    info_parser.add_argument("--dir", default=RANK_MATRIX_DIR, help="행렬 저장 디렉토리")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.command == "build":
+        categories = args.category
+        if not categories and args.source == "db":
+            with db.get_connection() as conn, conn.cursor() as cur:
+                cur.execute("SELECT DISTINCT category_id FROM daily_keywords ORDER BY category_id;")
+                categories = [row[0] for row in cur.fetchall()]
+        elif not categories and args.source == "csv":
+            categories = sorted({category_id for _, category_id, _ in keyword_archive.find_backup_files(args.backup_dir)})
+        elif not categories:
+            categories = sorted(name for name in os.listdir(args.archive_dir)
+                                if os.path.exists(os.path.join(args.archive_dir, name, "index.json")))
+        for category_id in categories:
+            if args.source == "db":
+                count = build_from_db(category_id, args.dir)
+            elif args.source == "csv":
+                count = build_from_csv(category_id, args.backup_dir, args.dir)
+            else:
+                count = build_from_archive(category_id, args.archive_dir, args.dir)
+            logging.info(f"[{category_id}] {count}일로 순위 행렬 생성 완료")
+        db.close_pool()
+    else:
+        for category_id in args.category:
+            matrix = RankMatrix.open(args.dir, category_id)
+            if matrix is None:
+                print(f"[{category_id}] 행렬 없음")
+                sys.exit(1)
+            print(f"[{category_id}] {matrix.start_date} 부터 {matrix.n_dates}일, 키워드 {matrix.n_keywords}개, "
+                  f"수집일 {int(matrix.collected.sum())}일, 용량 {matrix._ranks.shape}")
@@ -0,0 +1,128 @@
+# coding: utf-8
+# 스크래퍼 실행 상태 파일 (scrape_status.json): 스크래퍼가 쓰고 대시보드가 읽습니다.
+#
+# 실행 중인 스크래퍼의 PID/프로세스 시작 시각과 진행 상황(현재 날짜, 카테고리, 페이지, 수집 키워드 수)을
+# 하나의 JSON 파일에 기록합니다. 대시보드는 전체 프로세스 목록을 훑지 않고 이 파일과 PID 하나만 확인합니다.
+# 파일은 임시 파일에 쓴 뒤 os.replace 로 교체하므로 읽는 쪽이 쓰다 만 내용을 보지 않습니다.
+
+import os
+import json
+import time
+import datetime
+import threading
+
+import psutil
+
+STATUS_FILE = "scrape_status.json"
+MIN_WRITE_INTERVAL_SECONDS = 1.0 # 진행 상황 갱신이 잦아도 이 간격 이상으로만 파일에 씀
+
+STATE_RUNNING = "running"
+STATE_COMPLETED = "completed"
+STATE_FAILED = "failed"
+STATE_STOPPED = "stopped"
+STATE_INTERRUPTED = "interrupted" # 상태 파일은 running 인데 프로세스가 없음 (강제 종료 등)
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+def write_status(path, status):
+    """상태를 원자적으로 기록 (임시 파일 작성 후 교체)"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(status, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_status(path):
+    """상태 파일 내용 (없거나 읽을 수 없으면 None)"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_process_alive(pid, create_time):
+    """pid 프로세스가 살아 있고, 기록된 시작 시각과 같은 프로세스인지 (PID 재사용 구분)"""
+    try:
+        process = psutil.Process(pid)
+        if process.status() == psutil.STATUS_ZOMBIE:
+            return False
+        return create_time is None or abs(process.create_time() - create_time) < 1.0
+    except (psutil.NoSuchProcess, psutil.AccessDenied, ValueError, TypeError):
+        return False
+
+
+class StatusPublisher:
+    """스크래퍼 쪽: 진행 상황을 모아 상태 파일에 기록 (여러 워커 스레드에서 호출 가능)"""
+
+    def __init__(self, path=STATUS_FILE, **fields):
+        self.path = path
+        self._lock = threading.Lock()
+        self._last_write = 0.0
+        self.status = {
+            "state": STATE_RUNNING,
+            "pid": os.getpid(),
+            "process_create_time": psutil.Process().create_time(),
+            "started_at": _now(),
+            "updated_at": _now(),
+            "dates_total": 0,
+            "dates_done": 0,
+            "success": 0,
+            "fail": 0,
+            "active": {}, # 스레드 이름(MainThread, worker-N) -> {"date", "category", "page", "keywords"}
+            **fields,
+        }
+        self._write()
+
+    def _write(self):
+        self.status["updated_at"] = _now()
+        self._last_write = time.monotonic()
+        try:
+            write_status(self.path, self.status)
+        except OSError:
+            pass # 상태 파일은 부가 정보이므로 기록 실패로 수집을 중단하지 않음
+
+    def update(self, force=False, **fields):
+        """전체 항목 갱신 (dates_total, state 등)"""
+        with self._lock:
+            self.status.update(fields)
+            if force or time.monotonic() - self._last_write >= MIN_WRITE_INTERVAL_SECONDS:
+                self._write()
+
+    def progress(self, **fields):
+        """현재 스레드의 수집 위치 갱신 (date, category, page, keywords)"""
+        name = threading.current_thread().name
+        with self._lock:
+            self.status["active"].setdefault(name, {}).update(fields)
+            if time.monotonic() - self._last_write >= MIN_WRITE_INTERVAL_SECONDS:
+                self._write()
+
+    def leave(self):
+        """현재 스레드의 수집 위치 삭제 (날짜 처리 도중 끝나는 보조 스레드용)"""
+        name = threading.current_thread().name
+        with self._lock:
+            if self.status["active"].pop(name, None) is not None:
+                self._write()
+
+    def date_done(self, success):
+        """날짜 하나 처리 완료 (현재 스레드의 수집 위치는 비움)"""
+        name = threading.current_thread().name
+        with self._lock:
+            self.status["dates_done"] += 1
+            self.status["success" if success else "fail"] += 1
+            self.status["active"].pop(name, None)
+            self._write()
+
+    def finish(self, state=None):
+        """종료 상태 기록. state 를 주지 않으면 running 이었던 경우에만 failed 로 바꿈"""
+        with self._lock:
+            if state is not None:
+                self.status["state"] = state
+            elif self.status["state"] == STATE_RUNNING:
+                self.status["state"] = STATE_FAILED
+            self.status["active"] = {}
+            self.status["finished_at"] = _now()
+            self._write()
@@ -8,48 +8,74 @@ import sys       # 오류 발생 시 종료를 위해 추가
 import os        # 환경 변수 사용을 위해 추가
 import csv       # CSV 파일 처리를 위해 추가
 import logging   # 로깅 모듈 임포트
+import threading # 병렬 백필 워커를 위해 추가
+import queue     # 워커 간 날짜 분배를 위해 추가
+import re        # 페이지 정보 텍스트 파싱을 위해 추가
+import contextlib # 단계별 시간 측정을 위해 추가
+import signal    # 중지 신호(SIGTERM) 처리를 위해 추가
+import atexit    # 종료 시 실행 상태 기록을 위해 추가
+import weakref   # WebDriver별 화면 상태 기록을 위해 추가
 import psycopg2 # PostgreSQL 연동을 위해 추가
+import requests # HTTP 수집 엔진 오류 처리를 위해 추가
 from psycopg2.extras import execute_values # 대량 INSERT를 위해 추가
+import db # 공유 연결 풀 (PostgreSQL 접속 정보는 db.py 에서 환경 변수로 설정)
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException, StaleElementReferenceException
+import rank_extract # 목록 HTML → (순위, 키워드) 추출 (lxml)
+import datalab_http # 브라우저 없이 JSON 엔드포인트로 수집하는 HTTP 엔진
+import run_status # 대시보드에 보여 줄 실행 상태/진행 상황 파일
+import analytics # 저장 후 순위 변동(전일 대비) 계산
+import rank_matrix # 저장 후 (키워드 × 날짜) 순위 행렬 갱신
+import keyword_index # 키워드별 이력 조회용 인덱스
+import bulk_import # 백업 대량 적재 (import 하위 명령)
+import keyword_archive # 카테고리별 압축 아카이브 (날짜별 CSV 백업 대체)
+import migrate # 연도 파티션 준비, 요약 materialized view 갱신
+import anomaly # 저장 후 급상승/급락 감지 (키워드별 EWMA 상태 갱신)
+import forecast # 키워드별 순위 예측 (forecast 하위 명령)
+import keyword_families # 저장 후 새 키워드 묶음 배정, 묶음별 순위 집계
+import categories as category_registry # 수집 대상 카테고리 목록 (categories.json)
+import browser_service # 드라이버 경로 캐시, 웜 브라우저 임대
+import metrics # 수집 지표 (대시보드 /metrics 로 내보냄)
 
 # --- 설정 ---
-TARGET_URL = "https://datalab.naver.com/shoppingInsight/sCategory.naver"
+# 데이터랩 화면 주소 (기본: DATALAB_BASE_URL 기준, 로컬 대체 서버로 벤치마크할 때는 DATALAB_BASE_URL 만 바꾸면 됨)
+TARGET_URL = os.environ.get("TARGET_URL", datalab_http.DATALAB_BASE_URL + datalab_http.REFERER_PATH)
 INTER_DATE_SLEEP_SECONDS = 10 # 각 날짜 처리 사이 대기 시간 (초)
-
-# --- PostgreSQL 접속 정보 ---
-# 환경 변수에서 읽거나 기본값 사용
-DB_HOST = os.environ.get("DB_HOST", "192.168.1.148")
-DB_NAME = os.environ.get("DB_NAME", "postgres")
-DB_USER = os.environ.get("DB_USER", "postgres")
-DB_PASSWORD = os.environ.get("DB_PASSWORD", "Wldms1701!!")
-DB_PORT = os.environ.get("DB_PORT", "5432")
+DEFAULT_WORKER_RATE_LIMIT = 30 # 병렬 모드 기본 전역 요청 한도 (분당 요청 수, 전체 워커 합산)
+MAX_PAGES = 25 # 결과 페이지 수 (페이지당 20개)
+EXPECTED_KEYWORD_COUNT = 500 # 카테고리/날짜당 기대 키워드 수 (미만이면 partial 처리)
 
 # --- 카테고리 설정 ---
-# 수집할 카테고리 목록 (category_id, name, selector)
-CATEGORIES = [
-    {'id': '50000169', 'name': '남성의류', 'selector': "div.set_period.category > div.select:nth-of-type(2) ul.select_list a.option[data-cid='50000169']"},
-    {'id': '50000167', 'name': '여성의류', 'selector': "div.set_period.category > div.select:nth-of-type(2) ul.select_list a.option[data-cid='50000167']"},
-]
+# 수집할 카테고리 목록 (categories.json 의 enabled 항목: id, name, parent_id, selector, parent_selector)
+CATEGORIES = category_registry.load_categories()
+INTER_CATEGORY_SLEEP_SECONDS = 5 # 같은 세션에서 카테고리 사이 대기 시간 (초, 전역 속도 제한이 없을 때)
+# 같은 날짜의 카테고리를 동시에 수집할 세션(브라우저) 수 (--category-concurrency)
+DEFAULT_CATEGORY_CONCURRENCY = int(os.environ.get("SCRAPE_CATEGORY_CONCURRENCY", "2"))
 
 # --- CSS 선택자 (사용자 제공 HTML 기반, 필요시 실제 사이트에서 F12로 재확인) ---
-# 카테고리
+# 카테고리 (옵션 선택자는 categories.py 가 data-cid 로 생성)
 CATEGORY_1ST_BTN_SELECTOR = "div.set_period.category > div.select:nth-of-type(1) > span.select_btn"
-FASHION_CLOTHING_OPTION_SELECTOR = "div.set_period.category > div.select:nth-of-type(1) ul.select_list a.option[data-cid='50000000']"
 CATEGORY_2ND_BTN_SELECTOR = "div.set_period.category > div.select:nth-of-type(2) > span.select_btn"
 
 # 기간
 TIMEFRAME_BTN_SELECTOR = "div.set_period > div.select.w4 > span.select_btn"
 DAILY_OPTION_SELECTOR = "div.set_period > div.select.w4 ul.select_list a.option" # '일간' 텍스트 포함 확인 필요
 
-# 날짜 (시작일과 종료일 선택기 - 구조가 유사하다고 가정)
+# 날짜 (시작일/종료일 각각 연도 w2, 월/일 w3 드롭다운)
+START_DATE_BASE_SELECTOR = "div.set_period_target > span:nth-of-type(1)"
+END_DATE_BASE_SELECTOR = "div.set_period_target > span:nth-of-type(3)"
+# 날짜 드롭다운 버튼 (라벨이 선택된 값): 시작 연/월/일, 종료 연/월/일
+DATE_LABEL_SELECTORS = [
+    f"{base} > {part} > span.select_btn"
+    for base in (START_DATE_BASE_SELECTOR, END_DATE_BASE_SELECTOR)
+    for part in ("div.select.w2", "div.select.w3:nth-of-type(2)", "div.select.w3:nth-of-type(3)")
+]
+# (참고) 날짜 (시작일과 종료일 선택기 - 구조가 유사하다고 가정)
 # 예시: 시작일 연도 버튼 -> div.set_period_target > span:nth-of-type(1) > div.select.w2 > span.select_btn
 # 예시: 시작일 연도 옵션 -> div.set_period_target > span:nth-of-type(1) > div.select.w2 ul.select_list a.option[text='{}']
 # 날짜 선택기는 구조가 복잡하므로, 실제 구현 시 정확한 선택자 필요 (시작/종료, 연/월/일)
@@ -64,18 +90,36 @@ SEARCH_BUTTON_SELECTOR = "a.btn_submit" # 이전 코드 기반, 확인 필요
 
 # 결과 목록 및 페이지네이션
 KEYWORD_LIST_CONTAINER_SELECTOR = "ul.rank_top1000_list"
-KEYWORD_ITEM_SELECTOR = "li a.link_text" # 키워드 텍스트 포함 링크
-RANK_NUM_SELECTOR = "span.rank_top1000_num" # 순위 숫자 포함 span
+KEYWORD_ITEM_SELECTOR = "li a.link_text" # 키워드 텍스트 포함 링크 (rank_extract.py XPath와 동일 요소)
+RANK_NUM_SELECTOR = "span.rank_top1000_num" # 순위 숫자 포함 span (rank_extract.py XPath와 동일 요소)
 NEXT_PAGE_BTN_SELECTOR = "a.btn_page_next"
 PAGE_INFO_SELECTOR = "span.page_info" # 예: "1 /25"
 
+# --- 브라우저 세션 ---
+# reuse: 페이지를 한 번 열어 두고 바뀐 필터(카테고리/날짜 등)만 다시 설정, reload: 카테고리마다 페이지를 다시 열고 모두 설정
+DEFAULT_SESSION_MODE = os.environ.get("SCRAPE_SESSION_MODE", "reuse")
+# 순위 목록과 무관한 리소스(이미지, 글꼴, 분석 스크립트)는 받지 않음 (SCRAPE_BLOCK_RESOURCES=0 이면 모두 받음)
+BLOCK_PAGE_RESOURCES = os.environ.get("SCRAPE_BLOCK_RESOURCES", "1") != "0"
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*wcs.naver.net*", "*lcs.naver.com*", "*nlog.naver.com*", "*ntm.pstatic.net*",
+]
+
 # --- 백업 디렉토리 --- 
 BACKUP_DIR = "csv_backups"
+# 백업 형식: archive (카테고리별 압축 아카이브, keyword_archive.ARCHIVE_DIR) 또는 csv (예전 날짜별 CSV 파일)
+BACKUP_FORMAT = os.environ.get("BACKUP_FORMAT", "archive")
 LOG_FILE = "scrape_run.log" # 로그 파일명 정의
 
 # --- 로거 설정 --- (스크립트 실행 시 한 번만 설정되도록)
-def setup_logging():
-    log_formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s", datefmt='%Y-%m-%d %H:%M:%S')
+def setup_logging(with_thread_name=False):
+    log_format = "%(asctime)s [%(levelname)s] %(message)s"
+    if with_thread_name:
+        # 병렬 모드에서는 어느 워커의 로그인지 구분할 수 있도록 스레드 이름 포함
+        log_format = "%(asctime)s [%(levelname)s] [%(threadName)s] %(message)s"
+    log_formatter = logging.Formatter(log_format, datefmt='%Y-%m-%d %H:%M:%S')
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
 
@@ -89,54 +133,252 @@ def setup_logging():
     stream_handler.setFormatter(log_formatter)
     logger.addHandler(stream_handler)
 
+# --- 요청 속도 제한 ---
+class RequestRateLimiter:
+    """모든 워커가 공유하는 전역 요청 속도 제한기 (분당 요청 수 기준)
+
+    사이트에 실제 요청이 나가는 지점(페이지 접속, 조회, 페이지 이동)마다 acquire()를 호출하며,
+    워커 수와 관계없이 전체 요청 간격이 60/requests_per_minute 초 이상 유지됩니다.
+    """
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute
+        self._lock = threading.Lock()
+        self._next_allowed = time.monotonic()
+
+    def acquire(self):
+        # 다음 요청 슬롯을 예약한 뒤 잠금 밖에서 대기 (다른 워커가 예약을 막지 않도록)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_allowed)
+            self._next_allowed = slot + self.interval
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+
+_rate_limiter = None # 전역 요청 속도 제한기 (설정되지 않으면 제한 없음)
+_driver_setup_lock = threading.Lock() # 드라이버 설치/다운로드가 워커 간에 겹치지 않도록
+_browser_leases = {} # WebDriver -> 웜 브라우저 사용권 (browser_service.BrowserLease)
+
+def set_rate_limit(requests_per_minute):
+    """전역 요청 속도 제한 설정 (None 또는 0이면 해제)"""
+    global _rate_limiter
+    _rate_limiter = RequestRateLimiter(requests_per_minute) if requests_per_minute else None
+
+_category_concurrency = 1 # 날짜 하나의 카테고리를 동시에 수집하는 세션 수
+_session_reuse = True # 브라우저 세션 모드 (True: reuse, False: reload)
+
+def set_session_mode(mode):
+    """브라우저 세션 모드 설정 (reuse: 바뀐 필터만 설정, reload: 카테고리마다 페이지를 다시 열고 전부 설정)"""
+    global _session_reuse
+    _session_reuse = mode == "reuse"
+
+def set_category_concurrency(sessions):
+    """날짜당 카테고리 동시 수집 세션 수 설정 (1이면 순차 수집)"""
+    global _category_concurrency
+    _category_concurrency = max(1, sessions)
+
+# --- 실행 상태 파일 (대시보드 /api/status 용) ---
+_status = None # run_status.StatusPublisher (메인 실행 시 생성, 모듈로 가져다 쓸 때는 기록 안 함)
+
+def report_progress(**fields):
+    """현재 스레드의 수집 위치(date, category, page, keywords)를 상태 파일에 반영"""
+    if _status is not None:
+        _status.progress(**fields)
+
+def clear_progress():
+    """현재 스레드의 수집 위치 삭제 (카테고리 세션 스레드가 끝날 때)"""
+    if _status is not None:
+        _status.leave()
+
+def report_date_done(success):
+    if _status is not None:
+        _status.date_done(success)
+
+def finalize_status():
+    """프로세스 종료 시 상태 기록 (중지 신호로 끝났으면 stopped, 완료 표시 없이 끝났으면 failed)"""
+    if _status is not None:
+        _status.finish(run_status.STATE_STOPPED if _stop_event.is_set() else None)
+    if _metrics_exporter is not None:
+        _metrics_exporter.stop() # 마지막 지표 기록
+
+# --- 수집 지표 (metrics.FileExporter 가 scrape_metrics.json 에 기록, 대시보드 /metrics 가 읽음) ---
+METRICS = metrics.Registry()
+PAGES_SCRAPED = METRICS.counter("scraper_pages_scraped_total", "수집한 결과 페이지 수", ["engine"])
+KEYWORDS_PER_PAGE = METRICS.histogram("scraper_keywords_per_page", "페이지당 수집 키워드 수", ["engine"],
+                                      buckets=(0, 5, 10, 15, 19, 20))
+CLICK_SECONDS = METRICS.histogram("scraper_click_element_seconds", "click_element 소요 시간 (클릭 결과 반영 대기 포함)",
+                                  ["result"], buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+DATE_SELECTIONS = METRICS.counter("scraper_date_selection_total",
+                                  "select_date_via_ui 결과 (A: 플랜 A 성공, B: 플랜 B 대체 성공, failed: 모두 실패)", ["plan"])
+SAVE_SECONDS = METRICS.histogram("scraper_save_to_db_seconds", "save_to_db 소요 시간", ["result"],
+                                 buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+CATEGORY_RESULTS = METRICS.counter("scraper_categories_total", "(날짜, 카테고리) 수집 결과 (작업 원장 상태)", ["status"])
+_metrics_exporter = None # metrics.FileExporter (메인 실행 시 생성)
+
+def throttle():
+    """사이트 요청 직전에 호출하여 전역 요청 한도를 지킴"""
+    if _rate_limiter is not None:
+        _rate_limiter.acquire()
+
+# --- 단계별 소요 시간 측정 ---
+class PhaseTimer:
+    """날짜 단위로 단계별(탐색/날짜 선택/페이지 수집/저장) 소요 시간을 누적"""
+    PHASE_LABELS = {
+        'navigation': '페이지 탐색/필터',
+        'date_selection': '날짜 선택',
+        'pagination': '조회/페이지 수집',
+        'persistence': '저장',
+    }
+
+    def __init__(self):
+        self.totals = dict.fromkeys(self.PHASE_LABELS, 0.0)
+        self.started_at = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[name] += time.perf_counter() - start
+
+    def report(self):
+        """예: '페이지 탐색/필터 3.2s | 날짜 선택 4.1s | ... | 전체 20.3s'"""
+        parts = [f"{label} {self.totals[name]:.1f}s" for name, label in self.PHASE_LABELS.items()]
+        parts.append(f"전체 {time.perf_counter() - self.started_at:.1f}s")
+        return " | ".join(parts)
+
 # --- 함수 정의 ---
 
+def chrome_arguments():
+    """직접 실행과 웜 브라우저 서비스가 공유하는 Chrome 인자
+
+    헤드리스/샌드박스 인자는 각 실행 경로가 따로 지정합니다 (setup_driver, browser_service.chrome_command).
+    """
+    arguments = [
+        "--start-maximized", # 창 최대화 (헤드리스에서는 큰 의미 없을 수 있음)
+        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36",
+    ]
+    if BLOCK_PAGE_RESOURCES:
+        arguments.append("--blink-settings=imagesEnabled=false")
+    return arguments
+
 def setup_driver():
-    """Selenium WebDriver 설정"""
+    """Selenium WebDriver 설정
+
+    웜 브라우저 서비스(browser_service.py serve)가 떠 있으면 쉬고 있는 브라우저에 붙고, 없으면 새 Chrome 을 띄웁니다.
+    드라이버 경로는 캐시를 사용하므로 매 실행 네트워크 확인을 하지 않습니다. 시작 소요 시간을 로그로 남깁니다.
+    """
     logger = logging.getLogger() # 함수 내에서 로거 가져오기
+    started = time.perf_counter()
     chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--start-maximized") # 창 최대화 (헤드리스에서는 큰 의미 없을 수 있음)
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36")
+    lease = browser_service.acquire_browser()
+    if lease is not None:
+        chrome_options.debugger_address = lease.address # 실행 인자는 서비스가 브라우저를 띄울 때 이미 적용됨
+    else:
+        for argument in ["--headless", "--no-sandbox", "--disable-dev-shm-usage", *chrome_arguments()]:
+            chrome_options.add_argument(argument)
+        if BLOCK_PAGE_RESOURCES:
+            chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
 
     try:
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        logger.info("WebDriver 설정 완료.")
+        with _driver_setup_lock:
+            driver_path, driver_source = browser_service.resolve_driver_path()
+        resolved = time.perf_counter()
+        driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+        if BLOCK_PAGE_RESOURCES:
+            block_page_resources(driver)
+        if lease is not None:
+            _browser_leases[driver] = lease
+        mode = f"웜 브라우저 {lease.address} 연결" if lease is not None else "새 브라우저 실행"
+        logger.info(f"WebDriver 설정 완료: {mode}, {time.perf_counter() - started:.2f}초 "
+                    f"(드라이버 경로 {driver_source} {resolved - started:.2f}초)")
         return driver
     except Exception as e:
+        if lease is not None:
+            lease.release()
         logger.error(f"WebDriver 설정 중 오류 발생: {e}")
         return None
 
-def click_element(driver, selector, wait_time=10):
-    """요소 클릭 (WebDriverWait 사용)"""
-    logger = logging.getLogger()
+def quit_driver(driver):
+    """WebDriver 종료 (웜 브라우저에 붙은 세션이면 브라우저는 남기고 사용권만 반납)"""
     try:
-        element = WebDriverWait(driver, wait_time).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-        )
-        element.click()
-        time.sleep(0.5) # 클릭 후 잠시 대기
+        driver.quit()
+    except Exception:
+        pass # 이미 종료된 세션
+    lease = _browser_leases.pop(driver, None)
+    if lease is not None:
+        lease.release()
+
+def block_page_resources(driver):
+    """CDP 로 BLOCKED_URL_PATTERNS 요청을 차단 (이후 모든 페이지 이동에 적용, 실패해도 경고만)"""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        logging.getLogger().warning(f"경고: 리소스 차단 설정 실패 (모든 리소스를 받습니다): {e}")
+
+# --- 대기 조건 (고정 sleep 대신 화면 상태 변화를 기다림) ---
+READY_TIMEOUT_SECONDS = 10 # 화면 반영 대기 최대 시간 (초)
+
+def wait_until(driver, condition, timeout=READY_TIMEOUT_SECONDS, description=None):
+    """조건이 참이 될 때까지 대기. 시간 초과 시 경고만 남기고 False 반환"""
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(condition)
         return True
     except TimeoutException:
-        logger.error(f"오류: 요소를 찾거나 클릭할 수 없습니다 (시간 초과): {selector}")
-        return False
-    except ElementClickInterceptedException:
-         logger.warning(f"오류: 요소 클릭이 가로막혔습니다: {selector}. JavaScript 클릭 시도...")
-         try:
-             element = driver.find_element(By.CSS_SELECTOR, selector)
-             driver.execute_script("arguments[0].click();", element)
-             time.sleep(0.5)
-             return True
-         except Exception as e_js:
-             logger.error(f"오류: JavaScript 클릭 실패: {e_js}")
-             return False
-    except Exception as e:
-        logger.error(f"오류: 요소 클릭 중 예상치 못한 오류: {selector} - {e}")
+        if description:
+            logging.getLogger().warning(f"경고: 대기 시간 초과 - {description}")
         return False
 
+def page_is_ready(selector):
+    """문서 로딩 완료 + 기준 요소가 클릭 가능해졌는지 확인하는 대기 조건"""
+    def _condition(driver):
+        if driver.execute_script("return document.readyState") != "complete":
+            return False
+        return EC.element_to_be_clickable((By.CSS_SELECTOR, selector))(driver)
+    return _condition
+
+def selection_shows(selector, text):
+    """드롭다운 버튼 라벨에 선택한 값이 반영되었는지 확인하는 대기 조건"""
+    return EC.text_to_be_present_in_element((By.CSS_SELECTOR, selector), text)
+
+def click_element(driver, selector, wait_time=10, then=None):
+    """요소 클릭 (WebDriverWait 사용). then 조건이 주어지면 클릭 결과가 화면에 반영될 때까지 대기"""
+    logger = logging.getLogger()
+    started = time.perf_counter()
+    result = "ok" # 지표 레이블: ok / js_click / timeout / not_reflected / error
+    try:
+        try:
+            element = WebDriverWait(driver, wait_time).until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
+            )
+            element.click()
+        except TimeoutException:
+            logger.error(f"오류: 요소를 찾거나 클릭할 수 없습니다 (시간 초과): {selector}")
+            result = "timeout"
+            return False
+        except ElementClickInterceptedException:
+             logger.warning(f"오류: 요소 클릭이 가로막혔습니다: {selector}. JavaScript 클릭 시도...")
+             result = "js_click"
+             try:
+                 element = driver.find_element(By.CSS_SELECTOR, selector)
+                 driver.execute_script("arguments[0].click();", element)
+             except Exception as e_js:
+                 logger.error(f"오류: JavaScript 클릭 실패: {e_js}")
+                 result = "error"
+                 return False
+        except Exception as e:
+            logger.error(f"오류: 요소 클릭 중 예상치 못한 오류: {selector} - {e}")
+            result = "error"
+            return False
+        if then is not None and not wait_until(driver, then, wait_time, f"클릭 결과 반영: {selector}"):
+            result = "not_reflected"
+            return False
+        return True
+    finally:
+        CLICK_SECONDS.observe(time.perf_counter() - started, result=result)
+
 def select_date_via_js(driver, year, month, day):
     """ JavaScript를 사용하여 날짜 설정 (주의: 사이트 구조에 따라 동작 안 할 수 있음) """
     logger = logging.getLogger()
@@ -162,7 +404,7 @@ def select_date_via_ui(driver, year, month, day):
 
     # --- 선택자 정의 ---
     # 시작일
-    start_date_base_selector = "div.set_period_target > span:nth-of-type(1)"
+    start_date_base_selector = START_DATE_BASE_SELECTOR
     start_year_btn_selector = f"{start_date_base_selector} > div.select.w2 > span.select_btn"
     start_year_options_selector = f"{start_date_base_selector} > div.select.w2 ul.select_list a.option"
     start_month_btn_selector = f"{start_date_base_selector} > div.select.w3:nth-of-type(2) > span.select_btn"
@@ -170,7 +412,7 @@ def select_date_via_ui(driver, year, month, day):
     start_day_btn_selector = f"{start_date_base_selector} > div.select.w3:nth-of-type(3) > span.select_btn"
     start_day_options_selector = f"{start_date_base_selector} > div.select.w3:nth-of-type(3) ul.select_list a.option"
     # 종료일
-    end_date_base_selector = "div.set_period_target > span:nth-of-type(3)"
+    end_date_base_selector = END_DATE_BASE_SELECTOR
     end_year_btn_selector = f"{end_date_base_selector} > div.select.w2 > span.select_btn"
     end_year_options_selector = f"{end_date_base_selector} > div.select.w2 ul.select_list a.option"
     end_month_btn_selector = f"{end_date_base_selector} > div.select.w3:nth-of-type(2) > span.select_btn"
@@ -183,7 +425,6 @@ def select_date_via_ui(driver, year, month, day):
         try:
             # 1. 버튼 클릭하여 드롭다운 열기
             if not click_element(driver, button_selector): return False
-            # time.sleep(0.3) # 단순 대기 대신 명시적 대기 사용
 
             # 2. 옵션 목록(ul)이 나타날 때까지 대기
             list_selector_parts = options_selector.split(' a.option')
@@ -191,9 +432,8 @@ def select_date_via_ui(driver, year, month, day):
                 list_selector = list_selector_parts[0]
                 try:
                     WebDriverWait(driver, 5).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, list_selector))
+                        EC.visibility_of_element_located((By.CSS_SELECTOR, list_selector))
                     )
-                    time.sleep(0.2) # 목록 나타난 후 짧은 대기
                 except TimeoutException:
                     logger.warning(f"오류: 옵션 목록({list_selector})이 시간 내에 나타나지 않습니다.")
                     # 드롭다운을 닫기 위해 body 클릭 시도 (선택적)
@@ -201,8 +441,7 @@ def select_date_via_ui(driver, year, month, day):
                     except: pass
                     return False
             else:
-                logger.warning(f"경고: 옵션 목록 선택자 구조가 예상과 다릅니다: {options_selector}. 이전 방식대로 진행합니다.")
-                time.sleep(0.3) # 폴백으로 단순 대기
+                logger.warning(f"경고: 옵션 목록 선택자 구조가 예상과 다릅니다: {options_selector}. 옵션 요소 대기로 진행합니다.")
 
             # 3. 옵션 목록 찾기 및 클릭
             options = WebDriverWait(driver, 5).until(
@@ -223,24 +462,20 @@ def select_date_via_ui(driver, year, month, day):
                     try:
                         # 4. 클릭 전 스크롤하여 보이도록 함
                         driver.execute_script("arguments[0].scrollIntoView(true);", option)
-                        time.sleep(0.2) # 스크롤 후 짧은 대기
 
                         # 5. 클릭 가능한 상태가 될 때까지 기다렸다가 클릭
                         WebDriverWait(driver, 5).until(EC.element_to_be_clickable(option))
                         option.click()
                         found = True
                         logger.info(f"  - '{text_to_find}' 선택 완료.")
-                        time.sleep(0.5) # 클릭 후 UI 반영 대기
                         break
                     except ElementClickInterceptedException:
                         logger.warning(f"    경고: '{text_to_find}' 옵션 클릭 가로막힘. JS 클릭 시도...")
                         try:
                             driver.execute_script("arguments[0].scrollIntoView(true);", option) # JS 클릭 전에도 스크롤
-                            time.sleep(0.2)
                             driver.execute_script("arguments[0].click();", option)
                             found = True
                             logger.info(f"  - '{text_to_find}' JS 클릭 완료.")
-                            time.sleep(0.5)
                             break
                         except Exception as e_js_click:
                             logger.error(f"    오류: '{text_to_find}' JS 클릭 중 오류: {e_js_click}")
@@ -256,6 +491,8 @@ def select_date_via_ui(driver, year, month, day):
             if not found:
                  logger.error(f"    오류: '{text_to_find}' 옵션을 찾을 수 없습니다. (선택자: {options_selector})")
                  return False
+            # 6. 클릭 후 UI 반영 대기: 드롭다운 버튼 라벨이 선택한 값으로 바뀔 때까지
+            wait_until(driver, selection_shows(button_selector, text_to_find), 5, f"'{text_to_find}' 선택 반영")
             return True
 
         except TimeoutException:
@@ -274,7 +511,6 @@ def select_date_via_ui(driver, year, month, day):
         if not click_option_by_text(driver, end_month_btn_selector, end_month_options_selector, month_str): raise ValueError("Plan A Failed")
         if not click_option_by_text(driver, end_day_btn_selector, end_day_options_selector, day_str): raise ValueError("Plan A Failed")
         logger.info("  --- 종료일 설정 완료 (플랜 A) ---")
-        time.sleep(0.5)
         logger.info("  --- 시작일 설정 (플랜 A) ---")
         if not click_option_by_text(driver, start_year_btn_selector, start_year_options_selector, year_str): raise ValueError("Plan A Failed")
         if not click_option_by_text(driver, start_month_btn_selector, start_month_options_selector, month_str): raise ValueError("Plan A Failed")
@@ -287,6 +523,7 @@ def select_date_via_ui(driver, year, month, day):
 
     if plan_a_success:
         logger.info(f"날짜 선택 최종 완료 (플랜 A): {year}-{month_str}-{day_str}")
+        DATE_SELECTIONS.inc(plan="A")
         return True
     else:
         # --- 플랜 B 시도: 시작일 -> 종료일 --- 
@@ -298,7 +535,6 @@ def select_date_via_ui(driver, year, month, day):
             if not click_option_by_text(driver, start_month_btn_selector, start_month_options_selector, month_str): raise ValueError("Plan B Failed")
             if not click_option_by_text(driver, start_day_btn_selector, start_day_options_selector, day_str): raise ValueError("Plan B Failed")
             logger.info("  --- 시작일 설정 완료 (플랜 B) ---")
-            time.sleep(0.5)
             logger.info("  --- 종료일 설정 (플랜 B) ---")
             if not click_option_by_text(driver, end_year_btn_selector, end_year_options_selector, year_str): raise ValueError("Plan B Failed")
             if not click_option_by_text(driver, end_month_btn_selector, end_month_options_selector, month_str): raise ValueError("Plan B Failed")
@@ -311,13 +547,154 @@ def select_date_via_ui(driver, year, month, day):
 
         if plan_b_success:
             logger.info(f"날짜 선택 최종 완료 (플랜 B): {year}-{month_str}-{day_str}")
+            DATE_SELECTIONS.inc(plan="B")
             return True
         else:
             logger.error(f"오류: 날짜 선택 플랜 A, B 모두 실패 ({year}-{month_str}-{day_str})")
+            DATE_SELECTIONS.inc(plan="failed")
             return False
 
+# --- 화면 상태 재사용 (세션 모드) ---
+# 현재 필터 상태를 한 번에 읽는 스크립트: 분류/기간/날짜 드롭다운 라벨과 체크된 연령대
+_PAGE_STATE_JS = """
+if (document.readyState !== 'complete' || !document.querySelector(arguments[0])) return null;
+const label = sel => { const el = document.querySelector(sel); return el ? el.textContent.trim() : null; };
+return {
+    category1: label(arguments[0]),
+    category2: label(arguments[1]),
+    timeframe: label(arguments[2]),
+    dates: arguments[3].map(label),
+    ages: Array.from(document.querySelectorAll("input[type='checkbox']:checked")).map(el => el.value),
+};
+"""
+
+class DatalabPage:
+    """WebDriver 하나의 데이터랩 화면. 필터 상태를 스크립트 한 번으로 읽어 다른 항목만 다시 설정
+
+    reuse 모드에서는 페이지를 한 번 열어 두고 카테고리/날짜가 바뀔 때 그 드롭다운만 조작하며,
+    연속한 날짜 사이에는 보통 날짜만 바뀝니다. 설정 중 오류가 나면 invalidate()로 다음에 페이지를 다시 엽니다.
+    reload 모드는 예전처럼 카테고리마다 페이지를 다시 열고 모든 필터를 설정합니다.
+    """
+    def __init__(self, driver):
+        self.driver = driver
+        self.category_id = None # 이 화면에서 마지막으로 선택한 카테고리 (None: 페이지를 새로 열어야 함)
+
+    def invalidate(self):
+        self.category_id = None
+
+    def read_state(self):
+        """현재 필터 상태 dict (페이지가 열려 있지 않으면 None)"""
+        try:
+            return self.driver.execute_script(_PAGE_STATE_JS, CATEGORY_1ST_BTN_SELECTOR, CATEGORY_2ND_BTN_SELECTOR,
+                                              TIMEFRAME_BTN_SELECTOR, DATE_LABEL_SELECTORS)
+        except Exception:
+            return None
+
+    def _load(self):
+        logger = logging.getLogger()
+        logger.info(f"페이지 초기화 (재접속): {TARGET_URL}")
+        self.category_id = None
+        throttle()
+        self.driver.get(TARGET_URL)
+        if not wait_until(self.driver, page_is_ready(CATEGORY_1ST_BTN_SELECTOR), description="페이지 로딩"):
+            raise Exception("페이지 로딩 시간 초과")
+
+    def _category_shown(self, state, category):
+        if category['parent_selector']:
+            return state.get('category2') == category['name'] and \
+                (not category.get('parent_name') or state.get('category1') == category['parent_name'])
+        return state.get('category1') == category['name']
+
+    def _select_category(self, category):
+        logger = logging.getLogger()
+        category_name = category['name']
+        category_selector = category['selector']
+        # 1차 분류 > 2차 분류, 1차 분류만 수집하는 항목은 1차 분류에서 바로 선택
+        logger.info(f"카테고리 선택 중: {category_name}")
+        if not click_element(self.driver, CATEGORY_1ST_BTN_SELECTOR): raise Exception("1차 분류 버튼 클릭 실패")
+        if category['parent_selector']:
+            parent_name = category.get('parent_name') or category['parent_id']
+            # 1차 분류 선택 후 2차 분류 목록에 해당 카테고리 옵션이 채워질 때까지 대기
+            if not click_element(self.driver, category['parent_selector'],
+                                 then=EC.presence_of_element_located((By.CSS_SELECTOR, category_selector))):
+                raise Exception(f"{parent_name} 옵션 클릭 실패")
+            if not click_element(self.driver, CATEGORY_2ND_BTN_SELECTOR): raise Exception("2차 분류 버튼 클릭 실패")
+            if not click_element(self.driver, category_selector, then=selection_shows(CATEGORY_2ND_BTN_SELECTOR, category_name)):
+                raise Exception(f"{category_name} 옵션 클릭 실패")
+        elif not click_element(self.driver, category_selector, then=selection_shows(CATEGORY_1ST_BTN_SELECTOR, category_name)):
+            raise Exception(f"{category_name} 옵션 클릭 실패")
+        logger.info(f"카테고리 선택 완료: {category_name}")
+
+    def _select_daily(self):
+        logger = logging.getLogger()
+        logger.info("기간 선택 중: 일간")
+        if not click_element(self.driver, TIMEFRAME_BTN_SELECTOR): raise Exception("기간 버튼 클릭 실패")
+        daily_options = self.driver.find_elements(By.CSS_SELECTOR, DAILY_OPTION_SELECTOR)
+        daily_clicked = False
+        for option in daily_options:
+            if "일간" in option.text: option.click(); daily_clicked = True; break
+        if not daily_clicked: raise Exception("기간 '일간' 옵션 클릭 실패")
+        wait_until(self.driver, selection_shows(TIMEFRAME_BTN_SELECTOR, "일간"), description="기간 '일간' 반영")
+        logger.info("기간 '일간' 선택 완료.")
+
+    def prepare(self, category):
+        """페이지를 (필요하면) 열고 카테고리와 기간 '일간'을 맞춤"""
+        state = self.read_state() if _session_reuse and self.category_id is not None else None
+        if state is None:
+            self._load()
+            state = self.read_state() or {}
+        else:
+            logging.getLogger().info("열려 있는 페이지 재사용 (바뀐 필터만 설정)")
+        if self.category_id != category['id'] or not self._category_shown(state, category):
+            self._select_category(category)
+            self.category_id = category['id']
+            state = self.read_state() or {} # 분류를 바꾸면 다른 필터가 초기화될 수 있으므로 다시 확인
+        if "일간" not in (state.get('timeframe') or ""):
+            self._select_daily()
+
+    def select_date(self, target_date):
+        """시작일/종료일을 target_date 로 (이미 그 날짜면 그대로)"""
+        logger = logging.getLogger()
+        year, month, day = str(target_date.year), f"{target_date.month:02d}", f"{target_date.day:02d}"
+        state = self.read_state() or {}
+        if state.get('dates') == [year, month, day] * 2:
+            logger.info(f"날짜 유지: {target_date.strftime('%Y-%m-%d')}")
+            return
+        logger.info("날짜 선택 시도...")
+        if not select_date_via_ui(self.driver, target_date.year, target_date.month, target_date.day):
+            raise Exception("날짜 선택 실패") # 날짜 선택 실패 시 해당 날짜 처리 중단
+
+    def ensure_ages(self):
+        """AGES_TO_SELECT 연령대가 모두 체크되어 있도록 (빠진 것만 클릭)"""
+        logger = logging.getLogger()
+        checked = set((self.read_state() or {}).get('ages') or [])
+        if checked.issuperset(AGES_TO_SELECT):
+            return
+        logger.info("연령대 선택 중...")
+        for age in AGES_TO_SELECT:
+            if age in checked:
+                continue
+            age_checkbox_selector = AGE_CHECKBOX_SELECTOR_TEMPLATE.format(age)
+            checkbox = WebDriverWait(self.driver, 5).until(EC.presence_of_element_located((By.CSS_SELECTOR, age_checkbox_selector)))
+            if not checkbox.is_selected():
+                self.driver.execute_script("arguments[0].click();", checkbox)
+                wait_until(self.driver, EC.element_to_be_selected(checkbox), 5, f"{age}대 체크 반영")
+                logger.info(f"- {age}대 선택")
+        logger.info("연령대 선택 완료.")
+
+_pages = weakref.WeakKeyDictionary() # WebDriver -> DatalabPage
+_pages_lock = threading.Lock()
+
+def page_session(driver):
+    """WebDriver 의 화면 상태 객체 (드라이버마다 하나)"""
+    with _pages_lock:
+        page = _pages.get(driver)
+        if page is None:
+            page = _pages[driver] = DatalabPage(driver)
+        return page
+
 def save_to_csv(keywords_data, scrape_date_str):
-    """수집된 데이터를 CSV 파일로 백업 저장"""
+    """수집된 [(순위, 키워드), ...] 데이터를 CSV 파일로 백업 저장"""
     logger = logging.getLogger()
     try:
         os.makedirs(BACKUP_DIR, exist_ok=True)
@@ -330,8 +707,8 @@ def save_to_csv(keywords_data, scrape_date_str):
             # 헤더 작성
             csvwriter.writerow(['rank', 'keyword'])
             # 데이터 작성
-            for rank, keyword in enumerate(keywords_data):
-                csvwriter.writerow([rank + 1, keyword])
+            for rank, keyword in keywords_data:
+                csvwriter.writerow([rank, keyword])
         
         logger.info(f"CSV 백업 완료: {filepath}")
         return True
@@ -339,44 +716,87 @@ def save_to_csv(keywords_data, scrape_date_str):
         logger.error(f"CSV 백업 중 오류 발생: {e}")
         return False
 
-def scrape_page_keywords(driver):
-    """현재 페이지의 키워드 목록 스크랩"""
+def read_page_info(driver):
+    """페이지 정보 텍스트(예: "1 /25")를 (현재 페이지, 전체 페이지)로 파싱. 없으면 None"""
+    try:
+        page_info = driver.find_element(By.CSS_SELECTOR, PAGE_INFO_SELECTOR).text
+    except (NoSuchElementException, StaleElementReferenceException):
+        return None
+    match = re.search(r"(\d+)\s*/\s*(\d+)", page_info)
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+# 결과 목록의 첫/마지막 항목 텍스트와 페이지 정보로 만든 가벼운 서명 (목록 전체를 가져오지 않음)
+_RESULT_SIGNATURE_JS = """
+const list = document.querySelector(arguments[0]);
+if (!list || !list.firstElementChild) return null;
+const info = document.querySelector(arguments[1]);
+return [list.firstElementChild.textContent, list.lastElementChild.textContent,
+        info ? info.textContent : ''].join('|');
+"""
+
+def result_list_signature(driver):
+    """현재 결과 목록의 서명. 목록이 없으면 None"""
+    try:
+        return driver.execute_script(_RESULT_SIGNATURE_JS, KEYWORD_LIST_CONTAINER_SELECTOR, PAGE_INFO_SELECTOR)
+    except Exception:
+        return None
+
+def results_changed(previous_signature, expected_page=None):
+    """결과 목록이 이전 서명과 달라졌는지(그리고 expected_page로 넘어갔는지) 확인하는 대기 조건"""
+    def _condition(driver):
+        signature = result_list_signature(driver)
+        if signature is None or signature == previous_signature:
+            return False
+        if expected_page is not None:
+            page_info = read_page_info(driver)
+            return page_info is not None and page_info[0] == expected_page
+        return True
+    return _condition
+
+def scrape_page_keywords(driver, rank_offset=0):
+    """현재 페이지의 [(순위, 키워드), ...] 스크랩
+
+    페이지 전체 소스 대신 목록 영역(ul.rank_top1000_list)의 outerHTML만 가져와 한 번 파싱합니다.
+    순위는 사이트에 표시된 번호를 사용하고, 표시가 없는 항목만 rank_offset + 페이지 내 위치로 보정합니다.
+    """
     logger = logging.getLogger()
     keywords_on_page = []
     try:
         # 목록 컨테이너가 로드될 때까지 잠시 대기
-        WebDriverWait(driver, 10).until(
+        keyword_container = WebDriverWait(driver, 10).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, KEYWORD_LIST_CONTAINER_SELECTOR))
         )
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        keyword_container = soup.select_one(KEYWORD_LIST_CONTAINER_SELECTOR)
-        if keyword_container:
-            keyword_items = keyword_container.select(KEYWORD_ITEM_SELECTOR)
-            for item in keyword_items:
-                rank_span = item.select_one(RANK_NUM_SELECTOR)
-                rank_text = rank_span.get_text(strip=True) if rank_span else ""
-                # 키워드 텍스트 추출 (순위 숫자 제외)
-                keyword_text = item.get_text(strip=True)
-                if rank_text and keyword_text.startswith(rank_text):
-                     # 순위 숫자가 맨 앞에 있으면 제거 (공백처리 포함)
-                     keyword = keyword_text[len(rank_text):].strip()
-                else:
-                     keyword = keyword_text # 순위가 없거나 다른 형식인 경우 그대로 사용
-                if keyword:
-                     keywords_on_page.append(keyword)
+        list_html = keyword_container.get_attribute('outerHTML')
+        for position, (rank, keyword) in enumerate(rank_extract.extract_rank_pairs(list_html), start=1):
+            keywords_on_page.append((rank if rank is not None else rank_offset + position, keyword))
     except Exception as e:
         logger.error(f"페이지 키워드 스크랩 중 오류: {e}")
     return keywords_on_page
 
 def save_to_db(keywords_data, scrape_date_str, category_id='50000169'):
-    """수집된 데이터를 PostgreSQL에 저장"""
+    """수집된 [(순위, 키워드), ...] 데이터를 PostgreSQL에 저장"""
     logger = logging.getLogger()
-    conn = None
+    started = time.perf_counter()
+    saved = False
     try:
-        logger.info("데이터베이스 연결 시도...")
-        conn = psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASSWORD, port=DB_PORT)
-        cur = conn.cursor()
-        logger.info("데이터베이스 연결 성공.")
+        with db.get_connection() as conn:
+            saved = _save_to_db(conn, keywords_data, scrape_date_str, category_id)
+        return saved
+    except psycopg2.Error as db_err:
+        logger.error(f"데이터베이스 오류: {db_err}")
+        return False # 실패 시 False 반환 (미커밋 트랜잭션은 연결 반납 시 롤백)
+    except Exception as e:
+        logger.error(f"데이터 저장 중 예상치 못한 오류: {e}")
+        return False # 실패 시 False 반환
+    finally:
+        SAVE_SECONDS.observe(time.perf_counter() - started, result="ok" if saved else "error")
+
+def _save_to_db(conn, keywords_data, scrape_date_str, category_id):
+    """save_to_db 본체: 풀에서 빌린 연결 하나로 기존 데이터 삭제 후 일괄 삽입 (한 트랜잭션)"""
+    logger = logging.getLogger()
+    with conn.cursor() as cur:
         logger.info(f"{scrape_date_str} 날짜의 기존 키워드 데이터 삭제 시도... (category_id: {category_id})")
         delete_sql = "DELETE FROM daily_keywords WHERE scrape_date = %s AND category_id = %s;"
         cur.execute(delete_sql, (scrape_date_str, category_id))
@@ -387,169 +807,713 @@ def save_to_db(keywords_data, scrape_date_str, category_id='50000169'):
             ON CONFLICT (scrape_date, keyword_rank, category_id) DO NOTHING;
         """
         values_to_insert = [
-            (scrape_date_str, rank + 1, keyword, category_id)
-            for rank, keyword in enumerate(keywords_data)
+            (scrape_date_str, rank, keyword, category_id)
+            for rank, keyword in keywords_data
         ]
         if values_to_insert:
              logger.info(f"{len(values_to_insert)}개의 키워드 데이터베이스 저장 시도...")
-             execute_values(cur, insert_sql, values_to_insert)
+             execute_values(cur, insert_sql, values_to_insert, page_size=len(values_to_insert))
+             db.notify_keywords_changed(cur, scrape_date_str, category_id) # 커밋 시 대시보드 캐시 무효화
              conn.commit()
              logger.info("데이터베이스 저장 완료.")
         else:
              logger.info("저장할 키워드 데이터가 없습니다.")
-        cur.close()
-        return True # 성공 시 True 반환
+    return True # 성공 시 True 반환
+
+# --- 작업 원장 (재개 가능한 백필) ---
+# (날짜, 카테고리) 단위로 수집 상태를 기록하여, 재실행 시 완료된 조합은 건너뛰고
+# 실패(failed)/부분(partial)/중단(running으로 남은) 조합만 다시 수집합니다.
+LEDGER_STATUS_RUNNING = 'running'
+LEDGER_STATUS_COMPLETED = 'completed'
+LEDGER_STATUS_PARTIAL = 'partial'
+LEDGER_STATUS_FAILED = 'failed'
+
+def ensure_ledger_table():
+    """작업 원장 테이블 생성 (없을 때만)"""
+    logger = logging.getLogger()
+    try:
+        with db.get_connection() as conn, conn.cursor() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS scrape_ledger (
+                    scrape_date DATE NOT NULL,
+                    category_id VARCHAR(20) NOT NULL,
+                    status VARCHAR(16) NOT NULL,
+                    keyword_count INTEGER NOT NULL DEFAULT 0,
+                    attempt INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    PRIMARY KEY (scrape_date, category_id)
+                );
+                """)
+            conn.commit()
+        return True
     except psycopg2.Error as db_err:
-        logger.error(f"데이터베이스 오류: {db_err}")
-        if conn:
-            conn.rollback() # 오류 발생 시 롤백
-        return False # 실패 시 False 반환
+        logger.error(f"작업 원장 테이블 생성 중 데이터베이스 오류: {db_err}")
+        return False
+
+def ledger_start(scrape_date_str, category_id):
+    """(날짜, 카테고리) 수집 시작 기록 - 시도 횟수 증가"""
+    _ledger_execute("""
+        INSERT INTO scrape_ledger (scrape_date, category_id, status, keyword_count, attempt, last_error, updated_at)
+        VALUES (%s, %s, %s, 0, 1, NULL, now())
+        ON CONFLICT (scrape_date, category_id) DO UPDATE
+        SET status = EXCLUDED.status, keyword_count = 0, attempt = scrape_ledger.attempt + 1,
+            last_error = NULL, updated_at = now();
+    """, (scrape_date_str, category_id, LEDGER_STATUS_RUNNING))
+
+def ledger_finish(scrape_date_str, category_id, status, keyword_count=0, error=None):
+    """(날짜, 카테고리) 수집 결과 기록"""
+    CATEGORY_RESULTS.inc(status=status)
+    _ledger_execute("""
+        UPDATE scrape_ledger
+        SET status = %s, keyword_count = %s, last_error = %s, updated_at = now()
+        WHERE scrape_date = %s AND category_id = %s;
+    """, (status, keyword_count, error, scrape_date_str, category_id))
+
+def _ledger_execute(sql, params):
+    """원장 갱신 실패가 수집 자체를 중단시키지 않도록 오류는 경고로만 남김"""
+    logger = logging.getLogger()
+    try:
+        with db.get_connection() as conn, conn.cursor() as cur:
+            cur.execute(sql, params)
+            conn.commit()
+    except psycopg2.Error as db_err:
+        logger.warning(f"경고: 작업 원장 갱신 실패: {db_err}")
+
+def load_completed_pairs(start_date, end_date):
+    """원장에서 완료된 (날짜, 카테고리) 조합 조회"""
+    with db.get_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT scrape_date, category_id FROM scrape_ledger WHERE scrape_date BETWEEN %s AND %s AND status = %s;",
+            (start_date, end_date, LEDGER_STATUS_COMPLETED)
+        )
+        return {(row[0], row[1]) for row in cur.fetchall()}
+
+def load_stored_pairs(start_date, end_date):
+    """daily_keywords에 이미 온전히(EXPECTED_KEYWORD_COUNT개 이상) 저장된 (날짜, 카테고리) 조합 조회"""
+    with db.get_connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT scrape_date, category_id FROM daily_keywords
+            WHERE scrape_date BETWEEN %s AND %s
+            GROUP BY scrape_date, category_id
+            HAVING COUNT(*) >= %s;
+        """, (start_date, end_date, EXPECTED_KEYWORD_COUNT))
+        return {(row[0], str(row[1])) for row in cur.fetchall()}
+
+def plan_pending_work(dates_to_scrape, missing_only=False, force=False):
+    """날짜별로 수집이 필요한 카테고리 목록 계산. [(날짜, [카테고리...]), ...] 반환
+
+    - 기본: 원장에서 completed 인 조합은 건너뜀
+    - missing_only: daily_keywords에 이미 저장된 조합도 건너뜀 (원장 도입 이전 데이터 포함)
+    - force: 원장을 무시하고 전부 다시 수집
+    """
+    logger = logging.getLogger()
+    start_date, end_date = min(dates_to_scrape), max(dates_to_scrape)
+    done_pairs = set()
+    if not force:
+        try:
+            done_pairs |= load_completed_pairs(start_date, end_date)
+        except psycopg2.Error as db_err:
+            logger.warning(f"경고: 작업 원장 조회 실패, 전체 범위를 수집합니다: {db_err}")
+    if missing_only:
+        done_pairs |= load_stored_pairs(start_date, end_date)
+
+    pending = []
+    skipped = 0
+    for target_date in dates_to_scrape:
+        categories = [c for c in CATEGORIES if (target_date, c['id']) not in done_pairs]
+        skipped += len(CATEGORIES) - len(categories)
+        if categories:
+            pending.append((target_date, categories))
+    logger.info(f"작업 계획: {len(pending)}일 수집 대상, 이미 완료된 (날짜, 카테고리) {skipped}건 건너뜀")
+    return pending
+
+def store_category_keywords(all_keywords, scrape_date_str, category):
+    """수집 결과 [(순위, 키워드), ...]를 CSV 백업 + DB에 저장하고 원장 상태 (status, error)를 반환 (수집 엔진 공용)"""
+    logger = logging.getLogger()
+    category_id = category['id']
+    if not all_keywords:
+        logger.info("수집된 키워드가 없어 저장할 내용이 없습니다.")
+        return LEDGER_STATUS_FAILED, "수집된 키워드 없음"
+    # 같은 순위가 중복되면(페이지 재로딩 등) 먼저 수집된 항목 유지, 순위순 정렬
+    ranked = {}
+    for rank, keyword in all_keywords:
+        ranked.setdefault(rank, keyword)
+    all_keywords = sorted(ranked.items())
+
+    # 6.5. 백업 저장 (기본: 카테고리 아카이브에 추가, BACKUP_FORMAT=csv 이면 날짜별 CSV 파일)
+    if BACKUP_FORMAT == "csv":
+        if not save_to_csv(all_keywords, f"{scrape_date_str}_{category_id}"):
+            logger.warning("경고: CSV 백업에 실패했습니다.")
+    elif not keyword_archive.append_day(scrape_date_str, category_id, all_keywords):
+        logger.warning("경고: 아카이브 백업에 실패했습니다.")
+
+    # 7. 데이터베이스에 저장
+    if not save_to_db(all_keywords, scrape_date_str, category_id):
+         logger.error(f"경고: 데이터베이스 저장에 실패했습니다 ({scrape_date_str} - {category['name']}).")
+         return LEDGER_STATUS_FAILED, "데이터베이스 저장 실패"
+    # 8. 순위 변동 테이블 갱신 (실패해도 수집 결과는 유지)
+    analytics.update_after_save(scrape_date_str, category_id)
+    rank_matrix.update_after_save(scrape_date_str, category_id, all_keywords)
+    anomaly.update_after_save(scrape_date_str, category_id, all_keywords)
+    keyword_families.update_after_save(scrape_date_str, category_id, all_keywords)
+    # 날짜 목록 요약만 최소 간격을 두고 갱신 (키워드 요약까지 전부는 실행 끝에 갱신)
+    migrate.refresh_summaries(force=False, views=migrate.IN_RUN_SUMMARY_VIEWS)
+    if len(all_keywords) >= EXPECTED_KEYWORD_COUNT:
+         return LEDGER_STATUS_COMPLETED, None
+    return LEDGER_STATUS_PARTIAL, None
+
+def scrape_category(driver, target_date, category, timer):
+    """날짜 하나의 카테고리 하나 TOP 500 수집 후 저장 (작업 원장 기록 포함). 저장까지 성공하면 True"""
+    logger = logging.getLogger()
+    scrape_date_str_for_db = target_date.strftime("%Y-%m-%d")
+    max_pages = MAX_PAGES
+    category_id = category['id']
+    category_name = category['name']
+    all_keywords = []
+
+    logger.info(f"\n--- [{category_name}] 카테고리 수집 시작 (ID: {category_id}) ---")
+    report_progress(date=scrape_date_str_for_db, category=category_name, page=0, keywords=0)
+    ledger_start(scrape_date_str_for_db, category_id)
+    ledger_status = LEDGER_STATUS_FAILED
+    ledger_error = None
+
+    try:
+        page = page_session(driver)
+        for attempt in (1, 2):
+            # 1~2. 페이지 준비, 카테고리/기간 '일간' (reuse 모드에서는 바뀐 필터만 설정)
+            with timer.phase('navigation'):
+                page.prepare(category)
+
+            # 3. 날짜 선택
+            with timer.phase('date_selection'):
+                page.select_date(target_date)
+
+            # 4. 연령대 선택
+            with timer.phase('navigation'):
+                page.ensure_ages()
+
+            with timer.phase('pagination'):
+                # 5. 조회하기 버튼 클릭 - 결과 목록이 새로 그려질 때까지 대기
+                logger.info("조회하기 버튼 클릭 시도...")
+                previous_signature = result_list_signature(driver)
+                throttle()
+                if not click_element(driver, SEARCH_BUTTON_SELECTOR): raise Exception("조회하기 버튼 클릭 실패")
+                logger.info("조회 완료. 결과 로딩 대기...")
+                if not wait_until(driver, results_changed(previous_signature), description="조회 결과 갱신"):
+                    # 이전 결과와 내용이 같은 경우일 수 있으므로 목록이 있으면 계속 진행
+                    if result_list_signature(driver) is None: raise Exception("조회 결과 로딩 시간 초과")
+            page_info = read_page_info(driver)
+            if page_info is None or page_info[0] == 1:
+                break
+            # 재사용한 화면에서 조회 결과가 1페이지부터 시작하지 않으면 페이지를 다시 열고 한 번 더 설정
+            if attempt == 2:
+                raise Exception(f"조회 결과가 1페이지가 아님 ({page_info[0]} 페이지)")
+            logger.warning(f"조회 결과가 {page_info[0]} 페이지에서 시작합니다. 페이지를 다시 열어 설정합니다.")
+            page.invalidate()
+
+        with timer.phase('pagination'):
+            # 6. 페이지네이션하며 키워드 수집
+            logger.info(f"키워드 수집 시작 (최대 {max_pages} 페이지)...")
+            current_page = 1
+            while current_page <= max_pages:
+                logger.info(f"- {current_page} 페이지 스크랩 중...")
+                keywords_on_page = scrape_page_keywords(driver, rank_offset=len(all_keywords))
+                if not keywords_on_page:
+                     logger.warning(f"경고: {current_page} 페이지에서 키워드를 찾을 수 없습니다.")
+                     # 필요시 재시도 로직 추가 가능
+
+                all_keywords.extend(keywords_on_page)
+                PAGES_SCRAPED.inc(engine="selenium")
+                KEYWORDS_PER_PAGE.observe(len(keywords_on_page), engine="selenium")
+                logger.info(f"  > {len(keywords_on_page)}개 수집 (총 {len(all_keywords)}개)")
+                report_progress(page=current_page, keywords=len(all_keywords))
+
+                # 마지막 페이지 확인
+                page_info = read_page_info(driver)
+                if page_info is None:
+                    logger.warning("페이지 정보 요소를 찾을 수 없음.")
+                elif page_info[0] >= page_info[1]:
+                    logger.info("마지막 페이지 도달."); break
+
+                # 다음 페이지 버튼 클릭 - 페이지 정보가 다음 번호로 넘어가고 목록이 바뀔 때까지 대기
+                try:
+                     next_button = driver.find_element(By.CSS_SELECTOR, NEXT_PAGE_BTN_SELECTOR)
+                     if 'defult' in next_button.get_attribute('class'): logger.info("다음 페이지 버튼 비활성화됨 (마지막 페이지)."); break
+                     logger.info("다음 페이지로 이동...")
+                     previous_signature = result_list_signature(driver)
+                     throttle()
+                     driver.execute_script("arguments[0].click();", next_button)
+                     if not wait_until(driver, results_changed(previous_signature, expected_page=current_page + 1),
+                                       description=f"{current_page + 1} 페이지 로딩"):
+                         raise Exception(f"{current_page + 1} 페이지 로딩 시간 초과")
+                     current_page += 1
+                except NoSuchElementException: logger.warning("다음 페이지 버튼을 찾을 수 없음 (마지막 페이지일 수 있음)."); break
+                except Exception as e_next:
+                     logger.error(f"다음 페이지 이동 중 오류: {e_next}")
+                     page.invalidate() # 수집한 페이지까지는 저장하고, 다음 수집은 페이지를 다시 열어 시작
+                     break
+
+        logger.info(f"\n총 {len(all_keywords)}개의 키워드 수집 완료 ({target_date.strftime('%Y-%m-%d')} - {category_name}).")
+
+        # 6.5 ~ 7. CSV 백업 및 데이터베이스 저장
+        with timer.phase('persistence'):
+            ledger_status, ledger_error = store_category_keywords(all_keywords, scrape_date_str_for_db, category)
+
+        logger.info(f"--- [{category_name}] 카테고리 수집 완료 ---")
+
     except Exception as e:
-        logger.error(f"데이터 저장 중 예상치 못한 오류: {e}")
-        if conn:
-            conn.rollback() # 오류 발생 시 롤백
-        return False # 실패 시 False 반환
+        logger.exception(f"오류: {target_date.strftime('%Y-%m-%d')} - {category_name} 데이터 처리 중 오류 발생: {e}")
+        ledger_error = str(e)[:500]
+        # 드롭다운이 열려 있거나 필터가 일부만 적용된 화면을 다음 카테고리/날짜가 재사용하지 않도록 다시 열게 함
+        page_session(driver).invalidate()
+    except BaseException:
+        # 중지 신호(SystemExit) 등으로 중단된 경우에도 원장에 실패로 남겨 재실행 시 다시 수집되도록 함
+        ledger_error = "중단됨"
+        raise
     finally:
-        if conn:
-            conn.close()
-            logger.info("데이터베이스 연결 종료.")
+        ledger_finish(scrape_date_str_for_db, category_id, ledger_status, len(all_keywords), ledger_error)
+    return ledger_status != LEDGER_STATUS_FAILED
 
-def scrape_single_date(driver, target_date):
-    """지정된 날짜의 TOP 500 키워드를 모든 카테고리에 대해 스크랩하고 저장"""
+def scrape_single_date(driver, target_date, categories=None):
+    """지정된 날짜의 TOP 500 키워드를 모든 카테고리(또는 지정된 카테고리)에 대해 한 세션에서 차례로 스크랩하고 저장"""
     logger = logging.getLogger()
     logger.info(f"\n{'='*20} {target_date.strftime('%Y-%m-%d')} 데이터 수집 시작 {'='*20}")
-    target_year = target_date.year
-    target_month = target_date.month
-    target_day = target_date.day
-    scrape_date_str_for_db = target_date.strftime("%Y-%m-%d")
-    max_pages = 25
+    timer = PhaseTimer()
     overall_success = True
+    categories = categories if categories is not None else CATEGORIES
+    for i, category in enumerate(categories):
+        if i > 0 and _rate_limiter is None:
+            time.sleep(INTER_CATEGORY_SLEEP_SECONDS) # 카테고리 간 대기 (밴 방지, 전역 속도 제한이 걸려 있으면 그쪽에 맡김)
+        if not scrape_category(driver, target_date, category, timer):
+            overall_success = False
 
-    # 각 카테고리별로 수집
-    for category in CATEGORIES:
-        category_id = category['id']
-        category_name = category['name']
-        category_selector = category['selector']
-        all_keywords = []
-        
-        logger.info(f"\n--- [{category_name}] 카테고리 수집 시작 (ID: {category_id}) ---")
+    logger.info(f"{'='*20} {target_date.strftime('%Y-%m-%d')} 전체 수집 완료 {'='*20}")
+    logger.info(f"[{target_date.strftime('%Y-%m-%d')}] 단계별 소요 시간: {timer.report()}")
+    return overall_success
+
+def record_http_page(page, rows):
+    """HTTP 엔진 페이지 하나 수집 지표"""
+    PAGES_SCRAPED.inc(engine="http")
+    KEYWORDS_PER_PAGE.observe(len(rows), engine="http")
+
+def scrape_category_http(session, target_date, category, timer):
+    """scrape_category의 HTTP 엔진 버전: 브라우저 없이 JSON 엔드포인트로 TOP 500 수집 후 동일한 경로로 저장"""
+    logger = logging.getLogger()
+    scrape_date_str_for_db = target_date.strftime("%Y-%m-%d")
+    category_id = category['id']
+    category_name = category['name']
+    ranked_keywords = []
+
+    logger.info(f"\n--- [{category_name}] 카테고리 수집 시작 (ID: {category_id}, HTTP) ---")
+    report_progress(date=scrape_date_str_for_db, category=category_name, page=0, keywords=0)
+    ledger_start(scrape_date_str_for_db, category_id)
+    ledger_status = LEDGER_STATUS_FAILED
+    ledger_error = None
+
+    try:
+        with timer.phase('pagination'):
+            ranked_keywords = datalab_http.fetch_top_keywords(
+                session, category_id, target_date, AGES_TO_SELECT, MAX_PAGES, before_request=throttle,
+                on_page=record_http_page
+            )
+        logger.info(f"총 {len(ranked_keywords)}개의 키워드 수집 완료 ({scrape_date_str_for_db} - {category_name}).")
+        report_progress(page=MAX_PAGES, keywords=len(ranked_keywords))
+
+        with timer.phase('persistence'):
+            ledger_status, ledger_error = store_category_keywords(ranked_keywords, scrape_date_str_for_db, category)
+        logger.info(f"--- [{category_name}] 카테고리 수집 완료 ---")
+    except (requests.RequestException, datalab_http.DataLabHttpError) as e:
+        logger.error(f"오류: {scrape_date_str_for_db} - {category_name} HTTP 수집 실패: {e}")
+        ledger_error = str(e)[:500]
+    except BaseException:
+        ledger_error = "중단됨"
+        raise
+    finally:
+        ledger_finish(scrape_date_str_for_db, category_id, ledger_status, len(ranked_keywords), ledger_error)
+    return ledger_status != LEDGER_STATUS_FAILED
 
+def scrape_categories_concurrently(sessions, target_date, categories, scrape_one, pause_seconds=0):
+    """카테고리를 세션 수만큼의 스레드에 나눠 동시에 수집하고 실패한 카테고리 목록을 반환
+
+    세션(WebDriver 또는 HTTP 세션)마다 스레드 하나가 남은 카테고리를 꺼내 scrape_one(session, 날짜, 카테고리, timer)로
+    수집합니다. 한 세션 안에서는 카테고리 사이에 pause_seconds 만큼 쉬고(전역 속도 제한이 없을 때),
+    요청 간격은 세션 수와 관계없이 전역 속도 제한(throttle)을 따릅니다.
+    """
+    logger = logging.getLogger()
+    date_str = target_date.strftime('%Y-%m-%d')
+    category_queue = queue.Queue()
+    for category in categories:
+        category_queue.put(category)
+    failed_ids = set()
+    failed_lock = threading.Lock()
+
+    def session_loop(index, session):
+        timer = PhaseTimer()
+        first = True
         try:
-            # --- 페이지 초기화: 매번 URL 재접속 --- 
-            logger.info(f"페이지 초기화 (재접속): {TARGET_URL}")
-            driver.get(TARGET_URL)
-            time.sleep(3) # 페이지 로딩 대기 (필요시 시간 조절)
-
-            # --- 설정 적용 ---
-            # 1. 카테고리 선택 (패션의류 > 해당 카테고리)
-            logger.info(f"카테고리 선택 중: {category_name}")
-            if not click_element(driver, CATEGORY_1ST_BTN_SELECTOR): raise Exception("패션의류 버튼 클릭 실패")
-            if not click_element(driver, FASHION_CLOTHING_OPTION_SELECTOR): raise Exception("패션의류 옵션 클릭 실패")
-            time.sleep(1)
-            if not click_element(driver, CATEGORY_2ND_BTN_SELECTOR): raise Exception("2차 분류 버튼 클릭 실패")
-            if not click_element(driver, category_selector): raise Exception(f"{category_name} 옵션 클릭 실패")
-            logger.info(f"카테고리 선택 완료: {category_name}")
-            time.sleep(1)
-
-        # 2. 기간 '일간' 선택
-        logger.info("기간 선택 중: 일간")
-        if not click_element(driver, TIMEFRAME_BTN_SELECTOR): raise Exception("기간 버튼 클릭 실패")
-        daily_options = driver.find_elements(By.CSS_SELECTOR, DAILY_OPTION_SELECTOR)
-        daily_clicked = False
-        for option in daily_options:
-            if "일간" in option.text: option.click(); daily_clicked = True; logger.info("기간 '일간' 선택 완료."); time.sleep(0.5); break
-        if not daily_clicked: raise Exception("기간 '일간' 옵션 클릭 실패")
+            while not _stop_event.is_set():
+                try:
+                    category = category_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if not first and pause_seconds and _rate_limiter is None:
+                    time.sleep(pause_seconds)
+                first = False
+                try:
+                    success = scrape_one(session, target_date, category, timer)
+                except Exception as e:
+                    logger.exception(f"오류: {date_str} - {category['name']} 수집 중 예기치 않은 오류: {e}")
+                    success = False
+                if not success:
+                    with failed_lock:
+                        failed_ids.add(category['id'])
+            logger.info(f"[{date_str}] 세션 {index} 단계별 소요 시간: {timer.report()}")
+        finally:
+            clear_progress()
 
-        # 3. 날짜 선택
-        logger.info("날짜 선택 시도...")
-        if not select_date_via_ui(driver, target_year, target_month, target_day):
-            raise Exception("날짜 선택 실패") # 날짜 선택 실패 시 해당 날짜 처리 중단
-        time.sleep(1)
+    parent_name = threading.current_thread().name
+    threads = [
+        threading.Thread(target=session_loop, args=(index, session), name=f"{parent_name}-cat{index}", daemon=True)
+        for index, session in enumerate(sessions, 1)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        # 타임아웃 join으로 대기해야 메인 스레드가 중지 신호를 바로 처리할 수 있음
+        while thread.is_alive():
+            thread.join(timeout=1.0)
+    while not category_queue.empty(): # 중지되어 꺼내지 못한 카테고리
+        failed_ids.add(category_queue.get_nowait()['id'])
+    return [category for category in categories if category['id'] in failed_ids]
 
-        # 4. 연령대 선택
-        logger.info("연령대 선택 중...")
-        for age in AGES_TO_SELECT:
-            age_checkbox_selector = AGE_CHECKBOX_SELECTOR_TEMPLATE.format(age)
-            checkbox = WebDriverWait(driver, 5).until(EC.presence_of_element_located((By.CSS_SELECTOR, age_checkbox_selector)))
-            if not checkbox.is_selected(): driver.execute_script("arguments[0].click();", checkbox); logger.info(f"- {age}대 선택"); time.sleep(0.2)
-        logger.info("연령대 선택 완료.")
+def scrape_single_date_concurrently(drivers, target_date, categories):
+    """scrape_single_date의 동시 수집 버전: 카테고리를 WebDriver 세션 여러 개에 나눠 같은 날짜를 동시에 수집"""
+    logger = logging.getLogger()
+    date_str = target_date.strftime('%Y-%m-%d')
+    logger.info(f"\n{'='*20} {date_str} 데이터 수집 시작 (카테고리 {len(categories)}개, 세션 {len(drivers)}개) {'='*20}")
+    started = time.perf_counter()
+    failed = scrape_categories_concurrently(drivers, target_date, categories, scrape_category,
+                                            pause_seconds=INTER_CATEGORY_SLEEP_SECONDS)
+    logger.info(f"{'='*20} {date_str} 전체 수집 완료 ({time.perf_counter() - started:.1f}s) {'='*20}")
+    return not failed
 
-        # 5. 조회하기 버튼 클릭
-        logger.info("조회하기 버튼 클릭 시도...")
-        if not click_element(driver, SEARCH_BUTTON_SELECTOR): raise Exception("조회하기 버튼 클릭 실패")
-        logger.info("조회 완료. 결과 로딩 대기...")
-        time.sleep(3) # 결과 로딩 대기
-
-        # 6. 페이지네이션하며 키워드 수집
-        logger.info("키워드 수집 시작 (최대 25 페이지)...")
-        current_page = 1
-        while current_page <= max_pages:
-            logger.info(f"- {current_page} 페이지 스크랩 중...")
-            keywords_on_page = scrape_page_keywords(driver)
-            if not keywords_on_page:
-                 logger.warning(f"경고: {current_page} 페이지에서 키워드를 찾을 수 없습니다.")
-                 # 필요시 재시도 로직 추가 가능
-
-            all_keywords.extend(keywords_on_page)
-            logger.info(f"  > {len(keywords_on_page)}개 수집 (총 {len(all_keywords)}개)")
-
-            # 마지막 페이지 확인
-            try:
-                page_info = driver.find_element(By.CSS_SELECTOR, PAGE_INFO_SELECTOR).text
-                if f"{current_page} / {max_pages}" in page_info.replace(" ", ""): logger.info("마지막 페이지 도달."); break
-            except NoSuchElementException: logger.warning("페이지 정보 요소를 찾을 수 없음.")
+def scrape_single_date_http(session, target_date, categories=None):
+    """scrape_single_date의 HTTP 엔진 버전 (카테고리 동시 수집 설정이 있으면 세션을 공유하는 스레드로 동시에 수집)
 
-            # 다음 페이지 버튼 클릭
-            try:
-                 next_button = driver.find_element(By.CSS_SELECTOR, NEXT_PAGE_BTN_SELECTOR)
-                 if 'defult' in next_button.get_attribute('class'): logger.info("다음 페이지 버튼 비활성화됨 (마지막 페이지)."); break
-                 logger.info("다음 페이지로 이동...")
-                 driver.execute_script("arguments[0].click();", next_button)
-                 time.sleep(2)
-                 current_page += 1
-            except NoSuchElementException: logger.warning("다음 페이지 버튼을 찾을 수 없음 (마지막 페이지일 수 있음)."); break
-            except Exception as e_next: logger.error(f"다음 페이지 이동 중 오류: {e_next}"); break
-
-            logger.info(f"\n총 {len(all_keywords)}개의 키워드 수집 완료 ({target_date.strftime('%Y-%m-%d')} - {category_name}).")
-
-            # 6.5. CSV 파일로 백업 저장
-            if all_keywords:
-                csv_filename = f"{scrape_date_str_for_db}_{category_id}"
-                if not save_to_csv(all_keywords, csv_filename):
-                     logger.warning("경고: CSV 백업에 실패했습니다.")
-
-            # 7. 데이터베이스에 저장
-            if all_keywords:
-                if not save_to_db(all_keywords, scrape_date_str_for_db, category_id):
-                     logger.error(f"경고: 데이터베이스 저장에 실패했습니다 ({target_date.strftime('%Y-%m-%d')} - {category_name}).")
-                     overall_success = False
-            else:
-                 logger.info("수집된 키워드가 없어 저장할 내용이 없습니다.")
+    (전체 성공 여부, 실패한 카테고리 목록)을 반환합니다. 실패한 카테고리는 Selenium 엔진으로 재시도할 수 있습니다.
+    """
+    logger = logging.getLogger()
+    logger.info(f"\n{'='*20} {target_date.strftime('%Y-%m-%d')} 데이터 수집 시작 (HTTP) {'='*20}")
+    categories = categories if categories is not None else CATEGORIES
+    sessions = min(_category_concurrency, len(categories))
+    if sessions > 1:
+        failed_categories = scrape_categories_concurrently([session] * sessions, target_date, categories, scrape_category_http)
+    else:
+        timer = PhaseTimer()
+        failed_categories = [category for category in categories
+                             if not scrape_category_http(session, target_date, category, timer)]
+        logger.info(f"[{target_date.strftime('%Y-%m-%d')}] 단계별 소요 시간: {timer.report()}")
+    logger.info(f"{'='*20} {target_date.strftime('%Y-%m-%d')} 전체 수집 완료 (HTTP) {'='*20}")
+    return not failed_categories, failed_categories
 
-            logger.info(f"--- [{category_name}] 카테고리 수집 완료 ---")
-            
-            # 카테고리 간 대기 시간 (밴 방지)
-            time.sleep(5)
+# --- 수집 엔진 ---
+class SeleniumCollector:
+    """--engine selenium: 브라우저 UI를 조작하여 수집 (기본값)
 
-        except Exception as e:
-            logger.exception(f"오류: {target_date.strftime('%Y-%m-%d')} - {category_name} 데이터 처리 중 오류 발생: {e}")
-            overall_success = False
-            continue  # 다음 카테고리 계속 처리
+    카테고리 동시 수집 설정(set_category_concurrency)이 있으면 같은 날짜의 카테고리를 WebDriver 세션 여러 개로
+    나눠 수집합니다. 추가 세션은 처음 필요할 때 만들고 날짜가 바뀌어도 다시 사용합니다.
+    """
+    def __init__(self, driver):
+        self.driver = driver
+        self._extra_drivers = []
 
-    logger.info(f"{'='*20} {target_date.strftime('%Y-%m-%d')} 전체 수집 완료 {'='*20}")
-    return overall_success
+    def _drivers(self, count):
+        while len(self._extra_drivers) < count - 1:
+            driver = setup_driver()
+            if driver is None:
+                logging.getLogger().warning("추가 WebDriver 세션을 만들지 못해 있는 세션으로만 수집합니다.")
+                break
+            self._extra_drivers.append(driver)
+        return [self.driver] + self._extra_drivers[:count - 1]
+
+    def scrape(self, target_date, categories=None):
+        categories = categories if categories is not None else CATEGORIES
+        sessions = min(_category_concurrency, len(categories))
+        if sessions > 1:
+            drivers = self._drivers(sessions)
+            if len(drivers) > 1:
+                return scrape_single_date_concurrently(drivers, target_date, categories)
+        return scrape_single_date(self.driver, target_date, categories)
+
+    def close(self):
+        drivers, self._extra_drivers = [self.driver] + self._extra_drivers, []
+        self.driver = None
+        for driver in drivers:
+            if driver is not None:
+                quit_driver(driver)
+
+class HttpCollector:
+    """--engine http: JSON 엔드포인트로 수집하고, 실패한 카테고리는 Selenium 엔진으로 재시도"""
+    def __init__(self, session, fallback=True):
+        self.session = session
+        self.fallback = fallback
+        self._fallback_driver = None # 필요할 때만 생성
+
+    def scrape(self, target_date, categories=None):
+        logger = logging.getLogger()
+        success, failed_categories = scrape_single_date_http(self.session, target_date, categories)
+        if success or not self.fallback:
+            return success
+        names = ", ".join(c['name'] for c in failed_categories)
+        logger.warning(f"HTTP 수집 실패 카테고리 [{names}] → Selenium 엔진으로 재시도합니다.")
+        if self._fallback_driver is None:
+            self._fallback_driver = setup_driver()
+            if self._fallback_driver is None:
+                logger.error("Selenium 대체 엔진용 WebDriver를 초기화할 수 없습니다.")
+                return False
+        return scrape_single_date(self._fallback_driver, target_date, failed_categories)
+
+    def close(self):
+        if self._fallback_driver is not None:
+            quit_driver(self._fallback_driver)
+            self._fallback_driver = None
+
+def create_collector(engine, session=None, fallback=True):
+    """엔진 이름에 맞는 수집기 생성. 초기화 실패 시 None"""
+    if engine == 'http':
+        return HttpCollector(session or datalab_http.create_session(), fallback=fallback)
+    driver = setup_driver()
+    return SeleniumCollector(driver) if driver is not None else None
+
+
+class BackfillProgress:
+    """병렬 백필의 워커별/전체 진행 상황 집계"""
+    def __init__(self, total_dates):
+        self.total_dates = total_dates
+        self._lock = threading.Lock()
+        self.workers = {} # worker_id -> {'done', 'success', 'fail', 'current'}
+        self.started_at = time.monotonic()
 
+    def start(self, worker_id, target_date):
+        with self._lock:
+            stats = self.workers.setdefault(worker_id, {'done': 0, 'success': 0, 'fail': 0, 'current': None})
+            stats['current'] = target_date
+
+    def record(self, worker_id, target_date, success):
+        logger = logging.getLogger()
+        with self._lock:
+            stats = self.workers.setdefault(worker_id, {'done': 0, 'success': 0, 'fail': 0, 'current': None})
+            stats['done'] += 1
+            stats['success' if success else 'fail'] += 1
+            stats['current'] = None
+            total_done = sum(w['done'] for w in self.workers.values())
+            elapsed = time.monotonic() - self.started_at
+        rate = total_done / elapsed * 60 if elapsed > 0 else 0.0
+        logger.info(
+            f"[워커 {worker_id}] {target_date.strftime('%Y-%m-%d')} {'성공' if success else '실패'} "
+            f"(워커 누적 {stats['done']}건: 성공 {stats['success']}, 실패 {stats['fail']}) | "
+            f"전체 {total_done}/{self.total_dates} ({rate:.2f}일/분)"
+        )
+
+    def totals(self):
+        with self._lock:
+            success = sum(w['success'] for w in self.workers.values())
+            fail = sum(w['fail'] for w in self.workers.values())
+        return success, fail
+
+# --- 중지 신호 처리 ---
+_stop_event = threading.Event() # 중지 신호 수신 시 설정 (워커는 새 날짜를 꺼내지 않음)
+
+def handle_termination(signum, frame):
+    """SIGTERM(대시보드의 /api/stop-scrape 등) 수신 시 정리 작업이 실행되도록 SystemExit로 변환"""
+    logging.getLogger().warning(f"중지 신호 수신 (signal {signum}). 진행 중인 작업을 정리하고 종료합니다.")
+    _stop_event.set()
+    raise SystemExit(128 + signum)
+
+def backfill_worker(worker_id, date_queue, progress, active_collectors, engine='selenium', session=None, fallback=True):
+    """워커 하나: 자신의 수집기(WebDriver 세션)로 큐에서 (날짜, 카테고리 목록)을 꺼내 수집 반복"""
+    logger = logging.getLogger()
+    collector = create_collector(engine, session, fallback)
+    if collector is None:
+        # 남은 날짜는 다른 워커가 처리하도록 큐에 그대로 둠
+        logger.error(f"[워커 {worker_id}] WebDriver 초기화 실패. 워커를 종료합니다.")
+        return
+    active_collectors.append(collector)
+    try:
+        while not _stop_event.is_set():
+            try:
+                target_date, categories = date_queue.get_nowait()
+            except queue.Empty:
+                break
+            progress.start(worker_id, target_date)
+            try:
+                success = collector.scrape(target_date, categories)
+            except Exception as e:
+                logger.exception(f"[워커 {worker_id}] {target_date.strftime('%Y-%m-%d')} 처리 중 예기치 않은 오류: {e}")
+                success = False
+            progress.record(worker_id, target_date, success)
+            report_date_done(success)
+    finally:
+        try:
+            collector.close()
+        except Exception:
+            pass # 중지 처리 중 메인 스레드가 이미 종료한 경우
+        logger.info(f"[워커 {worker_id}] 수집기 종료.")
+
+def run_parallel_backfill(pending_work, workers, engine='selenium', session=None, fallback=True):
+    """(날짜, 카테고리 목록) 작업을 N개의 수집기 세션에 나눠 병렬 수집. (성공 수, 실패 수) 반환"""
+    logger = logging.getLogger()
+    workers = min(workers, len(pending_work))
+    date_queue = queue.Queue()
+    for item in pending_work:
+        date_queue.put(item)
+    progress = BackfillProgress(len(pending_work))
+    active_collectors = []
+
+    logger.info(f"병렬 백필 시작: {len(pending_work)}일, 워커 {workers}개")
+    threads = []
+    for worker_id in range(1, workers + 1):
+        thread = threading.Thread(
+            target=backfill_worker, args=(worker_id, date_queue, progress, active_collectors, engine, session, fallback),
+            name=f"worker-{worker_id}", daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+    try:
+        for thread in threads:
+            # 타임아웃 join으로 대기해야 메인 스레드가 중지 신호를 바로 처리할 수 있음
+            while thread.is_alive():
+                thread.join(timeout=1.0)
+    except SystemExit:
+        # 워커 드라이버를 먼저 종료하면 진행 중인 수집이 즉시 실패하고, 원장에는 failed로 남음
+        logger.warning("워커 수집기를 종료하는 중...")
+        for collector in list(active_collectors):
+            try:
+                collector.close()
+            except Exception:
+                pass
+        for thread in threads:
+            thread.join(timeout=30)
+        raise
+
+    success_count, fail_count = progress.totals()
+    unprocessed = date_queue.qsize()
+    if unprocessed:
+        # 모든 워커가 드라이버 초기화에 실패한 경우 등
+        logger.error(f"처리되지 못한 날짜 {unprocessed}개가 남았습니다.")
+        fail_count += unprocessed
+    return success_count, fail_count
 
 # --- 메인 실행 로직 --- 
 if __name__ == "__main__":
-    setup_logging() # 메인 시작 시 로깅 설정 호출
-    logger = logging.getLogger() # 메인 로직용 로거 가져오기
-
     parser = argparse.ArgumentParser(description="네이버 데이터랩 쇼핑인사이트 키워드 스크래퍼 (기간별 수집 가능)")
     parser.add_argument("--start-date", help="수집 시작 날짜 (YYYY-MM-DD 형식)", default=None)
     parser.add_argument("--end-date", help="수집 종료 날짜 (YYYY-MM-DD 형식, 없으면 시작 날짜 하루만)", default=None)
+    parser.add_argument("--workers", type=int, default=1, help="병렬 WebDriver 워커 수 (기본 1: 순차 수집)")
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help=f"전체 워커 합산 분당 최대 요청 수 (병렬 모드 기본값 {DEFAULT_WORKER_RATE_LIMIT}, 0이면 제한 없음)")
+    parser.add_argument("--missing-only", action="store_true",
+                        help="daily_keywords에 아직 없는 (날짜, 카테고리)만 수집")
+    parser.add_argument("--force", action="store_true",
+                        help="작업 원장을 무시하고 완료된 날짜도 다시 수집")
+    parser.add_argument("--category", action="append",
+                        help="수집할 카테고리 ID (여러 번 지정 가능, 기본: categories.json 의 enabled 항목 전체)")
+    parser.add_argument("--category-concurrency", type=int, default=DEFAULT_CATEGORY_CONCURRENCY,
+                        help=f"날짜 하나의 카테고리를 동시에 수집할 세션 수 (기본 {DEFAULT_CATEGORY_CONCURRENCY}, 1이면 순차 수집)")
+    parser.add_argument("--session-mode", choices=["reuse", "reload"], default=DEFAULT_SESSION_MODE,
+                        help=f"selenium 엔진 화면 재사용 (reuse: 바뀐 필터만 설정, reload: 카테고리마다 페이지 재접속 후 전부 설정, 기본 {DEFAULT_SESSION_MODE})")
+    parser.add_argument("--engine", choices=["selenium", "http"], default="selenium",
+                        help="수집 엔진 (selenium: 브라우저 UI 조작, http: JSON 엔드포인트 직접 호출)")
+    parser.add_argument("--no-fallback", action="store_true",
+                        help="http 엔진 실패 시 Selenium 엔진으로 재시도하지 않음")
+    parser.add_argument("--fixture-dir", default=None,
+                        help="http 엔진: 네트워크 대신 기록된 응답 파일로 수집 (오프라인 테스트)")
+    parser.add_argument("--record-fixtures", default=None,
+                        help="http 엔진: 받은 응답을 지정한 디렉토리에 기록")
+    # 하위 명령 (없으면 위 옵션으로 수집 실행)
+    subparsers = parser.add_subparsers(dest="command", metavar="{import,forecast}")
+    import_parser = subparsers.add_parser("import", help="백업(CSV 파일 또는 아카이브) 전체를 COPY 로 daily_keywords 에 적재")
+    import_parser.add_argument("--source", choices=["csv", "archive"], default=BACKUP_FORMAT,
+                               help=f"백업 형식 (기본: 수집 시 백업 형식 BACKUP_FORMAT={BACKUP_FORMAT})")
+    import_parser.add_argument("--backup-dir", default=BACKUP_DIR, help=f"CSV 백업 파일 디렉토리 (기본: {BACKUP_DIR})")
+    import_parser.add_argument("--archive-dir", default=keyword_archive.ARCHIVE_DIR,
+                               help=f"아카이브 디렉토리 (기본: {keyword_archive.ARCHIVE_DIR})")
+    import_parser.add_argument("--jobs", type=int, default=bulk_import.DEFAULT_JOBS,
+                               help=f"병렬 적재 워커 수 (기본 {bulk_import.DEFAULT_JOBS})")
+    import_parser.add_argument("--category", action="append", help="대상 카테고리 ID (여러 번 지정 가능, 기본: 전체)")
+    import_parser.add_argument("--start-date", dest="import_start", metavar="START_DATE", default=None, help="적재 시작 날짜 (YYYY-MM-DD)")
+    import_parser.add_argument("--end-date", dest="import_end", metavar="END_DATE", default=None, help="적재 종료 날짜 (YYYY-MM-DD)")
+    import_parser.add_argument("--allow-partial", action="store_true",
+                               help=f"순위가 1..{EXPECTED_KEYWORD_COUNT} 보다 적어도 1부터 빈틈없이 이어지면 적재")
+    import_parser.add_argument("--dry-run", action="store_true", help="검사와 스테이징 적재만 하고 병합하지 않음")
+    forecast_parser = subparsers.add_parser("forecast", help="키워드별 순위 예측 갱신 (새 데이터가 있는 키워드만 다시 적합)")
+    forecast_parser.add_argument("--category", action="append", help="대상 카테고리 ID (여러 번 지정 가능, 기본: 전체)")
+    forecast_parser.add_argument("--jobs", type=int, default=forecast.DEFAULT_JOBS,
+                                 help=f"적합 프로세스 수 (기본: CPU 수 {forecast.DEFAULT_JOBS})")
+    forecast_parser.add_argument("--full", action="store_true", help="캐시를 무시하고 모든 대상 키워드를 다시 적합")
     args = parser.parse_args()
 
+    setup_logging(with_thread_name=args.workers > 1 or args.category_concurrency > 1 or args.command == "import") # 메인 시작 시 로깅 설정 호출
+    logger = logging.getLogger() # 메인 로직용 로거 가져오기
+
+    if args.command == "import":
+        if args.jobs < 1:
+            logger.error("오류: --jobs 는 1 이상이어야 합니다.")
+            sys.exit(1)
+        try:
+            import_start = datetime.datetime.strptime(args.import_start, "%Y-%m-%d").date() if args.import_start else None
+            import_end = datetime.datetime.strptime(args.import_end, "%Y-%m-%d").date() if args.import_end else None
+        except ValueError:
+            logger.error("오류: 날짜 형식이 잘못되었습니다. YYYY-MM-DD 형식으로 입력해주세요.")
+            sys.exit(1)
+        ensure_ledger_table()
+        try:
+            import_stats = bulk_import.run_import(args.backup_dir, args.jobs, args.category, import_start, import_end,
+                                                  allow_partial=args.allow_partial, dry_run=args.dry_run,
+                                                  source=args.source, archive_dir=args.archive_dir)
+        except psycopg2.Error as e:
+            logger.error(f"백업 적재 중 데이터베이스 오류: {e}")
+            sys.exit(1)
+        finally:
+            db.close_pool()
+        sys.exit(1 if import_stats.files_rejected else 0)
+    if args.command == "forecast":
+        if args.jobs < 1:
+            logger.error("오류: --jobs 는 1 이상이어야 합니다.")
+            sys.exit(1)
+        try:
+            forecast.run_forecast(args.category, args.jobs, args.full)
+        except psycopg2.Error as e:
+            logger.error(f"예측 중 데이터베이스 오류: {e}")
+            sys.exit(1)
+        finally:
+            db.close_pool()
+        sys.exit(0)
+    signal.signal(signal.SIGTERM, handle_termination)
+    _status = run_status.StatusPublisher(run_status.STATUS_FILE, engine=args.engine, workers=args.workers)
+    _metrics_exporter = metrics.FileExporter(METRICS, metrics.METRICS_FILE).start()
+    atexit.register(finalize_status)
+
+    if args.workers < 1:
+        logger.error("오류: --workers 는 1 이상이어야 합니다.")
+        sys.exit(1)
+    if args.category_concurrency < 1:
+        logger.error("오류: --category-concurrency 는 1 이상이어야 합니다.")
+        sys.exit(1)
+    try:
+        CATEGORIES = category_registry.select_categories(CATEGORIES, args.category)
+    except category_registry.CategoryConfigError as e:
+        logger.error(f"오류: {e}")
+        sys.exit(1)
+    if not CATEGORIES:
+        logger.error(f"오류: 수집할 카테고리가 없습니다 ({category_registry.CATEGORIES_FILE}).")
+        sys.exit(1)
+    set_category_concurrency(args.category_concurrency)
+    set_session_mode(args.session_mode)
+    logger.info(f"수집 카테고리 {len(CATEGORIES)}개: {', '.join(c['name'] for c in CATEGORIES)} "
+                f"(날짜당 동시 세션 {min(args.category_concurrency, len(CATEGORIES))}개)")
+
     # 날짜 범위 결정
     dates_to_scrape = []
     try:
@@ -582,51 +1546,99 @@ if __name__ == "__main__":
 
     if not dates_to_scrape:
         logger.info("수집할 날짜가 없습니다.")
+        _status.update(state=run_status.STATE_COMPLETED)
         sys.exit(0)
 
-    # --- WebDriver 초기화 ---
-    driver = setup_driver()
-    if driver is None:
+    # 작업 원장 기준으로 남은 (날짜, 카테고리) 계산
+    ensure_ledger_table()
+    try:
+        analytics.ensure_deltas_table()
+    except psycopg2.Error as e:
+        logger.warning(f"경고: 순위 변동 테이블을 준비하지 못했습니다: {e}")
+    keyword_index.ensure_history_index() # 처음 한 번만 생성 (실패해도 경고만 남김)
+    try:
+        migrate.ensure_partitions(dates_to_scrape) # 수집할 날짜의 연도 파티션이 없으면 생성
+    except psycopg2.Error as e:
+        logger.warning(f"경고: daily_keywords 파티션을 준비하지 못했습니다: {e}")
+    pending_work = plan_pending_work(dates_to_scrape, missing_only=args.missing_only, force=args.force)
+    if not pending_work:
+        logger.info("모든 (날짜, 카테고리)가 이미 수집되어 있습니다.")
+        _status.update(state=run_status.STATE_COMPLETED)
+        sys.exit(0)
+    _status.update(dates_total=len(pending_work), force=True)
+
+    # 전역 요청 속도 제한 설정 (병렬 모드는 기본으로 제한 적용)
+    rate_limit = args.rate_limit
+    if rate_limit is None and args.workers > 1:
+        rate_limit = DEFAULT_WORKER_RATE_LIMIT
+    if rate_limit:
+        set_rate_limit(rate_limit)
+        logger.info(f"전역 요청 속도 제한: 분당 {rate_limit:g}회")
+
+    # --- HTTP 엔진 세션 (워커 간 연결 풀 공유) ---
+    session = None
+    fallback = not args.no_fallback
+    if args.engine == 'http':
+        session = datalab_http.create_session(pool_size=max(args.workers, 4))
+        if args.fixture_dir:
+            datalab_http.use_fixtures(session, args.fixture_dir)
+            fallback = False # 오프라인 재생 중에는 실제 사이트로 대체 수집하지 않음
+            logger.info(f"기록된 응답으로 수집 (오프라인): {args.fixture_dir}")
+        if args.record_fixtures:
+            datalab_http.record_responses(session, args.record_fixtures)
+            logger.info(f"응답 기록 디렉토리: {args.record_fixtures}")
+    logger.info(f"수집 엔진: {args.engine}{' (Selenium 대체 수집 사용)' if args.engine == 'http' and fallback else ''}")
+
+    # --- 병렬 백필 모드 ---
+    if args.workers > 1 and len(pending_work) > 1:
+        success_count, fail_count = run_parallel_backfill(pending_work, args.workers, args.engine, session, fallback)
+        logger.info(f"\n{'='*20} 전체 작업 완료 {'='*20}")
+        logger.info(f"총 {len(pending_work)}일 처리 시도, 성공: {success_count}, 실패: {fail_count}")
+        if not _stop_event.is_set():
+            _status.update(state=run_status.STATE_COMPLETED)
+        migrate.refresh_summaries()
+        anomaly.rebuild_stale() # 과거 날짜를 채우거나 마지막 날짜를 다시 수집한 카테고리는 급등락 상태를 다시 계산
+        db.close_pool()
+        logger.info("스크립트 완전 종료.")
+        sys.exit(0)
+
+    # --- 수집기 초기화 (Selenium 엔진은 WebDriver 생성) ---
+    collector = create_collector(args.engine, session, fallback)
+    if collector is None:
         logger.error("WebDriver를 초기화할 수 없습니다. 스크립트를 종료합니다.")
         sys.exit(1)
 
-    initial_page_loaded = False
     try:
-        # --- 초기 페이지 접속 및 설정 (한번만 수행) ---
-        logger.info(f"초기 페이지 접속: {TARGET_URL}")
-        driver.get(TARGET_URL)
-        time.sleep(3) # 충분히 로딩 대기
-        initial_page_loaded = True
-
         # --- 날짜별 반복 스크래핑 --- 
-        total_dates = len(dates_to_scrape)
+        total_dates = len(pending_work)
         success_count = 0
         fail_count = 0
 
-        for i, target_date in enumerate(dates_to_scrape):
-            if scrape_single_date(driver, target_date):
+        for i, (target_date, categories) in enumerate(pending_work):
+            success = collector.scrape(target_date, categories)
+            if success:
                 success_count += 1
             else:
                 fail_count += 1
+            report_date_done(success)
             
-            # 마지막 날짜가 아니면 대기
-            if i < total_dates - 1:
+            # 마지막 날짜가 아니면 대기 (전역 속도 제한이 걸려 있으면 그쪽에 맡김)
+            if i < total_dates - 1 and _rate_limiter is None:
                 logger.info(f"\n다음 날짜 처리를 위해 {INTER_DATE_SLEEP_SECONDS}초 대기...")
                 time.sleep(INTER_DATE_SLEEP_SECONDS)
 
         # 최종 결과 로깅 (print -> logger.info)
         logger.info(f"\n{'='*20} 전체 작업 완료 {'='*20}")
         logger.info(f"총 {total_dates}일 처리 시도, 성공: {success_count}, 실패: {fail_count}")
+        _status.update(state=run_status.STATE_COMPLETED)
 
     except Exception as e:
         # 메인 로직 예외 로깅 (logger.exception 사용)
         logger.exception(f"스크립트 실행 중 예기치 않은 오류 발생: {e}") 
-        if not initial_page_loaded:
-             logger.warning("초기 페이지 로딩 단계에서 오류가 발생했을 수 있습니다.")
-        # import traceback # 필요 없음
-        # traceback.print_exc() # logger.exception이 처리
     finally:
-        if driver:
-            driver.quit()
-            logger.info("WebDriver 종료.")
+        collector.close()
+        logger.info("수집기 종료.")
+        migrate.refresh_summaries()
+        anomaly.rebuild_stale() # 과거 날짜를 채우거나 마지막 날짜를 다시 수집한 카테고리는 급등락 상태를 다시 계산
+        db.close_pool()
         logger.info("스크립트 완전 종료.")
\ No newline at end of file
@@ -4,18 +4,25 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // UI 요소 참조
     const statusElement = document.getElementById('scrape-status');
+    const progressElement = document.getElementById('scrape-progress');
     const runButton = document.getElementById('run-scrape-btn');
     const stopButton = document.getElementById('stop-scrape-btn');
     const startDateInput = document.getElementById('start-date');
     const endDateInput = document.getElementById('end-date');
     const runMessageElement = document.getElementById('run-message');
     const viewDateInput = document.getElementById('view-date-input');
+    const viewCategorySelect = document.getElementById('view-category-select');
     const viewDataButton = document.getElementById('view-data-btn');
     const keywordTableBody = document.getElementById('keyword-table-body');
     const loadingIndicator = document.getElementById('loading-indicator');
     const keywordTableContainer = document.getElementById('keyword-table-container');
     const noDataMessage = document.getElementById('no-data-message');
     const logOutputElement = document.getElementById('log-output');
+    const historyKeywordInput = document.getElementById('history-keyword-input');
+    const historyKeywordOptions = document.getElementById('history-keyword-options');
+    const historyViewButton = document.getElementById('history-view-btn');
+    const historySummaryElement = document.getElementById('history-summary');
+    const historyChartElement = document.getElementById('history-chart');
 
     // UI 요소 존재 확인 (디버깅 목적)
     console.log('버튼 요소 확인:', {
@@ -27,6 +34,11 @@ document.addEventListener('DOMContentLoaded', () => {
 
     let statusInterval;
     let logInterval;
+    let logStream;
+    const MAX_LOG_LINES = 500; // 화면에 유지할 최대 로그 줄 수
+    let searchTimer;
+    let searchController;
+    const SEARCH_DEBOUNCE_MS = 200; // 입력이 멈춘 뒤 자동 완성 요청까지 대기
 
     // 페이지 로드 시 애니메이션 효과
     try {
@@ -44,12 +56,35 @@ document.addEventListener('DOMContentLoaded', () => {
             }
             const data = await response.json();
             updateStatusUI(data.is_running, data.pid);
+            updateProgressUI(data.is_running, data.progress);
         } catch (error) {
             console.error('Error checking status:', error);
             updateStatusUI(null); // 상태 알 수 없음
+            updateProgressUI(false, null);
         }
     }
 
+    // 스크래퍼가 기록한 진행 상황 표시 (예: "3/31일 · 2025-01-03 남성의류 12페이지 (240개)")
+    function updateProgressUI(isRunning, progress) {
+        if (!progressElement) {
+            return;
+        }
+        if (!isRunning || !progress) {
+            progressElement.textContent = '';
+            return;
+        }
+        const parts = [];
+        if (progress.dates_total) {
+            parts.push(`${progress.dates_done}/${progress.dates_total}일`);
+        }
+        Object.values(progress.active || {}).forEach(item => {
+            if (item.date) {
+                parts.push(`${item.date} ${item.category || ''} ${item.page || 0}페이지 (${item.keywords || 0}개)`);
+            }
+        });
+        progressElement.textContent = parts.join(' · ');
+    }
+
     function updateStatusUI(isRunning, pid) {
         if (isRunning === true) {
             statusElement.textContent = '실행 중';
@@ -81,16 +116,52 @@ document.addEventListener('DOMContentLoaded', () => {
             logOutputElement.textContent = data.logs;
             // 스크롤을 항상 맨 아래로 이동 (새 로그 확인 용이)
             logOutputElement.scrollTop = logOutputElement.scrollHeight;
+            return data.offset;
         } catch (error) {
             console.error('Error updating logs:', error);
             logOutputElement.textContent = "로그 업데이트 중 오류 발생";
+            return null;
+        }
+    }
+
+    // --- 로그 스트리밍 (새로 추가된 줄만 서버에서 전송) ---
+    async function startLogStream() {
+        const offset = await updateLogs(); // 최신 100줄을 먼저 표시하고 그 뒤부터 이어 받음
+        if (!window.EventSource || offset === null || offset === undefined) {
+            // 스트리밍을 쓸 수 없으면 기존 방식(주기적 전체 조회)으로 동작
+            logInterval = setInterval(updateLogs, 10000);
+            return;
+        }
+        logStream = new EventSource(`/api/logs/stream?offset=${offset}`);
+        logStream.onmessage = (event) => {
+            const data = JSON.parse(event.data);
+            appendLogs(data.lines, data.reset);
+        };
+        logStream.onerror = () => {
+            // 연결이 끊기면 EventSource가 마지막 오프셋(Last-Event-ID)으로 자동 재연결함
+            console.warn('로그 스트림 연결 끊김, 재연결 대기 중');
+        };
+    }
+
+    function appendLogs(text, reset) {
+        const atBottom = logOutputElement.scrollTop + logOutputElement.clientHeight >= logOutputElement.scrollHeight - 5;
+        let content = reset ? text : logOutputElement.textContent + text;
+        // 오래된 줄은 잘라내 화면에 MAX_LOG_LINES 줄만 유지
+        const lines = content.split('\n');
+        if (lines.length > MAX_LOG_LINES + 1) {
+            content = lines.slice(lines.length - MAX_LOG_LINES - 1).join('\n');
+        }
+        logOutputElement.textContent = content;
+        if (atBottom) {
+            logOutputElement.scrollTop = logOutputElement.scrollHeight;
         }
     }
 
     // --- 날짜 목록 로드 함수 ---
     async function loadAvailableDates() {
         try {
-            const response = await fetch('/api/dates');
+            const category = encodeURIComponent(viewCategorySelect.value);
+            const response = await fetch(`/api/dates?category=${category}`);
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
@@ -123,7 +194,8 @@ document.addEventListener('DOMContentLoaded', () => {
         keywordTableBody.innerHTML = ''; // 기존 테이블 내용 지우기
 
         try {
-            const response = await fetch(`/api/keywords/${date}`);
+            const category = encodeURIComponent(viewCategorySelect.value);
+            const response = await fetch(`/api/keywords/${date}?category=${category}`);
             if (!response.ok) {
                  const errorData = await response.json().catch(() => ({ detail: '서버 응답 오류' }));
                 throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
@@ -189,6 +261,92 @@ document.addEventListener('DOMContentLoaded', () => {
         showNoDataMessage('', false); // 데이터 있으면 메시지 숨김
     }
 
+    // --- 키워드 자동 완성 (접두어 우선, 부분 문자열 포함) ---
+    async function searchKeywordOptions(query) {
+        if (searchController) {
+            searchController.abort(); // 이전 입력의 요청은 취소
+        }
+        if (!query.trim()) {
+            historyKeywordOptions.innerHTML = '';
+            return;
+        }
+        searchController = new AbortController();
+        try {
+            const category = encodeURIComponent(viewCategorySelect.value);
+            const response = await fetch(`/api/keyword-search?q=${encodeURIComponent(query)}&category=${category}&limit=10`,
+                                         { signal: searchController.signal });
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            const data = await response.json();
+            historyKeywordOptions.innerHTML = '';
+            data.results.forEach(item => {
+                const option = document.createElement('option');
+                option.value = item.keyword;
+                option.label = `${item.days}일`;
+                historyKeywordOptions.appendChild(option);
+            });
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                console.error('Error searching keywords:', error);
+            }
+        }
+    }
+
+    // --- 키워드 순위 이력 로드 및 차트 ---
+    async function loadKeywordHistory(keyword) {
+        keyword = keyword.trim();
+        if (!keyword) {
+            return;
+        }
+        historySummaryElement.textContent = '불러오는 중...';
+        try {
+            const category = encodeURIComponent(viewCategorySelect.value);
+            const response = await fetch(`/api/keyword/${encodeURIComponent(keyword)}/history?category=${category}`);
+            if (!response.ok) {
+                const errorData = await response.json().catch(() => ({ detail: '서버 응답 오류' }));
+                throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+            }
+            const data = await response.json();
+            if (data.history.length === 0) {
+                historySummaryElement.textContent = `'${keyword}' 키워드의 수집 기록이 없습니다.`;
+                historyChartElement.style.display = 'none';
+                return;
+            }
+            const ranks = data.history.map(item => item.rank);
+            const first = data.history[0].date;
+            const last = data.history[data.history.length - 1].date;
+            historySummaryElement.textContent =
+                `${first} ~ ${last} · ${data.history.length}일 · 최고 ${Math.min(...ranks)}위`;
+            drawHistoryChart(data.history);
+        } catch (error) {
+            console.error(`Error loading history for ${keyword}:`, error);
+            historySummaryElement.textContent = `이력 조회 중 오류 발생: ${error.message}`;
+            historyChartElement.style.display = 'none';
+        }
+    }
+
+    function drawHistoryChart(history) {
+        // x: 날짜 (빠진 날짜는 간격으로 표시), y: 순위 (1위가 위쪽)
+        const width = 400, height = 200, pad = 10;
+        const times = history.map(item => Date.parse(item.date));
+        const minTime = times[0];
+        const span = Math.max(times[times.length - 1] - minTime, 1);
+        const maxRank = Math.max(...history.map(item => item.rank), 10);
+        const points = history.map((item, i) => {
+            const x = pad + (times[i] - minTime) / span * (width - 2 * pad);
+            const y = pad + (item.rank - 1) / (maxRank - 1) * (height - 2 * pad);
+            return `${x.toFixed(1)},${y.toFixed(1)}`;
+        });
+        historyChartElement.innerHTML = `
+            <line x1="${pad}" y1="${pad}" x2="${width - pad}" y2="${pad}" stroke="#dee2e6" stroke-dasharray="4"/>
+            <text x="${pad}" y="${pad - 2}" font-size="9" fill="#6c757d">1위</text>
+            <text x="${pad}" y="${height - 2}" font-size="9" fill="#6c757d">${maxRank}위</text>
+            <polyline points="${points.join(' ')}" fill="none" stroke="#0d6efd" stroke-width="1.5"
+                      vector-effect="non-scaling-stroke"/>`;
+        historyChartElement.style.display = 'block';
+    }
+
     // 로딩 인디케이터 표시/숨김 함수
     function showLoadingIndicator(show) {
         loadingIndicator.style.display = show ? 'block' : 'none';
@@ -323,6 +481,13 @@ document.addEventListener('DOMContentLoaded', () => {
         console.error('stopButton을 찾을 수 없습니다');
     }
 
+    // 카테고리 변경 시 해당 카테고리의 최근 날짜로 다시 설정
+    if (viewCategorySelect) {
+        viewCategorySelect.addEventListener('change', () => {
+            loadAvailableDates();
+        });
+    }
+
     // 데이터 보기 버튼 클릭 시
     if (viewDataButton) {
         viewDataButton.addEventListener('click', () => {
@@ -342,11 +507,27 @@ document.addEventListener('DOMContentLoaded', () => {
         console.error('viewDataButton을 찾을 수 없습니다');
     }
 
+    // 키워드 입력 시 자동 완성, 엔터/버튼으로 추이 조회
+    if (historyKeywordInput) {
+        historyKeywordInput.addEventListener('input', () => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => searchKeywordOptions(historyKeywordInput.value), SEARCH_DEBOUNCE_MS);
+        });
+        historyKeywordInput.addEventListener('keydown', (event) => {
+            if (event.key === 'Enter') {
+                loadKeywordHistory(historyKeywordInput.value);
+            }
+        });
+        historyViewButton.addEventListener('click', () => {
+            loadKeywordHistory(historyKeywordInput.value);
+        });
+    }
+
     // --- 초기화 ---
     console.log('초기화 시작');
     loadAvailableDates();
     checkStatus();
-    updateLogs();
+    startLogStream();
     
     try {
         showNoDataMessage(`
@@ -361,7 +542,6 @@ document.addEventListener('DOMContentLoaded', () => {
     
     // 주기적 업데이트
     statusInterval = setInterval(checkStatus, 5000);
-    logInterval = setInterval(updateLogs, 10000);
     
     console.log('스크립트 초기화 완료');
 }); 
\ No newline at end of file
@@ -0,0 +1,51 @@
+# coding: utf-8
+# 순위 변동 재계산(rebuild): 기간 끝이 수집일이 아닐 때 이어서 반영할 날짜
+
+import datetime
+import contextlib
+
+import analytics
+
+DATES = {"50000169": [datetime.date(2025, 1, 30), datetime.date(2025, 1, 31)], "50000167": []}
+
+
+class FakeCursor:
+    """rebuild 가 읽는 카테고리/수집일 목록만 돌려주는 커서"""
+
+    def __init__(self):
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if "DISTINCT category_id" in sql:
+            self._rows = [(category_id,) for category_id in DATES]
+        else:
+            self._rows = [(scrape_date,) for scrape_date in DATES[params[0]]]
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConnection:
+    def cursor(self):
+        return FakeCursor()
+
+    def commit(self):
+        pass
+
+
+def test_rebuild_propagates_from_last_collected_date(monkeypatch):
+    calls = []
+    monkeypatch.setattr(analytics.db, "get_connection", lambda: contextlib.nullcontext(FakeConnection()))
+    monkeypatch.setattr(analytics, "ensure_deltas_table", lambda conn: None)
+    monkeypatch.setattr(analytics, "_compute_date", lambda cur, category_id, scrape_date: True)
+    monkeypatch.setattr(analytics, "update_rank_deltas", lambda conn, category_id, scrape_date: calls.append((category_id, scrape_date)))
+
+    # 2025-02-01(토)은 수집일이 아님: 그 날짜가 아니라 기간 안 마지막 수집일부터 이어서 반영, 수집일이 없는 카테고리는 건너뜀
+    analytics.rebuild(start_date="2025-01-30", end_date="2025-02-01")
+    assert calls == [("50000169", datetime.date(2025, 1, 30)), ("50000169", datetime.date(2025, 1, 31))]
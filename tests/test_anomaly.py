@@ -0,0 +1,42 @@
+# coding: utf-8
+# 급상승/급락 감지: EWMA 한 단계와 전체 재계산(replay)의 판정
+
+import datetime
+
+import numpy as np
+
+import anomaly
+
+START = datetime.date(2025, 1, 1)
+
+
+def run_days(ranks_by_day):
+    """[{키워드: 순위}, ...] 를 날짜순으로 replay 한 감지 목록"""
+    days = [(START + datetime.timedelta(days=i), [(rank, keyword) for keyword, rank in ranks.items()])
+            for i, ranks in enumerate(ranks_by_day)]
+    _, _, anomalies = anomaly.replay("50000169", days)
+    return [(scrape_date, keyword, kind, rank) for _, scrape_date, keyword, kind, rank, _, _ in anomalies]
+
+
+def test_ewma_step_first_observation():
+    z, ewma, var, n = anomaly.ewma_step(np.zeros(1), np.zeros(1), np.zeros(1, dtype=np.int64), np.log([10.0]))
+    assert np.isnan(z[0]) and ewma[0] == np.log(10.0) and var[0] == 0.0 and n[0] == 1
+
+
+def test_top_rank_step_is_not_an_anomaly():
+    # 1위를 지키다 2위: log 척도로는 z 약 -3.1 이지만 기대 순위와 1칸 차이라 판정하지 않음
+    steady = [{"나이키 반팔": 1}] * 10
+    assert run_days(steady + [{"나이키 반팔": 2}]) == []
+
+
+def test_spike_and_crash():
+    steady = [{"반팔티": 200, "린넨 셔츠": 20}] * 10
+    found = run_days(steady + [{"반팔티": 5}])
+    day = START + datetime.timedelta(days=10)
+    assert (day, "반팔티", anomaly.KIND_SPIKE, 5) in found
+    assert (day, "린넨 셔츠", anomaly.KIND_CRASH, None) in found # 순위권 이탈
+
+
+def test_needs_min_observations():
+    short = [{"반팔티": 200}] * (anomaly.MIN_OBSERVATIONS - 1)
+    assert run_days(short + [{"반팔티": 5}]) == []
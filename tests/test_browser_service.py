@@ -0,0 +1,14 @@
+# coding: utf-8
+# 웜 브라우저 서비스가 Chrome 에 넘기는 실행 인자 (스크래퍼와 공유하는 인자 포함)
+
+import browser_service
+import scrape_keywords
+
+
+def test_warm_browser_command_line():
+    command = browser_service.chrome_command("chrome", 9222, scrape_keywords.chrome_arguments())
+    switches = command[1:-1]
+    assert command[-1] == "about:blank" # 스위치가 아닌 인자는 열 URL 하나뿐
+    assert all(argument.startswith("--") for argument in switches)
+    assert [argument for argument in switches if argument.startswith("--headless")] == ["--headless=new"]
+    assert any(argument.startswith("--user-agent=Mozilla/5.0") for argument in switches)
@@ -0,0 +1,25 @@
+# coding: utf-8
+# 백업 적재 전 순위 연속성 검사 (validate_ranks)
+
+import bulk_import
+
+
+def full_day(count=bulk_import.KEYWORD_COUNT):
+    return [(rank, f"키워드 {rank}") for rank in range(1, count + 1)]
+
+
+def test_complete_day_is_valid():
+    assert bulk_import.validate_ranks(full_day()) is None
+
+
+def test_partial_day_needs_allow_partial():
+    assert bulk_import.validate_ranks(full_day(120)) == f"순위 120개 (1..{bulk_import.KEYWORD_COUNT} 아님)"
+    assert bulk_import.validate_ranks(full_day(120), allow_partial=True) is None
+
+
+def test_rejects_gaps_duplicates_and_blanks():
+    assert bulk_import.validate_ranks([]) == "빈 파일"
+    assert bulk_import.validate_ranks([(0, "a"), (1, "b")]) == "순위 범위 밖 (0..1)"
+    assert bulk_import.validate_ranks([(1, "a"), (1, "b"), (2, "c")], allow_partial=True) == "중복 순위 1개"
+    assert bulk_import.validate_ranks([(1, "a"), (2, "b"), (4, "c")], allow_partial=True) == "누락 순위 1개 (첫 누락: 3)"
+    assert bulk_import.validate_ranks([(1, "a"), (2, "")], allow_partial=True) == "빈 키워드"
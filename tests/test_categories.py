@@ -0,0 +1,27 @@
+# coding: utf-8
+# categories.json 읽기: 선택자 생성, 파일이 없을 때 기본 목록
+
+import json
+
+import categories
+
+
+def test_selectors_follow_parent(tmp_path):
+    path = tmp_path / "categories.json"
+    path.write_text(json.dumps({"categories": [
+        {"id": "50000169", "name": "남성의류", "parent_id": "50000000", "parent_name": "패션의류"},
+        {"id": "50000001", "name": "패션잡화"},
+        {"id": "50000002", "name": "화장품/미용", "enabled": False},
+    ]}), encoding="utf-8")
+    loaded = categories.load_categories(str(path))
+    assert [c["id"] for c in loaded] == ["50000169", "50000001"]
+    assert loaded[0]["parent_selector"] == categories.FIRST_LEVEL_OPTION_SELECTOR.format("50000000")
+    assert loaded[0]["selector"] == categories.SECOND_LEVEL_OPTION_SELECTOR.format("50000169")
+    assert loaded[1]["parent_selector"] is None
+    assert loaded[1]["selector"] == categories.FIRST_LEVEL_OPTION_SELECTOR.format("50000001")
+
+
+def test_missing_file_falls_back_to_default_categories(tmp_path):
+    loaded = categories.load_categories(str(tmp_path / "missing.json"))
+    assert [(c["id"], c["name"]) for c in loaded] == [("50000169", "남성의류"), ("50000167", "여성의류")]
+    assert all(c["parent_id"] == "50000000" for c in loaded)
@@ -0,0 +1,40 @@
+# coding: utf-8
+# 대량 내보내기 인코더: 배치 조각을 이어 붙인 결과를 다시 읽어 확인 (DB 없이)
+
+import io
+import csv
+import json
+import datetime
+
+import pytest
+
+import data_export
+
+BATCHES = [
+    [(datetime.date(2025, 2, 1), "50000169", 1, "나이키 반팔"), (datetime.date(2025, 2, 1), "50000169", 2, "맨투맨")],
+    [(datetime.date(2025, 2, 2), "50000167", 1, "원피스")],
+]
+ROWS = [row for rows in BATCHES for row in rows]
+
+
+def test_encode_csv_and_ndjson():
+    text = b"".join(data_export.encode_csv(iter(BATCHES))).decode("utf-8")
+    assert text.startswith("\ufeff") # Excel 호환용 BOM
+    rows = list(csv.reader(io.StringIO(text[1:])))
+    assert rows[0] == data_export.COLUMNS
+    assert rows[1:] == [[d.isoformat(), c, str(r), k] for d, c, r, k in ROWS]
+
+    lines = b"".join(data_export.encode_ndjson(iter(BATCHES))).decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines][2] == {"scrape_date": "2025-02-02", "category_id": "50000167",
+                                                        "keyword_rank": 1, "keyword": "원피스"}
+
+
+def test_encode_parquet_round_trip():
+    pq = pytest.importorskip("pyarrow.parquet")
+    chunks = list(data_export.encode_parquet(iter(BATCHES)))
+    assert len(chunks) == len(BATCHES) + 1 # 배치마다 한 조각 + 파일 끝 메타데이터
+    parquet_file = pq.ParquetFile(io.BytesIO(b"".join(chunks)))
+    assert parquet_file.metadata.num_row_groups == len(BATCHES)
+    table = pq.read_table(io.BytesIO(b"".join(chunks)))
+    assert table.column_names == data_export.COLUMNS
+    assert [tuple(row.values()) for row in table.to_pylist()] == ROWS
@@ -0,0 +1,42 @@
+# coding: utf-8
+# HTTP 수집 엔진을 기록된 응답(tests/fixtures/datalab)으로 네트워크 없이 실행
+
+import os
+import datetime
+
+import pytest
+
+import datalab_http
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "datalab")
+TARGET_DATE = datetime.date(2025, 2, 1)
+AGES = ["10", "20", "30", "40", "50", "60"]
+
+
+@pytest.fixture
+def session():
+    session = datalab_http.use_fixtures(datalab_http.create_session(), FIXTURE_DIR)
+    yield session
+    session.close()
+
+
+def test_build_rank_request():
+    form = datalab_http.build_rank_request("50000169", TARGET_DATE, AGES, 3)
+    assert form["startDate"] == form["endDate"] == "2025-02-01"
+    assert form["age"] == "10,20,30,40,50,60"
+    assert datalab_http.fixture_filename(form) == "50000169_2025-02-01_p3.json"
+
+
+def test_fetch_top_keywords_from_fixtures(session):
+    pages = []
+    pairs = datalab_http.fetch_top_keywords(session, "50000169", TARGET_DATE, AGES,
+                                            on_page=lambda page, rows: pages.append((page, len(rows))))
+    # 2페이지는 20개 미만이므로 마지막 페이지, 같은 순위가 다시 오면 먼저 받은 키워드 유지, 빈 키워드 제외
+    assert pages == [(1, 20), (2, 6)]
+    assert [rank for rank, _ in pairs] == list(range(1, 26))
+    assert pairs[4] == (5, "반팔티")
+    assert pairs[24] == (25, "키워드 25")
+
+
+def test_missing_fixture_is_empty_result(session):
+    assert datalab_http.fetch_top_keywords(session, "50000167", TARGET_DATE, AGES) == []
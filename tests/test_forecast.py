@@ -0,0 +1,37 @@
+# coding: utf-8
+# 순위 예측 모델 (fit_chunk) 과 예측 날짜
+
+import datetime
+
+import numpy as np
+
+import forecast
+
+
+def test_fit_chunk_shapes_and_flat_series():
+    length = 4 * forecast.SEASON
+    series = np.log(np.vstack([np.full(length, 50.0), np.full(length, 3.0)]))
+    predicted, error, params = forecast.fit_chunk(series)
+    assert predicted.shape == (2, forecast.HORIZON) and error.shape == (2,) and params.shape == (2, 3)
+    np.testing.assert_allclose(np.exp(predicted), [[50.0] * forecast.HORIZON, [3.0] * forecast.HORIZON], rtol=1e-6)
+    np.testing.assert_allclose(error, 0.0, atol=1e-9)
+
+
+def test_fit_chunk_follows_weekly_pattern():
+    week = np.log([10.0, 10.0, 10.0, 10.0, 10.0, 100.0, 100.0]) # 주말에만 순위가 낮음
+    series = np.tile(week, 8)[None, :]
+    predicted, _, _ = forecast.fit_chunk(series)
+    # 8주(56일) 다음 날은 다시 주 첫날
+    np.testing.assert_allclose(np.exp(predicted[0]), np.exp(week[:forecast.HORIZON]), rtol=0.05)
+
+
+def test_fit_chunk_clips_to_rank_range():
+    series = np.log(np.linspace(400.0, 500.0, 4 * forecast.SEASON))[None, :] # 계속 떨어지는 추세
+    predicted, _, _ = forecast.fit_chunk(series)
+    assert predicted.max() <= np.log(forecast.OUT_OF_RANK) + 1e-12
+
+
+def test_predicted_dates_start_after_origin():
+    dates = forecast.predicted_dates(datetime.date(2025, 2, 27))
+    assert dates[0] == "2025-02-28" and dates[1] == "2025-03-01" and len(dates) == forecast.HORIZON
+    assert forecast.predicted_dates(None) is None
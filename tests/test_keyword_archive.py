@@ -0,0 +1,46 @@
+# coding: utf-8
+# 압축 아카이브: 블록 인코딩/해독 왕복, 파일 아카이브 추가/교체/다시 열기
+
+import datetime
+
+import keyword_archive
+
+
+def day_pairs(day, count=500):
+    return [(rank, f"키워드 {(rank * day) % 700}") for rank in range(1, count + 1)]
+
+
+def test_block_round_trip():
+    days = {
+        datetime.date(2024, 2, 1): day_pairs(1),
+        datetime.date(2024, 2, 29): day_pairs(29),
+        datetime.date(2024, 2, 3): [(1, "첫 키워드"), (2, "줄\n바꿈"), (7, "빈 순위 뒤")], # 순위 빈틈 허용
+    }
+    keyword_ids = {}
+    data = keyword_archive.encode_block(days, keyword_ids)
+    vocab = sorted(keyword_ids, key=keyword_ids.get)
+    decoded = keyword_archive.decode_block(data, "2024-02", len(days))
+    assert [block_date for block_date, _, _ in decoded] == sorted(days)
+    for block_date, ranks, ids in decoded:
+        expected = [(rank, keyword.replace("\n", " ")) for rank, keyword in sorted(days[block_date])]
+        assert list(zip(ranks.tolist(), (vocab[i] for i in ids.tolist()))) == expected
+
+
+def test_block_reuses_existing_keyword_ids():
+    keyword_ids = {"키워드 1": 0}
+    keyword_archive.encode_block({datetime.date(2024, 3, 1): [(1, "키워드 1"), (2, "새 키워드")]}, keyword_ids)
+    assert keyword_ids == {"키워드 1": 0, "새 키워드": 1}
+
+
+def test_archive_put_replace_and_reopen(tmp_path):
+    first, second = datetime.date(2024, 1, 31), datetime.date(2024, 2, 1)
+    with keyword_archive.KeywordArchive.open(tmp_path, "50000169", writable=True) as archive:
+        archive.put_days({first: day_pairs(31), second: day_pairs(1)})
+        archive.put_days({first: [(1, "교체된 날")]}) # 같은 날짜는 교체, 같은 달 다른 날짜는 유지
+    with keyword_archive.KeywordArchive.open(tmp_path, "50000169") as archive:
+        assert archive.dates() == [first, second]
+        assert archive.read_day(first) == [(1, "교체된 날")]
+        assert archive.read_day(second) == day_pairs(1)
+        assert archive.read_day(datetime.date(2024, 2, 2)) is None
+        assert [d for d, _ in archive.iter_days(start_date=second)] == [second]
+    assert keyword_archive.KeywordArchive.open(tmp_path, "50000167") is None
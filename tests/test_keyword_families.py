@@ -0,0 +1,80 @@
+# coding: utf-8
+# 키워드 묶음: n-gram, 저장되는 버킷 해시, 후보 중 묶음 고르기, (카테고리, 날짜) 집계
+
+import os
+import sys
+import json
+import datetime
+import subprocess
+
+import keyword_families
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_index(members):
+    """[(키워드, 묶음 ID), ...] 를 _assign_new 처럼 버킷과 함께 넣은 FamilyIndex"""
+    index = keyword_families.FamilyIndex()
+    gram_sets, buckets = keyword_families.keyword_buckets([keyword for keyword, _ in members])
+    for (keyword, family_id), grams, buckets_of in zip(members, gram_sets, buckets):
+        index.add(keyword, family_id, buckets_of, grams)
+    return index
+
+
+def match(index, keyword):
+    gram_sets, buckets = keyword_families.keyword_buckets([keyword])
+    return index.match(keyword, gram_sets[0], buckets[0])
+
+
+def test_ngrams_normalize_spacing_and_case():
+    assert keyword_families.ngrams("나이키 반팔") == keyword_families.ngrams("나이키반팔") == {"나이", "이키", "키반", "반팔"}
+    assert keyword_families.ngrams("Nike") == keyword_families.ngrams("nike")
+    assert keyword_families.ngrams("양말") == {"양말"} # NGRAM 이하는 키워드 자체
+
+
+def test_suffix_variants_join_the_stem_family():
+    # 2-gram Jaccard 는 0.5 ("양말"/"양말들"), 0.67 ("원피스"/"원피스s") 로 기준 미달
+    assert keyword_families.jaccard(keyword_families.ngrams("양말"), keyword_families.ngrams("양말들")) < keyword_families.JACCARD_THRESHOLD
+    index = make_index([("양말", 1), ("원피스", 2), ("나이키 반팔", 3)])
+    assert match(index, "양말들") == 1
+    assert match(index, "원피스s") == 2
+    assert match(index, "나이키반팔") == 3
+    # 짧은 쪽이 나중에 와도 (기존 키워드가 긴 쪽) 앞부분 해시로 후보가 됨
+    assert match(make_index([("양말들", 7)]), "양말") == 7
+
+
+def test_unrelated_or_prefixed_keywords_stay_apart():
+    index = make_index([("양말", 1), ("바지", 2)])
+    assert match(index, "양") is None # 한 글자는 앞부분 일치로 묶지 않음
+    assert match(index, "청바지") is None # 앞에 붙은 말은 접미어 변형이 아님
+    assert match(index, "양말세트팩") is None # SUFFIX_MAX_LEN 보다 많이 붙음
+
+
+def test_match_tie_breaks_to_lowest_family_id():
+    # "양말" 과 "양말들" 모두 "양말" 의 후보로 점수가 같음 (Jaccard 0.5 -> 접미어 변형이라 기준값)
+    index = make_index([("양말들", 9), ("양말짝", 4)])
+    assert match(index, "양말") == 4
+    index = make_index([("나이키 반팔", 12), ("나이키  반팔", 5)]) # 정규화하면 같은 키워드 (Jaccard 1.0)
+    assert match(index, "나이키반팔") == 5
+
+
+def test_bucket_hashes_are_stable():
+    # 저장된 버킷과 비교하려면 해시가 실행/프로세스마다 같아야 함 (바뀌면 build --reset 필요)
+    bands = keyword_families.lsh_buckets([keyword_families.ngrams("나이키 반팔")])
+    assert bands.shape == (1, keyword_families.NUM_BANDS)
+    assert bands[0, :4].tolist() == [1912998751367193970, -2303264526794187593, -6987959057800078503, -3589592574315111023]
+    assert keyword_families.prefix_buckets("양말들") == [-570419529384148563, 9147530296696860878]
+
+    # 문자열 해시 무작위화(PYTHONHASHSEED)와 무관
+    code = "import json, keyword_families as k; print(json.dumps(k.keyword_buckets(['나이키 반팔', '양말들'])[1]))"
+    outputs = [subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True,
+                              env={**os.environ, "PYTHONHASHSEED": seed}).stdout for seed in ("1", "2")]
+    assert json.loads(outputs[0]) == json.loads(outputs[1]) == keyword_families.keyword_buckets(["나이키 반팔", "양말들"])[1]
+
+
+def test_daily_rows_aggregate_best_rank_per_keyword():
+    families = {"나이키 반팔": 1, "나이키반팔": 1, "양말": 2}
+    pairs = [(3, "나이키 반팔"), (8, "나이키반팔"), (5, "양말"), (20, "나이키 반팔")] # 같은 키워드는 가장 높은 순위만
+    rows = keyword_families._daily_rows("50000169", datetime.date(2025, 2, 1), pairs, families)
+    assert sorted(rows) == [("50000169", datetime.date(2025, 2, 1), 1, 3, 5.5, 2),
+                            ("50000169", datetime.date(2025, 2, 1), 2, 5, 5.0, 1)]
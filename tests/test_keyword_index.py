@@ -0,0 +1,42 @@
+# coding: utf-8
+# KeywordIndex 메모리 역색인: 날짜 단위 반영/교체, 이력 범위 조회, 어휘 검색 (DB 없이 set_day 로 구성)
+
+import datetime
+
+from keyword_index import KeywordIndex
+
+DAY1 = datetime.date(2025, 2, 1)
+DAY2 = datetime.date(2025, 2, 2)
+DAY3 = datetime.date(2025, 2, 3)
+
+
+def build_index():
+    index = KeywordIndex("50000169")
+    index.set_day(DAY1, [(1, "나이키 반팔"), (2, "반팔티"), (3, "나이키 반팔")]) # 같은 날 중복은 높은 순위
+    index.set_day(DAY3, [(5, "나이키 반팔"), (1, "린넨 셔츠")])
+    index.set_day(DAY2, [(2, "나이키 반팔")]) # 날짜 순서와 무관하게 반영
+    return index
+
+
+def test_history_is_date_ordered_and_filtered():
+    index = build_index()
+    assert index.history("나이키 반팔") == [(DAY1, 1), (DAY2, 2), (DAY3, 5)]
+    assert index.history("나이키 반팔", date_from=DAY2) == [(DAY2, 2), (DAY3, 5)]
+    assert index.history("나이키 반팔", date_to=DAY1) == [(DAY1, 1)]
+    assert index.history("없는 키워드") == []
+
+
+def test_set_day_replaces_previous_postings():
+    index = build_index()
+    index.set_day(DAY1, [(7, "나이키 반팔")]) # 같은 날짜를 다시 저장
+    assert index.history("나이키 반팔")[0] == (DAY1, 7)
+    assert "반팔티" not in index # 그날에만 있던 키워드는 색인과 검색 목록에서 제거
+    assert index.search("반팔") == [("나이키 반팔", 3)]
+
+
+def test_search_prefers_prefix_then_days():
+    index = build_index()
+    index.set_day(DAY2, [(2, "나이키 반팔"), (3, "반팔티")])
+    assert index.search("반팔") == [("반팔티", 2), ("나이키 반팔", 3)]
+    assert index.search("나이", limit=1) == [("나이키 반팔", 3)]
+    assert index.search("  ") == []
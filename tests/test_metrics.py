@@ -0,0 +1,47 @@
+# coding: utf-8
+# Prometheus 텍스트 형식 출력과 스냅샷 파일 왕복
+
+import metrics
+
+
+def test_render_counter_gauge_and_escaping():
+    registry = metrics.Registry()
+    pages = registry.counter("scrape_pages_total", "수집한 페이지 수", ["engine"])
+    pages.inc(engine="http")
+    pages.inc(2, engine="http")
+    registry.gauge("scrape_queue", 'line1\nsaid "hi"').set(1.5)
+    registry.counter("empty_total", "값이 없는 지표")
+    assert registry.render() == (
+        "# HELP scrape_pages_total 수집한 페이지 수\n"
+        "# TYPE scrape_pages_total counter\n"
+        'scrape_pages_total{engine="http"} 3\n'
+        '# HELP scrape_queue line1\\nsaid \\"hi\\"\n'
+        "# TYPE scrape_queue gauge\n"
+        "scrape_queue 1.5\n"
+        "# HELP empty_total 값이 없는 지표\n"
+        "# TYPE empty_total counter\n"
+    )
+
+
+def test_render_histogram_is_cumulative_with_inf_bucket():
+    registry = metrics.Registry()
+    latency = registry.histogram("db_seconds", "조회 시간", ["query"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value, query="summary")
+    lines = registry.render().splitlines()
+    assert lines[2:] == [
+        'db_seconds_bucket{query="summary",le="0.1"} 1',
+        'db_seconds_bucket{query="summary",le="1.0"} 3',
+        'db_seconds_bucket{query="summary",le="+Inf"} 4',
+        'db_seconds_sum{query="summary"} 4.05',
+        'db_seconds_count{query="summary"} 4',
+    ]
+
+
+def test_snapshot_file_round_trip(tmp_path):
+    registry = metrics.Registry()
+    registry.counter("runs_total", "실행 수").inc()
+    path = str(tmp_path / metrics.METRICS_FILE)
+    metrics.write_snapshot(path, registry)
+    assert metrics.render_snapshot(metrics.read_snapshot(path)) == registry.render()
+    assert metrics.read_snapshot(str(tmp_path / "missing.json")) is None
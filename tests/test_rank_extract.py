@@ -0,0 +1,36 @@
+# coding: utf-8
+# 저장된 결과 페이지(tests/fixtures/datalab_results_page.html)에서 순위 목록 추출
+
+import os
+
+from lxml import html as lxml_html
+
+import rank_extract
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "datalab_results_page.html")
+
+
+def list_outer_html(page_source):
+    """드라이버의 목록 요소 get_attribute('outerHTML') 에 해당하는 HTML"""
+    root = lxml_html.fromstring(page_source)
+    container = root.xpath("//ul[contains(concat(' ', normalize-space(@class), ' '), ' rank_top1000_list ')]")[0]
+    return lxml_html.tostring(container, encoding="unicode")
+
+
+def test_extract_rank_pairs_from_saved_page():
+    with open(FIXTURE_PATH, encoding="utf-8") as f:
+        pairs = rank_extract.extract_rank_pairs(list_outer_html(f.read()))
+    assert pairs == [
+        (41, "나이키 반팔"),
+        (42, "아디다스 트레이닝복 세트"),
+        (43, "노스페이스  패딩"),
+        (44, "탑텐긴팔슬랙스"), # 텍스트 조각을 각각 공백 제거 후 이어 붙임 (기존 get_text(strip=True) 와 같음)
+        (45, "커버낫 맨투맨"),
+        (46, "폴로 셔츠 남성"),
+        (None, "순위 표시 없음"), # 순위 번호가 없으면 None, 키워드가 없는 항목은 제외
+    ]
+
+
+def test_extract_rank_pairs_empty():
+    assert rank_extract.extract_rank_pairs("") == []
+    assert rank_extract.extract_rank_pairs('<ul class="rank_top1000_list"></ul>') == []